@@ -9,6 +9,9 @@ from core.utils.util import get_local_ip, validate_mcp_endpoint
 from core.http_server import SimpleHttpServer
 from core.websocket_server import WebSocketServer
 from core.utils.util import check_ffmpeg_installed
+from core.utils.audio_assets import load_asset_bundle
+from config.config_loader import run_private_config_warmer
+from config.manage_api_client import manage_api_async_close
 
 TAG = __name__
 logger = setup_logging()
@@ -60,9 +63,15 @@ async def main():
     
     config["server"]["auth_key"] = auth_key
 
+    # 加载预编码的提示音资源包（缺失或过期时重新构建）
+    load_asset_bundle(config)
+
     # 添加 stdin 监控任务
     stdin_task = asyncio.create_task(monitor_stdin())
 
+    # 后台预热各设备的差异化配置，设备连接时无需再请求管理端
+    warm_task = asyncio.create_task(run_private_config_warmer(config))
+
     # 启动 WebSocket 服务器
     ws_server = WebSocketServer(config)
     ws_task = asyncio.create_task(ws_server.start())
@@ -124,6 +133,7 @@ async def main():
     finally:
         # 取消所有任务（关键修复点）
         stdin_task.cancel()
+        warm_task.cancel()
         ws_task.cancel()
         if ota_task:
             ota_task.cancel()
@@ -134,6 +144,7 @@ async def main():
             timeout=3.0,
             return_when=asyncio.ALL_COMPLETED,
         )
+        await manage_api_async_close()
         print("服务器已关闭，程序退出。")
 
 
@@ -1,7 +1,18 @@
 import os
+import copy
+import json
+import asyncio
+import hashlib
 import yaml
 from collections.abc import Mapping
-from config.manage_api_client import init_service, get_server_config, get_agent_models
+from config.manage_api_client import (
+    init_service,
+    get_server_config,
+    get_agent_models,
+    get_server_config_async,
+    get_agent_models_async,
+    get_agent_models_batch_async,
+)
 
 
 def get_project_dir():
@@ -50,15 +61,27 @@ def get_config_from_api(config):
     init_service(config)
 
     # 获取服务器配置
-    config_data = get_server_config()
+    return _apply_local_config(config, get_server_config())
+
+
+async def get_config_from_api_async(config):
+    """从Java API获取配置，供运行中的服务在事件循环里重新加载"""
+    init_service(config)
+    return _apply_local_config(config, await get_server_config_async())
+
+
+def _apply_local_config(config, config_data):
+    """在管理端下发的配置上保留本地为准的部分"""
     if config_data is None:
         raise Exception("Failed to fetch server config from API")
 
     config_data["read_config_from_api"] = True
-    config_data["manager-api"] = {
-        "url": config["manager-api"].get("url", ""),
-        "secret": config["manager-api"].get("secret", ""),
-    }
+    # 除url和secret外，连接池、重试和熔断参数也以本地为准
+    config_data["manager-api"] = dict(
+        config["manager-api"],
+        url=config["manager-api"].get("url", ""),
+        secret=config["manager-api"].get("secret", ""),
+    )
     # server的配置以本地为准
     if config.get("server"):
         config_data["server"] = {
@@ -68,6 +91,10 @@ def get_config_from_api(config):
             "vision_explain": config["server"].get("vision_explain", ""),
             "auth_key": config["server"].get("auth_key", ""),
         }
+    # 聊天记录上报管道和差异化配置缓存的配置以本地为准
+    for key in ("chat_history_report", "private_config_cache"):
+        if config.get(key):
+            config_data[key] = config[key]
     return config_data
 
 
@@ -76,6 +103,101 @@ def get_private_config_from_api(config, device_id, client_id):
     return get_agent_models(device_id, client_id, config["selected_module"])
 
 
+def _private_config_key(device_id, client_id, selected_module):
+    selected = json.dumps(selected_module, sort_keys=True, ensure_ascii=False)
+    digest = hashlib.md5(selected.encode("utf-8")).hexdigest()[:12]
+    return f"{device_id}|{client_id}|{digest}"
+
+
+def _get_cached_private_config(config, device_id, client_id):
+    """返回缓存中的差异化配置副本，未命中或未开启缓存时返回None"""
+    from core.utils.cache.manager import cache_manager, CacheType
+
+    if not (config.get("private_config_cache") or {}).get("enable", True):
+        return None
+    cached = cache_manager.get(
+        CacheType.PRIVATE_CONFIG,
+        _private_config_key(device_id, client_id, config["selected_module"]),
+    )
+    # 调用方会修改返回的配置，缓存中保留原件
+    return copy.deepcopy(cached) if cached is not None else None
+
+
+def _cache_private_config(config, device_id, client_id, private_config):
+    from core.utils.cache.manager import cache_manager, CacheType
+
+    cache_config = config.get("private_config_cache") or {}
+    if not cache_config.get("enable", True) or private_config is None:
+        return
+    cache_manager.set(
+        CacheType.PRIVATE_CONFIG,
+        _private_config_key(device_id, client_id, config["selected_module"]),
+        copy.deepcopy(private_config),
+        ttl=cache_config.get("ttl", 300),
+    )
+
+
+async def get_private_config_async(config, device_id, client_id):
+    """在事件循环中获取私有配置：优先使用缓存，设备未找到或需要绑定时不缓存"""
+    private_config = _get_cached_private_config(config, device_id, client_id)
+    if private_config is not None:
+        return private_config
+    private_config = await get_agent_models_async(
+        device_id, client_id, config["selected_module"]
+    )
+    _cache_private_config(config, device_id, client_id, private_config)
+    return private_config
+
+
+def invalidate_private_config(device_id=None):
+    """丢弃设备（或客户端）的差异化配置缓存，不传参数时清空全部，返回删除的条数"""
+    from core.utils.cache.manager import cache_manager, CacheType
+
+    if device_id is None:
+        cache_manager.clear(CacheType.PRIVATE_CONFIG)
+        return 0
+    return cache_manager.invalidate_pattern(CacheType.PRIVATE_CONFIG, f"{device_id}|")
+
+
+async def warm_private_configs(config):
+    """通过管理端的批量接口预取所有设备的差异化配置，返回预取的设备数，接口不可用时返回None"""
+    from config.logger import setup_logging
+
+    cache_config = config.get("private_config_cache") or {}
+    endpoint = cache_config.get("warm_endpoint", "/config/agent-models/batch")
+    if not cache_config.get("enable", True) or not endpoint:
+        return None
+    logger = setup_logging()
+    try:
+        items = (
+            await get_agent_models_batch_async(endpoint, config["selected_module"])
+            or []
+        )
+    except Exception as e:
+        logger.bind(tag=__name__).info(f"批量预取差异化配置不可用，跳过预热: {e}")
+        return None
+    for item in items:
+        device_id = item.get("macAddress")
+        if not device_id or item.get("config") is None:
+            continue
+        client_id = item.get("clientId") or device_id
+        _cache_private_config(config, device_id, client_id, item["config"])
+    logger.bind(tag=__name__).info(f"已预热 {len(items)} 个设备的差异化配置")
+    return len(items)
+
+
+async def run_private_config_warmer(config):
+    """启动时预热差异化配置，并在缓存过期前按 warm_interval 定期刷新"""
+    if not config.get("read_config_from_api", False):
+        return
+    interval = (config.get("private_config_cache") or {}).get("warm_interval", 240)
+    while True:
+        warmed = await warm_private_configs(config)
+        if warmed is None or not interval:
+            return
+        await asyncio.sleep(interval)
+
+
 def ensure_directories(config):
     """确保所有配置路径存在"""
     dirs_to_create = set()
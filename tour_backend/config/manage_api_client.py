@@ -1,9 +1,16 @@
 import os
+import json
 import time
+import copy
 import base64
-from typing import Optional, Dict
+import random
+import asyncio
+import threading
+import weakref
+from typing import Any, Optional, Dict, List
 
 import httpx
+import aiohttp
 
 TAG = __name__
 
@@ -18,6 +25,39 @@ class DeviceBindException(Exception):
         super().__init__(f"设备绑定异常，绑定码: {bind_code}")
 
 
+class CircuitOpenError(Exception):
+    """接口熔断中，请求未发出"""
+
+    def __init__(self, endpoint, retry_after):
+        self.endpoint = endpoint
+        self.retry_after = retry_after
+        super().__init__(f"{endpoint} 已熔断，{retry_after:.1f} 秒后重试")
+
+
+def _parse_result(result: Dict):
+    """处理管理端返回的业务错误，成功时返回data"""
+    if result.get("code") == 10041:
+        raise DeviceNotFoundException(result.get("msg"))
+    elif result.get("code") == 10042:
+        raise DeviceBindException(result.get("msg"))
+    elif result.get("code") != 0:
+        raise Exception(f"API返回错误: {result.get('msg', '未知错误')}")
+    return result.get("data")
+
+
+def _backoff_delay(attempt: int, base: float, cap: float) -> float:
+    """第attempt次重试前的等待时间：指数增长，封顶后乘以随机抖动，避免多个实例同时重试"""
+    return min(cap, base * 2 ** (attempt - 1)) * random.uniform(0.5, 1.0)
+
+
+def _client_headers(secret: str) -> Dict[str, str]:
+    return {
+        "User-Agent": f"PythonClient/2.0 (PID:{os.getpid()})",
+        "Accept": "application/json",
+        "Authorization": "Bearer " + secret,
+    }
+
+
 class ManageApiClient:
     _instance = None
     _client = None
@@ -46,16 +86,13 @@ class ManageApiClient:
 
         cls._secret = cls.config.get("secret")
         cls.max_retries = cls.config.get("max_retries", 6)  # 最大重试次数
-        cls.retry_delay = cls.config.get("retry_delay", 10)  # 初始重试延迟(秒)
+        cls.retry_delay = cls.config.get("retry_delay", 1)  # 初始重试延迟(秒)
+        cls.retry_max_delay = cls.config.get("retry_max_delay", 30)  # 最大重试延迟(秒)
         # NOTE(goody): 2025/4/16 http相关资源统一管理，后续可以增加线程池或者超时
         # 后续也可以统一配置apiToken之类的走通用的Auth
         cls._client = httpx.Client(
             base_url=cls.config.get("url"),
-            headers={
-                "User-Agent": f"PythonClient/2.0 (PID:{os.getpid()})",
-                "Accept": "application/json",
-                "Authorization": "Bearer " + cls._secret,
-            },
+            headers=_client_headers(cls._secret),
             timeout=cls.config.get("timeout", 30),  # 默认超时时间30秒
         )
 
@@ -65,26 +102,25 @@ class ManageApiClient:
         endpoint = endpoint.lstrip("/")
         response = cls._client.request(method, endpoint, **kwargs)
         response.raise_for_status()
-
-        result = response.json()
-
-        # 处理API返回的业务错误
-        if result.get("code") == 10041:
-            raise DeviceNotFoundException(result.get("msg"))
-        elif result.get("code") == 10042:
-            raise DeviceBindException(result.get("msg"))
-        elif result.get("code") != 0:
-            raise Exception(f"API返回错误: {result.get('msg', '未知错误')}")
-
-        # 返回成功数据
-        return result.get("data") if result.get("code") == 0 else None
+        return _parse_result(response.json())
 
     @classmethod
     def _should_retry(cls, exception: Exception) -> bool:
         """判断异常是否应该重试"""
+        # 熔断中，稍后可以重试
+        if isinstance(exception, CircuitOpenError):
+            return True
+
         # 网络连接相关错误
         if isinstance(
-            exception, (httpx.ConnectError, httpx.TimeoutException, httpx.NetworkError)
+            exception,
+            (
+                httpx.ConnectError,
+                httpx.TimeoutException,
+                httpx.NetworkError,
+                aiohttp.ClientConnectionError,
+                asyncio.TimeoutError,
+            ),
         ):
             return True
 
@@ -92,6 +128,8 @@ class ManageApiClient:
         if isinstance(exception, httpx.HTTPStatusError):
             status_code = exception.response.status_code
             return status_code in [408, 429, 500, 502, 503, 504]
+        if isinstance(exception, aiohttp.ClientResponseError):
+            return exception.status in [408, 429, 500, 502, 503, 504]
 
         return False
 
@@ -108,10 +146,13 @@ class ManageApiClient:
                 # 判断是否应该重试
                 if retry_count < cls.max_retries and cls._should_retry(e):
                     retry_count += 1
+                    delay = _backoff_delay(
+                        retry_count, cls.retry_delay, cls.retry_max_delay
+                    )
                     print(
-                        f"{method} {endpoint} 请求失败，将在 {cls.retry_delay:.1f} 秒后进行第 {retry_count} 次重试"
+                        f"{method} {endpoint} 请求失败，将在 {delay:.1f} 秒后进行第 {retry_count} 次重试"
                     )
-                    time.sleep(cls.retry_delay)
+                    time.sleep(delay)
                     continue
                 else:
                     # 不重试，直接抛出异常
@@ -125,6 +166,224 @@ class ManageApiClient:
             cls._instance = None
 
 
+class CircuitBreaker:
+    """单个接口的熔断器：连续失败达到阈值后熔断，冷却期过后放行一个探测请求，成功则恢复"""
+
+    def __init__(self, name: str, failure_threshold: int = 5, recovery_timeout: float = 30):
+        self.name = name
+        self.failure_threshold = max(1, failure_threshold)
+        self.recovery_timeout = recovery_timeout
+        self._failures = 0
+        self._opened_at = None
+        self._probing = False
+        # 各事件循环（主循环、上报线程、记忆总结线程）共用同一组熔断器
+        self._lock = threading.Lock()
+
+    @property
+    def state(self) -> str:
+        if self._opened_at is None:
+            return "closed"
+        return "half_open" if self._probing else "open"
+
+    def before_request(self) -> bool:
+        """请求前检查，熔断中抛出CircuitOpenError；返回True表示本次请求是半开状态的探测请求"""
+        with self._lock:
+            if self._opened_at is None:
+                return False
+            elapsed = time.monotonic() - self._opened_at
+            if self._probing or elapsed < self.recovery_timeout:
+                raise CircuitOpenError(
+                    self.name, max(0.0, self.recovery_timeout - elapsed)
+                )
+            self._probing = True
+            return True
+
+    def record_success(self):
+        with self._lock:
+            if self._opened_at is not None:
+                print(f"{self.name} 熔断恢复")
+            self._failures = 0
+            self._opened_at = None
+            self._probing = False
+
+    def record_failure(self):
+        with self._lock:
+            self._failures += 1
+            if self._probing or (
+                self._opened_at is None and self._failures >= self.failure_threshold
+            ):
+                print(
+                    f"{self.name} 连续失败 {self._failures} 次，熔断 {self.recovery_timeout} 秒"
+                )
+                self._opened_at = time.monotonic()
+            self._probing = False
+
+    def release_probe(self):
+        """探测请求被取消时不计成败，允许下一个请求继续探测"""
+        with self._lock:
+            self._probing = False
+
+
+class AsyncManageApiClient:
+    """ManageApiClient的异步版本，供事件循环中的调用方使用
+
+    - aiohttp.ClientSession只能在创建它的事件循环中使用，每个事件循环各有一个长连接池，
+      同时建立的连接数不超过max_connections
+    - 重试用asyncio.sleep按指数退避加随机抖动等待，不阻塞事件循环
+    - 每个接口一个熔断器，管理端持续不可用时只放行探测请求，其余请求在重试预算内等待熔断恢复，
+      不再每个连接各自把请求打到管理端；不重试的调用方（retries=0）直接失败
+    - 同一事件循环中相同的并发读请求合并为一次请求
+    """
+
+    def __init__(self, api_config: Dict[str, Any], max_connections: Optional[int] = None):
+        self.base_url = api_config.get("url", "")
+        self.secret = api_config.get("secret", "")
+        self.timeout = api_config.get("timeout", 30)
+        self.max_retries = api_config.get("max_retries", 6)
+        self.retry_delay = api_config.get("retry_delay", 1)
+        self.retry_max_delay = api_config.get("retry_max_delay", 30)
+        self.max_connections = max_connections or api_config.get("max_connections", 50)
+        self.breaker_threshold = api_config.get("breaker_threshold", 5)
+        self.breaker_recovery = api_config.get("breaker_recovery", 30)
+
+        self._lock = threading.Lock()
+        self._sessions = weakref.WeakKeyDictionary()
+        self._inflight = weakref.WeakKeyDictionary()
+        self._breakers: Dict[str, CircuitBreaker] = {}
+        self._stats = {"requests": 0, "retries": 0, "coalesced": 0, "rejected": 0}
+
+    def _session(self) -> aiohttp.ClientSession:
+        loop = asyncio.get_running_loop()
+        with self._lock:
+            session = self._sessions.get(loop)
+            if session is None or session.closed:
+                session = aiohttp.ClientSession(
+                    headers=_client_headers(self.secret),
+                    timeout=aiohttp.ClientTimeout(total=self.timeout),
+                    connector=aiohttp.TCPConnector(limit=self.max_connections),
+                )
+                self._sessions[loop] = session
+                self._inflight[loop] = {}
+            return session
+
+    def _url(self, endpoint: str) -> str:
+        return self.base_url.rstrip("/") + "/" + endpoint.lstrip("/")
+
+    def _breaker(self, key: str) -> CircuitBreaker:
+        with self._lock:
+            breaker = self._breakers.get(key)
+            if breaker is None:
+                breaker = CircuitBreaker(
+                    key, self.breaker_threshold, self.breaker_recovery
+                )
+                self._breakers[key] = breaker
+            return breaker
+
+    async def request(
+        self,
+        method: str,
+        endpoint: str,
+        breaker_key: Optional[str] = None,
+        retries: Optional[int] = None,
+        coalesce: Optional[bool] = None,
+        **kwargs,
+    ):
+        """发送请求并返回data
+
+        Args:
+            breaker_key: 熔断器名称，默认为endpoint；路径中带设备号的接口应传入不带设备号的名称
+            retries: 最大重试次数，默认使用配置的max_retries；自行处理重试的调用方传0
+            coalesce: 是否合并相同的并发请求，默认只合并GET；只读的POST接口可显式开启
+        """
+        method = method.upper()
+        if coalesce is None:
+            coalesce = method == "GET"
+        # 确保当前事件循环的连接池和合并表已创建
+        self._session()
+        if not coalesce:
+            return await self._execute(method, endpoint, breaker_key, retries, **kwargs)
+
+        inflight = self._inflight[asyncio.get_running_loop()]
+        key = (method, endpoint, json.dumps(kwargs, sort_keys=True, default=str))
+        future = inflight.get(key)
+        if future is None:
+            future = asyncio.ensure_future(
+                self._execute(method, endpoint, breaker_key, retries, **kwargs)
+            )
+            inflight[key] = future
+            future.add_done_callback(lambda f: self._finish_inflight(inflight, key, f))
+            return await asyncio.shield(future)
+        self._stats["coalesced"] += 1
+        # 合并的调用方各自拿到一份副本，避免互相修改
+        return copy.deepcopy(await asyncio.shield(future))
+
+    @staticmethod
+    def _finish_inflight(inflight, key, future):
+        inflight.pop(key, None)
+        # 所有等待方都已取消时，避免"exception was never retrieved"警告
+        if not future.cancelled():
+            future.exception()
+
+    async def _execute(self, method, endpoint, breaker_key, retries, **kwargs):
+        breaker = self._breaker(breaker_key or endpoint)
+        max_retries = self.max_retries if retries is None else retries
+        attempt = 0
+        while True:
+            probing = False
+            try:
+                probing = breaker.before_request()
+                self._stats["requests"] += 1
+                async with self._session().request(
+                    method, self._url(endpoint), **kwargs
+                ) as response:
+                    response.raise_for_status()
+                    result = await response.json(content_type=None)
+            except asyncio.CancelledError:
+                if probing:
+                    breaker.release_probe()
+                raise
+            except CircuitOpenError as e:
+                self._stats["rejected"] += 1
+                error, wait = e, e.retry_after
+            except Exception as e:
+                if not ManageApiClient._should_retry(e):
+                    # 管理端有响应（如404），接口本身可用
+                    breaker.record_success()
+                    raise
+                breaker.record_failure()
+                error, wait = e, 0.0
+            else:
+                breaker.record_success()
+                return _parse_result(result)
+
+            if attempt >= max_retries:
+                raise error
+            attempt += 1
+            self._stats["retries"] += 1
+            delay = max(
+                wait, _backoff_delay(attempt, self.retry_delay, self.retry_max_delay)
+            )
+            if not isinstance(error, CircuitOpenError):
+                print(
+                    f"{method} {endpoint} 请求失败，将在 {delay:.1f} 秒后进行第 {attempt} 次重试"
+                )
+            await asyncio.sleep(delay)
+
+    def get_metrics(self) -> Dict[str, Any]:
+        with self._lock:
+            breakers = {key: b.state for key, b in self._breakers.items()}
+        return dict(self._stats, breakers=breakers)
+
+    async def aclose(self):
+        """关闭当前事件循环的连接池"""
+        loop = asyncio.get_running_loop()
+        with self._lock:
+            session = self._sessions.pop(loop, None)
+            self._inflight.pop(loop, None)
+        if session is not None:
+            await session.close()
+
+
 def get_server_config() -> Optional[Dict]:
     """获取服务器基础配置"""
     return ManageApiClient._instance._execute_request("POST", "/config/server-base")
@@ -185,9 +444,74 @@ def report(
         return None
 
 
+_async_client: Optional[AsyncManageApiClient] = None
+
+
+def get_async_client() -> AsyncManageApiClient:
+    if _async_client is None:
+        raise Exception("manager-api客户端未初始化")
+    return _async_client
+
+
+async def get_server_config_async() -> Optional[Dict]:
+    """获取服务器基础配置"""
+    return await get_async_client().request("POST", "/config/server-base")
+
+
+async def get_agent_models_async(
+    mac_address: str, client_id: str, selected_module: Dict
+) -> Optional[Dict]:
+    """获取代理模型配置，同一设备并发的请求合并为一次"""
+    return await get_async_client().request(
+        "POST",
+        "/config/agent-models",
+        coalesce=True,
+        json={
+            "macAddress": mac_address,
+            "clientId": client_id,
+            "selectedModule": selected_module,
+        },
+    )
+
+
+async def get_agent_models_batch_async(
+    endpoint: str, selected_module: Dict
+) -> Optional[List]:
+    """批量获取设备的模型配置，返回 [{"macAddress", "clientId", "config"}]"""
+    return await get_async_client().request(
+        "POST", endpoint, coalesce=True, json={"selectedModule": selected_module}
+    )
+
+
+async def save_mem_local_short_async(
+    mac_address: str, short_momery: str
+) -> Optional[Dict]:
+    try:
+        return await get_async_client().request(
+            "PUT",
+            "/agent/saveMemory/" + mac_address,
+            breaker_key="/agent/saveMemory",
+            json={
+                "summaryMemory": short_momery,
+            },
+        )
+    except Exception as e:
+        print(f"存储短期记忆到服务器失败: {e}")
+        return None
+
+
 def init_service(config):
+    global _async_client
     ManageApiClient(config)
+    if _async_client is None:
+        _async_client = AsyncManageApiClient(config.get("manager-api"))
 
 
 def manage_api_http_safe_close():
     ManageApiClient.safe_close()
+
+
+async def manage_api_async_close():
+    """关闭当前事件循环的异步连接池"""
+    if _async_client is not None:
+        await _async_client.aclose()
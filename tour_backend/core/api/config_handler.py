@@ -0,0 +1,48 @@
+import hmac
+import json
+from aiohttp import web
+
+from config.config_loader import invalidate_private_config
+from core.api.base_handler import BaseHandler
+
+TAG = __name__
+
+
+class ConfigCacheHandler(BaseHandler):
+    """管理端修改设备配置后推送失效通知，丢弃对应的差异化配置缓存"""
+
+    def __init__(self, config: dict):
+        super().__init__(config)
+        self.secret = (config.get("manager-api") or {}).get("secret", "")
+
+    def _verify_secret(self, request) -> bool:
+        auth_header = request.headers.get("Authorization", "")
+        if not self.secret or not auth_header.startswith("Bearer "):
+            return False
+        return hmac.compare_digest(auth_header[7:], self.secret)
+
+    async def handle_post(self, request):
+        """请求体 {"deviceId": "...", "clientId": "..."}，两者都为空时清空全部缓存"""
+        if not self._verify_secret(request):
+            return web.Response(
+                text=json.dumps({"success": False, "message": "认证失败"}),
+                content_type="application/json",
+                status=401,
+            )
+        try:
+            data = await request.json() if request.can_read_body else {}
+            ids = [data.get("deviceId") or data.get("macAddress"), data.get("clientId")]
+            ids = [value for value in ids if value]
+            if ids:
+                count = sum(invalidate_private_config(value) for value in ids)
+            else:
+                count = invalidate_private_config()
+            self.logger.bind(tag=TAG).info(f"差异化配置缓存已失效: {ids or '全部'}")
+            return_json = {"success": True, "invalidated": count}
+        except Exception as e:
+            self.logger.bind(tag=TAG).error(f"配置失效通知处理失败: {e}")
+            return_json = {"success": False, "message": str(e)}
+        return web.Response(
+            text=json.dumps(return_json, separators=(",", ":")),
+            content_type="application/json",
+        )
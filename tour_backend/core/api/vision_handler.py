@@ -1,10 +1,9 @@
 import json
-import copy
 from aiohttp import web
 from config.logger import setup_logging
 from core.utils.util import get_vision_url, is_valid_image_file
 from core.utils.vllm import create_instance
-from config.config_loader import get_private_config_from_api
+from config.config_loader import get_private_config_async
 from core.utils.auth import AuthToken
 import base64
 from typing import Tuple, Optional
@@ -92,11 +91,10 @@ class VisionHandler:
             # 将图片转换为base64编码
             image_base64 = base64.b64encode(image_data).decode("utf-8")
 
-            # 如果开启了智控台，则从智控台获取模型配置
-            current_config = copy.deepcopy(self.config)
-            read_config_from_api = current_config.get("read_config_from_api", False)
-            if read_config_from_api:
-                current_config = get_private_config_from_api(
+            # 如果开启了智控台，则从智控台获取模型配置（优先使用缓存），否则只读使用服务配置
+            current_config = self.config
+            if current_config.get("read_config_from_api", False):
+                current_config = await get_private_config_async(
                     current_config,
                     device_id,
                     client_id,
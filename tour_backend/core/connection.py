@@ -24,23 +24,33 @@ from core.utils.modules_initialize import (
     initialize_tts,
     initialize_asr,
 )
-from core.handle.reportHandle import report
 from core.providers.tts.default import DefaultTTS
+import concurrent.futures
 from concurrent.futures import ThreadPoolExecutor
 from core.utils.dialogue import Message, Dialogue
+from core.utils.context_window import ContextWindowManager
 from core.providers.asr.dto.dto import InterfaceType
 from core.handle.textHandle import handleTextMessage
 from core.providers.tools.unified_tool_handler import UnifiedToolHandler
 from plugins_func.loadplugins import auto_import_modules
 from plugins_func.register import Action
 from core.auth import AuthenticationError
-from config.config_loader import get_private_config_from_api
+from config.config_loader import get_private_config_async
 from core.providers.tts.dto.dto import ContentType, TTSMessageDTO, SentenceType
 from config.logger import setup_logging, build_module_string, create_connection_logger
 from config.manage_api_client import DeviceNotFoundException, DeviceBindException
 from core.utils.prompt_manager import PromptManager
 from core.utils.voiceprint_provider import VoiceprintProvider
+from core.utils.audio_frame_store import UplinkFrameStore
 from core.utils import textUtils
+from core.utils.async_pipeline import (
+    PipelineQueue,
+    clear_queue,
+    get_pipeline_executor,
+    is_async_pipeline_enabled,
+)
+from core.utils.cancellation import CancelToken
+from core.utils.memory_summary_queue import get_memory_summary_queue
 
 TAG = __name__
 
@@ -84,17 +94,27 @@ class ConnectionHandler:
 
         # 客户端状态相关
         self.client_abort = False
+        # 当前轮次的取消令牌，打断时取消并换新
+        self.turn_token = CancelToken()
         self.client_is_speaking = False
         self.client_listen_mode = "auto"
 
         # 线程任务相关
         self.loop = asyncio.get_event_loop()
         self.stop_event = threading.Event()
-        self.executor = ThreadPoolExecutor(max_workers=5)
+        # 异步流水线模式：各阶段以asyncio任务运行，阻塞调用使用进程级共享线程池
+        self.async_pipeline = is_async_pipeline_enabled(self.config)
+        self.pipeline_tasks = []
+        # 下行音频调度队列，首次发送音频时创建（未开启集中调度时保持None）
+        self.downlink_stream = None
+        # 每条下行消息最多合并的音频帧数，MQTT网关按配置、其他客户端在hello中协商
+        self.audio_batch_frames = 1
+        if self.async_pipeline:
+            self.executor = get_pipeline_executor(self.config)
+        else:
+            self.executor = ThreadPoolExecutor(max_workers=5)
 
-        # 添加上报线程池
-        self.report_queue = queue.Queue()
-        self.report_thread = None
+        # 聊天记录交给服务级上报管道，连接内不再单独开上报线程
         # 未来可以通过修改此处，调节asr的上报和tts的上报，目前默认都开启
         self.report_asr_enable = self.read_config_from_api
         self.report_tts_enable = self.read_config_from_api
@@ -119,16 +139,22 @@ class ConnectionHandler:
         self.last_activity_time = 0.0  # 统一的活动时间戳（毫秒）
         self.client_voice_stop = False
         self.last_is_voice = False
+        # 上行音频只解码一次，VAD、ASR、声纹、上报共享解码结果
+        self.uplink_frames = UplinkFrameStore(
+            int(self.config.get("uplink_audio_buffer_seconds", 30)) * 1000 // 60
+        )
 
         # asr相关变量
         # 因为实际部署时可能会用到公共的本地ASR，不能把变量暴露给公共ASR
         # 所以涉及到ASR的变量，需要在这里定义，属于connection的私有变量
         self.asr_audio = []
-        self.asr_audio_queue = queue.Queue()
+        self.asr_audio_queue = self._new_queue()
 
         # llm相关变量
         self.llm_finish_task = True
         self.dialogue = Dialogue()
+        # 按所选LLM的token预算窗口化历史，较早的对话在后台压缩为摘要
+        self.context_window = ContextWindowManager(self)
 
         # tts相关变量
         self.sentence_id = None
@@ -145,6 +171,8 @@ class ConnectionHandler:
         self.close_after_chat = False
         self.load_function_plugin = False
         self.intent_type = "nointent"
+        # intent_llm模式下是否与意图识别并行推测执行聊天回复
+        self.speculative_chat = False
 
         self.timeout_seconds = (
             int(self.config.get("close_connection_no_voice_time", 120)) + 10
@@ -160,6 +188,23 @@ class ConnectionHandler:
         # 初始化提示词管理器
         self.prompt_manager = PromptManager(config, self.logger)
 
+    def _new_queue(self):
+        """创建阶段间队列，异步流水线模式下使用绑定事件循环的队列"""
+        if self.async_pipeline:
+            return PipelineQueue(self.loop)
+        return queue.Queue()
+
+    def start_pipeline_task(self, coro):
+        """在事件循环中启动流水线阶段任务，可在任意线程调用，连接关闭时统一取消"""
+
+        def _start():
+            if self.stop_event.is_set():
+                coro.close()
+                return
+            self.pipeline_tasks.append(self.loop.create_task(coro))
+
+        self.loop.call_soon_threadsafe(_start)
+
     async def handle_connection(self, ws):
         try:
             # 获取并验证headers
@@ -185,6 +230,11 @@ class ConnectionHandler:
             self.conn_from_mqtt_gateway = request_path.endswith("?from=mqtt_gateway")
             if self.conn_from_mqtt_gateway:
                 self.logger.bind(tag=TAG).info("连接来自:MQTT网关")
+                batch_config = self.config.get("downlink_batch") or {}
+                if batch_config.get("enable", False) and batch_config.get(
+                    "mqtt_gateway", False
+                ):
+                    self.audio_batch_frames = max(1, int(batch_config.get("max_frames", 1)))
 
             # 初始化活动时间戳
             self.last_activity_time = time.time() * 1000
@@ -195,8 +245,9 @@ class ConnectionHandler:
             self.welcome_msg = self.config["xiaozhi"]
             self.welcome_msg["session_id"] = self.session_id
 
-            # 获取差异化配置
-            self._initialize_private_config()
+            # 获取差异化配置，命中缓存时不请求管理端，未命中时在线程池中请求，不阻塞事件循环
+            private_config = await self._fetch_private_config()
+            self._initialize_private_config(private_config)
             # 异步初始化
             self.executor.submit(self._initialize_components)
 
@@ -230,25 +281,10 @@ class ConnectionHandler:
         """保存记忆并关闭连接"""
         try:
             if self.memory:
-                # 使用线程池异步保存记忆
-                def save_memory_task():
-                    try:
-                        # 创建新事件循环（避免与主循环冲突）
-                        loop = asyncio.new_event_loop()
-                        asyncio.set_event_loop(loop)
-                        loop.run_until_complete(
-                            self.memory.save_memory(self.dialogue.dialogue)
-                        )
-                    except Exception as e:
-                        self.logger.bind(tag=TAG).error(f"保存记忆失败: {e}")
-                    finally:
-                        try:
-                            loop.close()
-                        except Exception:
-                            pass
-
-                # 启动线程保存记忆，不等待完成
-                threading.Thread(target=save_memory_task, daemon=True).start()
+                # 提交到服务级记忆总结队列，不等待完成
+                get_memory_summary_queue(self.config).submit(
+                    self.memory, self.dialogue.dialogue
+                )
         except Exception as e:
             self.logger.bind(tag=TAG).error(f"保存记忆失败: {e}")
         finally:
@@ -275,7 +311,7 @@ class ConnectionHandler:
                     return
 
             # 不需要头部处理或没有头部时，直接处理原始消息
-            self.asr_audio_queue.put(message)
+            self.asr_audio_queue.put_nowait(message)
 
     async def _process_mqtt_audio_message(self, message):
         """
@@ -302,7 +338,7 @@ class ConnectionHandler:
             elif len(message) > 16:
                 # 没有指定长度或长度无效，去掉头部后处理剩余数据
                 audio_data = message[16:]
-                self.asr_audio_queue.put(audio_data)
+                self.asr_audio_queue.put_nowait(audio_data)
                 return True
         except Exception as e:
             self.logger.bind(tag=TAG).error(f"解析WebSocket音频包失败: {e}")
@@ -320,7 +356,7 @@ class ConnectionHandler:
 
         # 如果时间戳是递增的，直接处理
         if timestamp >= self.last_processed_timestamp:
-            self.asr_audio_queue.put(audio_data)
+            self.asr_audio_queue.put_nowait(audio_data)
             self.last_processed_timestamp = timestamp
 
             # 处理缓冲区中的后续包
@@ -330,7 +366,7 @@ class ConnectionHandler:
                 for ts in sorted(self.audio_timestamp_buffer.keys()):
                     if ts > self.last_processed_timestamp:
                         buffered_audio = self.audio_timestamp_buffer.pop(ts)
-                        self.asr_audio_queue.put(buffered_audio)
+                        self.asr_audio_queue.put_nowait(buffered_audio)
                         self.last_processed_timestamp = ts
                         processed_any = True
                         break
@@ -339,7 +375,7 @@ class ConnectionHandler:
             if len(self.audio_timestamp_buffer) < self.max_timestamp_buffer_size:
                 self.audio_timestamp_buffer[timestamp] = audio_data
             else:
-                self.asr_audio_queue.put(audio_data)
+                self.asr_audio_queue.put_nowait(audio_data)
 
     async def handle_restart(self, message):
         """处理服务器重启请求"""
@@ -430,8 +466,6 @@ class ConnectionHandler:
             self._initialize_memory()
             """加载意图识别"""
             self._initialize_intent()
-            """初始化上报线程"""
-            self._init_report_threads()
             """更新系统提示词"""
             self._init_prompt_enhancement()
 
@@ -448,19 +482,6 @@ class ConnectionHandler:
             self.change_system_prompt(enhanced_prompt)
             self.logger.bind(tag=TAG).info("系统提示词已增强更新")
 
-    def _init_report_threads(self):
-        """初始化ASR和TTS上报线程"""
-        if not self.read_config_from_api or self.need_bind:
-            return
-        if self.chat_history_conf == 0:
-            return
-        if self.report_thread is None or not self.report_thread.is_alive():
-            self.report_thread = threading.Thread(
-                target=self._report_worker, daemon=True
-            )
-            self.report_thread.start()
-            self.logger.bind(tag=TAG).info("TTS上报线程已启动")
-
     def _initialize_tts(self):
         """初始化TTS"""
         tts = None
@@ -501,14 +522,13 @@ class ConnectionHandler:
         except Exception as e:
             self.logger.bind(tag=TAG).warning(f"声纹识别初始化失败: {str(e)}")
 
-    def _initialize_private_config(self):
-        """如果是从配置文件获取，则进行二次实例化"""
+    async def _fetch_private_config(self):
+        """从接口获取差异化的配置，失败时标记需要绑定并返回空配置"""
         if not self.read_config_from_api:
-            return
-        """从接口获取差异化的配置进行二次实例化，非全量重新实例化"""
+            return None
         try:
             begin_time = time.time()
-            private_config = get_private_config_from_api(
+            private_config = await get_private_config_async(
                 self.config,
                 self.headers.get("device-id"),
                 self.headers.get("client-id", self.headers.get("device-id")),
@@ -528,7 +548,13 @@ class ConnectionHandler:
             self.need_bind = True
             self.logger.bind(tag=TAG).error(f"获取差异化配置失败: {e}")
             private_config = {}
+        return private_config
 
+    def _initialize_private_config(self, private_config):
+        """如果是从配置文件获取，则进行二次实例化"""
+        if not self.read_config_from_api:
+            return
+        """用差异化的配置进行二次实例化，非全量重新实例化"""
         init_llm, init_tts, init_memory, init_intent = (
             False,
             False,
@@ -691,6 +717,11 @@ class ConnectionHandler:
             intent_llm_name = intent_config[self.config["selected_module"]["Intent"]][
                 "llm"
             ]
+            self.speculative_chat = bool(
+                intent_config[self.config["selected_module"]["Intent"]].get(
+                    "speculative_chat", False
+                )
+            )
 
             if intent_llm_name and intent_llm_name in self.config["LLM"]:
                 # 如果配置了专用LLM，则创建独立的LLM实例
@@ -722,21 +753,60 @@ class ConnectionHandler:
         # 更新系统prompt至上下文
         self.dialogue.update_system_message(self.prompt)
 
-    def chat(self, query, depth=0):
+    def _begin_chat_turn(self, query):
+        """新建会话ID、写入用户消息并发送FIRST请求"""
+        self.sentence_id = str(uuid.uuid4().hex)
+        self.dialogue.put(Message(role="user", content=query))
+        self.tts.tts_text_queue.put(
+            TTSMessageDTO(
+                sentence_id=self.sentence_id,
+                sentence_type=SentenceType.FIRST,
+                content_type=ContentType.ACTION,
+            )
+        )
+
+    def prefetch_memory(self, query):
+        """ASR识别出文本后立即发起记忆查询，与意图识别并行，需在事件循环中调用"""
+        if self.memory is None:
+            return
+        try:
+            self.memory.prefetch_memory(query)
+        except Exception as e:
+            self.logger.bind(tag=TAG).warning(f"记忆预取失败: {e}")
+
+    def _query_memory(self, query):
+        """在工作线程中获取记忆，最多等待memory_query_timeout秒，超时则本轮不带记忆"""
+        if self.memory is None:
+            return None
+        future = asyncio.run_coroutine_threadsafe(
+            self.memory.query_memory_cached(query), self.loop
+        )
+        timeout = self.config.get("memory_query_timeout", 1.0)
+        try:
+            return future.result(timeout=timeout or None)
+        except concurrent.futures.TimeoutError:
+            future.cancel()
+            self.logger.bind(tag=TAG).warning(
+                f"记忆查询超过{timeout}秒，本轮不使用记忆"
+            )
+            return None
+
+    def chat(self, query, depth=0, speculation=None, token=None):
+        """
+        speculation: 推测执行时传入SpeculativeChat，意图识别提交前输出只缓存，
+        用户消息和FIRST请求也推迟到提交时才写入
+        token: 工具调用后的递归请求沿用上一层的取消令牌
+        """
         self.logger.bind(tag=TAG).info(f"大模型收到用户消息: {query}")
         self.llm_finish_task = False
+        # 本轮的取消令牌，打断后本次调用（包括上游HTTP流）随之结束；
+        # 递归调用不能重新读取self.turn_token，工具执行期间被打断时那已是下一轮的令牌
+        if token is None:
+            token = self.turn_token
 
         # 为最顶层时新建会话ID和发送FIRST请求
-        if depth == 0:
-            self.sentence_id = str(uuid.uuid4().hex)
-            self.dialogue.put(Message(role="user", content=query))
-            self.tts.tts_text_queue.put(
-                TTSMessageDTO(
-                    sentence_id=self.sentence_id,
-                    sentence_type=SentenceType.FIRST,
-                    content_type=ContentType.ACTION,
-                )
-            )
+        if depth == 0 and speculation is None:
+            self._begin_chat_turn(query)
 
         # Define intent functions
         functions = None
@@ -745,29 +815,30 @@ class ConnectionHandler:
         response_message = []
 
         try:
-            # 使用带记忆的对话
-            memory_str = None
-            if self.memory is not None:
-                future = asyncio.run_coroutine_threadsafe(
-                    self.memory.query_memory(query), self.loop
-                )
-                memory_str = future.result()
+            # 使用带记忆的对话，查询通常已在ASR出结果时预取
+            memory_str = self._query_memory(query)
+
+            llm_dialogue = self.dialogue.get_llm_dialogue_with_memory(
+                memory_str, self.config.get("voiceprint", {})
+            )
+            if speculation is not None:
+                # 用户消息尚未写入对话历史，只追加到本次请求中
+                llm_dialogue.append({"role": "user", "content": query})
 
+            llm_kwargs = {}
+            if getattr(self.llm, "supports_cancel_token", False):
+                llm_kwargs["cancel_token"] = token
             if self.intent_type == "function_call" and functions is not None:
                 # 使用支持functions的streaming接口
                 llm_responses = self.llm.response_with_functions(
                     self.session_id,
-                    self.dialogue.get_llm_dialogue_with_memory(
-                        memory_str, self.config.get("voiceprint", {})
-                    ),
+                    llm_dialogue,
                     functions=functions,
+                    **llm_kwargs,
                 )
             else:
                 llm_responses = self.llm.response(
-                    self.session_id,
-                    self.dialogue.get_llm_dialogue_with_memory(
-                        memory_str, self.config.get("voiceprint", {})
-                    ),
+                    self.session_id, llm_dialogue, **llm_kwargs
                 )
         except Exception as e:
             self.logger.bind(tag=TAG).error(f"LLM 处理出错 {query}: {e}")
@@ -781,9 +852,22 @@ class ConnectionHandler:
         content_arguments = ""
         self.client_abort = False
         emotion_flag = True
+        # 推测执行时意图识别提交前缓存的输出
+        speculative_buffer = []
         for response in llm_responses:
-            if self.client_abort:
+            if token.cancelled:
                 break
+            if speculation is not None and speculation.decided:
+                if speculation.cancelled:
+                    break
+                # 意图识别已提交，先送出缓存的输出，之后照常流式处理
+                self._begin_chat_turn(query)
+                for buffered in speculative_buffer:
+                    emotion_flag = self._emit_chat_content(
+                        buffered, response_message, emotion_flag
+                    )
+                speculative_buffer.clear()
+                speculation = None
             if self.intent_type == "function_call" and functions is not None:
                 content, tools_call = response
                 if "content" in response:
@@ -807,25 +891,34 @@ class ConnectionHandler:
             else:
                 content = response
 
-            # 在llm回复中获取情绪表情，一轮对话只在开头获取一次
-            if emotion_flag and content is not None and content.strip():
-                asyncio.run_coroutine_threadsafe(
-                    textUtils.get_emotion(self, content),
-                    self.loop,
-                )
-                emotion_flag = False
-
-            if content is not None and len(content) > 0:
-                if not tool_call_flag:
-                    response_message.append(content)
-                    self.tts.tts_text_queue.put(
-                        TTSMessageDTO(
-                            sentence_id=self.sentence_id,
-                            sentence_type=SentenceType.MIDDLE,
-                            content_type=ContentType.TEXT,
-                            content_detail=content,
-                        )
+            if content is not None and len(content) > 0 and not tool_call_flag:
+                if speculation is not None:
+                    speculative_buffer.append(content)
+                else:
+                    emotion_flag = self._emit_chat_content(
+                        content, response_message, emotion_flag
                     )
+
+        if speculation is not None:
+            # 聊天输出已结束，等待意图识别的裁决
+            if not speculation.wait() or token.cancelled:
+                close = getattr(llm_responses, "close", None)
+                if close is not None:
+                    close()
+                self.llm_finish_task = True
+                self.logger.bind(tag=TAG).debug(f"推测执行的聊天回复已丢弃: {query}")
+                return None
+            self._begin_chat_turn(query)
+            for buffered in speculative_buffer:
+                emotion_flag = self._emit_chat_content(
+                    buffered, response_message, emotion_flag
+                )
+        if token.cancelled:
+            # 被打断：立即释放上游流，不再执行工具调用
+            close = getattr(llm_responses, "close", None)
+            if close is not None:
+                close()
+            tool_call_flag = False
         # 处理function call
         if tool_call_flag:
             bHasError = False
@@ -872,7 +965,15 @@ class ConnectionHandler:
                     ),
                     self.loop,
                 ).result()
-                self._handle_function_result(result, function_call_data, depth=depth)
+                if token.cancelled:
+                    # 工具执行期间被打断，丢弃结果，不再请求LLM或播报
+                    self.logger.bind(tag=TAG).info(
+                        f"工具调用期间被打断，丢弃结果: {function_name}"
+                    )
+                else:
+                    self._handle_function_result(
+                        result, function_call_data, depth=depth, token=token
+                    )
 
         # 存储对话内容
         if len(response_message) > 0:
@@ -887,6 +988,7 @@ class ConnectionHandler:
                     content_type=ContentType.ACTION,
                 )
             )
+            self.context_window.after_turn()
         self.llm_finish_task = True
         # 使用lambda延迟计算，只有在DEBUG级别时才执行get_llm_dialogue()
         self.logger.bind(tag=TAG).debug(
@@ -897,7 +999,28 @@ class ConnectionHandler:
 
         return True
 
-    def _handle_function_result(self, result, function_call_data, depth):
+    def _emit_chat_content(self, content, response_message, emotion_flag):
+        """把一段LLM输出送入TTS，返回更新后的emotion_flag"""
+        # 在llm回复中获取情绪表情，一轮对话只在开头获取一次
+        if emotion_flag and content.strip():
+            asyncio.run_coroutine_threadsafe(
+                textUtils.get_emotion(self, content),
+                self.loop,
+            )
+            emotion_flag = False
+
+        response_message.append(content)
+        self.tts.tts_text_queue.put(
+            TTSMessageDTO(
+                sentence_id=self.sentence_id,
+                sentence_type=SentenceType.MIDDLE,
+                content_type=ContentType.TEXT,
+                content_detail=content,
+            )
+        )
+        return emotion_flag
+
+    def _handle_function_result(self, result, function_call_data, depth, token=None):
         if result.action == Action.RESPONSE:  # 直接回复前端
             text = result.response
             self.tts.tts_one_sentence(self, ContentType.TEXT, content_detail=text)
@@ -938,7 +1061,7 @@ class ConnectionHandler:
                         content=text,
                     )
                 )
-                self.chat(text, depth=depth + 1)
+                self.chat(text, depth=depth + 1, token=token)
         elif result.action == Action.NOTFOUND or result.action == Action.ERROR:
             text = result.response if result.response else result.result
             self.tts.tts_one_sentence(self, ContentType.TEXT, content_detail=text)
@@ -946,40 +1069,6 @@ class ConnectionHandler:
         else:
             pass
 
-    def _report_worker(self):
-        """聊天记录上报工作线程"""
-        while not self.stop_event.is_set():
-            try:
-                # 从队列获取数据，设置超时以便定期检查停止事件
-                item = self.report_queue.get(timeout=1)
-                if item is None:  # 检测毒丸对象
-                    break
-                try:
-                    # 检查线程池状态
-                    if self.executor is None:
-                        continue
-                    # 提交任务到线程池
-                    self.executor.submit(self._process_report, *item)
-                except Exception as e:
-                    self.logger.bind(tag=TAG).error(f"聊天记录上报线程异常: {e}")
-            except queue.Empty:
-                continue
-            except Exception as e:
-                self.logger.bind(tag=TAG).error(f"聊天记录上报工作线程异常: {e}")
-
-        self.logger.bind(tag=TAG).info("聊天记录上报线程已退出")
-
-    def _process_report(self, type, text, audio_data, report_time):
-        """处理上报任务"""
-        try:
-            # 执行上报（传入二进制数据）
-            report(self, type, text, audio_data, report_time)
-        except Exception as e:
-            self.logger.bind(tag=TAG).error(f"上报处理异常: {e}")
-        finally:
-            # 标记任务完成
-            self.report_queue.task_done()
-
     def clearSpeakStatus(self):
         self.client_is_speaking = False
         self.logger.bind(tag=TAG).debug(f"清除服务端讲话状态")
@@ -1013,8 +1102,19 @@ class ConnectionHandler:
             if self.stop_event:
                 self.stop_event.set()
 
-            # 清空任务队列
+            # 取消异步流水线各阶段任务（跳过当前任务，它会在检测到停止事件后自行退出）
+            current_task = asyncio.current_task()
+            for task in self.pipeline_tasks:
+                if task is not current_task and not task.done():
+                    task.cancel()
+            self.pipeline_tasks.clear()
+
+            # 取消进行中的LLM请求和TTS合成，清空任务队列
+            self.turn_token.cancel()
             self.clear_queues()
+            if self.downlink_stream is not None:
+                self.downlink_stream.close()
+                self.downlink_stream = None
 
             # 关闭WebSocket连接
             try:
@@ -1055,8 +1155,8 @@ class ConnectionHandler:
             if self.tts:
                 await self.tts.close()
 
-            # 最后关闭线程池（避免阻塞）
-            if self.executor:
+            # 最后关闭线程池（避免阻塞），共享线程池由进程统一管理，不在此关闭
+            if self.executor and not self.async_pipeline:
                 try:
                     self.executor.shutdown(wait=False)
                 except Exception as executor_error:
@@ -1075,29 +1175,38 @@ class ConnectionHandler:
 
     def clear_queues(self):
         """清空所有任务队列"""
+        if self.downlink_stream is not None:
+            # 丢弃调度器中尚未发出的音频
+            self.downlink_stream.clear()
         if self.tts:
             self.logger.bind(tag=TAG).debug(
                 f"开始清理: TTS队列大小={self.tts.tts_text_queue.qsize()}, 音频队列大小={self.tts.tts_audio_queue.qsize()}"
             )
 
-            # 使用非阻塞方式清空队列
+            # 丢弃前瞻合成中尚未播放的句子
+            self.tts.cancel_pending_synthesis()
+
+            # 整体清空队列，不逐个取出
             for q in [
                 self.tts.tts_text_queue,
                 self.tts.tts_audio_queue,
-                self.report_queue,
             ]:
-                if not q:
-                    continue
-                while True:
-                    try:
-                        q.get_nowait()
-                    except queue.Empty:
-                        break
+                if q:
+                    clear_queue(q)
 
             self.logger.bind(tag=TAG).debug(
                 f"清理结束: TTS队列大小={self.tts.tts_text_queue.qsize()}, 音频队列大小={self.tts.tts_audio_queue.qsize()}"
             )
 
+    def cancel_turn(self):
+        """打断当前轮次：取消进行中的LLM流和TTS合成请求并清空队列，之后开始的工作使用新令牌"""
+        token, self.turn_token = self.turn_token, CancelToken()
+        self.client_abort = True
+        token.cancel()
+        if self.tts:
+            self.tts.cancel_turn()
+        self.clear_queues()
+
     def reset_vad_states(self):
         self.client_audio_buffer = bytearray()
         self.client_have_voice = False
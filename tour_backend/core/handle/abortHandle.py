@@ -5,9 +5,8 @@ TAG = __name__
 
 async def handleAbortMessage(conn):
     conn.logger.bind(tag=TAG).info("Abort message received")
-    # 设置成打断状态，会自动打断llm、tts任务
-    conn.client_abort = True
-    conn.clear_queues()
+    # 设置成打断状态，取消本轮进行中的LLM流和TTS合成请求，并清空待播放的队列
+    conn.cancel_turn()
     # 打断客户端说话状态
     await conn.websocket.send(
         json.dumps({"type": "tts", "state": "stop", "session_id": conn.session_id})
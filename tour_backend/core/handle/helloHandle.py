@@ -3,9 +3,10 @@ import json
 import random
 import asyncio
 from core.utils.dialogue import Message
-from core.utils.util import audio_to_data
+from core.utils.audio_assets import get_asset_opus
 from core.providers.tts.dto.dto import SentenceType
 from core.utils.wakeup_word import WakeupWordsConfig
+from core.utils.frame_packer import BATCH_VERSION, MAX_BATCH_FRAMES
 from core.handle.sendAudioHandle import sendAudioMessage, send_tts_message
 from core.utils.util import remove_punctuation_and_length, opus_datas_to_wav_bytes
 from core.providers.tools.device_mcp import (
@@ -73,6 +74,24 @@ async def handleHelloMessage(conn, msg_json):
             # 发送mcp消息，获取tools列表
             asyncio.create_task(send_mcp_tools_list_request(conn))
 
+    # 协商下行音频批量发送：客户端声明支持批量容器格式时，多帧合并为一条消息
+    batch_config = conn.config.get("downlink_batch") or {}
+    max_frames = min(int(batch_config.get("max_frames", 1)), MAX_BATCH_FRAMES)
+    if (
+        features
+        and features.get("audio_batch")
+        and batch_config.get("enable", False)
+        and max_frames > 1
+        and not conn.conn_from_mqtt_gateway
+    ):
+        conn.audio_batch_frames = max_frames
+        conn.welcome_msg["audio_batch"] = {
+            "version": BATCH_VERSION,
+            "max_frames": max_frames,
+        }
+    else:
+        conn.welcome_msg.pop("audio_batch", None)
+
     await conn.websocket.send(json.dumps(conn.welcome_msg))
 
 
@@ -116,7 +135,7 @@ async def checkWakeupWords(conn, text):
         }
 
     # 获取音频数据
-    opus_packets = audio_to_data(response.get("file_path"))
+    opus_packets = get_asset_opus(response.get("file_path"))
     # 播放唤醒词回复
     conn.client_abort = False
 
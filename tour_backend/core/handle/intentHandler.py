@@ -7,6 +7,7 @@ from core.handle.helloHandle import checkWakeupWords
 from plugins_func.register import Action, ActionResponse
 from core.handle.sendAudioHandle import send_stt_message
 from core.utils.util import remove_punctuation_and_length
+from core.utils.speculative_chat import SpeculativeChat
 from core.providers.tts.dto.dto import TTSMessageDTO, SentenceType
 
 TAG = __name__
@@ -45,6 +46,50 @@ async def handle_user_intent(conn, text):
     return await process_intent_result(conn, intent_result, text)
 
 
+def prefetch_user_intent(conn, text):
+    """流式ASR检测到句尾端点时调用，在VAD判定说完之前提前启动意图识别
+
+    只做预取，不产生任何副作用；最终仍由handle_user_intent按完整识别结果处理。
+    """
+    if conn.intent_type != "intent_llm" or not getattr(conn, "intent", None):
+        return
+    _, filtered_text = remove_punctuation_and_length(text)
+    if not filtered_text or filtered_text in conn.cmd_exit:
+        return
+    if filtered_text in conn.config.get("wakeup_words", []):
+        return
+    try:
+        conn.intent.prefetch_intent(conn, conn.dialogue.dialogue, text)
+    except Exception as e:
+        conn.logger.bind(tag=TAG).warning(f"意图预取失败: {e}")
+
+
+def start_speculative_chat(conn, text):
+    """intent_llm模式下与意图识别并行启动聊天回复，返回SpeculativeChat，不适合推测时返回None
+
+    退出命令、唤醒词和不调用LLM即可确定意图的句子不会进入聊天，推测执行只会浪费一次调用。
+    """
+    if not conn.speculative_chat or conn.intent_type != "intent_llm":
+        return None
+    if not getattr(conn, "intent", None) or conn.func_handler is None:
+        return None
+    _, filtered_text = remove_punctuation_and_length(text)
+    if not filtered_text or filtered_text in conn.cmd_exit:
+        return None
+    if filtered_text in conn.config.get("wakeup_words", []):
+        return None
+    try:
+        if conn.intent.quick_intent(conn, text) is not None:
+            return None
+    except Exception as e:
+        conn.logger.bind(tag=TAG).warning(f"快速意图判断失败: {e}")
+        return None
+
+    speculation = SpeculativeChat()
+    conn.executor.submit(conn.chat, text, 0, speculation)
+    return speculation
+
+
 async def check_direct_exit(conn, text):
     """检查是否有明确的退出命令"""
     _, text = remove_punctuation_and_length(text)
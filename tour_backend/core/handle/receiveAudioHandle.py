@@ -1,9 +1,9 @@
 import time
 import json
 import asyncio
-from core.utils.util import audio_to_data
+from core.utils.audio_assets import get_asset_opus
 from core.handle.abortHandle import handleAbortMessage
-from core.handle.intentHandler import handle_user_intent
+from core.handle.intentHandler import handle_user_intent, start_speculative_chat
 from core.utils.output_counter import check_device_output_limit
 from core.handle.sendAudioHandle import send_stt_message, SentenceType
 
@@ -16,7 +16,7 @@ async def handleAudioMessage(conn, audio):
     conn.logger.bind(tag=TAG).info(f"接收语音数据，长度: {len(audio)} 字节")
 
     # 当前片段是否有人说话
-    have_voice = conn.vad.is_vad(conn, audio)
+    have_voice = await conn.vad.is_vad_async(conn, audio)
     # 如果设备刚刚被唤醒，短暂忽略VAD检测
     if hasattr(conn, "just_woken_up") and conn.just_woken_up:
         have_voice = False
@@ -82,16 +82,32 @@ async def startToChat(conn, text):
     if conn.client_is_speaking and conn.client_listen_mode != "manual":
         await handleAbortMessage(conn)
 
+    # 记忆查询与意图识别并行进行，chat中直接使用结果
+    conn.prefetch_memory(actual_text)
+
+    # 推测执行：聊天回复与意图识别同时启动，意图结果出来前输出只缓存
+    speculation = start_speculative_chat(conn, actual_text)
+
     # 首先进行意图分析，使用实际文本内容
-    intent_handled = await handle_user_intent(conn, actual_text)
+    try:
+        intent_handled = await handle_user_intent(conn, actual_text)
+    except BaseException:
+        if speculation is not None:
+            speculation.cancel()
+        raise
 
     if intent_handled:
         # 如果意图已被处理，不再进行聊天
+        if speculation is not None:
+            speculation.cancel()
         return
 
     # 意图未被处理，继续常规聊天流程，使用实际文本内容
     await send_stt_message(conn, actual_text)
-    conn.executor.submit(conn.chat, actual_text)
+    if speculation is not None:
+        speculation.commit()
+    else:
+        conn.executor.submit(conn.chat, actual_text)
 
 
 async def no_voice_close_connect(conn, have_voice):
@@ -127,7 +143,7 @@ async def max_out_size(conn):
     text = "不好意思，我现在有点事情要忙，明天这个时候我们再聊，约好了哦！明天不见不散，拜拜！"
     await send_stt_message(conn, text)
     file_path = "config/assets/max_output_size.wav"
-    opus_packets = audio_to_data(file_path)
+    opus_packets = get_asset_opus(file_path)
     conn.tts.tts_audio_queue.put((SentenceType.LAST, opus_packets, text))
     conn.close_after_chat = True
 
@@ -146,7 +162,7 @@ async def check_bind_device(conn):
 
         # 播放提示音
         music_path = "config/assets/bind_code.wav"
-        opus_packets = audio_to_data(music_path)
+        opus_packets = get_asset_opus(music_path)
         conn.tts.tts_audio_queue.put((SentenceType.FIRST, opus_packets, text))
 
         # 逐个播放数字
@@ -154,7 +170,7 @@ async def check_bind_device(conn):
             try:
                 digit = conn.bind_code[i]
                 num_path = f"config/assets/bind_code/{digit}.wav"
-                num_packets = audio_to_data(num_path)
+                num_packets = get_asset_opus(num_path)
                 conn.tts.tts_audio_queue.put((SentenceType.MIDDLE, num_packets, None))
             except Exception as e:
                 conn.logger.bind(tag=TAG).error(f"播放数字音频失败: {e}")
@@ -166,5 +182,5 @@ async def check_bind_device(conn):
         text = f"没有找到该设备的版本信息，请正确配置 OTA地址，然后重新编译固件。"
         await send_stt_message(conn, text)
         music_path = "config/assets/bind_not_found.wav"
-        opus_packets = audio_to_data(music_path)
+        opus_packets = get_asset_opus(music_path)
         conn.tts.tts_audio_queue.put((SentenceType.LAST, opus_packets, text))
@@ -1,25 +1,24 @@
 """
-TTS上报功能已集成到ConnectionHandler类中。
+聊天记录上报
 
-上报功能包括：
-1. 每个连接对象拥有自己的上报队列和处理线程
-2. 上报线程的生命周期与连接对象绑定
-3. 使用ConnectionHandler.enqueue_tts_report方法进行上报
-
-具体实现请参考core/connection.py中的相关代码。
+ASR和TTS的每句记录交给服务级上报管道（core/utils/chat_history_reporter.py），
+由管道批量、异步地上报到管理端，调用方不会被网络请求阻塞。
 """
 
 import time
+from functools import partial
 
 import opuslib_next
 
-from config.manage_api_client import report as manage_report
+from core.utils.audio_frame_store import DecodedFrames
+from core.utils.chat_history_reporter import get_chat_history_reporter
+from core.utils.ogg_opus import opus_to_ogg
 
 TAG = __name__
 
 
 def report(conn, type, text, opus_data, report_time):
-    """执行聊天记录上报操作
+    """把一条聊天记录交给上报管道，音频在上报线程中编码
 
     Args:
         conn: 连接对象
@@ -29,18 +28,20 @@ def report(conn, type, text, opus_data, report_time):
         report_time: 上报时间
     """
     try:
+        reporter = get_chat_history_reporter(conn.config)
+        audio = None
         if opus_data:
-            audio_data = opus_to_wav(conn, opus_data)
-        else:
-            audio_data = None
-        # 执行上报
-        manage_report(
+            if reporter.audio_format == "wav":
+                audio = partial(opus_to_wav, conn, opus_data)
+            else:
+                audio = partial(opus_to_ogg, list(opus_data))
+        reporter.submit(
             mac_address=conn.device_id,
             session_id=conn.session_id,
             chat_type=type,
             content=text,
-            audio=audio_data,
             report_time=report_time,
+            audio=audio,
         )
     except Exception as e:
         conn.logger.bind(tag=TAG).error(f"聊天记录上报失败: {e}")
@@ -56,21 +57,27 @@ def opus_to_wav(conn, opus_data):
     Returns:
         bytes: WAV格式的音频数据
     """
-    decoder = opuslib_next.Decoder(16000, 1)  # 16kHz, 单声道
-    pcm_data = []
-
-    for opus_packet in opus_data:
-        try:
-            pcm_frame = decoder.decode(opus_packet, 960)  # 960 samples = 60ms
-            pcm_data.append(pcm_frame)
-        except opuslib_next.OpusError as e:
-            conn.logger.bind(tag=TAG).error(f"Opus解码错误: {e}", exc_info=True)
-
-    if not pcm_data:
+    # 上行音频在接收时已解码，数据仍在环形缓冲区中时直接使用
+    pcm_data_bytes = None
+    if isinstance(opus_data, DecodedFrames):
+        pcm_data_bytes = opus_data.pcm_bytes()
+
+    if pcm_data_bytes is None:
+        decoder = opuslib_next.Decoder(16000, 1)  # 16kHz, 单声道
+        pcm_data = []
+
+        for opus_packet in opus_data:
+            try:
+                pcm_frame = decoder.decode(opus_packet, 960)  # 960 samples = 60ms
+                pcm_data.append(pcm_frame)
+            except opuslib_next.OpusError as e:
+                conn.logger.bind(tag=TAG).error(f"Opus解码错误: {e}", exc_info=True)
+        pcm_data_bytes = b"".join(pcm_data)
+
+    if not pcm_data_bytes:
         raise ValueError("没有有效的PCM数据")
 
     # 创建WAV文件头
-    pcm_data_bytes = b"".join(pcm_data)
     num_samples = len(pcm_data_bytes) // 2  # 16-bit samples
 
     # WAV文件头
@@ -106,14 +113,14 @@ def enqueue_tts_report(conn, text, opus_data):
         opus_data: opus音频数据
     """
     try:
-        # 使用连接对象的队列，传入文本和二进制数据而非文件路径
+        # 传入文本和二进制数据而非文件路径
         if conn.chat_history_conf == 2:
-            conn.report_queue.put((2, text, opus_data, int(time.time())))
+            report(conn, 2, text, opus_data, int(time.time()))
             conn.logger.bind(tag=TAG).debug(
                 f"TTS数据已加入上报队列: {conn.device_id}, 音频大小: {len(opus_data)} "
             )
         else:
-            conn.report_queue.put((2, text, None, int(time.time())))
+            report(conn, 2, text, None, int(time.time()))
             conn.logger.bind(tag=TAG).debug(
                 f"TTS数据已加入上报队列: {conn.device_id}, 不上报音频"
             )
@@ -134,14 +141,14 @@ def enqueue_asr_report(conn, text, opus_data):
         opus_data: opus音频数据
     """
     try:
-        # 使用连接对象的队列，传入文本和二进制数据而非文件路径
+        # 传入文本和二进制数据而非文件路径
         if conn.chat_history_conf == 2:
-            conn.report_queue.put((1, text, opus_data, int(time.time())))
+            report(conn, 1, text, opus_data, int(time.time()))
             conn.logger.bind(tag=TAG).debug(
                 f"ASR数据已加入上报队列: {conn.device_id}, 音频大小: {len(opus_data)} "
             )
         else:
-            conn.report_queue.put((1, text, None, int(time.time())))
+            report(conn, 1, text, None, int(time.time()))
             conn.logger.bind(tag=TAG).debug(
                 f"ASR数据已加入上报队列: {conn.device_id}, 不上报音频"
             )
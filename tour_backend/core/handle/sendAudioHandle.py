@@ -2,13 +2,16 @@ import json
 import time
 import asyncio
 from core.utils import textUtils
-from core.utils.util import audio_to_data
+from core.utils.audio_assets import get_asset_opus
+from core.utils.cancellation import is_cancelled
+from core.utils.frame_packer import FramePacker
+from core.utils.downlink_scheduler import get_downlink_scheduler
 from core.providers.tts.dto.dto import SentenceType
 
 TAG = __name__
 
 
-async def sendAudioMessage(conn, sentenceType, audios, text):
+async def sendAudioMessage(conn, sentenceType, audios, text, token=None):
     if conn.tts.tts_audio_first_sentence:
         conn.logger.bind(tag=TAG).info(f"发送第一段语音: {text}")
         conn.tts.tts_audio_first_sentence = False
@@ -17,7 +20,7 @@ async def sendAudioMessage(conn, sentenceType, audios, text):
     if sentenceType == SentenceType.FIRST:
         await send_tts_message(conn, "sentence_start", text)
 
-    await sendAudio(conn, audios)
+    await sendAudio(conn, audios, token=token)
     # 发送句子开始消息
     if sentenceType is not SentenceType.MIDDLE:
         conn.logger.bind(tag=TAG).info(f"发送音频消息: {sentenceType}, {text}")
@@ -64,21 +67,85 @@ async def _send_to_mqtt_gateway(conn, opus_packet, timestamp, sequence):
         timestamp: 时间戳
         sequence: 序列号
     """
-    # 为opus数据包添加16字节头部
-    header = bytearray(16)
-    header[0] = 1  # type
-    header[2:4] = len(opus_packet).to_bytes(2, "big")  # payload length
-    header[4:8] = sequence.to_bytes(4, "big")  # sequence
-    header[8:12] = timestamp.to_bytes(4, "big")  # 时间戳
-    header[12:16] = len(opus_packet).to_bytes(4, "big")  # opus长度
+    # 头部与负载直接写入连接的预分配缓冲区
+    await _get_frame_packer(conn).send_mqtt(
+        conn.websocket, [(opus_packet, timestamp, sequence)]
+    )
+
+
+def _get_frame_packer(conn) -> FramePacker:
+    packer = getattr(conn, "frame_packer", None)
+    if packer is None:
+        packer = conn.frame_packer = FramePacker()
+    return packer
+
 
-    # 发送包含头部的完整数据包
-    complete_packet = bytes(header) + opus_packet
-    await conn.websocket.send(complete_packet)
+def _batch_frames(conn) -> int:
+    """本连接每条下行消息最多合并的音频帧数，1表示逐帧发送"""
+    return getattr(conn, "audio_batch_frames", 1)
+
+
+async def _send_opus(conn, opus_packet):
+    """发送单个opus包（非MQTT网关连接），已协商批量格式的客户端使用批量容器"""
+    if _batch_frames(conn) > 1:
+        await _get_frame_packer(conn).send_batch(conn.websocket, [opus_packet])
+    else:
+        await conn.websocket.send(opus_packet)
+
+
+async def _send_opus_packets(conn, packets):
+    """
+    发送一组opus包，支持批量发送的连接合并为一条消息
+    Args:
+        packets: [(opus数据包, 时间戳, 序列号)]
+    """
+    if _batch_frames(conn) > 1:
+        packer = _get_frame_packer(conn)
+        if conn.conn_from_mqtt_gateway:
+            await packer.send_mqtt(conn.websocket, packets)
+        else:
+            await packer.send_batch(conn.websocket, [p[0] for p in packets])
+        return
+    for opus_packet, timestamp, sequence in packets:
+        if conn.conn_from_mqtt_gateway:
+            await _send_to_mqtt_gateway(conn, opus_packet, timestamp, sequence)
+        else:
+            await conn.websocket.send(opus_packet)
+
+
+def _get_downlink_stream(conn):
+    """获取连接的下行调度队列，未开启集中调度或使用固定发送延迟时返回None"""
+    stream = getattr(conn, "downlink_stream", None)
+    if stream is not None:
+        return stream
+    if conn.config.get("tts_audio_send_delay", -1) > 0:
+        return None
+    scheduler = get_downlink_scheduler(conn.config)
+    if scheduler is None:
+        return None
+
+    async def send_frames(frames):
+        # 重置没有声音的状态
+        conn.last_activity_time = time.time() * 1000
+        await _send_opus_packets(
+            conn,
+            [
+                (opus_packet, int(play_time * 1000) % (2**32), sequence)
+                for opus_packet, play_time, sequence in frames
+            ],
+        )
+
+    conn.downlink_stream = scheduler.open_stream(
+        conn.websocket,
+        send_frames=send_frames,
+        send_message=lambda message: conn.websocket.send(message),
+        batch_frames=_batch_frames(conn),
+    )
+    return conn.downlink_stream
 
 
 # 播放音频
-async def sendAudio(conn, audios, frame_duration=60):
+async def sendAudio(conn, audios, frame_duration=60, token=None):
     """
     发送单个opus包，支持流控
     Args:
@@ -86,15 +153,26 @@ async def sendAudio(conn, audios, frame_duration=60):
         opus_packet: 单个opus数据包
         pre_buffer: 快速发送音频
         frame_duration: 帧时长（毫秒），匹配 Opus 编码
+        token: 音频所属轮次的令牌，默认取当前轮次；该轮次被打断后音频不再发送
     """
     if audios is None or len(audios) == 0:
         return
+    if token is None:
+        token = getattr(conn, "turn_token", None)
+
+    stream = _get_downlink_stream(conn)
+    if stream is not None:
+        # 交给服务级调度器按时间线统一发送
+        await stream.put_frames(
+            [audios] if isinstance(audios, bytes) else audios, token
+        )
+        return
 
     # 获取发送延迟配置
     send_delay = conn.config.get("tts_audio_send_delay", -1) / 1000.0
 
     if isinstance(audios, bytes):
-        if conn.client_abort:
+        if is_cancelled(token):
             return
 
         conn.last_activity_time = time.time() * 1000
@@ -125,6 +203,9 @@ async def sendAudio(conn, audios, frame_duration=60):
             else:
                 # 纠正误差
                 flow_control["start_time"] += abs(delay)
+        # 等待发送时间期间可能已被打断
+        if is_cancelled(token):
+            return
 
         if conn.conn_from_mqtt_gateway:
             # 计算时间戳和序列号
@@ -138,7 +219,7 @@ async def sendAudio(conn, audios, frame_duration=60):
             await _send_to_mqtt_gateway(conn, audios, timestamp, sequence)
         else:
             # 直接发送opus数据包，不添加头部
-            await conn.websocket.send(audios)
+            await _send_opus(conn, audios)
 
         # 更新流控状态
         flow_control["packet_count"] += 1
@@ -149,6 +230,9 @@ async def sendAudio(conn, audios, frame_duration=60):
         start_time = time.perf_counter()
         play_position = 0
 
+        if is_cancelled(token):
+            return
+
         # 执行预缓冲
         pre_buffer_frames = min(3, len(audios))
         for i in range(pre_buffer_frames):
@@ -161,12 +245,12 @@ async def sendAudio(conn, audios, frame_duration=60):
                 await _send_to_mqtt_gateway(conn, audios[i], timestamp, sequence)
             else:
                 # 直接发送预缓冲包，不添加头部
-                await conn.websocket.send(audios[i])
+                await _send_opus(conn, audios[i])
         remaining_audios = audios[pre_buffer_frames:]
 
         # 播放剩余音频帧
         for i, opus_packet in enumerate(remaining_audios):
-            if conn.client_abort:
+            if is_cancelled(token):
                 break
 
             # 重置没有声音的状态
@@ -182,6 +266,8 @@ async def sendAudio(conn, audios, frame_duration=60):
                 delay = expected_time - current_time
                 if delay > 0:
                     await asyncio.sleep(delay)
+            if is_cancelled(token):
+                break
 
             if conn.conn_from_mqtt_gateway:
                 # 计算时间戳和序列号（使用当前的数据包索引确保连续性）
@@ -193,7 +279,7 @@ async def sendAudio(conn, audios, frame_duration=60):
                 await _send_to_mqtt_gateway(conn, opus_packet, timestamp, sequence)
             else:
                 # 直接发送opus数据包，不添加头部
-                await conn.websocket.send(opus_packet)
+                await _send_opus(conn, opus_packet)
 
             play_position += frame_duration
 
@@ -211,21 +297,30 @@ async def send_tts_message(conn, state, text=None):
     if text is not None:
         message["text"] = textUtils.check_emoji(text)
 
+    stream = getattr(conn, "downlink_stream", None)
     # TTS播放结束
     if state == "stop":
+        # 等待已排队的音频播放完
+        if stream is not None:
+            await stream.drain()
         # 播放提示音
         tts_notify = conn.config.get("enable_stop_tts_notify", False)
         if tts_notify:
             stop_tts_notify_voice = conn.config.get(
                 "stop_tts_notify_voice", "config/assets/tts_notify.mp3"
             )
-            audios = audio_to_data(stop_tts_notify_voice, is_opus=True)
+            audios = get_asset_opus(stop_tts_notify_voice)
             await sendAudio(conn, audios)
+            if stream is not None:
+                await stream.drain()
         # 清除服务端讲话状态
         conn.clearSpeakStatus()
 
-    # 发送消息到客户端
-    await conn.websocket.send(json.dumps(message))
+    # 发送消息到客户端，还有音频在排队时排在音频之后，保持与播放进度一致
+    if stream is not None and stream.pending():
+        stream.put_message(json.dumps(message))
+    else:
+        await conn.websocket.send(json.dumps(message))
 
 
 async def send_stt_message(conn, text):
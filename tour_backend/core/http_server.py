@@ -3,6 +3,7 @@ from aiohttp import web
 from config.logger import setup_logging
 from core.api.ota_handler import OTAHandler
 from core.api.vision_handler import VisionHandler
+from core.api.config_handler import ConfigCacheHandler
 
 TAG = __name__
 
@@ -13,6 +14,7 @@ class SimpleHttpServer:
         self.logger = setup_logging()
         self.ota_handler = OTAHandler(config)
         self.vision_handler = VisionHandler(config)
+        self.config_handler = ConfigCacheHandler(config)
 
     def _get_websocket_url(self, local_ip: str, port: int) -> str:
         """获取websocket地址
@@ -50,6 +52,16 @@ class SimpleHttpServer:
                         web.options("/xiaozhi/ota/", self.ota_handler.handle_post),
                     ]
                 )
+            else:
+                # 管理端修改设备配置后推送失效通知
+                app.add_routes(
+                    [
+                        web.post(
+                            "/xiaozhi/config/invalidate",
+                            self.config_handler.handle_post,
+                        ),
+                    ]
+                )
             # 添加路由
             app.add_routes(
                 [
@@ -9,13 +9,13 @@ import asyncio
 import traceback
 import threading
 import opuslib_next
-import concurrent.futures
 from abc import ABC, abstractmethod
 from config.logger import setup_logging
 from typing import Optional, Tuple, List
 from core.handle.receiveAudioHandle import startToChat
 from core.handle.reportHandle import enqueue_asr_report
 from core.utils.util import remove_punctuation_and_length
+from core.utils.audio_frame_store import DecodedFrames
 from core.handle.receiveAudioHandle import handleAudioMessage
 
 TAG = __name__
@@ -28,11 +28,25 @@ class ASRProviderBase(ABC):
 
     # 打开音频通道
     async def open_audio_channels(self, conn):
+        if conn.async_pipeline:
+            conn.start_pipeline_task(self.asr_text_priority_task(conn))
+            return
         conn.asr_priority_thread = threading.Thread(
             target=self.asr_text_priority_thread, args=(conn,), daemon=True
         )
         conn.asr_priority_thread.start()
 
+    # 有序处理ASR音频（异步流水线模式）
+    async def asr_text_priority_task(self, conn):
+        while not conn.stop_event.is_set():
+            message = await conn.asr_audio_queue.get()
+            try:
+                await handleAudioMessage(conn, message)
+            except Exception as e:
+                logger.bind(tag=TAG).error(
+                    f"处理ASR文本失败: {str(e)}, 类型: {type(e).__name__}, 堆栈: {traceback.format_exc()}"
+                )
+
     # 有序处理ASR音频
     def asr_text_priority_thread(self, conn):
         while not conn.stop_event.is_set():
@@ -80,10 +94,15 @@ class ASRProviderBase(ABC):
             # 准备音频数据
             if conn.audio_format == "pcm":
                 pcm_data = asr_audio_task
+                combined_pcm_data = b"".join(pcm_data)
             else:
-                pcm_data = self.decode_opus(asr_audio_task)
-            
-            combined_pcm_data = b"".join(pcm_data)
+                # 关联VAD阶段已解码的PCM，ASR、声纹、上报不再重复解码
+                asr_audio_task = conn.uplink_frames.wrap(asr_audio_task)
+                combined_pcm_data = None
+                if isinstance(asr_audio_task, DecodedFrames):
+                    combined_pcm_data = asr_audio_task.pcm_bytes()
+                if combined_pcm_data is None:
+                    combined_pcm_data = b"".join(self.decode_opus(asr_audio_task))
             
             # 预先准备WAV数据
             wav_data = None
@@ -131,23 +150,22 @@ class ASRProviderBase(ABC):
                     logger.bind(tag=TAG).error(f"声纹识别失败: {e}")
                     return None
             
-            # 使用线程池执行器并行运行
-            with concurrent.futures.ThreadPoolExecutor(max_workers=2) as thread_executor:
-                asr_future = thread_executor.submit(run_asr)
-                
-                if conn.voiceprint_provider and wav_data:
-                    voiceprint_future = thread_executor.submit(run_voiceprint)
-                    
-                    # 等待两个线程都完成
-                    asr_result = asr_future.result(timeout=15)
-                    voiceprint_result = voiceprint_future.result(timeout=15)
-                    
-                    results = {"asr": asr_result, "voiceprint": voiceprint_result}
-                else:
-                    asr_result = asr_future.result(timeout=15)
-                    results = {"asr": asr_result, "voiceprint": None}
-            
-            
+            # 在连接的线程池中并行运行，等待期间不阻塞事件循环
+            loop = asyncio.get_running_loop()
+            asr_future = loop.run_in_executor(conn.executor, run_asr)
+
+            if conn.voiceprint_provider and wav_data:
+                voiceprint_future = loop.run_in_executor(conn.executor, run_voiceprint)
+
+                # 等待两个任务都完成
+                asr_result, voiceprint_result = await asyncio.wait_for(
+                    asyncio.gather(asr_future, voiceprint_future), timeout=15
+                )
+                results = {"asr": asr_result, "voiceprint": voiceprint_result}
+            else:
+                asr_result = await asyncio.wait_for(asr_future, timeout=15)
+                results = {"asr": asr_result, "voiceprint": None}
+
             # 处理结果
             raw_text, _ = results.get("asr", ("", None))
             speaker_name = results.get("voiceprint", None)
@@ -243,6 +261,12 @@ class ASRProviderBase(ABC):
     @staticmethod
     def decode_opus(opus_data: List[bytes]) -> List[bytes]:
         """将Opus音频数据解码为PCM数据"""
+        if isinstance(opus_data, DecodedFrames):
+            # 环形缓冲区中的memoryview会被新帧覆盖，调用方拿到后还要拼接、写文件，
+            # 这里先拷贝成bytes并确认拷贝期间数据未被覆盖；已被覆盖时退回重新解码
+            pcm = opus_data.pcm_bytes()
+            if pcm is not None:
+                return [pcm] if pcm else []
         try:
             decoder = opuslib_next.Decoder(16000, 1)
             pcm_data = []
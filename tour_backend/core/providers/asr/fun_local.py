@@ -1,5 +1,6 @@
 import time
 import os
+import asyncio
 import sys
 import io
 import psutil
@@ -10,6 +11,7 @@ from funasr import AutoModel
 from funasr.utils.postprocess_utils import rich_transcription_postprocess
 import shutil
 from core.providers.asr.dto.dto import InterfaceType
+from core.utils.asr_batch_scheduler import ASRBatchScheduler
 
 TAG = __name__
 logger = setup_logging()
@@ -61,6 +63,26 @@ class ASRProvider(ASRProviderBase):
                 # device="cuda:0",  # 启用GPU加速
             )
 
+        # 多个连接的语音在短窗口内合并为一次generate调用
+        self.batch_scheduler = ASRBatchScheduler(
+            "FunASR",
+            self._generate_batch,
+            window_ms=config.get("batch_window_ms", 30),
+            max_batch_size=config.get("max_batch_size", 8),
+        )
+
+    def _generate_batch(self, pcm_list: List[bytes]) -> List[str]:
+        """批量识别，按输入顺序返回文本"""
+        result = self.model.generate(
+            input=pcm_list[0] if len(pcm_list) == 1 else pcm_list,
+            cache={},
+            language="zh", # 如果需要识别任意语言，改为"auto"
+            use_itn=True,
+            batch_size=len(pcm_list),
+            batch_size_s=60,
+        )
+        return [rich_transcription_postprocess(item["text"]) for item in result]
+
     async def speech_to_text(
         self, opus_data: List[bytes], session_id: str, audio_format="opus"
     ) -> Tuple[Optional[str], Optional[str]]:
@@ -92,14 +114,9 @@ class ASRProvider(ASRProviderBase):
 
                 # 语音识别
                 start_time = time.time()
-                result = self.model.generate(
-                    input=combined_pcm_data,
-                    cache={},
-                    language="zh", # 如果需要识别任意语言，改为"auto"
-                    use_itn=True,
-                    batch_size_s=60,
+                text = await asyncio.wrap_future(
+                    self.batch_scheduler.submit(combined_pcm_data)
                 )
-                text = rich_transcription_postprocess(result[0]["text"])
                 logger.bind(tag=TAG).debug(
                     f"语音识别耗时: {time.time() - start_time:.3f}s | 结果: {text}"
                 )
@@ -1,5 +1,6 @@
 import time
 import wave
+import asyncio
 import os
 import sys
 import io
@@ -7,6 +8,7 @@ from config.logger import setup_logging
 from typing import Optional, Tuple, List
 from core.providers.asr.dto.dto import InterfaceType
 from core.providers.asr.base import ASRProviderBase
+from core.utils.asr_batch_scheduler import ASRBatchScheduler
 
 import numpy as np
 import sherpa_onnx
@@ -96,6 +98,24 @@ class ASRProvider(ASRProviderBase):
                     use_itn=True,
                 )
 
+        # 多个连接的语音在短窗口内合并为一次decode_streams调用
+        self.batch_scheduler = ASRBatchScheduler(
+            "SherpaASR",
+            self._decode_batch,
+            window_ms=config.get("batch_window_ms", 30),
+            max_batch_size=config.get("max_batch_size", 8),
+        )
+
+    def _decode_batch(self, samples_list: List[np.ndarray]) -> List[str]:
+        """批量识别，按输入顺序返回文本"""
+        streams = []
+        for samples in samples_list:
+            s = self.model.create_stream()
+            s.accept_waveform(16000, samples)
+            streams.append(s)
+        self.model.decode_streams(streams)
+        return [s.result.text for s in streams]
+
     def read_wave(self, wave_filename: str) -> Tuple[np.ndarray, int]:
         """
         Args:
@@ -137,13 +157,13 @@ class ASRProvider(ASRProviderBase):
                 f"音频文件保存耗时: {time.time() - start_time:.3f}s | 路径: {file_path}"
             )
 
-            # 语音识别
+            # 语音识别，直接使用内存中的PCM，不再读回WAV文件
             start_time = time.time()
-            s = self.model.create_stream()
-            samples, sample_rate = self.read_wave(file_path)
-            s.accept_waveform(sample_rate, samples)
-            self.model.decode_stream(s)
-            text = s.result.text
+            samples = (
+                np.frombuffer(b"".join(pcm_data), dtype=np.int16).astype(np.float32)
+                / 32768
+            )
+            text = await asyncio.wrap_future(self.batch_scheduler.submit(samples))
             logger.bind(tag=TAG).debug(
                 f"语音识别耗时: {time.time() - start_time:.3f}s | 结果: {text}"
             )
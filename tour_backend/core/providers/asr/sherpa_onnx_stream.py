@@ -0,0 +1,256 @@
+import os
+import time
+import threading
+import weakref
+import numpy as np
+import sherpa_onnx
+from typing import Optional, Tuple, List
+from config.logger import setup_logging
+from core.providers.asr.base import ASRProviderBase
+from core.providers.asr.dto.dto import InterfaceType
+from core.handle.intentHandler import prefetch_user_intent
+from core.utils.asr_batch_scheduler import ASRBatchScheduler
+
+TAG = __name__
+logger = setup_logging()
+
+SAMPLE_RATE = 16000
+# 结束时补充的静音，让模型输出最后几个字
+TAIL_PADDING = np.zeros(int(0.66 * SAMPLE_RATE), dtype=np.float32)
+
+
+class StreamState:
+    """单个连接的流式识别状态
+
+    同一个stream不能在解码的同时写入音频：解码进行中到达的音频先放入pending，
+    解码完成后由回调写入并继续提交。
+    """
+
+    def __init__(self, stream):
+        self.stream = stream
+        self.lock = threading.RLock()
+        self.idle = threading.Event()
+        self.idle.set()
+        self.pending: List[np.ndarray] = []
+        self.in_flight = None
+        self.closed = False
+        self.text = ""
+        self.prefetched_text = ""
+
+
+class ASRProvider(ASRProviderBase):
+    """sherpa-onnx 流式本地识别
+
+    说话过程中逐帧增量解码，VAD判定说完时只需解码剩余的少量音频；
+    模型检测到句尾端点时，把当前已稳定的文本提前交给意图识别预取。
+    """
+
+    def __init__(self, config: dict, delete_audio_file: bool):
+        super().__init__()
+        self.interface_type = InterfaceType.LOCAL
+        self.model_dir = config.get("model_dir")
+        self.output_dir = config.get("output_dir", "tmp/")
+        self.model_type = config.get("model_type", "transducer")  # 支持 paraformer
+        self.delete_audio_file = delete_audio_file
+        os.makedirs(self.output_dir, exist_ok=True)
+
+        def model_file(key, default):
+            return os.path.join(self.model_dir, config.get(key) or default)
+
+        num_threads = int(config.get("num_threads", 2))
+        endpoint_silence_ms = config.get("endpoint_silence_ms", 400)
+        endpoint_kwargs = dict(
+            enable_endpoint_detection=True,
+            rule1_min_trailing_silence=2.4,
+            rule2_min_trailing_silence=(int(endpoint_silence_ms) if endpoint_silence_ms else 400)
+            / 1000,
+            rule3_min_utterance_length=30,
+        )
+
+        if self.model_type == "paraformer":
+            self.model = sherpa_onnx.OnlineRecognizer.from_paraformer(
+                tokens=model_file("tokens", "tokens.txt"),
+                encoder=model_file("encoder", "encoder.int8.onnx"),
+                decoder=model_file("decoder", "decoder.int8.onnx"),
+                num_threads=num_threads,
+                sample_rate=SAMPLE_RATE,
+                feature_dim=80,
+                decoding_method="greedy_search",
+                **endpoint_kwargs,
+            )
+        else:  # transducer (zipformer)
+            self.model = sherpa_onnx.OnlineRecognizer.from_transducer(
+                tokens=model_file("tokens", "tokens.txt"),
+                encoder=model_file("encoder", "encoder.onnx"),
+                decoder=model_file("decoder", "decoder.onnx"),
+                joiner=model_file("joiner", "joiner.onnx"),
+                num_threads=num_threads,
+                sample_rate=SAMPLE_RATE,
+                feature_dim=80,
+                decoding_method="greedy_search",
+                **endpoint_kwargs,
+            )
+
+        # 各连接的增量解码合并为一次decode_streams调用
+        self.batch_scheduler = ASRBatchScheduler(
+            "SherpaStreamASR",
+            self._decode_batch,
+            window_ms=config.get("batch_window_ms", 10),
+            max_batch_size=config.get("max_batch_size", 32),
+        )
+
+        # 说话中的连接 -> StreamState
+        self.streams = weakref.WeakKeyDictionary()
+        # 已说完、等待speech_to_text取结果的 session_id -> StreamState
+        self.finishing = {}
+
+    def _decode_batch(self, states: List[StreamState]) -> List[Tuple[str, bool]]:
+        streams = [state.stream for state in states]
+        while True:
+            ready = [s for s in streams if self.model.is_ready(s)]
+            if not ready:
+                break
+            self.model.decode_streams(ready)
+        return [(self.model.get_result(s), self.model.is_endpoint(s)) for s in streams]
+
+    @staticmethod
+    def _to_samples(pcm) -> np.ndarray:
+        return np.frombuffer(pcm, dtype=np.int16).astype(np.float32) / 32768
+
+    def _packet_pcm(self, conn, audio):
+        if conn.audio_format == "pcm":
+            return audio
+        pcm = conn.uplink_frames.pcm_of(audio)
+        if pcm is None:
+            pcm = b"".join(self.decode_opus([audio]))
+        return pcm
+
+    def _open_stream(self, conn) -> StreamState:
+        state = StreamState(self.model.create_stream())
+        self.streams[conn] = state
+        # 写入VAD触发前缓存的几帧，避免丢失句首
+        if conn.asr_audio:
+            if conn.audio_format == "pcm":
+                pre_roll = conn.asr_audio
+            else:
+                pre_roll = self.decode_opus(conn.uplink_frames.wrap(conn.asr_audio))
+            pcm = b"".join(pre_roll)
+            if pcm:
+                self._feed(conn, state, self._to_samples(pcm))
+        return state
+
+    def _feed(self, conn, state: StreamState, samples: np.ndarray):
+        with state.lock:
+            if state.closed:
+                return
+            if state.in_flight is not None:
+                state.pending.append(samples)
+                return
+            state.stream.accept_waveform(SAMPLE_RATE, samples)
+            self._submit(conn, state)
+
+    def _submit(self, conn, state: StreamState):
+        state.idle.clear()
+        state.in_flight = self.batch_scheduler.submit(state)
+        conn_ref = weakref.ref(conn)
+        state.in_flight.add_done_callback(
+            lambda future: self._on_decoded(conn_ref, state, future)
+        )
+
+    def _on_decoded(self, conn_ref, state: StreamState, future):
+        endpoint_text = None
+        with state.lock:
+            if future.exception() is None:
+                text, is_endpoint = future.result()
+                state.text = text
+                if is_endpoint and text and text != state.prefetched_text:
+                    state.prefetched_text = text
+                    endpoint_text = text
+            conn = conn_ref()
+            if state.pending and not state.closed and conn is not None:
+                samples = np.concatenate(state.pending)
+                state.pending.clear()
+                state.stream.accept_waveform(SAMPLE_RATE, samples)
+                self._submit(conn, state)
+            else:
+                state.in_flight = None
+                state.idle.set()
+
+        conn = conn_ref()
+        if endpoint_text and conn is not None and not conn.stop_event.is_set():
+            # 句尾端点先于VAD静默判定到达，提前启动意图识别
+            conn.loop.call_soon_threadsafe(prefetch_user_intent, conn, endpoint_text)
+
+    async def receive_audio(self, conn, audio, audio_have_voice):
+        if conn.client_listen_mode == "auto" or conn.client_listen_mode == "realtime":
+            have_voice = audio_have_voice
+        else:
+            have_voice = conn.client_have_voice
+
+        state = self.streams.get(conn)
+        if state is None and (have_voice or conn.client_have_voice):
+            state = self._open_stream(conn)
+        if state is not None and audio:
+            pcm = self._packet_pcm(conn, audio)
+            if pcm:
+                self._feed(conn, state, self._to_samples(pcm))
+
+        if conn.client_voice_stop and state is not None:
+            # 句子结束，转交给speech_to_text收尾；过短的语音父类不会识别，直接丢弃
+            self.streams.pop(conn, None)
+            if len(conn.asr_audio) + 1 > 15 or conn.client_listen_mode == "manual":
+                self.finishing[conn.session_id] = state
+            else:
+                with state.lock:
+                    state.closed = True
+
+        await super().receive_audio(conn, audio, audio_have_voice)
+
+    def _finish(self, state: StreamState) -> str:
+        """收尾解码：等待进行中的增量解码，写入剩余音频和尾部静音后解码到底"""
+        with state.lock:
+            state.closed = True
+        state.idle.wait(timeout=10)
+        with state.lock:
+            for samples in state.pending:
+                state.stream.accept_waveform(SAMPLE_RATE, samples)
+            state.pending.clear()
+            state.stream.accept_waveform(SAMPLE_RATE, TAIL_PADDING)
+            state.stream.input_finished()
+            while self.model.is_ready(state.stream):
+                self.model.decode_stream(state.stream)
+            return self.model.get_result(state.stream)
+
+    def _recognize_offline(self, pcm: bytes) -> str:
+        """没有增量状态时（如连接刚切换ASR）整句送入流式模型"""
+        stream = self.model.create_stream()
+        state = StreamState(stream)
+        stream.accept_waveform(SAMPLE_RATE, self._to_samples(pcm))
+        return self._finish(state)
+
+    async def speech_to_text(
+        self, opus_data: List[bytes], session_id: str, audio_format="opus"
+    ) -> Tuple[Optional[str], Optional[str]]:
+        """语音转文本主处理逻辑"""
+        file_path = None
+        try:
+            start_time = time.time()
+            state = self.finishing.pop(session_id, None)
+            pcm_data = None
+            if not self.delete_audio_file or state is None:
+                pcm_data = opus_data if audio_format == "pcm" else self.decode_opus(opus_data)
+            if not self.delete_audio_file:
+                file_path = self.save_audio_to_file(pcm_data, session_id)
+
+            # speech_to_text在连接线程池中执行，这里可以直接阻塞等待
+            if state is not None:
+                text = self._finish(state)
+            else:
+                text = self._recognize_offline(b"".join(pcm_data))
+            logger.bind(tag=TAG).debug(
+                f"流式识别收尾耗时: {time.time() - start_time:.3f}s | 结果: {text}"
+            )
+            return text, file_path
+        except Exception as e:
+            logger.bind(tag=TAG).error(f"语音识别失败: {e}", exc_info=True)
+            return "", file_path
@@ -1,5 +1,5 @@
 from abc import ABC, abstractmethod
-from typing import List, Dict
+from typing import List, Dict, Optional
 from config.logger import setup_logging
 
 TAG = __name__
@@ -31,3 +31,17 @@ class IntentProviderBase(ABC):
             - "查询天气 地点名" 或 "查询天气 [当前位置]"
         """
         pass
+
+    def prefetch_intent(self, conn, dialogue_history: List[Dict], text: str):
+        """
+        在完整识别结果到达前，根据已稳定的文本提前准备意图识别
+        默认不做任何处理，随后的detect_intent按正常流程执行
+        """
+        pass
+
+    def quick_intent(self, conn, text: str) -> Optional[str]:
+        """
+        不调用LLM即可确定的意图，无法确定时返回None
+        用于判断是否值得与意图识别并行启动聊天回复
+        """
+        return None
@@ -2,10 +2,14 @@ from typing import List, Dict
 from ..base import IntentProviderBase
 from plugins_func.functions.play_music import initialize_music_handler
 from config.logger import setup_logging
+from core.utils.util import remove_punctuation_and_length
+from core.utils.intent_matcher import LocalIntentMatcher
+from collections import OrderedDict
 import re
 import json
 import hashlib
 import time
+import asyncio
 
 TAG = __name__
 logger = setup_logging()
@@ -15,7 +19,15 @@ class IntentProvider(IntentProviderBase):
     def __init__(self, config):
         super().__init__(config)
         self.llm = None
-        self.promot = ""
+        # 工具集签名 -> (系统提示词, 哈希)
+        self.system_prompts = OrderedDict()
+        self.max_system_prompts = 32
+        # 本地快速匹配：系统提示词哈希 -> LocalIntentMatcher，高置信度的短指令不再调用LLM
+        self.fast_path_config = config.get("fast_path") or {}
+        self.fast_path_enabled = self.fast_path_config.get("enable", True)
+        self.matchers = {}
+        # 缓存键 -> 进行中的LLM调用
+        self.inflight = {}
         # 导入全局缓存管理器
         from core.utils.cache.manager import cache_manager, CacheType
 
@@ -115,6 +127,152 @@ class IntentProvider(IntentProviderBase):
         )
         return prompt
 
+    def _get_system_prompt(self, conn):
+        """获取系统提示词及其哈希
+
+        提示词只依赖工具列表、音乐列表和Home Assistant设备，三者不变时直接复用已构建的结果。
+        """
+        functions = list(conn.func_handler.get_functions() or [])
+        if hasattr(conn, "mcp_client"):
+            mcp_tools = conn.mcp_client.get_available_tools()
+            if mcp_tools:
+                functions.extend(mcp_tools)
+        # 参数定义变化同样会改变提示词，按完整的函数定义计算签名
+        tools_signature = hashlib.md5(
+            json.dumps(functions, ensure_ascii=False, sort_keys=True, default=str).encode()
+        ).hexdigest()
+
+        music_config = initialize_music_handler(conn)
+        music_file_names = music_config["music_file_names"]
+
+        home_assistant_cfg = conn.config["plugins"].get("home_assistant")
+        if home_assistant_cfg:
+            devices = home_assistant_cfg.get("devices", [])
+        else:
+            devices = []
+
+        exit_commands = tuple(conn.cmd_exit or [])
+        wakeup_words = tuple(conn.config.get("wakeup_words") or [])
+
+        # 按音乐列表的内容计算签名：列表对象可能被原地修改，id也可能在旧列表回收后被复用
+        signature = (
+            tools_signature,
+            tuple(music_file_names),
+            tuple(devices),
+            exit_commands,
+            wakeup_words,
+        )
+        cached = self.system_prompts.get(signature)
+        if cached is not None:
+            self.system_prompts.move_to_end(signature)
+            return cached
+
+        prompt = self.get_intent_system_prompt(functions)
+        prompt_music = f"{prompt}\n<musicNames>{music_file_names}\n</musicNames>"
+        if len(devices) > 0:
+            hass_prompt = "\n下面是我家智能设备列表（位置，设备名，entity_id），可以通过homeassistant控制\n"
+            for device in devices:
+                hass_prompt += device + "\n"
+            prompt_music += hass_prompt
+
+        # 退出命令和唤醒词不影响提示词，但会影响本地快速匹配，一并计入哈希
+        prompt_hash = hashlib.md5(
+            f"{prompt_music}{exit_commands}{wakeup_words}".encode()
+        ).hexdigest()
+        cached = (prompt_music, prompt_hash)
+        self.system_prompts[signature] = cached
+        if self.fast_path_enabled:
+            self.matchers[cached[1]] = LocalIntentMatcher(
+                functions,
+                exit_commands,
+                wakeup_words,
+                music_file_names,
+                self.fast_path_config,
+            )
+        if len(self.system_prompts) > self.max_system_prompts:
+            _, (_, evicted_hash) = self.system_prompts.popitem(last=False)
+            self.matchers.pop(evicted_hash, None)
+        logger.bind(tag=TAG).debug(f"意图识别系统提示词已重建, 工具数: {len(functions)}")
+        return cached
+
+    def _build_user_prompt(self, dialogue_history: List[Dict], text: str) -> str:
+        # 构建用户对话历史的提示
+        msgStr = ""
+
+        # 获取最近的对话历史
+        start_idx = max(0, len(dialogue_history) - self.history_count)
+        for i in range(start_idx, len(dialogue_history)):
+            msgStr += f"{dialogue_history[i].role}: {dialogue_history[i].content}\n"
+
+        msgStr += f"User: {text}\n"
+        return f"current dialogue:\n{msgStr}"
+
+    @staticmethod
+    def _get_cache_key(text: str, tools_hash: str) -> str:
+        """缓存键只由归一化后的文本和工具集决定，不同设备说同一句话可以共享结果"""
+        _, normalized = remove_punctuation_and_length(text)
+        return hashlib.md5(f"{tools_hash}:{normalized.lower()}".encode()).hexdigest()
+
+    async def _call_llm(self, cache_key: str, system_prompt: str, user_prompt: str) -> str:
+        intent = await self.llm.response_no_stream_async(
+            system_prompt=system_prompt, user_prompt=user_prompt
+        )
+        # 清理和解析响应
+        intent = intent.strip()
+        # 尝试提取JSON部分
+        match = re.search(r"\{.*\}", intent, re.DOTALL)
+        if match:
+            intent = match.group(0)
+        # 结果有效时立即缓存，预取完成后再到达的请求可以直接命中
+        try:
+            json.loads(intent)
+            self.cache_manager.set(self.CacheType.INTENT, cache_key, intent)
+        except json.JSONDecodeError:
+            pass
+        return intent
+
+    def _start_request(self, cache_key: str, system_prompt: str, user_prompt: str):
+        """单飞：相同缓存键的请求在完成前只调用一次LLM，其余请求等待同一结果"""
+        task = self.inflight.get(cache_key)
+        if task is None:
+            task = asyncio.ensure_future(
+                self._call_llm(cache_key, system_prompt, user_prompt)
+            )
+            self.inflight[cache_key] = task
+            task.add_done_callback(lambda _: self.inflight.pop(cache_key, None))
+        return task
+
+    def prefetch_intent(self, conn, dialogue_history: List[Dict], text: str):
+        """根据流式ASR已稳定的文本提前发起意图识别调用，detect_intent通过单飞复用结果"""
+        if not self.llm or conn.func_handler is None:
+            return
+        system_prompt, tools_hash = self._get_system_prompt(conn)
+        if self._match_fast_path(tools_hash, text) is not None:
+            return
+        cache_key = self._get_cache_key(text, tools_hash)
+        if self.cache_manager.get(self.CacheType.INTENT, cache_key) is not None:
+            return
+        user_prompt = self._build_user_prompt(dialogue_history, text)
+        self._start_request(cache_key, system_prompt, user_prompt)
+        logger.bind(tag=TAG).debug(f"意图识别预取: {text}")
+
+    def _match_fast_path(self, tools_hash: str, text: str):
+        matcher = self.matchers.get(tools_hash)
+        if matcher is None:
+            return None
+        return matcher.match(text)
+
+    def quick_intent(self, conn, text: str):
+        if conn.func_handler is None:
+            return None
+        _, tools_hash = self._get_system_prompt(conn)
+        fast_intent = self._match_fast_path(tools_hash, text)
+        if fast_intent is not None:
+            return fast_intent
+        return self.cache_manager.get(
+            self.CacheType.INTENT, self._get_cache_key(text, tools_hash)
+        )
+
     def replyResult(self, text: str, original_text: str):
         llm_result = self.llm.response_no_stream(
             system_prompt=text,
@@ -136,8 +294,18 @@ class IntentProvider(IntentProviderBase):
         model_info = getattr(self.llm, "model_name", str(self.llm.__class__.__name__))
         logger.bind(tag=TAG).debug(f"使用意图识别模型: {model_info}")
 
+        system_prompt, tools_hash = self._get_system_prompt(conn)
+
+        # 本地快速匹配，命中时跳过LLM调用
+        fast_intent = self._match_fast_path(tools_hash, text)
+        if fast_intent is not None:
+            logger.bind(tag=TAG).debug(
+                f"本地快速匹配命中: '{text}' -> {fast_intent}, 耗时: {time.time() - total_start_time:.4f}秒"
+            )
+            return self._handle_intent_result(conn, fast_intent)
+
         # 计算缓存键
-        cache_key = hashlib.md5((conn.device_id + text).encode()).hexdigest()
+        cache_key = self._get_cache_key(text, tools_hash)
 
         # 检查缓存
         cached_intent = self.cache_manager.get(self.CacheType.INTENT, cache_key)
@@ -148,56 +316,20 @@ class IntentProvider(IntentProviderBase):
             )
             return cached_intent
 
-        if self.promot == "":
-            functions = conn.func_handler.get_functions()
-            if hasattr(conn, "mcp_client"):
-                mcp_tools = conn.mcp_client.get_available_tools()
-                if mcp_tools is not None and len(mcp_tools) > 0:
-                    if functions is None:
-                        functions = []
-                    functions.extend(mcp_tools)
-
-            self.promot = self.get_intent_system_prompt(functions)
-
-        music_config = initialize_music_handler(conn)
-        music_file_names = music_config["music_file_names"]
-        prompt_music = f"{self.promot}\n<musicNames>{music_file_names}\n</musicNames>"
-
-        home_assistant_cfg = conn.config["plugins"].get("home_assistant")
-        if home_assistant_cfg:
-            devices = home_assistant_cfg.get("devices", [])
-        else:
-            devices = []
-        if len(devices) > 0:
-            hass_prompt = "\n下面是我家智能设备列表（位置，设备名，entity_id），可以通过homeassistant控制\n"
-            for device in devices:
-                hass_prompt += device + "\n"
-            prompt_music += hass_prompt
-
-        logger.bind(tag=TAG).debug(f"User prompt: {prompt_music}")
-
-        # 构建用户对话历史的提示
-        msgStr = ""
-
-        # 获取最近的对话历史
-        start_idx = max(0, len(dialogue_history) - self.history_count)
-        for i in range(start_idx, len(dialogue_history)):
-            msgStr += f"{dialogue_history[i].role}: {dialogue_history[i].content}\n"
-
-        msgStr += f"User: {text}\n"
-        user_prompt = f"current dialogue:\n{msgStr}"
+        user_prompt = self._build_user_prompt(dialogue_history, text)
+        logger.bind(tag=TAG).debug(f"User prompt: {user_prompt}")
 
         # 记录预处理完成时间
         preprocess_time = time.time() - total_start_time
         logger.bind(tag=TAG).debug(f"意图识别预处理耗时: {preprocess_time:.4f}秒")
 
-        # 使用LLM进行意图识别
+        # 使用LLM进行意图识别，相同请求进行中时直接等待其结果
         llm_start_time = time.time()
         logger.bind(tag=TAG).debug(f"开始LLM意图识别调用, 模型: {model_info}")
 
-        intent = self.llm.response_no_stream(
-            system_prompt=prompt_music, user_prompt=user_prompt
-        )
+        task = self._start_request(cache_key, system_prompt, user_prompt)
+        # shield：当前请求被取消时不影响其他等待同一结果的连接
+        intent = await asyncio.shield(task)
 
         # 记录LLM调用完成时间
         llm_time = time.time() - llm_start_time
@@ -205,22 +337,18 @@ class IntentProvider(IntentProviderBase):
             f"LLM意图识别完成, 模型: {model_info}, 调用耗时: {llm_time:.4f}秒"
         )
 
-        # 记录后处理开始时间
-        postprocess_start_time = time.time()
-
-        # 清理和解析响应
-        intent = intent.strip()
-        # 尝试提取JSON部分
-        match = re.search(r"\{.*\}", intent, re.DOTALL)
-        if match:
-            intent = match.group(0)
-
         # 记录总处理时间
         total_time = time.time() - total_start_time
         logger.bind(tag=TAG).debug(
             f"【意图识别性能】模型: {model_info}, 总耗时: {total_time:.4f}秒, LLM调用: {llm_time:.4f}秒, 查询: '{text[:20]}...'"
         )
 
+        return self._handle_intent_result(conn, intent)
+
+    def _handle_intent_result(self, conn, intent: str) -> str:
+        # 记录后处理开始时间
+        postprocess_start_time = time.time()
+
         # 尝试解析为JSON
         try:
             intent_data = json.loads(intent)
@@ -254,8 +382,7 @@ class IntentProvider(IntentProviderBase):
                     # 处理函数调用
                     logger.bind(tag=TAG).info(f"检测到函数调用意图: {function_name}")
 
-            # 统一缓存处理和返回
-            self.cache_manager.set(self.CacheType.INTENT, cache_key, intent)
+            # 有效结果已在_call_llm中缓存
             postprocess_time = time.time() - postprocess_start_time
             logger.bind(tag=TAG).debug(f"意图后处理耗时: {postprocess_time:.4f}秒")
             return intent
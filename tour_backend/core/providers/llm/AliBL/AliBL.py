@@ -24,7 +24,8 @@ class LLMProvider(LLMProviderBase):
         try:
             # 处理dialogue
             if self.is_No_prompt:
-                dialogue.pop(0)
+                # 去掉系统提示词，切片得到新列表，不修改调用方的对话
+                dialogue = dialogue[1:]
                 logger.bind(tag=TAG).debug(
                     f"【阿里百练API服务】处理后的dialogue: {dialogue}"
                 )
@@ -1,10 +1,15 @@
+import asyncio
 from abc import ABC, abstractmethod
+from contextlib import contextmanager
 from config.logger import setup_logging
 
 TAG = __name__
 logger = setup_logging()
 
 class LLMProviderBase(ABC):
+    # 流式接口是否支持 cancel_token 参数（打断时关闭上游HTTP流）
+    supports_cancel_token = False
+
     @abstractmethod
     def response(self, session_id, dialogue):
         """LLM response generator"""
@@ -26,6 +31,13 @@ class LLMProviderBase(ABC):
             logger.bind(tag=TAG).error(f"Error in Ollama response generation: {e}")
             return "【LLM服务响应异常】"
     
+    async def response_no_stream_async(self, system_prompt, user_prompt, **kwargs):
+        """非流式调用的异步版本，默认在线程池中执行同步实现，不阻塞事件循环"""
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(
+            None, lambda: self.response_no_stream(system_prompt, user_prompt, **kwargs)
+        )
+
     def response_with_functions(self, session_id, dialogue, functions=None):
         """
         Default implementation for function calling (streaming)
@@ -37,3 +49,14 @@ class LLMProviderBase(ABC):
         for token in self.response(session_id, dialogue):
             yield token, None
 
+    @contextmanager
+    def _close_on_cancel(self, stream, cancel_token=None):
+        """令牌取消时关闭上游流式响应，阻塞在读取上的迭代随之结束；退出时注销回调并关闭响应"""
+        if cancel_token is not None:
+            cancel_token.add_callback(stream.close)
+        try:
+            yield stream
+        finally:
+            if cancel_token is not None:
+                cancel_token.remove_callback(stream.close)
+            stream.close()
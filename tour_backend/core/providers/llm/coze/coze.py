@@ -55,19 +55,24 @@ class LLMProvider(LLMProviderBase):
                 yield event.message.content
 
     def response_with_functions(self, session_id, dialogue, functions=None):
+        # 对话中的消息是对话历史的缓存对象，下面会弹出和改写消息，先拷贝列表，改写时替换为新字典
+        dialogue = list(dialogue)
         if len(dialogue) == 2 and functions is not None and len(functions) > 0:
             # 第一次调用llm， 取最后一条用户消息，附加tool提示词
             last_msg = dialogue[-1]["content"]
             function_str = json.dumps(functions, ensure_ascii=False)
             modify_msg = get_system_prompt_for_function(function_str) + last_msg
-            dialogue[-1]["content"] = modify_msg
+            dialogue[-1] = {**dialogue[-1], "content": modify_msg}
 
         # 如果最后一个是 role="tool"，附加到user上
         if len(dialogue) > 1 and dialogue[-1]["role"] == "tool":
             assistant_msg = "\ntool call result: " + dialogue[-1]["content"] + "\n\n"
             while len(dialogue) > 1:
                 if dialogue[-1]["role"] == "user":
-                    dialogue[-1]["content"] = assistant_msg + dialogue[-1]["content"]
+                    dialogue[-1] = {
+                        **dialogue[-1],
+                        "content": assistant_msg + dialogue[-1]["content"],
+                    }
                     break
                 dialogue.pop()
 
@@ -34,10 +34,11 @@ class LLMProvider(LLMProviderBase):
                 # 找到最后一条用户消息
                 for i in range(len(dialogue_copy) - 1, -1, -1):
                     if dialogue_copy[i]["role"] == "user":
-                        # 在用户消息前添加/no_think指令
-                        dialogue_copy[i]["content"] = (
-                            "/no_think " + dialogue_copy[i]["content"]
-                        )
+                        # 在用户消息前添加/no_think指令，消息本身也要拷贝，不修改对话历史的缓存
+                        dialogue_copy[i] = {
+                            **dialogue_copy[i],
+                            "content": "/no_think " + dialogue_copy[i]["content"],
+                        }
                         logger.bind(tag=TAG).debug(f"为qwen3模型添加/no_think指令")
                         break
 
@@ -103,10 +104,11 @@ class LLMProvider(LLMProviderBase):
                 # 找到最后一条用户消息
                 for i in range(len(dialogue_copy) - 1, -1, -1):
                     if dialogue_copy[i]["role"] == "user":
-                        # 在用户消息前添加/no_think指令
-                        dialogue_copy[i]["content"] = (
-                            "/no_think " + dialogue_copy[i]["content"]
-                        )
+                        # 在用户消息前添加/no_think指令，消息本身也要拷贝，不修改对话历史的缓存
+                        dialogue_copy[i] = {
+                            **dialogue_copy[i],
+                            "content": "/no_think " + dialogue_copy[i]["content"],
+                        }
                         logger.bind(tag=TAG).debug(f"为qwen3模型添加/no_think指令")
                         break
 
@@ -1,5 +1,7 @@
+import re
 import httpx
 import openai
+import asyncio
 from openai.types import CompletionUsage
 from config.logger import setup_logging
 from core.utils.util import check_model_key
@@ -10,6 +12,8 @@ logger = setup_logging()
 
 
 class LLMProvider(LLMProviderBase):
+    supports_cancel_token = True
+
     def __init__(self, config):
         self.model_name = config.get("model_name")
         self.api_key = config.get("api_key")
@@ -48,7 +52,57 @@ class LLMProvider(LLMProviderBase):
             logger.bind(tag=TAG).error(model_key_msg)
         self.client = openai.OpenAI(api_key=self.api_key, base_url=self.base_url, timeout=httpx.Timeout(self.timeout))
 
+        # 异步客户端使用连接池复用HTTP连接，供意图识别等非流式调用使用
+        max_connections = config.get("max_connections", 100)
+        self.max_connections = int(max_connections) if max_connections else 100
+        self.async_client = None
+        self.async_client_loop = None
+
+    def _get_async_client(self):
+        """按事件循环创建异步客户端（httpx连接绑定到创建它的事件循环）"""
+        loop = asyncio.get_running_loop()
+        if self.async_client is None or self.async_client_loop is not loop:
+            self.async_client = openai.AsyncOpenAI(
+                api_key=self.api_key,
+                base_url=self.base_url,
+                timeout=httpx.Timeout(self.timeout),
+                http_client=httpx.AsyncClient(
+                    timeout=httpx.Timeout(self.timeout),
+                    limits=httpx.Limits(
+                        max_connections=self.max_connections,
+                        max_keepalive_connections=self.max_connections,
+                        keepalive_expiry=60,
+                    ),
+                ),
+            )
+            self.async_client_loop = loop
+        return self.async_client
+
+    async def response_no_stream_async(self, system_prompt, user_prompt, **kwargs):
+        try:
+            response = await self._get_async_client().chat.completions.create(
+                model=self.model_name,
+                messages=[
+                    {"role": "system", "content": system_prompt},
+                    {"role": "user", "content": user_prompt},
+                ],
+                stream=False,
+                max_tokens=kwargs.get("max_tokens", self.max_tokens),
+                temperature=kwargs.get("temperature", self.temperature),
+                top_p=kwargs.get("top_p", self.top_p),
+                frequency_penalty=kwargs.get(
+                    "frequency_penalty", self.frequency_penalty
+                ),
+            )
+            content = response.choices[0].message.content or ""
+            # 去掉思考内容
+            return re.sub(r"<think>.*?</think>", "", content, flags=re.DOTALL)
+        except Exception as e:
+            logger.bind(tag=TAG).error(f"Error in async response generation: {e}")
+            return "【LLM服务响应异常】"
+
     def response(self, session_id, dialogue, **kwargs):
+        cancel_token = kwargs.get("cancel_token")
         try:
             responses = self.client.chat.completions.create(
                 model=self.model_name,
@@ -63,52 +117,62 @@ class LLMProvider(LLMProviderBase):
             )
 
             is_active = True
-            for chunk in responses:
-                try:
-                    # 检查是否存在有效的choice且content不为空
-                    delta = (
-                        chunk.choices[0].delta
-                        if getattr(chunk, "choices", None)
-                        else None
-                    )
-                    content = delta.content if hasattr(delta, "content") else ""
-                except IndexError:
-                    content = ""
-                if content:
-                    # 处理标签跨多个chunk的情况
-                    if "<think>" in content:
-                        is_active = False
-                        content = content.split("<think>")[0]
-                    if "</think>" in content:
-                        is_active = True
-                        content = content.split("</think>")[-1]
-                    if is_active:
-                        yield content
+            with self._close_on_cancel(responses, cancel_token):
+                for chunk in responses:
+                    try:
+                        # 检查是否存在有效的choice且content不为空
+                        delta = (
+                            chunk.choices[0].delta
+                            if getattr(chunk, "choices", None)
+                            else None
+                        )
+                        content = delta.content if hasattr(delta, "content") else ""
+                    except IndexError:
+                        content = ""
+                    if content:
+                        # 处理标签跨多个chunk的情况
+                        if "<think>" in content:
+                            is_active = False
+                            content = content.split("<think>")[0]
+                        if "</think>" in content:
+                            is_active = True
+                            content = content.split("</think>")[-1]
+                        if is_active:
+                            yield content
 
         except Exception as e:
+            if cancel_token is not None and cancel_token.cancelled:
+                logger.bind(tag=TAG).debug(f"LLM流已随打断关闭: {e}")
+                return
             logger.bind(tag=TAG).error(f"Error in response generation: {e}")
 
-    def response_with_functions(self, session_id, dialogue, functions=None):
+    def response_with_functions(
+        self, session_id, dialogue, functions=None, cancel_token=None
+    ):
         try:
             stream = self.client.chat.completions.create(
                 model=self.model_name, messages=dialogue, stream=True, tools=functions
             )
 
-            for chunk in stream:
-                # 检查是否存在有效的choice且content不为空
-                if getattr(chunk, "choices", None):
-                    yield chunk.choices[0].delta.content, chunk.choices[
-                        0
-                    ].delta.tool_calls
-                # 存在 CompletionUsage 消息时，生成 Token 消耗 log
-                elif isinstance(getattr(chunk, "usage", None), CompletionUsage):
-                    usage_info = getattr(chunk, "usage", None)
-                    logger.bind(tag=TAG).info(
-                        f"Token 消耗：输入 {getattr(usage_info, 'prompt_tokens', '未知')}，"
-                        f"输出 {getattr(usage_info, 'completion_tokens', '未知')}，"
-                        f"共计 {getattr(usage_info, 'total_tokens', '未知')}"
-                    )
+            with self._close_on_cancel(stream, cancel_token):
+                for chunk in stream:
+                    # 检查是否存在有效的choice且content不为空
+                    if getattr(chunk, "choices", None):
+                        yield chunk.choices[0].delta.content, chunk.choices[
+                            0
+                        ].delta.tool_calls
+                    # 存在 CompletionUsage 消息时，生成 Token 消耗 log
+                    elif isinstance(getattr(chunk, "usage", None), CompletionUsage):
+                        usage_info = getattr(chunk, "usage", None)
+                        logger.bind(tag=TAG).info(
+                            f"Token 消耗：输入 {getattr(usage_info, 'prompt_tokens', '未知')}，"
+                            f"输出 {getattr(usage_info, 'completion_tokens', '未知')}，"
+                            f"共计 {getattr(usage_info, 'total_tokens', '未知')}"
+                        )
 
         except Exception as e:
+            if cancel_token is not None and cancel_token.cancelled:
+                logger.bind(tag=TAG).debug(f"LLM流已随打断关闭: {e}")
+                return
             logger.bind(tag=TAG).error(f"Error in function call streaming: {e}")
             yield f"【OpenAI服务响应异常: {e}】", None
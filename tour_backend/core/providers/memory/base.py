@@ -1,11 +1,24 @@
+import asyncio
 from abc import ABC, abstractmethod
 from config.logger import setup_logging
+from core.utils.cache.manager import cache_manager
+from core.utils.cache.config import CacheType
 
 TAG = __name__
 logger = setup_logging()
 
+# 缓存键 -> 进行中的记忆查询，所有连接共用服务事件循环
+_inflight_queries = {}
+
 
 class MemoryProviderBase(ABC):
+    # 断开连接时是否需要提交记忆总结
+    saves_memory = True
+    # 查询结果是否按角色缓存并支持预取（远程记忆服务开启，本地记忆的查询本身没有开销）
+    cache_query = False
+    # 查询结果缓存时间（秒）
+    query_cache_ttl = 30
+
     def __init__(self, config):
         self.config = config
         self.role_id = None
@@ -26,3 +39,53 @@ class MemoryProviderBase(ABC):
     def init_memory(self, role_id, llm, **kwargs):
         self.role_id = role_id
         self.llm = llm
+
+    def refresh_memory(self):
+        """总结前重新读取已保存的记忆，默认无需处理"""
+        pass
+
+    def prefetch_memory(self, query: str):
+        """ASR结果出来后在事件循环中提前发起查询，query_memory_cached 通过单飞复用结果"""
+        if not self.cache_query or self.role_id is None:
+            return
+        cache_key = self._query_cache_key(query)
+        if cache_manager.get(CacheType.MEMORY_QUERY, cache_key) is not None:
+            return
+        self._start_query(query)
+
+    async def query_memory_cached(self, query: str) -> str:
+        """带缓存的记忆查询，需要在服务事件循环中调用"""
+        if not self.cache_query or self.role_id is None:
+            return await self.query_memory(query)
+        cached = cache_manager.get(CacheType.MEMORY_QUERY, self._query_cache_key(query))
+        if cached is not None:
+            return cached
+        # 调用方超时放弃等待时，查询继续完成并写入缓存
+        return await asyncio.shield(self._start_query(query))
+
+    def invalidate_query_cache(self):
+        """角色记忆更新后丢弃该角色的查询缓存"""
+        if self.cache_query and self.role_id is not None:
+            cache_manager.invalidate_pattern(CacheType.MEMORY_QUERY, f"{self.role_id}:")
+
+    def _query_cache_key(self, query: str) -> str:
+        return f"{self.role_id}:{query}"
+
+    def _start_query(self, query: str):
+        """单飞：同一角色相同文本的查询在完成前只发起一次"""
+        cache_key = self._query_cache_key(query)
+        task = _inflight_queries.get(cache_key)
+        if task is None:
+            task = asyncio.ensure_future(self._query_and_cache(cache_key, query))
+            _inflight_queries[cache_key] = task
+            task.add_done_callback(lambda _: _inflight_queries.pop(cache_key, None))
+        return task
+
+    async def _query_and_cache(self, cache_key: str, query: str):
+        result = await self.query_memory(query)
+        # 查询失败时返回None，不缓存
+        if result is not None:
+            cache_manager.set(
+                CacheType.MEMORY_QUERY, cache_key, result, ttl=self.query_cache_ttl
+            )
+        return result
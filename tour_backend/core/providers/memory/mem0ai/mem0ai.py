@@ -1,17 +1,44 @@
+import threading
 import traceback
 
+import httpx
 from ..base import MemoryProviderBase, logger
-from mem0 import MemoryClient
+from mem0 import AsyncMemoryClient, MemoryClient
 from core.utils.util import check_model_key
 
 TAG = __name__
 
+# api_key -> 进程内共享的异步客户端（连接池），所有连接的查询都在服务事件循环中执行
+_async_clients = {}
+_async_clients_lock = threading.Lock()
+
+
+def _get_async_client(api_key, max_connections, timeout):
+    client = _async_clients.get(api_key)
+    if client is None:
+        with _async_clients_lock:
+            client = _async_clients.get(api_key)
+            if client is None:
+                http_client = httpx.AsyncClient(
+                    limits=httpx.Limits(
+                        max_connections=max_connections,
+                        max_keepalive_connections=max_connections,
+                    ),
+                    timeout=timeout,
+                )
+                client = AsyncMemoryClient(api_key=api_key, client=http_client)
+                _async_clients[api_key] = client
+    return client
+
 
 class MemoryProvider(MemoryProviderBase):
+    cache_query = True
+
     def __init__(self, config, summary_memory=None):
         super().__init__(config)
         self.api_key = config.get("api_key", "")
         self.api_version = config.get("api_version", "v1.1")
+        self.query_cache_ttl = float(config.get("query_cache_ttl", 30))
         model_key_msg = check_model_key("Mem0ai", self.api_key)
         if model_key_msg:
             logger.bind(tag=TAG).error(model_key_msg)
@@ -21,7 +48,14 @@ class MemoryProvider(MemoryProviderBase):
             self.use_mem0 = True
 
         try:
+            # 保存记忆在记忆总结队列的工作线程中执行，使用同步客户端
             self.client = MemoryClient(api_key=self.api_key)
+            # 查询在对话链路上，使用共享连接池的异步客户端，不阻塞事件循环
+            self.async_client = _get_async_client(
+                self.api_key,
+                int(config.get("max_connections", 20)),
+                float(config.get("query_timeout", 10)),
+            )
             logger.bind(tag=TAG).info("成功连接到 Mem0ai 服务")
         except Exception as e:
             logger.bind(tag=TAG).error(f"连接到 Mem0ai 服务时发生错误: {str(e)}")
@@ -53,7 +87,7 @@ class MemoryProvider(MemoryProviderBase):
         if not self.use_mem0:
             return ""
         try:
-            results = self.client.search(
+            results = await self.async_client.search(
                 query, user_id=self.role_id, output_format=self.api_version
             )
             if not results or "results" not in results:
@@ -84,4 +118,5 @@ class MemoryProvider(MemoryProviderBase):
             return memories_str
         except Exception as e:
             logger.bind(tag=TAG).error(f"查询记忆失败: {str(e)}")
-            return ""
+            # 返回None表示查询失败，不写入缓存
+            return None
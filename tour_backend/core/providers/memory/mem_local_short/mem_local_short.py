@@ -1,11 +1,10 @@
 from ..base import MemoryProviderBase, logger
 import time
 import json
-import os
-import yaml
-from config.config_loader import get_project_dir
-from config.manage_api_client import save_mem_local_short
+from config.config_loader import get_project_dir, invalidate_private_config
+from config.manage_api_client import save_mem_local_short_async
 from core.utils.util import check_model_key
+from core.utils.memory_store import get_memory_store
 
 
 short_term_memory_prompt = """
@@ -111,7 +110,11 @@ class MemoryProvider(MemoryProviderBase):
         super().__init__(config)
         self.short_memory = ""
         self.save_to_file = True
-        self.memory_path = get_project_dir() + "data/.memory.yaml"
+        # 按角色索引的本地存储，首次打开时导入旧版 data/.memory.yaml
+        self.store = get_memory_store(
+            get_project_dir() + "data/.memory.db",
+            legacy_yaml_path=get_project_dir() + "data/.memory.yaml",
+        )
         self.load_memory(summary_memory)
 
     def init_memory(
@@ -127,21 +130,19 @@ class MemoryProvider(MemoryProviderBase):
             self.short_memory = summary_memory
             return
 
-        all_memory = {}
-        if os.path.exists(self.memory_path):
-            with open(self.memory_path, "r", encoding="utf-8") as f:
-                all_memory = yaml.safe_load(f) or {}
-        if self.role_id in all_memory:
-            self.short_memory = all_memory[self.role_id]
+        if self.role_id is None:
+            return
+        memory = self.store.get(self.role_id)
+        if memory is not None:
+            self.short_memory = memory
+
+    def refresh_memory(self):
+        # 排队期间同一角色可能已有新的总结写入存储
+        if self.save_to_file:
+            self.load_memory(None)
 
     def save_memory_to_file(self):
-        all_memory = {}
-        if os.path.exists(self.memory_path):
-            with open(self.memory_path, "r", encoding="utf-8") as f:
-                all_memory = yaml.safe_load(f) or {}
-        all_memory[self.role_id] = self.short_memory
-        with open(self.memory_path, "w", encoding="utf-8") as f:
-            yaml.dump(all_memory, f, allow_unicode=True)
+        self.store.put(self.role_id, self.short_memory)
 
     async def save_memory(self, msgs):
         # 打印使用的模型信息
@@ -193,7 +194,9 @@ class MemoryProvider(MemoryProviderBase):
                 max_tokens=2000,
                 temperature=0.2,
             )
-            save_mem_local_short(self.role_id, result)
+            await save_mem_local_short_async(self.role_id, result)
+            # 差异化配置中带有总结记忆，下次连接需要重新获取
+            invalidate_private_config(self.role_id)
         logger.bind(tag=TAG).info(f"Save memory successful - Role: {self.role_id}")
 
         return self.short_memory
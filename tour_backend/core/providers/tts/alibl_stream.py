@@ -6,11 +6,13 @@ import queue
 import asyncio
 import traceback
 import websockets
+from functools import partial
 from asyncio import Task
 from config.logger import setup_logging
 from core.utils import opus_encoder_utils
 from core.utils.tts import MarkdownCleaner
 from core.providers.tts.base import TTSProviderBase
+from core.utils.ws_pool import get_ws_pool, pool_key
 from core.providers.tts.dto.dto import SentenceType, ContentType, InterfaceType
 
 TAG = __name__
@@ -28,8 +30,12 @@ class TTSProvider(TTSProviderBase):
             raise ValueError("api_key is required for CosyVoice TTS")
 
         # WebSocket配置
-        self.ws_url = "wss://dashscope.aliyuncs.com/api-ws/v1/inference/"
+        self.ws_url = config.get(
+            "ws_url", "wss://dashscope.aliyuncs.com/api-ws/v1/inference/"
+        )
         self.ws = None
+        # 服务级上游连接池，未开启时为None
+        self.ws_pool = None
         self._monitor_task = None
         self.last_active_time = None
 
@@ -66,22 +72,35 @@ class TTSProvider(TTSProviderBase):
         )
 
     async def _ensure_connection(self):
-        """确保WebSocket连接可用，支持60秒内连接复用"""
+        """确保WebSocket连接可用，开启连接池时从池中借出预热连接，否则支持60秒内连接复用"""
         try:
             current_time = time.time()
-            if self.ws and current_time - self.last_active_time < 60:
-                # 一分钟内才可以复用链接进行连续对话
-                logger.bind(tag=TAG).info(f"使用已有链接...")
-                return self.ws
-            logger.bind(tag=TAG).info("开始建立新连接...")
-
-            self.ws = await websockets.connect(
+            connector = partial(
+                websockets.connect,
                 self.ws_url,
                 additional_headers=self.header,
                 ping_interval=30,
                 ping_timeout=10,
                 close_timeout=10,
             )
+            self.ws_pool = get_ws_pool(
+                self.conn.config,
+                pool_key("alibl_stream", self.ws_url, self.api_key),
+                connector,
+            )
+            if self.ws_pool is not None:
+                if self.ws is None:
+                    self.ws = await self.ws_pool.lease()
+                self.last_active_time = current_time
+                return self.ws
+
+            if self.ws and current_time - self.last_active_time < 60:
+                # 一分钟内才可以复用链接进行连续对话
+                logger.bind(tag=TAG).info(f"使用已有链接...")
+                return self.ws
+            logger.bind(tag=TAG).info("开始建立新连接...")
+
+            self.ws = await connector()
 
             logger.bind(tag=TAG).info("WebSocket连接建立成功")
             self.last_active_time = current_time
@@ -92,6 +111,20 @@ class TTSProvider(TTSProviderBase):
             self.last_active_time = None
             raise
 
+    async def _drop_ws(self, reusable=False):
+        """归还（连接池）或关闭当前上游连接"""
+        ws, self.ws = self.ws, None
+        self.last_active_time = None
+        if ws is None:
+            return
+        if self.ws_pool is not None:
+            await self.ws_pool.release(ws, reusable)
+            return
+        try:
+            await ws.close()
+        except:
+            pass
+
     def tts_text_priority_thread(self):
         """流式TTS文本处理线程"""
         while not self.conn.stop_event.is_set():
@@ -201,12 +234,7 @@ class TTSProvider(TTSProviderBase):
 
         except Exception as e:
             logger.bind(tag=TAG).error(f"发送TTS文本失败: {str(e)}")
-            if self.ws:
-                try:
-                    await self.ws.close()
-                except:
-                    pass
-                self.ws = None
+            await self._drop_ws()
             raise
 
     async def start_session(self, session_id):
@@ -311,13 +339,7 @@ class TTSProvider(TTSProviderBase):
             self._monitor_task = None
 
         # 关闭WebSocket连接
-        if self.ws:
-            try:
-                await self.ws.close()
-            except:
-                pass
-            self.ws = None
-            self.last_active_time = None
+        await self._drop_ws()
 
     async def _start_monitor_tts_response(self):
         """监听TTS响应"""
@@ -378,13 +400,12 @@ class TTSProvider(TTSProviderBase):
                     )
                     break
 
+            if self.ws_pool is not None:
+                # 会话结束即归还连接，正常结束的连接留给下一个会话
+                await self._drop_ws(reusable=session_finished)
             # 仅在连接异常且非正常结束时才关闭连接
-            if not session_finished and self.ws:
-                try:
-                    await self.ws.close()
-                except:
-                    pass
-                self.ws = None
+            elif not session_finished and self.ws:
+                await self._drop_ws()
         # 监听任务退出时清理引用
         finally:
             self._monitor_task = None
@@ -10,10 +10,12 @@ import asyncio
 import traceback
 from asyncio import Task
 import websockets
+from functools import partial
 import os
 from datetime import datetime
 from urllib import parse
 from core.providers.tts.base import TTSProviderBase
+from core.utils.ws_pool import get_ws_pool, pool_key
 from core.providers.tts.dto.dto import SentenceType, ContentType, InterfaceType
 from core.utils.tts import MarkdownCleaner
 from core.utils import opus_encoder_utils, textUtils
@@ -128,6 +130,8 @@ class TTSProvider(TTSProviderBase):
             # 默认使用wss协议
             self.ws_url = f"wss://{self.host}/ws/v1"
         self.ws = None
+        # 服务级上游连接池，未开启时为None
+        self.ws_pool = None
         self._monitor_task = None
         self.last_active_time = None
 
@@ -178,12 +182,38 @@ class TTSProvider(TTSProviderBase):
         return time.time() > self.expire_time
 
     async def _ensure_connection(self):
-        """确保WebSocket连接可用"""
+        """确保WebSocket连接可用，开启连接池时从池中借出预热连接"""
         try:
             if self._is_token_expired():
                 logger.bind(tag=TAG).warning("Token已过期，正在自动刷新...")
                 self._refresh_token()
             current_time = time.time()
+            # 每次都用当前Token更新建连工厂，Token刷新后新建的连接使用新Token
+            connector = partial(
+                websockets.connect,
+                self.ws_url,
+                additional_headers={"X-NLS-Token": self.token},
+                ping_interval=30,
+                ping_timeout=10,
+                close_timeout=10,
+            )
+            self.ws_pool = get_ws_pool(
+                self.conn.config,
+                pool_key(
+                    "aliyun_stream",
+                    self.ws_url,
+                    self.appkey,
+                    self.access_key_id or self.token,
+                ),
+                connector,
+            )
+            if self.ws_pool is not None:
+                if self.ws is None:
+                    self.ws = await self.ws_pool.lease()
+                self.task_id = uuid.uuid4().hex
+                self.last_active_time = current_time
+                return self.ws
+
             if self.ws and current_time - self.last_active_time < 10:
                 # 10秒内才可以复用链接进行连续对话
                 self.task_id = uuid.uuid4().hex
@@ -191,13 +221,7 @@ class TTSProvider(TTSProviderBase):
                 return self.ws
             logger.bind(tag=TAG).info("开始建立新连接...")
 
-            self.ws = await websockets.connect(
-                self.ws_url,
-                additional_headers={"X-NLS-Token": self.token},
-                ping_interval=30,
-                ping_timeout=10,
-                close_timeout=10,
-            )
+            self.ws = await connector()
             self.task_id = uuid.uuid4().hex
             logger.bind(tag=TAG).info(f"WebSocket连接建立成功, task_id: {self.task_id}")
             self.last_active_time = time.time()
@@ -208,6 +232,20 @@ class TTSProvider(TTSProviderBase):
             self.last_active_time = None
             raise
 
+    async def _drop_ws(self, reusable=False):
+        """归还（连接池）或关闭当前上游连接"""
+        ws, self.ws = self.ws, None
+        self.last_active_time = None
+        if ws is None:
+            return
+        if self.ws_pool is not None:
+            await self.ws_pool.release(ws, reusable)
+            return
+        try:
+            await ws.close()
+        except:
+            pass
+
     def tts_text_priority_thread(self):
         """流式文本处理线程"""
         while not self.conn.stop_event.is_set():
@@ -304,12 +342,7 @@ class TTSProvider(TTSProviderBase):
 
         except Exception as e:
             logger.bind(tag=TAG).error(f"发送TTS文本失败: {str(e)}")
-            if self.ws:
-                try:
-                    await self.ws.close()
-                except:
-                    pass
-                self.ws = None
+            await self._drop_ws()
             raise
 
     async def start_session(self, task_id):
@@ -402,13 +435,7 @@ class TTSProvider(TTSProviderBase):
                 logger.bind(tag=TAG).warning(f"关闭时取消监听任务错误: {e}")
             self._monitor_task = None
 
-        if self.ws:
-            try:
-                await self.ws.close()
-            except:
-                pass
-            self.ws = None
-            self.last_active_time = None
+        await self._drop_ws()
 
     async def _start_monitor_tts_response(self):
         """监听TTS响应"""
@@ -460,13 +487,12 @@ class TTSProvider(TTSProviderBase):
                         f"处理TTS响应时出错: {e}\n{traceback.format_exc()}"
                     )
                     break
+            if self.ws_pool is not None:
+                # 会话结束即归还连接，正常结束的连接留给下一个会话
+                await self._drop_ws(reusable=session_finished)
             # 仅在连接异常时才关闭
-            if not session_finished and self.ws:
-                try:
-                    await self.ws.close()
-                except:
-                    pass
-                self.ws = None
+            elif not session_finished and self.ws:
+                await self._drop_ws()
         # 监听任务退出时清理引用
         finally:
             self._monitor_task = None
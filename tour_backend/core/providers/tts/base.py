@@ -6,6 +6,7 @@ import queue
 import asyncio
 import threading
 import traceback
+from functools import partial
 from core.utils import p3
 from datetime import datetime
 from core.utils import textUtils
@@ -16,7 +17,13 @@ from core.utils.tts import MarkdownCleaner
 from core.utils.output_counter import add_device_output
 from core.handle.reportHandle import enqueue_tts_report
 from core.handle.sendAudioHandle import sendAudioMessage
+from core.utils.async_pipeline import PipelineQueue
+from core.utils.tts_cache import get_tts_cache, tts_cache_params
 from core.utils.util import audio_bytes_to_data_stream, audio_to_data_stream
+from core.utils.opus_encoder_utils import OpusEncoderPool
+from core.utils.tts_lookahead import OrderedAudioRelay
+from core.utils.tts_segmenter import TextSegmenter, get_rolling_estimate
+from core.utils.cancellation import TurnCancelled, is_cancelled, run_cancellable
 from core.providers.tts.dto.dto import (
     TTSMessageDTO,
     SentenceType,
@@ -39,8 +46,9 @@ class TTSProviderBase(ABC):
         self.tts_audio_queue = queue.Queue()
         self.tts_audio_first_sentence = True
         self.before_stop_play_files = []
+        # 本连接复用的Opus编码器，不再每句话新建
+        self.opus_encoder_pool = OpusEncoderPool()
 
-        self.tts_text_buff = []
         self.punctuations = (
             "。",
             "？",
@@ -66,8 +74,24 @@ class TTSProviderBase(ABC):
             "：",
         )
         self.tts_stop_request = False
-        self.processed_chars = 0
-        self.is_first_sentence = True
+        # 增量切句，首句长度按本提供方的TTS首包耗时和LLM出字速度自适应
+        self.ttfb_estimate = get_rolling_estimate(f"tts_ttfb:{type(self).__module__}")
+        self.text_segmenter = TextSegmenter(
+            self.first_sentence_punctuations,
+            self.punctuations,
+            ttfb_estimate=self.ttfb_estimate,
+            llm_rate_estimate=get_rolling_estimate("llm_chars_per_second"),
+        )
+
+        # 需要上报的文本和音频列表
+        self._report_text = None
+        self._report_audio = None
+
+        # 短语级音频缓存，在open_audio_channels中按全局配置获取
+        self.tts_cache = None
+        # 前瞻并行合成，在open_audio_channels中按全局配置开启
+        self.synthesis_relay = None
+        self.tts_cache_params = tts_cache_params(type(self).__module__, config)
 
     def generate_filename(self, extension=".wav"):
         return os.path.join(
@@ -75,32 +99,113 @@ class TTSProviderBase(ABC):
             f"tts-{datetime.now().date()}@{uuid.uuid4().hex}{extension}",
         )
 
-    def handle_opus(self, opus_data: bytes):
+    def handle_opus(self, opus_data: bytes, token=None):
+        """音频帧入队，附带产生它的轮次令牌；未指定时取当前轮次的令牌"""
+        if token is None:
+            token = getattr(self.conn, "turn_token", None)
+        if is_cancelled(token):
+            return
         logger.bind(tag=TAG).debug(f"推送数据到队列里面帧数～～ {len(opus_data)}")
-        self.tts_audio_queue.put((SentenceType.MIDDLE, opus_data, None))
+        self.tts_audio_queue.put((SentenceType.MIDDLE, opus_data, None, token))
 
     def handle_audio_file(self, file_audio: bytes, text):
         self.before_stop_play_files.append((file_audio, text))
 
-    def to_tts_stream(self, text, opus_handler: Callable[[bytes], None] = None) -> None:
+    def _get_tts_cache_key(self, text):
+        if self.tts_cache is None:
+            return None
+        # 需要删除文件时始终输出Opus，否则按设备音频格式输出
+        audio_format = "opus"
+        if not self.delete_audio_file and self.conn and self.conn.audio_format == "pcm":
+            audio_format = "pcm"
+        return self.tts_cache.make_key(f"{self.tts_cache_params}|{audio_format}", text)
+
+    def to_tts_stream(
+        self,
+        text,
+        opus_handler: Callable[[bytes], None] = None,
+        audio_queue=None,
+        token=None,
+    ) -> None:
+        """
+        合成一句话并逐帧回调
+        Args:
+            audio_queue: 句子开始标记写入的队列，默认为tts_audio_queue；前瞻合成时为该句的输出槽位
+            token: 本句所属轮次的令牌，默认取当前轮次的令牌
+        """
+        if audio_queue is None:
+            audio_queue = self.tts_audio_queue
+        # 打断时取消本句进行中的合成请求，并丢弃取消之后才产出的音频帧
+        if token is None:
+            token = getattr(self.conn, "turn_token", None)
+        if opus_handler is None:
+            opus_handler = partial(self.handle_opus, token=token)
+        source_handler = opus_handler
+
+        def opus_handler(frame):
+            if not is_cancelled(token):
+                source_handler(frame)
+
         text = MarkdownCleaner.clean_markdown(text)
+        cache_key = self._get_tts_cache_key(text)
+        if cache_key is not None:
+            frames = self.tts_cache.get(cache_key)
+            if frames is not None:
+                # 命中缓存：不调用TTS，也不重新转码，直接发送已切好的音频帧
+                logger.bind(tag=TAG).debug(f"TTS缓存命中: {text}")
+                if self.delete_audio_file:
+                    audio_queue.put((SentenceType.FIRST, None, text, token))
+                for frame in frames:
+                    opus_handler(frame)
+                return None
+            # 未命中：转发音频帧的同时收集，合成成功后写入缓存
+            cached_frames = []
+
+            def frame_handler(frame):
+                cached_frames.append(frame)
+                opus_handler(frame)
+
+        else:
+            frame_handler = opus_handler
+
+        # 统计首包耗时（从请求到第一帧音频），用于自适应首句长度
+        synthesis_start = time.monotonic()
+        first_frame = True
+        output_handler = frame_handler
+
+        def frame_handler(frame):
+            nonlocal first_frame
+            if first_frame:
+                first_frame = False
+                self.ttfb_estimate.update(time.monotonic() - synthesis_start)
+            output_handler(frame)
+
         max_repeat_time = 5
         if self.delete_audio_file:
             # 需要删除文件的直接转为音频数据
             while max_repeat_time > 0:
                 try:
-                    audio_bytes = asyncio.run(self.text_to_speak(text, None))
+                    audio_bytes = run_cancellable(self.text_to_speak(text, None), token)
                     if audio_bytes:
-                        self.tts_audio_queue.put((SentenceType.FIRST, None, text))
+                        audio_queue.put((SentenceType.FIRST, None, text, token))
+                        if cache_key is not None:
+                            # 转码中途失败重试时丢弃上一次的残缺音频
+                            cached_frames.clear()
                         audio_bytes_to_data_stream(
                             audio_bytes,
                             file_type=self.audio_file_type,
                             is_opus=True,
-                            callback=opus_handler,
+                            callback=frame_handler,
+                            encoder_pool=self.opus_encoder_pool,
                         )
+                        if cache_key is not None:
+                            self.tts_cache.put(cache_key, cached_frames)
                         break
                     else:
                         max_repeat_time -= 1
+                except TurnCancelled:
+                    logger.bind(tag=TAG).debug(f"语音合成随打断取消: {text}")
+                    return None
                 except Exception as e:
                     logger.bind(tag=TAG).warning(
                         f"语音生成失败{5 - max_repeat_time + 1}次: {text}，错误: {e}"
@@ -120,7 +225,12 @@ class TTSProviderBase(ABC):
             try:
                 while not os.path.exists(tmp_file) and max_repeat_time > 0:
                     try:
-                        asyncio.run(self.text_to_speak(text, tmp_file))
+                        run_cancellable(self.text_to_speak(text, tmp_file), token)
+                    except TurnCancelled:
+                        logger.bind(tag=TAG).debug(f"语音合成随打断取消: {text}")
+                        if os.path.exists(tmp_file):
+                            os.remove(tmp_file)
+                        return None
                     except Exception as e:
                         logger.bind(tag=TAG).warning(
                             f"语音生成失败{5 - max_repeat_time + 1}次: {text}，错误: {e}"
@@ -138,8 +248,10 @@ class TTSProviderBase(ABC):
                     logger.bind(tag=TAG).error(
                         f"语音生成失败: {text}，请检查网络或服务是否正常"
                     )
-                    self.tts_audio_queue.put((SentenceType.FIRST, None, text))
-                self._process_audio_file_stream(tmp_file, callback=opus_handler)
+                    audio_queue.put((SentenceType.FIRST, None, text, token))
+                self._process_audio_file_stream(tmp_file, callback=frame_handler)
+                if cache_key is not None and max_repeat_time > 0:
+                    self.tts_cache.put(cache_key, cached_frames)
             except Exception as e:
                 logger.bind(tag=TAG).error(f"Failed to generate TTS file: {e}")
                 return None
@@ -158,7 +270,8 @@ class TTSProviderBase(ABC):
                             audio_bytes,
                             file_type=self.audio_file_type,
                             is_opus=True,
-                            callback=lambda data: audio_datas.append(data)
+                            callback=lambda data: audio_datas.append(data),
+                            encoder_pool=self.opus_encoder_pool,
                         )
                         return audio_datas
                     else:
@@ -214,13 +327,23 @@ class TTSProviderBase(ABC):
         self, audio_file_path, callback: Callable[[Any], Any] = None
     ):
         """音频文件转换为PCM编码"""
-        return audio_to_data_stream(audio_file_path, is_opus=False, callback=callback)
+        return audio_to_data_stream(
+            audio_file_path,
+            is_opus=False,
+            callback=callback,
+            encoder_pool=self.opus_encoder_pool,
+        )
 
     def audio_to_opus_data_stream(
         self, audio_file_path, callback: Callable[[Any], Any] = None
     ):
         """音频文件转换为Opus编码"""
-        return audio_to_data_stream(audio_file_path, is_opus=True, callback=callback)
+        return audio_to_data_stream(
+            audio_file_path,
+            is_opus=True,
+            callback=callback,
+            encoder_pool=self.opus_encoder_pool,
+        )
 
     def tts_one_sentence(
         self,
@@ -252,17 +375,57 @@ class TTSProviderBase(ABC):
 
     async def open_audio_channels(self, conn):
         self.conn = conn
+        self.tts_cache = get_tts_cache(conn.config)
+        self.text_segmenter.configure(conn.config.get("tts_segment"))
+        lookahead_config = conn.config.get("tts_lookahead") or {}
+        max_parallel = int(lookahead_config.get("max_parallel", 3))
+        if (
+            lookahead_config.get("enable", False)
+            and max_parallel > 1
+            and self.interface_type == InterfaceType.NON_STREAM
+            and type(self).tts_text_priority_thread
+            is TTSProviderBase.tts_text_priority_thread
+        ):
+            # 只有使用默认文本处理流程的非流式TTS逐句合成，流式TTS自行管理上游连接
+            self.synthesis_relay = OrderedAudioRelay(
+                lambda: self.tts_audio_queue, max_parallel
+            )
+        if conn.async_pipeline:
+            # 音频播放阶段以asyncio任务运行
+            self.tts_audio_queue = self._switch_to_pipeline_queue(self.tts_audio_queue)
+            conn.start_pipeline_task(self._audio_play_priority_task())
+            # 流式TTS重写了文本处理线程，依赖阻塞式队列，仍使用独立线程
+            if (
+                type(self).tts_text_priority_thread
+                is TTSProviderBase.tts_text_priority_thread
+            ):
+                self.tts_text_queue = self._switch_to_pipeline_queue(
+                    self.tts_text_queue
+                )
+                conn.start_pipeline_task(self.tts_text_priority_task())
+                return
+        else:
+            # 音频播放 消化线程
+            self.audio_play_priority_thread = threading.Thread(
+                target=self._audio_play_priority_thread, daemon=True
+            )
+            self.audio_play_priority_thread.start()
+
         # tts 消化线程
         self.tts_priority_thread = threading.Thread(
             target=self.tts_text_priority_thread, daemon=True
         )
         self.tts_priority_thread.start()
 
-        # 音频播放 消化线程
-        self.audio_play_priority_thread = threading.Thread(
-            target=self._audio_play_priority_thread, daemon=True
-        )
-        self.audio_play_priority_thread.start()
+    def _switch_to_pipeline_queue(self, old_queue):
+        """替换为绑定事件循环的队列，并转移已入队的数据"""
+        new_queue = PipelineQueue(self.conn.loop)
+        while True:
+            try:
+                new_queue.put(old_queue.get_nowait())
+            except queue.Empty:
+                break
+        return new_queue
 
     # 这里默认是非流式的处理方式
     # 流式处理方式请在子类中重写
@@ -270,36 +433,7 @@ class TTSProviderBase(ABC):
         while not self.conn.stop_event.is_set():
             try:
                 message = self.tts_text_queue.get(timeout=1)
-                if message.sentence_type == SentenceType.FIRST:
-                    self.conn.client_abort = False
-                if self.conn.client_abort:
-                    logger.bind(tag=TAG).info("收到打断信息，终止TTS文本处理线程")
-                    continue
-                if message.sentence_type == SentenceType.FIRST:
-                    # 初始化参数
-                    self.tts_stop_request = False
-                    self.processed_chars = 0
-                    self.tts_text_buff = []
-                    self.is_first_sentence = True
-                    self.tts_audio_first_sentence = True
-                elif ContentType.TEXT == message.content_type:
-                    self.tts_text_buff.append(message.content_detail)
-                    segment_text = self._get_segment_text()
-                    if segment_text:
-                        self.to_tts_stream(segment_text, opus_handler=self.handle_opus)
-                elif ContentType.FILE == message.content_type:
-                    self._process_remaining_text_stream(opus_handler=self.handle_opus)
-                    tts_file = message.content_file
-                    if tts_file and os.path.exists(tts_file):
-                        self._process_audio_file_stream(
-                            tts_file, callback=self.handle_opus
-                        )
-                if message.sentence_type == SentenceType.LAST:
-                    self._process_remaining_text_stream(opus_handler=self.handle_opus)
-                    self.tts_audio_queue.put(
-                        (message.sentence_type, [], message.content_detail)
-                    )
-
+                self._process_tts_text_message(message)
             except queue.Empty:
                 continue
             except Exception as e:
@@ -308,53 +442,173 @@ class TTSProviderBase(ABC):
                 )
                 continue
 
+    async def tts_text_priority_task(self):
+        """TTS文本处理任务（异步流水线模式），阻塞的合成调用提交到共享线程池"""
+        loop = asyncio.get_running_loop()
+        while not self.conn.stop_event.is_set():
+            message = await self.tts_text_queue.get()
+            try:
+                await loop.run_in_executor(
+                    self.conn.executor, self._process_tts_text_message, message
+                )
+            except Exception as e:
+                logger.bind(tag=TAG).error(
+                    f"处理TTS文本失败: {str(e)}, 类型: {type(e).__name__}, 堆栈: {traceback.format_exc()}"
+                )
+
+    def _process_tts_text_message(self, message):
+        """处理单条TTS文本消息"""
+        if message.sentence_type == SentenceType.FIRST:
+            self.conn.client_abort = False
+        if self.conn.client_abort:
+            logger.bind(tag=TAG).info("收到打断信息，终止TTS文本处理线程")
+            return
+        # 本条消息产生的音频都带上当前轮次的令牌，打断后已产出的音频在播放和发送前丢弃
+        token = getattr(self.conn, "turn_token", None)
+        opus_handler = partial(self.handle_opus, token=token)
+        if message.sentence_type == SentenceType.FIRST:
+            # 初始化参数
+            self.tts_stop_request = False
+            self.text_segmenter.reset()
+            self.tts_audio_first_sentence = True
+        elif ContentType.TEXT == message.content_type:
+            segment_text = self._get_segment_text(message.content_detail)
+            if segment_text:
+                self._synthesize_segment(segment_text, token=token)
+        elif ContentType.FILE == message.content_type:
+            self._process_remaining_text_stream(token=token)
+            tts_file = message.content_file
+            if tts_file and os.path.exists(tts_file):
+                if self.synthesis_relay is not None:
+                    # 排在已提交的句子之后播放
+                    slot = self.synthesis_relay.new_slot()
+                    try:
+                        self._process_audio_file_stream(
+                            tts_file,
+                            callback=lambda data: slot.put(
+                                (SentenceType.MIDDLE, data, None, token)
+                            ),
+                        )
+                    finally:
+                        slot.finish()
+                else:
+                    self._process_audio_file_stream(tts_file, callback=opus_handler)
+        if message.sentence_type == SentenceType.LAST:
+            self._process_remaining_text_stream(token=token)
+            item = (message.sentence_type, [], message.content_detail, token)
+            if self.synthesis_relay is not None:
+                self.synthesis_relay.put(item)
+            else:
+                self.tts_audio_queue.put(item)
+
+    def _synthesize_segment(self, segment_text, opus_handler=None, token=None):
+        """合成一句话：开启前瞻时提交到并行合成池，按顺序写入音频队列，否则同步合成"""
+        if token is None:
+            token = getattr(self.conn, "turn_token", None)
+        if self.synthesis_relay is None or opus_handler is not None:
+            self.to_tts_stream(segment_text, opus_handler=opus_handler, token=token)
+            return
+
+        def synthesize(slot):
+            self.to_tts_stream(
+                segment_text,
+                opus_handler=lambda data: slot.put(
+                    (SentenceType.MIDDLE, data, None, token)
+                ),
+                audio_queue=slot,
+                token=token,
+            )
+
+        self.synthesis_relay.submit(synthesize)
+
+    def cancel_pending_synthesis(self):
+        """打断时丢弃前瞻合成中尚未播放的句子"""
+        if self.synthesis_relay is not None:
+            self.synthesis_relay.cancel()
+
+    def cancel_turn(self):
+        """打断时关闭流式TTS的上游会话连接，不再等待上游的下一条消息
+        非流式合成请求由 to_tts_stream 中注册的取消令牌取消"""
+        drop_ws = getattr(self, "_drop_ws", None)
+        if drop_ws is None or getattr(self, "ws", None) is None or self.conn is None:
+            return
+        asyncio.run_coroutine_threadsafe(drop_ws(), self.conn.loop)
+
     def _audio_play_priority_thread(self):
-        # 需要上报的文本和音频列表
-        enqueue_text = None
-        enqueue_audio = None
         while not self.conn.stop_event.is_set():
             text = None
             try:
                 try:
-                    sentence_type, audio_datas, text = self.tts_audio_queue.get(
-                        timeout=0.1
-                    )
+                    item = self.tts_audio_queue.get(timeout=0.1)
                 except queue.Empty:
                     if self.conn.stop_event.is_set():
                         break
                     continue
+                sentence_type, audio_datas, text, token = self._unpack_audio_item(item)
 
-                if self.conn.client_abort:
-                    logger.bind(tag=TAG).debug("收到打断信号，跳过当前音频数据")
-                    enqueue_text, enqueue_audio = None, []
+                if not self._before_play_audio(sentence_type, audio_datas, text, token):
                     continue
 
-                # 收到下一个文本开始或会话结束时进行上报
-                if sentence_type is not SentenceType.MIDDLE:
-                    # 上报TTS数据
-                    if enqueue_text is not None and enqueue_audio is not None:
-                        enqueue_tts_report(self.conn, enqueue_text, enqueue_audio)
-                    enqueue_audio = []
-                    enqueue_text = text
-
-                # 收集上报音频数据
-                if isinstance(audio_datas, bytes) and enqueue_audio is not None:
-                    enqueue_audio.append(audio_datas)
-
                 # 发送音频
                 future = asyncio.run_coroutine_threadsafe(
-                    sendAudioMessage(self.conn, sentence_type, audio_datas, text),
+                    sendAudioMessage(self.conn, sentence_type, audio_datas, text, token),
                     self.conn.loop,
                 )
                 future.result()
 
-                # 记录输出和报告
-                if self.conn.max_output_size > 0 and text:
-                    add_device_output(self.conn.headers.get("device-id"), len(text))
+                self._after_play_audio(text)
 
             except Exception as e:
                 logger.bind(tag=TAG).error(f"audio_play_priority_thread: {text} {e}")
 
+    async def _audio_play_priority_task(self):
+        """音频播放任务（异步流水线模式），直接在事件循环中发送音频"""
+        while not self.conn.stop_event.is_set():
+            item = await self.tts_audio_queue.get()
+            sentence_type, audio_datas, text, token = self._unpack_audio_item(item)
+            try:
+                if not self._before_play_audio(sentence_type, audio_datas, text, token):
+                    continue
+                await sendAudioMessage(
+                    self.conn, sentence_type, audio_datas, text, token
+                )
+                self._after_play_audio(text)
+            except Exception as e:
+                logger.bind(tag=TAG).error(f"audio_play_priority_task: {text} {e}")
+
+    def _unpack_audio_item(self, item):
+        """音频队列中的项为 (句子类型, 音频, 文本[, 轮次令牌])，
+        流式TTS等未附带令牌的按取出时的当前轮次处理"""
+        if len(item) > 3:
+            return item
+        sentence_type, audio_datas, text = item
+        return sentence_type, audio_datas, text, getattr(self.conn, "turn_token", None)
+
+    def _before_play_audio(self, sentence_type, audio_datas, text, token=None) -> bool:
+        """播放前收集上报数据，返回False表示所属轮次已被打断，跳过本段音频"""
+        if is_cancelled(token):
+            logger.bind(tag=TAG).debug("收到打断信号，跳过当前音频数据")
+            self._report_text, self._report_audio = None, []
+            return False
+
+        # 收到下一个文本开始或会话结束时进行上报
+        if sentence_type is not SentenceType.MIDDLE:
+            # 上报TTS数据
+            if self._report_text is not None and self._report_audio is not None:
+                enqueue_tts_report(self.conn, self._report_text, self._report_audio)
+            self._report_audio = []
+            self._report_text = text
+
+        # 收集上报音频数据
+        if isinstance(audio_datas, bytes) and self._report_audio is not None:
+            self._report_audio.append(audio_datas)
+        return True
+
+    def _after_play_audio(self, text):
+        # 记录输出和报告
+        if self.conn.max_output_size > 0 and text:
+            add_device_output(self.conn.headers.get("device-id"), len(text))
+
     async def start_session(self, session_id):
         pass
 
@@ -363,47 +617,17 @@ class TTSProviderBase(ABC):
 
     async def close(self):
         """资源清理方法"""
+        if self.synthesis_relay is not None:
+            self.synthesis_relay.shutdown()
         if hasattr(self, "ws") and self.ws:
             await self.ws.close()
 
-    def _get_segment_text(self):
-        # 合并当前全部文本并处理未分割部分
-        full_text = "".join(self.tts_text_buff)
-        current_text = full_text[self.processed_chars :]  # 从未处理的位置开始
-        last_punct_pos = -1
-
-        # 根据是否是第一句话选择不同的标点符号集合
-        punctuations_to_use = (
-            self.first_sentence_punctuations
-            if self.is_first_sentence
-            else self.punctuations
-        )
-
-        for punct in punctuations_to_use:
-            pos = current_text.rfind(punct)
-            if (pos != -1 and last_punct_pos == -1) or (
-                pos != -1 and pos < last_punct_pos
-            ):
-                last_punct_pos = pos
-
-        if last_punct_pos != -1:
-            segment_text_raw = current_text[: last_punct_pos + 1]
-            segment_text = textUtils.get_string_no_punctuation_or_emoji(
-                segment_text_raw
-            )
-            self.processed_chars += len(segment_text_raw)  # 更新已处理字符位置
-
-            # 如果是第一句话，在找到第一个逗号后，将标志设置为False
-            if self.is_first_sentence:
-                self.is_first_sentence = False
-
-            return segment_text
-        elif self.tts_stop_request and current_text:
-            segment_text = current_text
-            self.is_first_sentence = True  # 重置标志
-            return segment_text
-        else:
-            return None
+    def _get_segment_text(self, text):
+        """追加LLM新输出的文本，切出完整的一句时返回去掉标点和表情后的文本"""
+        segment_text_raw = self.text_segmenter.feed(text)
+        if segment_text_raw:
+            return textUtils.get_string_no_punctuation_or_emoji(segment_text_raw)
+        return None
 
     def _process_audio_file_stream(
         self, tts_file, callback: Callable[[Any], Any]
@@ -436,19 +660,19 @@ class TTSProviderBase(ABC):
         self.tts_audio_queue.put((SentenceType.LAST, [], None))
 
     def _process_remaining_text_stream(
-        self, opus_handler: Callable[[bytes], None] = None
+        self, opus_handler: Callable[[bytes], None] = None, token=None
     ):
         """处理剩余的文本并生成语音
 
         Returns:
             bool: 是否成功处理了文本
         """
-        full_text = "".join(self.tts_text_buff)
-        remaining_text = full_text[self.processed_chars :]
+        remaining_text = self.text_segmenter.take_remaining()
         if remaining_text:
             segment_text = textUtils.get_string_no_punctuation_or_emoji(remaining_text)
             if segment_text:
-                self.to_tts_stream(segment_text, opus_handler=opus_handler)
-                self.processed_chars += len(full_text)
+                self._synthesize_segment(
+                    segment_text, opus_handler=opus_handler, token=token
+                )
                 return True
         return False
@@ -4,6 +4,7 @@ import json
 import queue
 import asyncio
 import traceback
+from functools import partial
 from typing import Callable, Any
 import websockets
 from core.utils.tts import MarkdownCleaner
@@ -11,6 +12,7 @@ from config.logger import setup_logging
 from core.utils import opus_encoder_utils
 from core.utils.util import check_model_key
 from core.providers.tts.base import TTSProviderBase
+from core.utils.ws_pool import get_ws_pool, pool_key
 from core.providers.tts.dto.dto import SentenceType, ContentType, InterfaceType
 from asyncio import Task
 
@@ -139,10 +141,28 @@ class Response:
         return super().__str__()
 
 
+async def _connect_upstream(ws_url, app_id, access_token, resource_id):
+    """
+    建立火山双流式上游WebSocket连接
+    连接池会长期持有建连工厂，这里只接收凭据值，不引用提供方实例及其访客连接
+    """
+    ws_header = {
+        "X-Api-App-Key": app_id,
+        "X-Api-Access-Key": access_token,
+        "X-Api-Resource-Id": resource_id,
+        "X-Api-Connect-Id": uuid.uuid4(),
+    }
+    return await websockets.connect(
+        ws_url, additional_headers=ws_header, max_size=1000000000
+    )
+
+
 class TTSProvider(TTSProviderBase):
     def __init__(self, config, delete_audio_file):
         super().__init__(config, delete_audio_file)
         self.ws = None
+        # 服务级上游连接池，未开启时为None
+        self.ws_pool = None
         self.interface_type = InterfaceType.DUAL_STREAM
         self._monitor_task = None  # 监听任务引用
         self.appId = config.get("appid")
@@ -181,22 +201,36 @@ class TTSProvider(TTSProviderBase):
             raise
 
     async def _ensure_connection(self):
-        """建立新的WebSocket连接，并启动监听任务（仅第一次）"""
+        """建立新的WebSocket连接（开启连接池时从池中借出），并启动监听任务"""
         try:
             if self.ws:
                 logger.bind(tag=TAG).info(f"使用已有链接...")
                 return self.ws
-            logger.bind(tag=TAG).info("开始建立新连接...")
-            ws_header = {
-                "X-Api-App-Key": self.appId,
-                "X-Api-Access-Key": self.access_token,
-                "X-Api-Resource-Id": self.resource_id,
-                "X-Api-Connect-Id": uuid.uuid4(),
-            }
-            self.ws = await websockets.connect(
-                self.ws_url, additional_headers=ws_header, max_size=1000000000
+
+            connector = partial(
+                _connect_upstream,
+                self.ws_url,
+                self.appId,
+                self.access_token,
+                self.resource_id,
             )
-            logger.bind(tag=TAG).info("WebSocket连接建立成功")
+            self.ws_pool = get_ws_pool(
+                self.conn.config,
+                pool_key(
+                    "huoshan_double_stream",
+                    self.ws_url,
+                    self.appId,
+                    self.access_token,
+                    self.resource_id,
+                ),
+                connector,
+            )
+            if self.ws_pool is not None:
+                self.ws = await self.ws_pool.lease()
+            else:
+                logger.bind(tag=TAG).info("开始建立新连接...")
+                self.ws = await connector()
+                logger.bind(tag=TAG).info("WebSocket连接建立成功")
             
             # 连接建立成功后，启动监听任务
             if self._monitor_task is None or self._monitor_task.done():
@@ -209,6 +243,19 @@ class TTSProvider(TTSProviderBase):
             self.ws = None
             raise
 
+    async def _drop_ws(self, reusable=False):
+        """归还（连接池）或关闭当前上游连接"""
+        ws, self.ws = self.ws, None
+        if ws is None:
+            return
+        if self.ws_pool is not None:
+            await self.ws_pool.release(ws, reusable)
+            return
+        try:
+            await ws.close()
+        except:
+            pass
+
     def tts_text_priority_thread(self):
         """火山引擎双流式TTS的文本处理线程"""
         while not self.conn.stop_event.is_set():
@@ -311,12 +358,7 @@ class TTSProvider(TTSProviderBase):
             return
         except Exception as e:
             logger.bind(tag=TAG).error(f"发送TTS文本失败: {str(e)}")
-            if self.ws:
-                try:
-                    await self.ws.close()
-                except:
-                    pass
-                self.ws = None
+            await self._drop_ws()
             raise
 
     async def start_session(self, session_id):
@@ -415,12 +457,7 @@ class TTSProvider(TTSProviderBase):
                 logger.bind(tag=TAG).warning(f"关闭时取消监听任务错误: {e}")
             self._monitor_task = None
 
-        if self.ws:
-            try:
-                await self.ws.close()
-            except:
-                pass
-            self.ws = None
+        await self._drop_ws()
 
     async def _start_monitor_tts_response(self):
         """监听TTS响应 - 长期运行"""
@@ -443,6 +480,10 @@ class TTSProvider(TTSProviderBase):
                     if res.optional.event == EVENT_SessionCanceled:
                         logger.bind(tag=TAG).debug(f"释放服务端资源成功～～")
                         self.activate_session = False
+                        if self.ws_pool is not None:
+                            # 会话已释放，连接归还连接池供其他会话使用
+                            await self._drop_ws(reusable=True)
+                            break
                     elif res.optional.event == EVENT_TTSSentenceStart:
                         json_data = json.loads(res.payload.decode("utf-8"))
                         self.tts_text = json_data.get("text", "")
@@ -461,6 +502,9 @@ class TTSProvider(TTSProviderBase):
                         logger.bind(tag=TAG).debug(f"会话结束～～")
                         self.activate_session = False
                         self._process_before_stop_play_files()
+                        if self.ws_pool is not None:
+                            await self._drop_ws(reusable=True)
+                            break
                 except websockets.ConnectionClosed:
                     logger.bind(tag=TAG).warning("WebSocket连接已关闭")
                     break
@@ -471,12 +515,7 @@ class TTSProvider(TTSProviderBase):
                     traceback.print_exc()
                     break
             # 连接异常时关闭WebSocket
-            if self.ws:
-                try:
-                    await self.ws.close()
-                except:
-                    pass
-                self.ws = None
+            await self._drop_ws()
         # 监听任务退出时清理引用
         finally:
             self._monitor_task = None
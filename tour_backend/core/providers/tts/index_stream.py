@@ -44,12 +44,10 @@ class TTSProvider(TTSProviderBase):
                 if message.sentence_type == SentenceType.FIRST:
                     # 初始化参数
                     self.tts_stop_request = False
-                    self.processed_chars = 0
-                    self.tts_text_buff = []
+                    self.text_segmenter.reset()
                     self.before_stop_play_files.clear()
                 elif ContentType.TEXT == message.content_type:
-                    self.tts_text_buff.append(message.content_detail)
-                    segment_text = self._get_segment_text()
+                    segment_text = self._get_segment_text(message.content_detail)
                     if segment_text:
                         self.to_tts_single_stream(segment_text)
 
@@ -77,13 +75,11 @@ class TTSProvider(TTSProviderBase):
         Returns:
             bool: 是否成功处理了文本
         """
-        full_text = "".join(self.tts_text_buff)
-        remaining_text = full_text[self.processed_chars :]
+        remaining_text = self.text_segmenter.take_remaining()
         if remaining_text:
             segment_text = textUtils.get_string_no_punctuation_or_emoji(remaining_text)
             if segment_text:
                 self.to_tts_single_stream(segment_text, is_last)
-                self.processed_chars += len(full_text)
             else:
                 self._process_before_stop_play_files()
         else:
@@ -10,11 +10,13 @@ import asyncio
 import traceback
 import websockets
 from asyncio import Task
+from functools import partial
 from config.logger import setup_logging
 from core.utils import opus_encoder_utils
 from core.utils.tts import MarkdownCleaner
 from urllib.parse import urlencode, urlparse
 from core.providers.tts.base import TTSProviderBase
+from core.utils.ws_pool import get_ws_pool, pool_key
 from core.providers.tts.dto.dto import SentenceType, ContentType, InterfaceType
 
 TAG = __name__
@@ -58,6 +60,21 @@ class XunfeiWSAuth:
         return url
 
 
+async def _connect_upstream(api_key, api_secret, api_url):
+    """
+    建立讯飞上游WebSocket连接
+    连接池会长期持有建连工厂，这里只接收凭据值，不引用提供方实例及其访客连接
+    """
+    # 认证URL带时间戳签名，每次建连时重新生成
+    auth_url = XunfeiWSAuth.create_auth_url(api_key, api_secret, api_url)
+    return await websockets.connect(
+        auth_url,
+        ping_interval=30,
+        ping_timeout=10,
+        close_timeout=10,
+    )
+
+
 class TTSProvider(TTSProviderBase):
     def __init__(self, config, delete_audio_file):
         super().__init__(config, delete_audio_file)
@@ -108,6 +125,8 @@ class TTSProvider(TTSProviderBase):
 
         # WebSocket配置
         self.ws = None
+        # 服务级上游连接池，未开启时为None
+        self.ws_pool = None
         self._monitor_task = None
 
         # 序列号管理
@@ -123,21 +142,22 @@ class TTSProvider(TTSProviderBase):
             raise ValueError("讯飞TTS需要配置app_id、api_key和api_secret")
 
     async def _ensure_connection(self):
-        """确保WebSocket连接可用"""
+        """确保WebSocket连接可用，开启连接池时借出预热好的连接"""
         try:
-            logger.bind(tag=TAG).info("开始建立新连接...")
-
-            # 生成认证URL
-            auth_url = XunfeiWSAuth.create_auth_url(
-                self.api_key, self.api_secret, self.api_url
+            connector = partial(
+                _connect_upstream, self.api_key, self.api_secret, self.api_url
             )
-
-            self.ws = await websockets.connect(
-                auth_url,
-                ping_interval=30,
-                ping_timeout=10,
-                close_timeout=10,
+            self.ws_pool = get_ws_pool(
+                self.conn.config,
+                pool_key("xunfei_stream", self.api_url, self.app_id, self.api_key),
+                connector,
             )
+            if self.ws_pool is not None:
+                self.ws = await self.ws_pool.lease()
+                return self.ws
+
+            logger.bind(tag=TAG).info("开始建立新连接...")
+            self.ws = await connector()
             logger.bind(tag=TAG).info("WebSocket连接建立成功")
             return self.ws
         except Exception as e:
@@ -145,6 +165,19 @@ class TTSProvider(TTSProviderBase):
             self.ws = None
             raise
 
+    async def _drop_ws(self):
+        """关闭当前上游连接，讯飞一条连接只能完成一次合成，不归还复用"""
+        ws, self.ws = self.ws, None
+        if ws is None:
+            return
+        if self.ws_pool is not None:
+            await self.ws_pool.release(ws, reusable=False)
+            return
+        try:
+            await ws.close()
+        except:
+            pass
+
     def tts_text_priority_thread(self):
         """流式文本处理线程"""
         while not self.conn.stop_event.is_set():
@@ -245,12 +278,7 @@ class TTSProvider(TTSProviderBase):
 
         except Exception as e:
             logger.bind(tag=TAG).error(f"发送TTS文本失败: {str(e)}")
-            if self.ws:
-                try:
-                    await self.ws.close()
-                except:
-                    pass
-                self.ws = None
+            await self._drop_ws()
             raise
 
     async def start_session(self, session_id):
@@ -317,12 +345,7 @@ class TTSProvider(TTSProviderBase):
                 logger.bind(tag=TAG).warning(f"关闭时取消监听任务错误: {e}")
             self._monitor_task = None
 
-        if self.ws:
-            try:
-                await self.ws.close()
-            except:
-                pass
-            self.ws = None
+        await self._drop_ws()
 
     async def _start_monitor_tts_response(self):
         """监听TTS响应"""
@@ -394,12 +417,7 @@ class TTSProvider(TTSProviderBase):
                     break
 
             # 链接不可复用
-            if self.ws:
-                try:
-                    await self.ws.close()
-                except:
-                    pass
-                self.ws = None
+            await self._drop_ws()
         # 监听任务退出时清理引用
         finally:
             self._monitor_task = None
@@ -19,8 +19,6 @@ class VADProvider(VADProviderBase):
             force_reload=False,
         )
 
-        self.decoder = opuslib_next.Decoder(16000, 1)
-
         # 处理空字符串的情况
         threshold = config.get("threshold", "0.5")
         threshold_low = config.get("threshold_low", "0.2")
@@ -38,7 +36,7 @@ class VADProvider(VADProviderBase):
 
     def is_vad(self, conn, opus_packet):
         try:
-            pcm_frame = self.decoder.decode(opus_packet, 960)
+            pcm_frame = conn.uplink_frames.push(opus_packet)
             conn.client_audio_buffer.extend(pcm_frame)  # 将新数据加入缓冲区
 
             # 处理缓冲区中的完整帧（每次处理512采样点）
@@ -0,0 +1,222 @@
+import os
+import time
+import asyncio
+import weakref
+import numpy as np
+import onnxruntime
+from concurrent.futures import ThreadPoolExecutor
+from config.logger import setup_logging
+from core.providers.vad.base import VADProviderBase
+
+TAG = __name__
+logger = setup_logging()
+
+SAMPLE_RATE = 16000
+WINDOW_SIZE = 512  # 16kHz下每次推理512个采样点
+CONTEXT_SIZE = 64  # 模型需要拼接上一窗口末尾64个采样点作为上下文
+
+
+class StreamState:
+    """单个连接的VAD状态：PCM缓冲、模型循环状态和上下文"""
+
+    def __init__(self):
+        self.pcm_buffer = bytearray()
+        self.context = np.zeros(CONTEXT_SIZE, dtype=np.float32)
+        self.rnn_state = np.zeros((2, 128), dtype=np.float32)
+
+
+class VADProvider(VADProviderBase):
+    """跨连接批量推理的Silero VAD
+
+    每个连接独立维护模型状态，避免不同设备之间串音；
+    各连接待检测的512采样点窗口在一个短周期内汇总为一个批次，在独立线程中做一次前向推理。
+    """
+
+    def __init__(self, config):
+        logger.bind(tag=TAG).info("SileroBatchVAD", config)
+        model_path = config.get("onnx_model") or os.path.join(
+            config["model_dir"], "src", "silero_vad", "data", "silero_vad.onnx"
+        )
+        opts = onnxruntime.SessionOptions()
+        opts.inter_op_num_threads = 1
+        opts.intra_op_num_threads = int(config.get("intra_op_num_threads", 1))
+        self.session = onnxruntime.InferenceSession(
+            model_path, sess_options=opts, providers=["CPUExecutionProvider"]
+        )
+        self.sr = np.array(SAMPLE_RATE, dtype=np.int64)
+
+        # 处理空字符串的情况
+        threshold = config.get("threshold", "0.5")
+        threshold_low = config.get("threshold_low", "0.2")
+        min_silence_duration_ms = config.get("min_silence_duration_ms", "1000")
+        batch_interval_ms = config.get("batch_interval_ms", "10")
+        max_batch_size = config.get("max_batch_size", "256")
+
+        self.vad_threshold = float(threshold) if threshold else 0.5
+        self.vad_threshold_low = float(threshold_low) if threshold_low else 0.2
+
+        self.silence_threshold_ms = (
+            int(min_silence_duration_ms) if min_silence_duration_ms else 1000
+        )
+        self.batch_interval = (int(batch_interval_ms) if batch_interval_ms else 10) / 1000
+        self.max_batch_size = int(max_batch_size) if max_batch_size else 256
+
+        # 至少要多少帧才算有语音
+        self.frame_window_threshold = 3
+
+        # 连接 -> StreamState，连接释放后自动回收
+        self.streams = weakref.WeakKeyDictionary()
+
+        # 批量推理在单独线程中执行，不阻塞事件循环
+        self.executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="vad")
+        self.pending = []
+        self.flush_handle = None
+
+    def _get_stream(self, conn) -> StreamState:
+        stream = self.streams.get(conn)
+        if stream is None:
+            stream = StreamState()
+            self.streams[conn] = stream
+        return stream
+
+    def _split_windows(self, conn, opus_packet):
+        """从连接的上行帧存储取得解码后的PCM，切分出完整的512采样点窗口"""
+        stream = self._get_stream(conn)
+        pcm_frame = conn.uplink_frames.push(opus_packet)
+        stream.pcm_buffer.extend(pcm_frame)
+
+        window_bytes = WINDOW_SIZE * 2
+        count = len(stream.pcm_buffer) // window_bytes
+        if count == 0:
+            return stream, None
+        audio_int16 = np.frombuffer(
+            bytes(stream.pcm_buffer[: count * window_bytes]), dtype=np.int16
+        )
+        del stream.pcm_buffer[: count * window_bytes]
+        windows = audio_int16.reshape(count, WINDOW_SIZE).astype(np.float32) / 32768.0
+        return stream, windows
+
+    def run_batch(self, streams, windows):
+        """对一组来自不同连接的窗口做一次前向推理，并回写各连接的模型状态
+
+        Args:
+            streams: StreamState列表，同一批次内每个连接最多出现一次
+            windows: shape为(B, 512)的float32数组
+        Returns:
+            shape为(B,)的语音概率
+        """
+        contexts = np.stack([stream.context for stream in streams])
+        inputs = np.concatenate([contexts, windows], axis=1)
+        states = np.stack([stream.rnn_state for stream in streams], axis=1)
+        out, new_states = self.session.run(
+            None, {"input": inputs, "state": states, "sr": self.sr}
+        )
+        for i, stream in enumerate(streams):
+            stream.rnn_state = new_states[:, i, :]
+            stream.context = inputs[i, -CONTEXT_SIZE:]
+        return out[:, 0]
+
+    def _run_rounds(self, requests):
+        """按轮次推理：同一连接的多个窗口必须按顺序经过模型，每轮取每个请求的下一个窗口"""
+        results = [np.empty(len(windows), dtype=np.float32) for _, windows, _ in requests]
+        max_rounds = max(len(windows) for _, windows, _ in requests)
+        for r in range(max_rounds):
+            active = [i for i, (_, windows, _) in enumerate(requests) if len(windows) > r]
+            probs = self.run_batch(
+                [requests[i][0] for i in active],
+                np.stack([requests[i][1][r] for i in active]),
+            )
+            for i, prob in zip(active, probs):
+                results[i][r] = prob
+        return results
+
+    async def _flush(self):
+        self.flush_handle = None
+        requests, self.pending = self.pending, []
+        if not requests:
+            return
+        loop = asyncio.get_running_loop()
+        try:
+            results = await loop.run_in_executor(
+                self.executor, self._run_rounds, requests
+            )
+        except Exception as e:
+            for _, _, future in requests:
+                if not future.done():
+                    future.set_exception(e)
+            return
+        for (_, _, future), probs in zip(requests, results):
+            if not future.done():
+                future.set_result(probs)
+
+    def _schedule_flush(self, loop):
+        if len(self.pending) >= self.max_batch_size:
+            if self.flush_handle is not None:
+                self.flush_handle.cancel()
+            self.flush_handle = None
+            loop.create_task(self._flush())
+        elif self.flush_handle is None:
+            self.flush_handle = loop.call_later(
+                self.batch_interval, lambda: loop.create_task(self._flush())
+            )
+
+    def _update_voice_state(self, conn, speech_prob) -> bool:
+        # 双阈值判断
+        if speech_prob >= self.vad_threshold:
+            is_voice = True
+        elif speech_prob <= self.vad_threshold_low:
+            is_voice = False
+        else:
+            is_voice = conn.last_is_voice
+
+        # 声音没低于最低值则延续前一个状态，判断为有声音
+        conn.last_is_voice = is_voice
+
+        # 更新滑动窗口
+        conn.client_voice_window.append(is_voice)
+        client_have_voice = (
+            conn.client_voice_window.count(True) >= self.frame_window_threshold
+        )
+
+        # 如果之前有声音，但本次没有声音，且与上次有声音的时间差已经超过了静默阈值，则认为已经说完一句话
+        if conn.client_have_voice and not client_have_voice:
+            stop_duration = time.time() * 1000 - conn.last_activity_time
+            if stop_duration >= self.silence_threshold_ms:
+                conn.client_voice_stop = True
+        if client_have_voice:
+            conn.client_have_voice = True
+            conn.last_activity_time = time.time() * 1000
+        return client_have_voice
+
+    async def is_vad_async(self, conn, opus_packet) -> bool:
+        try:
+            stream, windows = self._split_windows(conn, opus_packet)
+            if windows is None:
+                return False
+            loop = asyncio.get_running_loop()
+            future = loop.create_future()
+            self.pending.append((stream, windows, future))
+            self._schedule_flush(loop)
+            probs = await future
+
+            client_have_voice = False
+            for speech_prob in probs:
+                client_have_voice = self._update_voice_state(conn, float(speech_prob))
+            return client_have_voice
+        except Exception as e:
+            logger.bind(tag=TAG).error(f"Error processing audio packet: {e}")
+        return False
+
+    def is_vad(self, conn, opus_packet):
+        """同步检测（不参与批处理），供无法等待的调用方使用"""
+        try:
+            stream, windows = self._split_windows(conn, opus_packet)
+            if windows is None:
+                return False
+            client_have_voice = False
+            for window in windows:
+                speech_prob = self.run_batch([stream], window[np.newaxis, :])[0]
+                client_have_voice = self._update_voice_state(conn, float(speech_prob))
+            return client_have_voice
+        except Exception as e:
+            logger.bind(tag=TAG).error(f"Error processing audio packet: {e}")
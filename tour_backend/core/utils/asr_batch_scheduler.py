@@ -0,0 +1,152 @@
+"""
+本地ASR跨连接微批调度
+
+本地模型（FunASR、sherpa-onnx）在整个服务内只加载一份，多个连接同时说完话时，
+逐句调用模型会在GIL上排队。调度器把一个短窗口内（或凑满N条）提交的语音合并成一次批量推理，
+再把结果分别返回给各自的连接，并统计队列深度和批大小。
+"""
+
+import time
+import queue
+import threading
+from concurrent.futures import Future
+from typing import Any, Callable, Dict, List
+from config.logger import setup_logging
+
+TAG = __name__
+logger = setup_logging()
+
+
+class ASRBatchScheduler:
+    """
+    Args:
+        name: 调度器名称，用于日志
+        batch_fn: 批量推理函数，输入为提交项列表，按相同顺序返回结果列表
+        window_ms: 收到第一条请求后最多等待多久凑批
+        max_batch_size: 单批最多条数，凑满立即推理
+        metrics_interval: 指标日志输出间隔（秒），0表示不输出
+    """
+
+    def __init__(
+        self,
+        name: str,
+        batch_fn: Callable[[List[Any]], List[Any]],
+        window_ms: int = 30,
+        max_batch_size: int = 8,
+        metrics_interval: int = 60,
+    ):
+        self.name = name
+        self.batch_fn = batch_fn
+        self.window = max(0, int(window_ms)) / 1000
+        self.max_batch_size = max(1, int(max_batch_size))
+        self.metrics_interval = metrics_interval
+        self._queue = queue.Queue()
+
+        self._metrics_lock = threading.Lock()
+        self._reset_metrics()
+        self._last_metrics_time = time.monotonic()
+
+        self._thread = threading.Thread(
+            target=self._worker, name=f"asr-batch-{name}", daemon=True
+        )
+        self._thread.start()
+
+    def submit(self, item: Any) -> Future:
+        """提交一条待识别语音，返回的Future在批量推理完成后得到对应结果"""
+        future = Future()
+        self._queue.put((item, future, time.monotonic()))
+        return future
+
+    def _collect(self):
+        batch = [self._queue.get()]
+        deadline = time.monotonic() + self.window
+        while len(batch) < self.max_batch_size:
+            remaining = deadline - time.monotonic()
+            try:
+                if remaining <= 0:
+                    batch.append(self._queue.get_nowait())
+                else:
+                    batch.append(self._queue.get(timeout=remaining))
+            except queue.Empty:
+                break
+        return batch
+
+    def _worker(self):
+        while True:
+            batch = self._collect()
+            queue_depth = self._queue.qsize()
+            batch = [entry for entry in batch if entry[1].set_running_or_notify_cancel()]
+            if not batch:
+                continue
+
+            start_time = time.monotonic()
+            try:
+                results = self.batch_fn([item for item, _, _ in batch])
+                if len(results) != len(batch):
+                    raise RuntimeError(
+                        f"批量推理结果数量不匹配: {len(results)} != {len(batch)}"
+                    )
+            except Exception as e:
+                logger.bind(tag=TAG).error(f"{self.name} 批量推理失败: {e}")
+                for _, future, _ in batch:
+                    future.set_exception(e)
+            else:
+                for (_, future, _), result in zip(batch, results):
+                    future.set_result(result)
+
+            end_time = time.monotonic()
+            self._record(
+                batch_size=len(batch),
+                queue_depth=queue_depth,
+                wait_time=sum(start_time - enqueued for _, _, enqueued in batch),
+                run_time=end_time - start_time,
+            )
+
+    def _reset_metrics(self):
+        self._batches = 0
+        self._items = 0
+        self._max_batch = 0
+        self._max_queue_depth = 0
+        self._wait_time = 0.0
+        self._run_time = 0.0
+
+    def _record(self, batch_size, queue_depth, wait_time, run_time):
+        with self._metrics_lock:
+            self._batches += 1
+            self._items += batch_size
+            self._max_batch = max(self._max_batch, batch_size)
+            self._max_queue_depth = max(self._max_queue_depth, queue_depth)
+            self._wait_time += wait_time
+            self._run_time += run_time
+
+        if not self.metrics_interval:
+            return
+        now = time.monotonic()
+        if now - self._last_metrics_time >= self.metrics_interval:
+            self._last_metrics_time = now
+            metrics = self.get_metrics(reset=True)
+            logger.bind(tag=TAG).info(
+                f"{self.name} 批处理统计: 批次 {metrics['batches']}, 语音 {metrics['items']}, "
+                f"平均批大小 {metrics['avg_batch_size']:.2f}, 最大批大小 {metrics['max_batch_size']}, "
+                f"最大队列深度 {metrics['max_queue_depth']}, 当前队列深度 {metrics['queue_depth']}, "
+                f"平均排队 {metrics['avg_wait_ms']:.1f}ms, 平均推理 {metrics['avg_run_ms']:.1f}ms"
+            )
+
+    def get_metrics(self, reset: bool = False) -> Dict[str, Any]:
+        """获取自上次重置以来的队列深度、批大小等指标"""
+        with self._metrics_lock:
+            batches = self._batches
+            items = self._items
+            metrics = {
+                "batches": batches,
+                "items": items,
+                "queue_depth": self._queue.qsize(),
+                "max_queue_depth": self._max_queue_depth,
+                "max_batch_size": self._max_batch,
+                "avg_batch_size": items / batches if batches else 0.0,
+                "avg_wait_ms": self._wait_time * 1000 / items if items else 0.0,
+                "avg_run_ms": self._run_time * 1000 / batches if batches else 0.0,
+            }
+            if reset:
+                self._reset_metrics()
+        return metrics
@@ -0,0 +1,119 @@
+"""
+异步流水线模式工具
+
+开启 async_pipeline 后，连接内的 ASR、TTS、音频发送各阶段以 asyncio 任务运行，
+阶段之间通过 asyncio.Queue 衔接；阻塞的模型/接口调用统一提交到进程级共享线程池，
+不再为每个连接创建独立线程池和常驻线程。
+"""
+
+import queue
+import asyncio
+import threading
+from typing import Any, Dict, Optional
+from concurrent.futures import ThreadPoolExecutor
+
+TAG = __name__
+
+_pipeline_executor: Optional[ThreadPoolExecutor] = None
+_pipeline_executor_lock = threading.Lock()
+
+
+def is_async_pipeline_enabled(config: Dict[str, Any]) -> bool:
+    """判断配置中是否开启了异步流水线模式"""
+    pipeline_config = config.get("async_pipeline") or {}
+    return bool(pipeline_config.get("enable", False))
+
+
+def get_pipeline_executor(config: Dict[str, Any]) -> ThreadPoolExecutor:
+    """获取进程级共享线程池（首次调用时按配置创建）"""
+    global _pipeline_executor
+    if _pipeline_executor is None:
+        with _pipeline_executor_lock:
+            if _pipeline_executor is None:
+                pipeline_config = config.get("async_pipeline") or {}
+                max_workers = int(pipeline_config.get("max_workers", 32))
+                _pipeline_executor = ThreadPoolExecutor(
+                    max_workers=max_workers, thread_name_prefix="pipeline"
+                )
+    return _pipeline_executor
+
+
+class PipelineQueue:
+    """绑定到事件循环的 asyncio.Queue
+
+    对外保留 queue.Queue 的 put/get_nowait/qsize/task_done 接口，原有生产者代码无需修改：
+    - 在事件循环线程内调用 put 时直接入队
+    - 在其他线程（线程池、旧式工作线程）调用 put 时通过 call_soon_threadsafe 转交给事件循环
+    消费者在事件循环中使用 ``await queue.get()`` 获取数据。
+    """
+
+    def __init__(self, loop: asyncio.AbstractEventLoop, maxsize: int = 0):
+        self._loop = loop
+        self._queue: asyncio.Queue = asyncio.Queue(maxsize=maxsize)
+
+    def _in_loop(self) -> bool:
+        try:
+            return asyncio.get_running_loop() is self._loop
+        except RuntimeError:
+            return False
+
+    def put(self, item, block=True, timeout=None):
+        if self._in_loop():
+            self._queue.put_nowait(item)
+        else:
+            self._loop.call_soon_threadsafe(self._queue.put_nowait, item)
+
+    put_nowait = put
+
+    async def get(self):
+        return await self._queue.get()
+
+    def get_nowait(self):
+        try:
+            return self._queue.get_nowait()
+        except asyncio.QueueEmpty:
+            raise queue.Empty
+
+    def task_done(self):
+        if self._in_loop():
+            self._queue.task_done()
+        else:
+            self._loop.call_soon_threadsafe(self._queue.task_done)
+
+    def qsize(self) -> int:
+        return self._queue.qsize()
+
+    def empty(self) -> bool:
+        return self._queue.empty()
+
+    def clear(self):
+        """一次性丢弃队列中的全部数据"""
+        if self._in_loop():
+            self._clear()
+        else:
+            self._loop.call_soon_threadsafe(self._clear)
+
+    def _clear(self):
+        # 在事件循环的一次回调内取空，期间不会有新数据插入；只使用asyncio.Queue的公开接口，
+        # task_done同时维护join计数，get_nowait会唤醒等待中的生产者
+        q = self._queue
+        while True:
+            try:
+                q.get_nowait()
+            except asyncio.QueueEmpty:
+                break
+            q.task_done()
+
+
+def clear_queue(q):
+    """清空 queue.Queue 或 PipelineQueue，queue.Queue 在一次加锁内整体清空而不是逐个 get_nowait"""
+    if isinstance(q, PipelineQueue):
+        q.clear()
+        return
+    with q.mutex:
+        pending = len(q.queue)
+        q.queue.clear()
+        q.unfinished_tasks = max(0, q.unfinished_tasks - pending)
+        if q.unfinished_tasks == 0:
+            q.all_tasks_done.notify_all()
+        q.not_full.notify_all()
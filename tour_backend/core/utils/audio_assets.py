@@ -0,0 +1,267 @@
+"""
+预编码提示音资源包
+
+绑定码播报、超出输出上限、TTS结束提示音、唤醒词回复等固定提示音，原先每次播放都要经过
+pydub/ffmpeg解码、重采样和Opus编码。这里在构建阶段把 config/assets 下的全部音频预先编码为
+60ms的Opus帧，打包成一个带索引的资源包：
+
+    文件头: 8字节魔数 | 4字节索引长度(大端) | JSON索引
+    数据区: 各资源的p3帧依次排列（每帧4字节头 [类型, 保留, 长度] + Opus数据）
+
+索引记录每个资源在数据区中的偏移、长度、帧数以及源文件的大小和修改时间。服务启动时用mmap
+加载一次，播放提示音时只需按偏移切出帧；源文件被修改（如唤醒词回复重新生成）或不在资源包中
+的文件，退回到 audio_to_data 实时编码，结果按源文件大小和修改时间缓存在进程内。
+
+手动构建：python -m core.utils.audio_assets [资源目录] [资源包路径]
+"""
+
+import os
+import sys
+import json
+import mmap
+import struct
+import threading
+from typing import Any, Dict, List, Optional, Tuple
+
+from config.logger import setup_logging
+
+TAG = __name__
+logger = setup_logging()
+
+BUNDLE_MAGIC = b"XZP3PACK"
+AUDIO_EXTENSIONS = (".wav", ".mp3", ".ogg", ".flac", ".m4a", ".aac", ".opus")
+DEFAULT_ASSET_DIR = "config/assets"
+DEFAULT_BUNDLE_PATH = "data/audio_assets.p3b"
+
+_bundle: Optional["AudioAssetBundle"] = None
+# 资源包以外的文件实时编码后的结果: 路径 -> (源文件大小, 修改时间, 帧元组)
+_runtime_cache: Dict[str, Tuple[int, int, tuple]] = {}
+_runtime_lock = threading.Lock()
+
+
+def _normalize_path(path: str) -> str:
+    return os.path.normpath(path).replace("\\", "/")
+
+
+def _source_signature(path: str) -> Optional[Tuple[int, int]]:
+    try:
+        stat = os.stat(path)
+    except OSError:
+        return None
+    return stat.st_size, stat.st_mtime_ns
+
+
+def _pack_frames(frames: List[bytes]) -> bytes:
+    return b"".join(struct.pack(">BBH", 0, 0, len(f)) + f for f in frames)
+
+
+def _iter_asset_files(asset_dir: str):
+    for root, _, files in os.walk(asset_dir):
+        for file_name in sorted(files):
+            if file_name.lower().endswith(AUDIO_EXTENSIONS):
+                yield _normalize_path(os.path.join(root, file_name))
+
+
+def build_asset_bundle(
+    asset_dir: str = DEFAULT_ASSET_DIR, bundle_path: str = DEFAULT_BUNDLE_PATH
+) -> int:
+    """
+    把资源目录下的全部音频编码为Opus帧并写入资源包
+    Returns:
+        打包的资源数量
+    """
+    from core.utils.util import audio_to_data
+
+    index = {}
+    chunks = []
+    offset = 0
+    for path in _iter_asset_files(asset_dir):
+        signature = _source_signature(path)
+        if signature is None:
+            continue
+        try:
+            frames = audio_to_data(path, is_opus=True)
+        except Exception as e:
+            logger.bind(tag=TAG).warning(f"提示音编码失败，跳过: {path}, {e}")
+            continue
+        data = _pack_frames(frames)
+        index[path] = {
+            "offset": offset,
+            "length": len(data),
+            "frames": len(frames),
+            "source_size": signature[0],
+            "source_mtime_ns": signature[1],
+        }
+        chunks.append(data)
+        offset += len(data)
+
+    header = json.dumps(index, ensure_ascii=False).encode("utf-8")
+    bundle_dir = os.path.dirname(bundle_path)
+    if bundle_dir:
+        os.makedirs(bundle_dir, exist_ok=True)
+    tmp_path = f"{bundle_path}.{os.getpid()}.tmp"
+    with open(tmp_path, "wb") as f:
+        f.write(BUNDLE_MAGIC)
+        f.write(struct.pack(">I", len(header)))
+        f.write(header)
+        for data in chunks:
+            f.write(data)
+    os.replace(tmp_path, bundle_path)
+    logger.bind(tag=TAG).info(
+        f"提示音资源包已生成: {bundle_path}, {len(index)}个资源, {offset / 1024:.1f}KB"
+    )
+    return len(index)
+
+
+class AudioAssetBundle:
+    """mmap加载的提示音资源包，按需切出帧并缓存"""
+
+    def __init__(self, bundle_path: str):
+        self.bundle_path = bundle_path
+        self._file = open(bundle_path, "rb")
+        try:
+            self._mmap = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+            if self._mmap[: len(BUNDLE_MAGIC)] != BUNDLE_MAGIC:
+                raise ValueError("资源包格式不正确")
+            (index_length,) = struct.unpack_from(">I", self._mmap, len(BUNDLE_MAGIC))
+            index_start = len(BUNDLE_MAGIC) + 4
+            self._data_start = index_start + index_length
+            self.index: Dict[str, Dict[str, int]] = json.loads(
+                self._mmap[index_start : self._data_start].decode("utf-8")
+            )
+        except Exception:
+            self.close()
+            raise
+        # 路径 -> 帧元组，首次播放时从mmap中切出
+        self._frames: Dict[str, tuple] = {}
+
+    def __contains__(self, path: str) -> bool:
+        return path in self.index
+
+    def is_fresh(self, path: str, signature: Optional[Tuple[int, int]]) -> bool:
+        """源文件与打包时一致（大小和修改时间都没变）"""
+        entry = self.index.get(path)
+        return (
+            entry is not None
+            and signature is not None
+            and signature == (entry["source_size"], entry["source_mtime_ns"])
+        )
+
+    def stale_paths(self, asset_dir: str) -> List[str]:
+        """资源目录中新增、修改或已删除的文件"""
+        stale = []
+        current = set()
+        for path in _iter_asset_files(asset_dir):
+            current.add(path)
+            if not self.is_fresh(path, _source_signature(path)):
+                stale.append(path)
+        prefix = _normalize_path(asset_dir) + "/"
+        stale.extend(
+            path
+            for path in self.index
+            if path.startswith(prefix) and path not in current
+        )
+        return stale
+
+    def get_frames(self, path: str) -> Optional[tuple]:
+        frames = self._frames.get(path)
+        if frames is not None:
+            return frames
+        entry = self.index.get(path)
+        if entry is None:
+            return None
+        start = self._data_start + entry["offset"]
+        end = start + entry["length"]
+        frames = []
+        offset = start
+        while offset + 4 <= end:
+            _, _, length = struct.unpack_from(">BBH", self._mmap, offset)
+            offset += 4
+            frames.append(self._mmap[offset : offset + length])
+            offset += length
+        if offset != end or len(frames) != entry["frames"]:
+            logger.bind(tag=TAG).warning(f"资源包中的提示音数据损坏: {path}")
+            return None
+        frames = tuple(frames)
+        self._frames[path] = frames
+        return frames
+
+    def close(self):
+        mm = getattr(self, "_mmap", None)
+        if mm is not None:
+            mm.close()
+        self._file.close()
+
+
+def load_asset_bundle(config: Dict[str, Any]) -> Optional[AudioAssetBundle]:
+    """
+    服务启动时调用：加载提示音资源包，资源包缺失或与源文件不一致时先重新构建
+    """
+    global _bundle
+    assets_config = config.get("audio_assets") or {}
+    if not assets_config.get("enable", True):
+        return None
+    asset_dir = assets_config.get("asset_dir", DEFAULT_ASSET_DIR)
+    bundle_path = assets_config.get("bundle_path", DEFAULT_BUNDLE_PATH)
+    auto_build = assets_config.get("auto_build", True)
+
+    bundle = None
+    if os.path.exists(bundle_path):
+        try:
+            bundle = AudioAssetBundle(bundle_path)
+        except (OSError, ValueError) as e:
+            logger.bind(tag=TAG).warning(f"提示音资源包无法加载: {e}")
+
+    if auto_build:
+        stale = (
+            bundle.stale_paths(asset_dir) if bundle is not None else [asset_dir]
+        )
+        if stale:
+            logger.bind(tag=TAG).info(
+                f"提示音资源包需要更新({len(stale)}项变化)，正在重新构建: {bundle_path}"
+            )
+            if bundle is not None:
+                bundle.close()
+                bundle = None
+            try:
+                build_asset_bundle(asset_dir, bundle_path)
+                bundle = AudioAssetBundle(bundle_path)
+            except Exception as e:
+                logger.bind(tag=TAG).error(f"构建提示音资源包失败，提示音将实时编码: {e}")
+
+    old_bundle, _bundle = _bundle, bundle
+    if old_bundle is not None:
+        old_bundle.close()
+    return bundle
+
+
+def get_asset_opus(path: str) -> List[bytes]:
+    """
+    获取提示音文件的Opus帧列表，可直接替代 audio_to_data(path)
+    优先从资源包读取；不在资源包中或源文件已变化时实时编码，并在进程内缓存
+    """
+    path = _normalize_path(path)
+    signature = _source_signature(path)
+    bundle = _bundle
+    if bundle is not None and bundle.is_fresh(path, signature):
+        frames = bundle.get_frames(path)
+        if frames is not None:
+            return list(frames)
+
+    cached = _runtime_cache.get(path)
+    if cached is not None and signature is not None and cached[:2] == signature:
+        return list(cached[2])
+
+    from core.utils.util import audio_to_data
+
+    frames = tuple(audio_to_data(path, is_opus=True))
+    if signature is not None:
+        with _runtime_lock:
+            _runtime_cache[path] = (signature[0], signature[1], frames)
+    return list(frames)
+
+
+if __name__ == "__main__":
+    asset_dir = sys.argv[1] if len(sys.argv) > 1 else DEFAULT_ASSET_DIR
+    bundle_path = sys.argv[2] if len(sys.argv) > 2 else DEFAULT_BUNDLE_PATH
+    build_asset_bundle(asset_dir, bundle_path)
@@ -0,0 +1,196 @@
+"""
+进程内音频解码
+
+非流式TTS每合成一句话都要把WAV/MP3转为16kHz单声道16位PCM再编码Opus，原先通过
+pydub调用ffmpeg子进程完成。这里在进程内完成这一步：
+- WAV：直接解析RIFF头，支持8/16/24/32位整数和32/64位浮点、多声道
+- MP3等压缩格式：安装了 miniaudio 时用它解码，否则返回None由调用方退回ffmpeg
+- 重采样：基于NumPy的多相FIR（Kaiser窗sinc）有理数倍率重采样，滤波器按采样率组合缓存
+"""
+
+import struct
+from math import gcd
+from functools import lru_cache
+from typing import Optional, Tuple
+
+import numpy as np
+
+try:
+    import miniaudio
+except ImportError:
+    miniaudio = None
+
+TARGET_SAMPLE_RATE = 16000
+
+_WAVE_FORMAT_PCM = 0x0001
+_WAVE_FORMAT_IEEE_FLOAT = 0x0003
+_WAVE_FORMAT_EXTENSIBLE = 0xFFFE
+
+# 重采样滤波器每侧的过零点数，越大过渡带越窄
+_RESAMPLE_HALF_ZEROS = 16
+_RESAMPLE_KAISER_BETA = 8.6
+
+
+def decode_wav(data) -> Tuple[np.ndarray, int]:
+    """
+    解析WAV数据
+    Returns:
+        (float32单声道采样, 采样率)
+    Raises:
+        ValueError: 不是WAV或编码不受支持（如A-law/μ-law）
+    """
+    view = memoryview(data)
+    if len(view) < 12 or view[:4] != b"RIFF" or view[8:12] != b"WAVE":
+        raise ValueError("不是WAV数据")
+
+    fmt = None
+    offset = 12
+    total = len(view)
+    while offset + 8 <= total:
+        chunk_id = bytes(view[offset : offset + 4])
+        (chunk_size,) = struct.unpack_from("<I", view, offset + 4)
+        body = offset + 8
+        if chunk_id == b"fmt ":
+            fmt = struct.unpack_from("<HHIIHH", view, body)
+            if fmt[0] == _WAVE_FORMAT_EXTENSIBLE and chunk_size >= 26:
+                # 扩展格式的真实编码在子格式GUID的前两个字节
+                (sub_format,) = struct.unpack_from("<H", view, body + 24)
+                fmt = (sub_format,) + fmt[1:]
+        elif chunk_id == b"data":
+            if fmt is None:
+                raise ValueError("WAV缺少fmt块")
+            # 流式生成的WAV数据块长度可能是0或0xFFFFFFFF，按实际剩余长度处理
+            end = total if chunk_size in (0, 0xFFFFFFFF) else min(body + chunk_size, total)
+            return _pcm_to_float(view[body:end], fmt), fmt[2]
+        offset = body + chunk_size + (chunk_size & 1)
+    raise ValueError("WAV缺少data块")
+
+
+def _pcm_to_float(payload, fmt) -> np.ndarray:
+    audio_format, channels, _, _, block_align, bits = fmt
+    if channels < 1 or bits not in (8, 16, 24, 32, 64):
+        raise ValueError(f"不支持的WAV参数: {channels}声道 {bits}位")
+    frame_bytes = channels * bits // 8
+    usable = len(payload) - len(payload) % frame_bytes
+
+    if audio_format == _WAVE_FORMAT_PCM:
+        if bits == 8:
+            samples = np.frombuffer(payload, dtype=np.uint8, count=usable)
+            samples = (samples.astype(np.float32) - 128.0) / 128.0
+        elif bits == 16:
+            samples = np.frombuffer(payload, dtype="<i2", count=usable // 2)
+            samples = samples.astype(np.float32) / 32768.0
+        elif bits == 24:
+            raw = np.frombuffer(payload, dtype=np.uint8, count=usable).reshape(-1, 3)
+            ints = (
+                raw[:, 0].astype(np.int32)
+                | (raw[:, 1].astype(np.int32) << 8)
+                | (raw[:, 2].astype(np.int8).astype(np.int32) << 16)
+            )
+            samples = ints.astype(np.float32) / 8388608.0
+        elif bits == 32:
+            samples = np.frombuffer(payload, dtype="<i4", count=usable // 4)
+            samples = samples.astype(np.float32) / 2147483648.0
+        else:
+            raise ValueError("不支持64位整数WAV")
+    elif audio_format == _WAVE_FORMAT_IEEE_FLOAT and bits in (32, 64):
+        dtype = "<f4" if bits == 32 else "<f8"
+        samples = np.frombuffer(payload, dtype=dtype, count=usable // (bits // 8))
+        samples = samples.astype(np.float32)
+    else:
+        raise ValueError(f"不支持的WAV编码: 0x{audio_format:04x}")
+
+    if channels > 1:
+        samples = samples.reshape(-1, channels).mean(axis=1, dtype=np.float32)
+    return samples
+
+
+@lru_cache(maxsize=32)
+def _polyphase_filter(up: int, down: int) -> np.ndarray:
+    """设计重采样低通滤波器并拆成 up 个相位，返回形状 (up, 每相抽头数)"""
+    factor = max(up, down)
+    half_length = _RESAMPLE_HALF_ZEROS * factor
+    n = np.arange(-half_length, half_length + 1, dtype=np.float64)
+    cutoff = 1.0 / factor
+    taps = cutoff * np.sinc(cutoff * n) * np.kaiser(len(n), _RESAMPLE_KAISER_BETA) * up
+
+    taps_per_phase = -(-len(taps) // up)
+    padded = np.zeros(taps_per_phase * up, dtype=np.float64)
+    padded[: len(taps)] = taps
+    # bank[p][k] = taps[p + k*up]
+    return padded.reshape(taps_per_phase, up).T.astype(np.float32).copy()
+
+
+def resample(samples: np.ndarray, orig_rate: int, target_rate: int) -> np.ndarray:
+    """有理数倍率多相重采样，输出长度为 ceil(len * target / orig)"""
+    if orig_rate == target_rate or len(samples) == 0:
+        return samples
+    g = gcd(orig_rate, target_rate)
+    up, down = target_rate // g, orig_rate // g
+    # 反转抽头，使每个输出点等于一个连续输入窗口与对应相位的点积
+    bank = _polyphase_filter(up, down)[:, ::-1]
+    taps_per_phase = bank.shape[1]
+    # 滤波器中心（未补齐前的长度为 2*center+1）
+    center = _RESAMPLE_HALF_ZEROS * max(up, down)
+
+    output_length = -(-len(samples) * up // down)
+    padded = np.zeros(len(samples) + 2 * taps_per_phase, dtype=np.float32)
+    padded[taps_per_phase : taps_per_phase + len(samples)] = samples
+    # windows[i] = padded[i : i + taps_per_phase]，零拷贝视图
+    windows = np.lib.stride_tricks.sliding_window_view(padded, taps_per_phase)
+
+    output = np.empty(output_length, dtype=np.float32)
+    # 输出序号按 up 取模分组：同组使用同一相位，对应的输入窗口间隔固定为 down
+    for first in range(min(up, output_length)):
+        position = first * down + center
+        count = len(range(first, output_length, up))
+        start = position // up + 1
+        rows = windows[start : start + (count - 1) * down + 1 : down]
+        output[first::up] = rows @ bank[position % up]
+    return output
+
+
+def float_to_pcm16(samples: np.ndarray) -> bytes:
+    """float32采样转16位小端PCM"""
+    scaled = np.clip(samples * 32768.0, -32768.0, 32767.0)
+    return np.rint(scaled).astype("<i2").tobytes()
+
+
+def decode_to_pcm16(
+    audio_bytes, file_type: str, sample_rate: int = TARGET_SAMPLE_RATE
+) -> Optional[bytes]:
+    """
+    进程内把音频数据解码为单声道16位PCM并重采样
+    Returns:
+        PCM数据；格式不支持进程内解码时返回None，由调用方退回ffmpeg
+    """
+    file_type = (file_type or "").lower().lstrip(".")
+    if file_type == "wav" or bytes(audio_bytes[:4]) == b"RIFF":
+        try:
+            samples, rate = decode_wav(audio_bytes)
+        except ValueError:
+            samples = None
+        if samples is not None:
+            return float_to_pcm16(resample(samples, rate, sample_rate))
+
+    if miniaudio is not None and file_type in ("mp3", "flac", "ogg", "wav"):
+        try:
+            decoded = miniaudio.decode(
+                bytes(audio_bytes),
+                output_format=miniaudio.SampleFormat.SIGNED16,
+                nchannels=1,
+                sample_rate=sample_rate,
+            )
+            return decoded.samples.tobytes()
+        except miniaudio.DecodeError:
+            return None
+    return None
+
+
+def decode_file_to_pcm16(
+    audio_file_path: str, sample_rate: int = TARGET_SAMPLE_RATE
+) -> Optional[bytes]:
+    """进程内解码音频文件，不支持时返回None"""
+    file_type = audio_file_path.rsplit(".", 1)[-1] if "." in audio_file_path else ""
+    with open(audio_file_path, "rb") as f:
+        return decode_to_pcm16(f.read(), file_type, sample_rate)
@@ -0,0 +1,139 @@
+"""
+上行音频帧存储
+
+每个连接持有一个 UplinkFrameStore，设备上行的每个 Opus 包只在到达时解码一次，
+解码后的 PCM 写入预分配的环形缓冲区，原始 Opus 包与之并存。
+VAD、ASR、声纹识别和聊天记录上报都通过 memoryview 切片读取 PCM，不再各自重复解码。
+"""
+
+import opuslib_next
+from typing import List, Optional
+from config.logger import setup_logging
+
+TAG = __name__
+logger = setup_logging()
+
+SAMPLE_RATE = 16000
+FRAME_SAMPLES = 960  # 60ms
+FRAME_BYTES = FRAME_SAMPLES * 2
+
+
+class DecodedFrames(list):
+    """带解码结果的Opus包列表
+
+    本身仍是原始 Opus 包的列表，可直接交给各ASR提供者；
+    ``decode_opus``、``opus_to_wav`` 识别到该类型时直接读取 PCM 切片，跳过解码。
+    """
+
+    def __init__(self, packets, store: "UplinkFrameStore", start_seq: int):
+        super().__init__(packets)
+        self.store = store
+        self.start_seq = start_seq
+
+    def pcm_frames(self) -> Optional[List[memoryview]]:
+        """返回每帧PCM的memoryview，环形缓冲区中的数据已被覆盖时返回None"""
+        return self.store.pcm_frames(self.start_seq, len(self))
+
+    def pcm_bytes(self) -> Optional[bytes]:
+        """拼接为连续PCM，拼接期间若数据被覆盖则返回None
+
+        拷贝之后再检查一次存活：push在覆盖槽位之前先递增write_seq，
+        因此只要拷贝期间有写入开始，这次检查就会失败
+        """
+        frames = self.pcm_frames()
+        if frames is None:
+            return None
+        pcm = b"".join(frames)
+        if not self.store.is_alive(self.start_seq):
+            return None
+        return pcm
+
+
+class UplinkFrameStore:
+    """单连接的上行音频环形缓冲区
+
+    Args:
+        capacity: 最多保留的帧数，超出后最早的帧被覆盖
+    """
+
+    def __init__(self, capacity: int = 500):
+        self.capacity = max(1, int(capacity))
+        self.decoder = opuslib_next.Decoder(SAMPLE_RATE, 1)
+        self._pcm = bytearray(self.capacity * FRAME_BYTES)
+        self._view = memoryview(self._pcm)
+        self._lengths = [0] * self.capacity
+        self._packets: List[Optional[bytes]] = [None] * self.capacity
+        self._seq_by_id = {}
+        # 下一帧的序号（单调递增），槽位为 seq % capacity
+        self.next_seq = 0
+        # 正在写入的最大序号+1：写槽位之前先递增，写完再递增next_seq。
+        # 读方拷贝后再用它判断是否存活，拷贝期间槽位被覆盖时一定能发现（seqlock）
+        self.write_seq = 0
+
+    def push(self, opus_packet: bytes) -> memoryview:
+        """写入一个Opus包并解码，返回该帧PCM的memoryview（解码失败时为空）"""
+        seq = self.next_seq
+        slot = seq % self.capacity
+        self.write_seq = seq + 1
+        old_packet = self._packets[slot]
+        if old_packet is not None:
+            self._seq_by_id.pop(id(old_packet), None)
+
+        offset = slot * FRAME_BYTES
+        length = 0
+        try:
+            pcm_frame = self.decoder.decode(opus_packet, FRAME_SAMPLES)
+            length = min(len(pcm_frame), FRAME_BYTES)
+            self._view[offset : offset + length] = pcm_frame[:length]
+        except opuslib_next.OpusError as e:
+            logger.bind(tag=TAG).info(f"解码错误: {e}")
+
+        self._packets[slot] = opus_packet
+        self._lengths[slot] = length
+        self._seq_by_id[id(opus_packet)] = seq
+        self.next_seq = seq + 1
+        return self._view[offset : offset + length]
+
+    def is_alive(self, seq: int) -> bool:
+        """判断序号为seq的帧是否仍在缓冲区中，且没有正在被新帧覆盖"""
+        return self.write_seq - self.capacity <= seq < self.next_seq
+
+    def pcm_frames(self, start_seq: int, count: int) -> Optional[List[memoryview]]:
+        if count == 0:
+            return []
+        if not self.is_alive(start_seq) or start_seq + count > self.next_seq:
+            return None
+        frames = []
+        for seq in range(start_seq, start_seq + count):
+            slot = seq % self.capacity
+            length = self._lengths[slot]
+            if length:
+                offset = slot * FRAME_BYTES
+                frames.append(self._view[offset : offset + length])
+        return frames
+
+    def pcm_of(self, packet: bytes) -> Optional[memoryview]:
+        """获取单个Opus包的解码结果，不在缓冲区中时返回None"""
+        seq = self._seq_by_id.get(id(packet))
+        if seq is None or not self.is_alive(seq):
+            return None
+        slot = seq % self.capacity
+        if self._packets[slot] is not packet:
+            return None
+        offset = slot * FRAME_BYTES
+        return self._view[offset : offset + self._lengths[slot]]
+
+    def wrap(self, packets: List[bytes]) -> List[bytes]:
+        """将一段Opus包列表关联到缓冲区中的解码结果
+
+        要求这些包按顺序经过 push 且仍在缓冲区中，否则原样返回，调用方按原方式解码。
+        """
+        if isinstance(packets, DecodedFrames) or not packets:
+            return packets
+        start_seq = self._seq_by_id.get(id(packets[0]))
+        if start_seq is None or start_seq + len(packets) > self.next_seq:
+            return packets
+        for i, packet in enumerate(packets):
+            if self._packets[(start_seq + i) % self.capacity] is not packet:
+                return packets
+        return DecodedFrames(packets, self, start_seq)
@@ -19,6 +19,8 @@ class CacheType(Enum):
     CONFIG = "config"
     DEVICE_PROMPT = "device_prompt"
     VOICEPRINT_HEALTH = "voiceprint_health"  # 声纹识别健康检查
+    MEMORY_QUERY = "memory_query"  # 记忆查询结果，键为 角色:查询文本
+    PRIVATE_CONFIG = "private_config"  # 设备差异化配置，键为 设备|客户端|模块选择
 
 
 @dataclass
@@ -58,5 +60,11 @@ class CacheConfig:
             CacheType.VOICEPRINT_HEALTH: cls(
                 strategy=CacheStrategy.TTL, ttl=600, max_size=100  # 10分钟过期
             ),
+            CacheType.MEMORY_QUERY: cls(
+                strategy=CacheStrategy.TTL_LRU, ttl=30, max_size=2000  # 30秒过期
+            ),
+            CacheType.PRIVATE_CONFIG: cls(
+                strategy=CacheStrategy.TTL_LRU, ttl=300, max_size=5000  # 5分钟过期
+            ),
         }
         return configs.get(cache_type, cls())
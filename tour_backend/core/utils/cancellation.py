@@ -0,0 +1,97 @@
+"""
+对话轮次的取消令牌
+
+客户端打断（abort）时，原先只设置 conn.client_abort，LLM循环要等到下一个token才退出，
+非流式TTS会把正在进行的 asyncio.run(text_to_speak) 跑完。CancelToken 让每个阶段在开始时
+取得当前轮次的令牌并注册取消回调：
+- 打断时 conn.cancel_turn() 取消当前令牌并换上新令牌，打断之前开始的工作全部收到取消，之后开始的工作不受影响
+- LLM 提供方在回调中关闭上游HTTP流，TTS 在回调中取消正在进行的合成请求
+"""
+
+import asyncio
+import threading
+from typing import Callable, List
+from config.logger import setup_logging
+
+TAG = __name__
+logger = setup_logging()
+
+
+class TurnCancelled(Exception):
+    """当前轮次已被打断"""
+
+
+class CancelToken:
+    """线程安全的取消令牌，取消时依次执行已注册的回调"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._cancelled = False
+        self._callbacks: List[Callable[[], None]] = []
+
+    @property
+    def cancelled(self) -> bool:
+        return self._cancelled
+
+    def cancel(self):
+        with self._lock:
+            if self._cancelled:
+                return
+            self._cancelled = True
+            callbacks, self._callbacks = self._callbacks, []
+        for callback in callbacks:
+            try:
+                callback()
+            except Exception as e:
+                logger.bind(tag=TAG).debug(f"取消回调执行失败: {e}")
+
+    def add_callback(self, callback: Callable[[], None]):
+        """注册取消回调，已取消时立即执行"""
+        with self._lock:
+            if not self._cancelled:
+                self._callbacks.append(callback)
+                return
+        callback()
+
+    def remove_callback(self, callback: Callable[[], None]):
+        with self._lock:
+            try:
+                self._callbacks.remove(callback)
+            except ValueError:
+                pass
+
+    def raise_if_cancelled(self):
+        if self._cancelled:
+            raise TurnCancelled()
+
+
+def is_cancelled(token: CancelToken = None) -> bool:
+    """令牌所属轮次是否已被打断，没有令牌时视为未打断"""
+    return token is not None and token.cancelled
+
+
+def run_cancellable(coro, token: CancelToken = None):
+    """在新的事件循环中运行协程（替代 asyncio.run），令牌取消时取消该协程，抛出 TurnCancelled"""
+    if token is None:
+        return asyncio.run(coro)
+
+    async def main():
+        loop = asyncio.get_running_loop()
+        task = asyncio.current_task()
+
+        def cancel():
+            loop.call_soon_threadsafe(task.cancel)
+
+        token.add_callback(cancel)
+        try:
+            return await coro
+        finally:
+            token.remove_callback(cancel)
+
+    if token.cancelled:
+        coro.close()
+        raise TurnCancelled()
+    try:
+        return asyncio.run(main())
+    except asyncio.CancelledError:
+        raise TurnCancelled()
@@ -0,0 +1,406 @@
+"""
+服务级聊天记录上报管道
+
+原先每句ASR/TTS各自解码为WAV、base64后通过同步的ManageApiClient单独POST，失败时在连接的线程池里
+time.sleep重试。这里改为进程内一个上报管道，在独立线程的事件循环中运行：
+- 多条记录攒成一批，一次请求上报到 batch_endpoint；管理端不支持批量接口（404/405）时自动退回逐条上报
+- 音频默认直接封装原始Opus包为Ogg-Opus，体积约为WAV的十分之一；旧版管理端可配置 audio_format: wav
+- 使用AsyncManageApiClient（长连接池、熔断），同时进行的请求数不超过 max_concurrency
+- 请求失败时按指数退避（带随机抖动）暂停发送，期间的记录写入 spool_dir，恢复后按时间顺序补传
+- 调用方只把记录放入内存队列，不会阻塞对话线程
+"""
+
+import os
+import json
+import time
+import atexit
+import base64
+import random
+import asyncio
+import threading
+from collections import deque
+from typing import Any, Callable, Dict, List, Optional
+
+import aiohttp
+from config.logger import setup_logging
+from config.config_loader import get_project_dir
+from config.manage_api_client import ManageApiClient, AsyncManageApiClient
+
+TAG = __name__
+logger = setup_logging()
+
+_reporter = None
+_reporter_lock = threading.Lock()
+
+
+def get_chat_history_reporter(config: Dict[str, Any]) -> "ChatHistoryReporter":
+    """获取进程级上报管道（首次调用时按配置创建）"""
+    global _reporter
+    if _reporter is None:
+        with _reporter_lock:
+            if _reporter is None:
+                report_config = config.get("chat_history_report") or {}
+                spool_dir = report_config.get("spool_dir", "data/report_spool")
+                if spool_dir and not os.path.isabs(spool_dir):
+                    spool_dir = os.path.join(get_project_dir(), spool_dir)
+                _reporter = ChatHistoryReporter(
+                    config.get("manager-api") or {},
+                    batch_size=int(report_config.get("batch_size", 20)),
+                    flush_interval=float(report_config.get("flush_interval", 2)),
+                    max_concurrency=int(report_config.get("max_concurrency", 4)),
+                    audio_format=report_config.get("audio_format", "ogg"),
+                    batch_endpoint=report_config.get(
+                        "batch_endpoint", "/agent/chat-history/report/batch"
+                    ),
+                    spool_dir=spool_dir or None,
+                    spool_max_mb=report_config.get("spool_max_mb", 200),
+                    max_pending=int(report_config.get("max_pending", 5000)),
+                    backoff_max=float(report_config.get("backoff_max", 60)),
+                    metrics_interval=report_config.get("metrics_interval", 300),
+                )
+    return _reporter
+
+
+class ChatHistoryReporter:
+    SINGLE_ENDPOINT = "/agent/chat-history/report"
+
+    def __init__(
+        self,
+        api_config: Dict[str, Any],
+        batch_size: int = 20,
+        flush_interval: float = 2,
+        max_concurrency: int = 4,
+        audio_format: str = "ogg",
+        batch_endpoint: Optional[str] = "/agent/chat-history/report/batch",
+        spool_dir: Optional[str] = None,
+        spool_max_mb: float = 200,
+        max_pending: int = 5000,
+        backoff_base: float = 1,
+        backoff_max: float = 60,
+        metrics_interval: int = 300,
+    ):
+        self.api_config = api_config
+        self.batch_size = max(1, batch_size)
+        self.flush_interval = max(0.0, flush_interval)
+        self.max_concurrency = max(1, max_concurrency)
+        self.audio_format = "wav" if audio_format == "wav" else "ogg"
+        self.batch_endpoint = batch_endpoint
+        self.spool_dir = spool_dir
+        if spool_dir:
+            os.makedirs(spool_dir, exist_ok=True)
+        self.spool_max_bytes = int(spool_max_mb * 1024 * 1024)
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+        self.metrics_interval = metrics_interval
+
+        # 调用方线程写入，上报线程取出；超过上限时丢弃最早的记录
+        self._pending = deque(maxlen=max(1, max_pending))
+        self._pending_lock = threading.Lock()
+        self._loop = asyncio.new_event_loop()
+        self._wakeup = asyncio.Event()
+        self._thread: Optional[threading.Thread] = None
+        self._tasks = set()
+
+        self._batch_supported = bool(batch_endpoint)
+        self._failures = 0
+        self._down_until = 0.0
+        self._spool_seq = 0
+        self._draining = False
+
+        self._stats = {
+            "submitted": 0,
+            "sent": 0,
+            "requests": 0,
+            "spooled": 0,
+            "dropped": 0,
+        }
+        self._last_metrics_time = time.monotonic()
+
+    def submit(
+        self,
+        mac_address: str,
+        session_id: str,
+        chat_type: int,
+        content: str,
+        report_time: int,
+        audio: Optional[Callable[[], bytes]] = None,
+    ):
+        """提交一条聊天记录，audio为在上报线程中生成音频字节的函数"""
+        if not content:
+            return
+        record = {
+            "macAddress": mac_address,
+            "sessionId": session_id,
+            "chatType": chat_type,
+            "content": content,
+            "reportTime": report_time,
+        }
+        with self._pending_lock:
+            if len(self._pending) == self._pending.maxlen:
+                self._stats["dropped"] += 1
+            self._pending.append((record, audio))
+            self._stats["submitted"] += 1
+            if self._thread is None:
+                self._thread = threading.Thread(
+                    target=self._run, name="chat-history-report", daemon=True
+                )
+                self._thread.start()
+                atexit.register(self._spool_pending)
+        self._loop.call_soon_threadsafe(self._wakeup.set)
+
+    def _run(self):
+        asyncio.set_event_loop(self._loop)
+        self._loop.run_until_complete(self._main())
+
+    async def _main(self):
+        self._client = AsyncManageApiClient(
+            self.api_config, max_connections=self.max_concurrency
+        )
+        self._semaphore = asyncio.Semaphore(self.max_concurrency)
+        # 上次运行留下的落盘记录
+        self._start_drain()
+
+        while True:
+            await self._wakeup.wait()
+            batch = await self._collect_batch()
+            if not batch:
+                continue
+            records = [self._encode(record, audio) for record, audio in batch]
+            if self._is_backing_off():
+                # 管理端不可用时不再请求，直接落盘等待补传
+                self._spool_write(records)
+                continue
+            await self._semaphore.acquire()
+            task = asyncio.ensure_future(self._send_batch(records))
+            self._tasks.add(task)
+            task.add_done_callback(self._tasks.discard)
+            self._maybe_log_metrics()
+
+    async def _collect_batch(self):
+        """等到攒满一批或距第一条记录超过flush_interval后取出一批"""
+        deadline = self._loop.time() + self.flush_interval
+        while len(self._pending) < self.batch_size:
+            remaining = deadline - self._loop.time()
+            if remaining <= 0:
+                break
+            self._wakeup.clear()
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), remaining)
+            except asyncio.TimeoutError:
+                break
+        with self._pending_lock:
+            count = min(self.batch_size, len(self._pending))
+            batch = [self._pending.popleft() for _ in range(count)]
+            if not self._pending:
+                self._wakeup.clear()
+        return batch
+
+    def _encode(self, record, audio) -> Dict[str, Any]:
+        audio_bytes = None
+        if audio is not None:
+            try:
+                audio_bytes = audio()
+            except Exception as e:
+                logger.bind(tag=TAG).warning(f"上报音频编码失败，仅上报文本: {e}")
+        record["audioBase64"] = (
+            base64.b64encode(audio_bytes).decode("utf-8") if audio_bytes else None
+        )
+        record["audioFormat"] = self.audio_format if audio_bytes else None
+        return record
+
+    async def _send_batch(self, records: List[Dict[str, Any]]):
+        try:
+            failed = await self._post_records(records)
+        finally:
+            self._semaphore.release()
+        self._after_post(failed)
+        if failed:
+            self._spool_write(failed)
+
+    async def _post_records(self, records: List[Dict[str, Any]]) -> List[Dict]:
+        """上报一批记录，返回需要稍后重试的记录"""
+        if self._batch_supported:
+            try:
+                await self._request(self.batch_endpoint, {"records": records})
+                self._stats["sent"] += len(records)
+                return []
+            except aiohttp.ClientResponseError as e:
+                if e.status not in (404, 405):
+                    return self._failed(records, e)
+                self._batch_supported = False
+                logger.bind(tag=TAG).warning(
+                    f"管理端不支持批量上报接口 {self.batch_endpoint}，改为逐条上报"
+                )
+            except Exception as e:
+                return self._failed(records, e)
+
+        results = await asyncio.gather(
+            *(self._post_single(record) for record in records)
+        )
+        return [record for record, ok in zip(records, results) if not ok]
+
+    async def _post_single(self, record: Dict[str, Any]) -> bool:
+        """逐条上报，返回False表示需要重试"""
+        try:
+            await self._request(self.SINGLE_ENDPOINT, record)
+            self._stats["sent"] += 1
+            return True
+        except Exception as e:
+            return not self._failed([record], e)
+
+    def _failed(self, records, error) -> List[Dict]:
+        """可重试的错误返回原记录，其余错误丢弃"""
+        if ManageApiClient._should_retry(error):
+            return records
+        self._stats["dropped"] += len(records)
+        logger.bind(tag=TAG).error(f"聊天记录上报失败，丢弃 {len(records)} 条: {error}")
+        return []
+
+    async def _request(self, endpoint: str, payload):
+        self._stats["requests"] += 1
+        # 失败的记录由上报管道落盘并退避补传，客户端不再重试
+        return await self._client.request("POST", endpoint, retries=0, json=payload)
+
+    def _is_backing_off(self) -> bool:
+        return self._loop.time() < self._down_until
+
+    def _after_post(self, failed):
+        if failed:
+            self._failures += 1
+            delay = min(self.backoff_max, self.backoff_base * 2 ** (self._failures - 1))
+            # 随机抖动，避免多个服务实例同时恢复请求
+            delay *= random.uniform(0.5, 1.0)
+            self._down_until = self._loop.time() + delay
+            logger.bind(tag=TAG).warning(
+                f"聊天记录上报失败，{delay:.1f}秒内暂停上报（连续失败{self._failures}次）"
+            )
+        else:
+            if self._failures:
+                logger.bind(tag=TAG).info("聊天记录上报已恢复")
+            self._failures = 0
+            self._down_until = 0.0
+        self._start_drain()
+
+    def _start_drain(self):
+        if self._draining or not self.spool_dir:
+            return
+        self._draining = True
+        task = asyncio.ensure_future(self._drain_spool())
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+
+    async def _drain_spool(self):
+        """按时间顺序补传落盘的记录，失败时等待退避结束后继续"""
+        try:
+            while True:
+                delay = self._down_until - self._loop.time()
+                if delay > 0:
+                    await asyncio.sleep(delay)
+                files = self._spool_files()
+                if not files:
+                    return
+                path = files[0]
+                try:
+                    with open(path, encoding="utf-8") as f:
+                        records = json.load(f)
+                except Exception as e:
+                    logger.bind(tag=TAG).warning(f"读取上报落盘文件失败 {path}: {e}")
+                    self._remove_file(path)
+                    continue
+                async with self._semaphore:
+                    failed = await self._post_records(records)
+                if failed:
+                    self._write_json(path, failed)
+                    self._failures += 1
+                    delay = min(
+                        self.backoff_max, self.backoff_base * 2 ** (self._failures - 1)
+                    )
+                    self._down_until = self._loop.time() + delay * random.uniform(
+                        0.5, 1.0
+                    )
+                else:
+                    self._remove_file(path)
+                    self._failures = 0
+                    self._down_until = 0.0
+        finally:
+            self._draining = False
+
+    def _spool_files(self) -> List[str]:
+        if not self.spool_dir:
+            return []
+        return [
+            os.path.join(self.spool_dir, name)
+            for name in sorted(os.listdir(self.spool_dir))
+            if name.endswith(".json")
+        ]
+
+    def _spool_write(self, records: List[Dict[str, Any]]):
+        if not self.spool_dir:
+            self._stats["dropped"] += len(records)
+            return
+        self._spool_seq += 1
+        name = f"{time.time_ns()}-{self._spool_seq:06d}.json"
+        self._write_json(os.path.join(self.spool_dir, name), records)
+        self._stats["spooled"] += len(records)
+        self._trim_spool()
+
+    def _trim_spool(self):
+        """落盘总量超过上限时删除最早的文件"""
+        files = self._spool_files()
+        sizes = [os.path.getsize(path) for path in files]
+        total = sum(sizes)
+        removed = 0
+        for path, size in zip(files, sizes):
+            if total <= self.spool_max_bytes:
+                break
+            self._remove_file(path)
+            total -= size
+            removed += 1
+        if removed:
+            logger.bind(tag=TAG).warning(f"上报落盘超过上限，已删除最早的 {removed} 个文件")
+
+    def _write_json(self, path: str, records):
+        try:
+            tmp_path = f"{path}.tmp"
+            with open(tmp_path, "w", encoding="utf-8") as f:
+                json.dump(records, f, ensure_ascii=False)
+            os.replace(tmp_path, path)
+        except Exception as e:
+            logger.bind(tag=TAG).error(f"写入上报落盘文件失败: {e}")
+
+    def _remove_file(self, path: str):
+        try:
+            os.remove(path)
+        except FileNotFoundError:
+            pass
+
+    def _spool_pending(self):
+        """进程退出时把尚未发送的记录落盘"""
+        with self._pending_lock:
+            batch = list(self._pending)
+            self._pending.clear()
+        if batch and self.spool_dir:
+            self._spool_write([self._encode(record, audio) for record, audio in batch])
+
+    def get_metrics(self, reset: bool = False) -> Dict[str, Any]:
+        metrics = dict(self._stats)
+        metrics["pending"] = len(self._pending)
+        metrics["spool_files"] = len(self._spool_files())
+        if reset:
+            for key in self._stats:
+                self._stats[key] = 0
+        return metrics
+
+    def _maybe_log_metrics(self):
+        if not self.metrics_interval:
+            return
+        now = time.monotonic()
+        if now - self._last_metrics_time < self.metrics_interval:
+            return
+        self._last_metrics_time = now
+        metrics = self.get_metrics(reset=True)
+        logger.bind(tag=TAG).info(
+            f"聊天记录上报统计: 提交 {metrics['submitted']}, 已上报 {metrics['sent']}, "
+            f"请求 {metrics['requests']}, 落盘 {metrics['spooled']}, 丢弃 {metrics['dropped']}, "
+            f"待发送 {metrics['pending']}, 待补传文件 {metrics['spool_files']}"
+        )
@@ -0,0 +1,135 @@
+"""
+对话上下文窗口管理
+
+Dialogue 会完整保留整个连接期间的对话（断开时用于记忆总结），但发送给LLM的历史按
+所选LLM的token预算窗口化：
+- 历史超过预算的一定比例时，在后台把最早的若干轮对话压缩进滚动摘要，摘要放在系统提示词末尾
+- 摘要未完成时不等待，本轮请求临时从较早的user消息处截断，保证不超预算
+"""
+
+import json
+import time
+from typing import Dict
+from config.logger import setup_logging
+
+TAG = __name__
+logger = setup_logging()
+
+# 每条消息的固定开销（角色、分隔符等）
+MESSAGE_OVERHEAD_TOKENS = 4
+
+# 追加到记忆总结提示词后的说明：压缩的是同一次对话中较早的内容
+SUMMARY_PROMPT_SUFFIX = (
+    "9、以上是同一次对话中较早的内容，除用户信息外还要保留已经聊过的话题、讲过的内容和得出的结论，"
+    "便于接下来的对话衔接，不要重复已讲过的内容\n"
+)
+
+
+def estimate_tokens(text: str) -> int:
+    """快速估算token数：中日韩字符约1个token，其余字符约4个一个token"""
+    if not text:
+        return 0
+    cjk = 0
+    for ch in text:
+        if ch >= "⺀":
+            cjk += 1
+    return cjk + (len(text) - cjk + 3) // 4
+
+
+def estimate_message_tokens(message: Dict) -> int:
+    content = message.get("content")
+    if content is None and message.get("tool_calls") is not None:
+        content = json.dumps(message["tool_calls"], ensure_ascii=False)
+    if not isinstance(content, str):
+        content = str(content) if content is not None else ""
+    return estimate_tokens(content) + MESSAGE_OVERHEAD_TOKENS
+
+
+class ContextWindowManager:
+    """按所选LLM的token预算管理conn.dialogue的上下文窗口"""
+
+    def __init__(self, conn):
+        self.conn = conn
+        window_config = conn.config.get("context_window") or {}
+        self.enabled = window_config.get("enable", False)
+        self.default_max_tokens = int(window_config.get("max_tokens", 4000))
+        # 历史超过可用预算的该比例时开始后台压缩
+        self.trigger_ratio = float(window_config.get("summary_trigger_ratio", 0.8))
+        # 压缩后保留的最近对话占可用预算的比例
+        self.keep_ratio = float(window_config.get("keep_ratio", 0.4))
+        self.min_recent_messages = int(window_config.get("min_recent_messages", 6))
+        self.summary_max_tokens = int(window_config.get("summary_max_tokens", 1000))
+        self.summary_future = None
+        self.refresh_budget()
+
+    def refresh_budget(self):
+        """所选LLM可能随私有配置变化，每轮结束时重新读取其预算"""
+        if not self.enabled:
+            self.conn.dialogue.token_budget = None
+            return
+        config = self.conn.config
+        llm_name = config.get("selected_module", {}).get("LLM")
+        llm_config = config.get("LLM", {}).get(llm_name) or {}
+        self.conn.dialogue.token_budget = int(
+            llm_config.get("context_max_tokens") or self.default_max_tokens
+        )
+
+    def after_turn(self):
+        """一轮对话结束后调用，历史接近预算时提交后台摘要，不阻塞当前对话"""
+        self.refresh_budget()
+        dialogue = self.conn.dialogue
+        budget = dialogue.history_budget()
+        if budget is None or self.conn.llm is None:
+            return
+        if self.summary_future is not None and not self.summary_future.done():
+            return
+        if dialogue.history_tokens() <= budget * self.trigger_ratio:
+            return
+
+        candidates = dialogue.take_summary_candidates(
+            int(budget * self.keep_ratio), self.min_recent_messages
+        )
+        if candidates is None:
+            return
+        messages, summarized_ids = candidates
+        self.summary_future = self.conn.executor.submit(
+            self._summarize, messages, summarized_ids, dialogue.summary
+        )
+
+    def _summarize(self, messages, summarized_ids, previous_summary):
+        # 复用 mem_local_short 的记忆总结提示词
+        from core.providers.memory.mem_local_short.mem_local_short import (
+            short_term_memory_prompt_only_content,
+        )
+
+        start_time = time.time()
+        msg_str = ""
+        for role, content in messages:
+            if role == "user":
+                msg_str += f"User: {content}\n"
+            elif role == "assistant":
+                msg_str += f"Assistant: {content}\n"
+        if previous_summary:
+            msg_str += "历史记忆：\n"
+            msg_str += previous_summary
+
+        try:
+            summary = self.conn.llm.response_no_stream(
+                short_term_memory_prompt_only_content + SUMMARY_PROMPT_SUFFIX,
+                msg_str,
+                max_tokens=self.summary_max_tokens,
+                temperature=0.2,
+            )
+        except Exception as e:
+            logger.bind(tag=TAG).error(f"对话摘要失败: {e}")
+            return
+        summary = (summary or "").strip()
+        if not summary or summary.startswith("【"):
+            # 空结果或LLM异常提示，保留原历史，下轮再试
+            logger.bind(tag=TAG).warning(f"对话摘要结果无效: {summary[:50]}")
+            return
+
+        self.conn.dialogue.apply_summary(summary, summarized_ids)
+        logger.bind(tag=TAG).info(
+            f"对话摘要完成: 压缩 {len(summarized_ids)} 条消息, 摘要 {len(summary)} 字, 耗时 {time.time() - start_time:.2f}s"
+        )
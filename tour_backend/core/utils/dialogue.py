@@ -1,7 +1,12 @@
 import uuid
 import re
+import threading
 from typing import List, Dict
 from datetime import datetime
+from core.utils.context_window import estimate_message_tokens, estimate_tokens
+
+# 系统提示词中的记忆占位段，不管中间有什么内容
+MEMORY_PATTERN = re.compile(r"<memory>.*?</memory>", flags=re.DOTALL)
 
 
 class Message:
@@ -26,6 +31,31 @@ class Dialogue:
         # 获取当前时间
         self.current_time = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
 
+        # 增量渲染缓存：非系统消息只在首次出现时渲染一次，之后每轮直接复用
+        self._rendered: List[Dict[str, str]] = []
+        # 渲染缓存对应的消息列表对象和已处理条数，列表被整体替换或缩短时重建
+        self._rendered_source = None
+        self._rendered_count = 0
+        self._system_message: Message = None
+        # 系统提示词渲染结果，依赖内容、时间(分钟)、记忆和说话人，四者不变时复用
+        self._system_key = None
+        self._system_rendered: Dict[str, str] = None
+        # 说话人配置 -> 说话人描述片段
+        self._speakers_key = None
+        self._speakers_text = ""
+        # 窗口化：各渲染消息的uniq_id和token数前缀和
+        self._rendered_ids: List[str] = []
+        self._token_prefix: List[int] = [0]
+        self._system_tokens = 0
+        # 已被摘要替代的较早消息，不再发送给LLM，但仍保留在self.dialogue中供记忆总结使用
+        self.summary = ""
+        self._summarized_ids = set()
+        self._window_start = 0
+        # 上下文token预算，None表示不限制
+        self.token_budget: int = None
+        # 聊天线程与事件循环可能同时读写渲染缓存
+        self._lock = threading.Lock()
+
     def put(self, message: Message):
         self.dialogue.append(message)
 
@@ -50,69 +80,191 @@ class Dialogue:
         # 这样确保说话人功能在所有调用路径下都生效
         return self.get_llm_dialogue_with_memory(None, None)
 
+    def _sync_rendered(self):
+        """把上次渲染之后新增的消息追加到渲染缓存"""
+        with self._lock:
+            messages = self.dialogue
+            if (
+                messages is not self._rendered_source
+                or len(messages) < self._rendered_count
+            ):
+                # 消息列表被替换（如清理工具消息）或截断，重新渲染
+                self._rendered = []
+                self._rendered_ids = []
+                self._token_prefix = [0]
+                self._rendered_source = messages
+                self._rendered_count = 0
+                self._system_message = None
+                self._window_start = 0
+
+            end = len(messages)
+            for m in messages[self._rendered_count : end]:
+                if m.role == "system":
+                    if self._system_message is None:
+                        self._system_message = m
+                else:
+                    self.getMessages(m, self._rendered)
+                    self._rendered_ids.append(m.uniq_id)
+                    self._token_prefix.append(
+                        self._token_prefix[-1] + estimate_message_tokens(self._rendered[-1])
+                    )
+            self._rendered_count = end
+            self._skip_summarized()
+
+    def _skip_summarized(self):
+        """窗口起点跳过已被摘要替代的消息"""
+        while (
+            self._window_start < len(self._rendered_ids)
+            and self._rendered_ids[self._window_start] in self._summarized_ids
+        ):
+            self._window_start += 1
+
+    def history_tokens(self) -> int:
+        """当前窗口内（摘要之后）历史消息的估算token数"""
+        self._sync_rendered()
+        return self._token_prefix[-1] - self._token_prefix[self._window_start]
+
+    def history_budget(self):
+        """扣除系统提示词后可用于历史消息的token数，未设置预算时返回None"""
+        if self.token_budget is None:
+            return None
+        return max(self.token_budget - self._system_tokens, 0)
+
+    def _user_boundaries(self, start: int, end: int) -> List[int]:
+        """[start, end)内user消息的位置，窗口只能从user消息处切开，避免拆散工具调用"""
+        return [
+            i
+            for i in range(start, end)
+            if self._rendered[i].get("role") == "user"
+        ]
+
+    def take_summary_candidates(self, keep_tokens: int, min_recent: int):
+        """
+        选出窗口中最早的一段对话交给摘要，保留最近约keep_tokens的内容和至少min_recent条消息
+        Returns:
+            (消息列表[(role, content)], uniq_id集合)，没有可压缩内容时返回None
+        """
+        self._sync_rendered()
+        with self._lock:
+            total = len(self._rendered)
+            limit = max(total - min_recent, self._window_start)
+            cut = None
+            for i in self._user_boundaries(self._window_start + 1, limit + 1):
+                cut = i
+                if self._token_prefix[-1] - self._token_prefix[i] <= keep_tokens:
+                    break
+            if cut is None:
+                return None
+            messages = [
+                (m["role"], m["content"])
+                for m in self._rendered[self._window_start : cut]
+                if m.get("role") in ("user", "assistant") and m.get("content")
+            ]
+            return messages, set(self._rendered_ids[self._window_start : cut])
+
+    def apply_summary(self, summary: str, summarized_ids):
+        """用摘要替代已压缩的较早消息"""
+        with self._lock:
+            self.summary = summary
+            self._summarized_ids |= set(summarized_ids)
+            self._skip_summarized()
+
     def update_system_message(self, new_content: str):
         """更新或添加系统消息"""
-        # 查找第一个系统消息
-        system_msg = next((msg for msg in self.dialogue if msg.role == "system"), None)
-        if system_msg:
-            system_msg.content = new_content
+        self._sync_rendered()
+        if self._system_message:
+            self._system_message.content = new_content
         else:
             self.put(Message(role="system", content=new_content))
 
-    def get_llm_dialogue_with_memory(
-        self, memory_str: str = None, voiceprint_config: dict = None
-    ) -> List[Dict[str, str]]:
-        # 构建对话
-        dialogue = []
+    def _render_speakers(self, voiceprint_config: dict) -> str:
+        try:
+            speakers = voiceprint_config.get("speakers", [])
+        except:
+            # 配置读取失败时忽略错误，不影响其他功能
+            return ""
+        if not speakers:
+            return ""
+        key = tuple(speakers)
+        if key == self._speakers_key:
+            return self._speakers_text
 
-        # 添加系统提示和记忆
-        system_message = next(
-            (msg for msg in self.dialogue if msg.role == "system"), None
+        text = "\n\n<speakers_info>"
+        for speaker_str in speakers:
+            try:
+                parts = speaker_str.split(",", 2)
+                if len(parts) >= 2:
+                    name = parts[1].strip()
+                    # 如果描述为空，则为""
+                    description = parts[2].strip() if len(parts) >= 3 else ""
+                    text += f"\n- {name}：{description}"
+            except:
+                pass
+        text += "\n\n</speakers_info>"
+        self._speakers_key = key
+        self._speakers_text = text
+        return text
+
+    def _render_system(self, memory_str: str, voiceprint_config: dict) -> Dict[str, str]:
+        content = self._system_message.content
+        current_time = (
+            datetime.now().strftime("%H:%M") if "{{current_time}}" in content else None
         )
+        speakers_text = self._render_speakers(voiceprint_config)
+        key = (content, current_time, memory_str, speakers_text, self.summary)
+        if key == self._system_key:
+            return self._system_rendered
 
-        if system_message:
-            # 基础系统提示
-            enhanced_system_prompt = system_message.content
-            # 替换时间占位符
+        # 基础系统提示，替换时间占位符
+        enhanced_system_prompt = content
+        if current_time is not None:
             enhanced_system_prompt = enhanced_system_prompt.replace(
-                "{{current_time}}", datetime.now().strftime("%H:%M")
+                "{{current_time}}", current_time
+            )
+        # 添加说话人个性化描述
+        enhanced_system_prompt += speakers_text
+        # 使用正则表达式匹配 <memory> 标签，不管中间有什么内容
+        if memory_str is not None:
+            enhanced_system_prompt = MEMORY_PATTERN.sub(
+                lambda _: f"<memory>\n{memory_str}\n</memory>",
+                enhanced_system_prompt,
             )
+        # 较早的对话已被压缩为摘要
+        if self.summary:
+            enhanced_system_prompt += f"\n\n<history_summary>\n{self.summary}\n</history_summary>"
+        self._system_key = key
+        self._system_rendered = {"role": "system", "content": enhanced_system_prompt}
+        self._system_tokens = estimate_tokens(enhanced_system_prompt)
+        return self._system_rendered
 
-            # 添加说话人个性化描述
-            try:
-                speakers = voiceprint_config.get("speakers", [])
-                if speakers:
-                    enhanced_system_prompt += "\n\n<speakers_info>"
-                    for speaker_str in speakers:
-                        try:
-                            parts = speaker_str.split(",", 2)
-                            if len(parts) >= 2:
-                                name = parts[1].strip()
-                                # 如果描述为空，则为""
-                                description = (
-                                    parts[2].strip() if len(parts) >= 3 else ""
-                                )
-                                enhanced_system_prompt += f"\n- {name}：{description}"
-                        except:
-                            pass
-                    enhanced_system_prompt += "\n\n</speakers_info>"
-            except:
-                # 配置读取失败时忽略错误，不影响其他功能
-                pass
+    def _window_start_for_budget(self) -> int:
+        """
+        摘要尚未完成而历史已超出预算时，临时从较早的user消息处截断，保证本轮请求不超预算
+        截断只影响本次请求，摘要完成后窗口起点会前移到摘要之后
+        """
+        start = self._window_start
+        budget = self.history_budget()
+        if budget is None:
+            return start
+        total = self._token_prefix[-1]
+        if total - self._token_prefix[start] <= budget:
+            return start
+        for i in self._user_boundaries(start + 1, len(self._rendered)):
+            start = i
+            if total - self._token_prefix[i] <= budget:
+                break
+        return start
 
-            # 使用正则表达式匹配 <memory> 标签，不管中间有什么内容
-            if memory_str is not None:
-                enhanced_system_prompt = re.sub(
-                    r"<memory>.*?</memory>",
-                    f"<memory>\n{memory_str}\n</memory>",
-                    enhanced_system_prompt,
-                    flags=re.DOTALL,
-                )
-            dialogue.append({"role": "system", "content": enhanced_system_prompt})
-
-        # 添加用户和助手的对话
-        for m in self.dialogue:
-            if m.role != "system":  # 跳过原始的系统消息
-                self.getMessages(m, dialogue)
+    def get_llm_dialogue_with_memory(
+        self, memory_str: str = None, voiceprint_config: dict = None
+    ) -> List[Dict[str, str]]:
+        self._sync_rendered()
 
+        # 构建对话：系统提示和记忆 + 用户和助手的对话
+        dialogue = []
+        if self._system_message:
+            dialogue.append(dict(self._render_system(memory_str, voiceprint_config)))
+        # 历史消息直接返回渲染缓存中的对象，不逐条拷贝，构建耗时不随历史增长；
+        # 需要改写消息的LLM适配器(dify/coze/ollama/AliBL)自行拷贝列表和被修改的消息
+        dialogue.extend(self._rendered[self._window_start_for_budget() :])
         return dialogue
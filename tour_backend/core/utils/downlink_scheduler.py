@@ -0,0 +1,351 @@
+"""
+下行音频集中调度
+
+原先每个连接的每一帧Opus都各自 asyncio.sleep 到预定时间再发送，几百个连接同时播放时
+事件循环每秒要唤醒数千次，各条路径的漂移修正也不一致。这里改为服务级的单一定时器：
+- 每个连接一个 DownlinkStream，按顺序保存待发送的音频帧和需要保持先后顺序的文本消息
+- 调度器每 tick_ms 唤醒一次，把所有连接中已到期的帧一起发出；各连接按下一帧的到期节拍挂在时间轮上，
+  每个节拍只处理本节拍有帧到期的连接
+- 节拍循环不等待任何连接的发送：websocket.send 写入后超过写缓冲上限时会等待 drain，此时该连接的发送
+  转入单独的任务继续，任务完成前跳过该连接，慢连接不拖住其他连接；未超限的发送（绝大多数）在节拍内
+  直接完成，不为每次发送创建任务
+- 每个连接播放开始（以及欠载后重新开始）时先连续发出 pre_buffer_frames 帧作为客户端的抖动缓冲，
+  之后严格按帧时长发送；时间线对齐到节拍并以绝对时间计算，不随唤醒误差累积漂移
+- 生产者领先播放进度超过 max_buffered_frames 帧时等待，避免一次性堆积整段音频
+- batch_frames > 1 时，队首帧到期后连同其后最多 batch_frames-1 帧一起交给发送函数，合并为一条消息
+- 每帧附带所属轮次的取消令牌，轮次被打断后队列中剩余的该轮次音频在发送前丢弃，不会发到下一轮
+"""
+
+import math
+import time
+import asyncio
+from collections import deque
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Tuple
+from config.logger import setup_logging
+from core.utils.cancellation import is_cancelled
+
+TAG = __name__
+logger = setup_logging()
+
+_AUDIO = 0
+_MESSAGE = 1
+_MARKER = 2
+# 之后的音频帧属于该轮次令牌
+_TURN = 3
+
+# 发送一组音频帧：[(Opus帧, 播放时间, 序列号)]
+SendFrames = Callable[[List[Tuple[bytes, float, int]]], Awaitable[Any]]
+SendMessage = Callable[[str], Awaitable[Any]]
+
+
+class _Resume:
+    """接着驱动一个已开始执行、停在等待上的协程，交给任务继续运行"""
+
+    __slots__ = ("coro", "waiting")
+
+    def __init__(self, coro, waiting):
+        self.coro = coro
+        self.waiting = waiting
+
+    def __await__(self):
+        coro, waiting = self.coro, self.waiting
+        while True:
+            try:
+                value = yield waiting
+            except BaseException as e:
+                send, value = coro.throw, e
+            else:
+                send = coro.send
+            try:
+                waiting = send(value)
+            except StopIteration as stop:
+                return stop.value
+
+
+async def _resume(coro, waiting):
+    return await _Resume(coro, waiting)
+
+
+def _write_blocked(websocket) -> bool:
+    """客户端写缓冲已满时本轮跳过该连接，避免一个慢连接拖住所有连接的发送"""
+    transport = getattr(websocket, "transport", None)
+    if transport is None:
+        return False
+    try:
+        return transport.get_write_buffer_size() >= transport.get_write_buffer_limits()[1]
+    except Exception:
+        return False
+
+
+class DownlinkStream:
+    """单个连接的下行发送队列"""
+
+    def __init__(
+        self,
+        scheduler: "DownlinkScheduler",
+        websocket,
+        send_frames: SendFrames,
+        send_message: SendMessage,
+        batch_frames: int = 1,
+    ):
+        self.scheduler = scheduler
+        self.websocket = websocket
+        self.send_frames = send_frames
+        self.batch_frames = max(1, batch_frames)
+        self.send_message = send_message
+
+        self._items = deque()
+        # 轮次令牌只在变化处入队一次：音频项只含bytes，不被GC跟踪，排队帧多时年轻代回收不必遍历它们
+        self._put_token = None
+        self._play_token = None
+        self._queued_frames = 0
+        self._space_waiters: List[asyncio.Future] = []
+        # 时间线：第 base_index 帧之后的第 n 帧在 timeline_start + (n - pre_buffer) * 帧时长 到期
+        self.timeline_start = 0.0
+        self.base_index = 0
+        self.sent_frames = 0
+        self.closed = False
+        # 在时间轮上挂载的节拍，None表示未挂载
+        self._slot: Optional[int] = None
+        # 进行中的发送任务
+        self._sending: Optional[asyncio.Task] = None
+
+    def pending(self) -> bool:
+        return bool(self._items)
+
+    def _next_due(self) -> float:
+        scheduler = self.scheduler
+        offset = self.sent_frames - self.base_index - scheduler.pre_buffer_frames
+        return self.timeline_start + offset * scheduler.frame_seconds
+
+    async def put_frames(self, frames, token=None):
+        """追加音频帧，生产者领先太多时等待
+        Args:
+            token: 音频所属轮次的取消令牌，取消后尚未发出的帧直接丢弃
+        """
+        if self.closed or is_cancelled(token):
+            return
+        scheduler = self.scheduler
+        now = time.perf_counter()
+        if not self._queued_frames and now > self._next_due():
+            # 欠载（或首次播放）：重新开始时间线，重新积累客户端的抖动缓冲
+            self.timeline_start = math.ceil(now / scheduler.tick_seconds) * scheduler.tick_seconds
+            self.base_index = self.sent_frames
+        if token is not self._put_token:
+            self._put_token = token
+            self._items.append((_TURN, token))
+        for frame in frames:
+            self._items.append((_AUDIO, frame))
+        self._queued_frames += len(frames)
+        scheduler._schedule(self, now)
+
+        while self._queued_frames > self.scheduler.max_buffered_frames and not self.closed:
+            waiter = asyncio.get_running_loop().create_future()
+            self._space_waiters.append(waiter)
+            await waiter
+
+    def put_message(self, message: str):
+        """文本消息排在已入队的音频之后发送"""
+        if self.closed:
+            return
+        self._items.append((_MESSAGE, message))
+        self.scheduler._schedule(self, time.perf_counter())
+
+    async def drain(self):
+        """等待已入队的内容全部发出"""
+        if self.closed or not self._items:
+            return
+        waiter = asyncio.get_running_loop().create_future()
+        self._items.append((_MARKER, waiter))
+        self.scheduler._schedule(self, time.perf_counter())
+        await waiter
+
+    def clear(self):
+        """丢弃未发送的音频和消息，唤醒所有等待者"""
+        items, self._items = self._items, deque()
+        self._put_token = self._play_token = None
+        self._queued_frames = 0
+        for kind, payload in items:
+            if kind == _MARKER and not payload.done():
+                payload.set_result(None)
+        self._wake_producers()
+
+    def close(self):
+        self.closed = True
+        self.clear()
+        self.scheduler._streams.pop(id(self), None)
+
+    def _wake_producers(self):
+        if self._queued_frames > self.scheduler.max_buffered_frames:
+            return
+        waiters, self._space_waiters = self._space_waiters, []
+        for waiter in waiters:
+            if not waiter.done():
+                waiter.set_result(None)
+
+    def _head_due(self, now: float) -> float:
+        """队首内容的到期时间，消息和等待标记随到随发"""
+        if self._items and self._items[0][0] == _AUDIO:
+            if is_cancelled(self._play_token):
+                # 已打断轮次的帧不必等到期，尽快丢弃
+                return now
+            return self._next_due()
+        return now
+
+    async def _flush_due(self, deadline: float):
+        """发送到期的音频帧以及排在它们之间的消息，丢弃已打断轮次的帧"""
+        if _write_blocked(self.websocket):
+            return
+        while self._items:
+            kind, payload = self._items[0]
+            if kind == _AUDIO:
+                if is_cancelled(self._play_token):
+                    self._items.popleft()
+                    self._queued_frames -= 1
+                    continue
+                if self._next_due() > deadline:
+                    break
+                batch = []
+                while (
+                    self._items
+                    and self._items[0][0] == _AUDIO
+                    and len(batch) < self.batch_frames
+                ):
+                    frame = self._items.popleft()[1]
+                    self._queued_frames -= 1
+                    # 播放位置(用于MQTT网关时间戳)不早于时间线起点
+                    play_time = max(self._next_due(), self.timeline_start)
+                    batch.append((frame, play_time, self.sent_frames))
+                    self.sent_frames += 1
+                await self.send_frames(batch)
+            elif kind == _MESSAGE:
+                self._items.popleft()
+                await self.send_message(payload)
+            elif kind == _TURN:
+                self._items.popleft()
+                self._play_token = payload
+            else:
+                self._items.popleft()
+                if not payload.done():
+                    payload.set_result(None)
+        self._wake_producers()
+
+
+class DownlinkScheduler:
+    def __init__(
+        self,
+        tick_ms: int = 20,
+        frame_duration: int = 60,
+        pre_buffer_frames: int = 3,
+        max_buffered_ms: int = 2000,
+        step_ms: float = 0.5,
+    ):
+        self.tick_seconds = tick_ms / 1000
+        self.frame_seconds = frame_duration / 1000
+        self.pre_buffer_frames = pre_buffer_frames
+        self.max_buffered_frames = max(
+            pre_buffer_frames + 1, max_buffered_ms // frame_duration
+        )
+        self.step_seconds = step_ms / 1000
+        self._streams: Dict[int, DownlinkStream] = {}
+        # 时间轮：节拍序号 -> 该节拍有内容到期的连接
+        self._wheel: Dict[int, List[DownlinkStream]] = {}
+        self._next_slot = 0
+        self._task: Optional[asyncio.Task] = None
+
+        self.ticks = 0
+        self.frames_sent = 0
+
+    def open_stream(
+        self,
+        websocket,
+        send_frames: SendFrames,
+        send_message: SendMessage,
+        batch_frames: int = 1,
+    ) -> DownlinkStream:
+        stream = DownlinkStream(self, websocket, send_frames, send_message, batch_frames)
+        self._streams[id(stream)] = stream
+        return stream
+
+    def _slot_of(self, t: float) -> int:
+        # 到期时间在 (节拍 - 半个节拍, 节拍 + 半个节拍] 内的内容在该节拍发出
+        return math.ceil(t / self.tick_seconds - 0.5)
+
+    def _schedule(self, stream: DownlinkStream, now: float):
+        """把连接挂到其队首内容到期的节拍上"""
+        if self._task is None or self._task.done():
+            self._next_slot = self._slot_of(now)
+            # 空闲后第一个内容立即处理，之后按节拍运行，时间轮为空时退出
+            self._task = asyncio.get_running_loop().create_task(self._run())
+        slot = max(self._slot_of(stream._head_due(now)), self._next_slot)
+        if stream._slot is not None and stream._slot <= slot:
+            return
+        stream._slot = slot
+        self._wheel.setdefault(slot, []).append(stream)
+
+    async def _run(self):
+        while self._wheel:
+            slot = self._next_slot
+            delay = slot * self.tick_seconds - time.perf_counter()
+            if delay > 0:
+                await asyncio.sleep(delay)
+            self.ticks += 1
+            now = time.perf_counter()
+            # 处理超时错过的节拍一并补上，节拍按绝对时间推进，唤醒误差不累积
+            last = max(slot, self._slot_of(now))
+            self._next_slot = last + 1
+            deadline = now + self.tick_seconds / 2
+            loop = asyncio.get_running_loop()
+            step_start = now
+            for current in range(slot, last + 1):
+                for stream in self._wheel.pop(current, ()):
+                    if stream._slot != current:
+                        # 已改挂到更早的节拍并处理过
+                        continue
+                    if time.perf_counter() - step_start > self.step_seconds:
+                        # 一个节拍的连接很多时分批处理，批间让出事件循环，其他连接的收发不必等整个节拍处理完
+                        await asyncio.sleep(0)
+                        step_start = time.perf_counter()
+                        if stream._slot != current:
+                            continue
+                    stream._slot = None
+                    if stream._sending is not None and not stream._sending.done():
+                        # 上一次发送还在等待该连接的写缓冲，发送完成后重新挂载
+                        continue
+                    flush = self._flush(stream, deadline)
+                    try:
+                        # 在节拍内直接执行，发送需要等待写缓冲时才转入任务
+                        waiting = flush.send(None)
+                    except StopIteration:
+                        continue
+                    stream._sending = loop.create_task(_resume(flush, waiting))
+
+    async def _flush(self, stream: DownlinkStream, deadline: float):
+        """发送一个连接到期的内容，完成后按队首内容重新挂到时间轮上"""
+        try:
+            sent = stream.sent_frames
+            await stream._flush_due(deadline)
+            self.frames_sent += stream.sent_frames - sent
+        except Exception as e:
+            logger.bind(tag=TAG).warning(f"下行音频发送失败: {e}")
+            stream.clear()
+        if stream.pending() and not stream.closed:
+            self._schedule(stream, time.perf_counter())
+
+
+_scheduler: Optional[DownlinkScheduler] = None
+
+
+def get_downlink_scheduler(config: Dict[str, Any]) -> Optional[DownlinkScheduler]:
+    """获取服务级下行调度器，未开启时返回None"""
+    global _scheduler
+    scheduler_config = config.get("downlink_scheduler") or {}
+    if not scheduler_config.get("enable", False):
+        return None
+    if _scheduler is None:
+        _scheduler = DownlinkScheduler(
+            tick_ms=int(scheduler_config.get("tick_ms", 20)),
+            pre_buffer_frames=int(scheduler_config.get("pre_buffer_frames", 3)),
+            max_buffered_ms=int(scheduler_config.get("max_buffered_ms", 2000)),
+        )
+    return _scheduler
@@ -0,0 +1,101 @@
+"""
+下行音频帧打包
+
+每个60ms的Opus包原先单独调用一次 websocket.send；MQTT网关连接还要为每个包新建16字节头部，
+再用 bytes(header) + opus_packet 拷贝一次负载。FramePacker 把头部和负载直接写入连接级的预分配缓冲区，
+并支持把多帧打包进一条WebSocket消息，减少多人同时收听时的系统调用和逐条消息开销。
+
+批量容器格式（客户端在hello的features中声明 audio_batch 后，该连接的所有下行音频二进制消息都使用此格式）:
+    u8  版本号(BATCH_VERSION)
+    u8  帧数N
+    N × (u16 帧长度(大端) + Opus帧)
+
+MQTT网关格式：每帧仍是 16字节头部 + Opus帧，头部中已带负载长度，批量发送时把多帧首尾相接放入一条消息:
+    u8 类型(1) | u8 保留 | u16 负载长度 | u32 序列号 | u32 时间戳 | u32 Opus长度
+"""
+
+import struct
+from typing import Iterable, List, Tuple
+
+BATCH_VERSION = 1
+# 单条批量消息最多的帧数（帧数字段为u8）
+MAX_BATCH_FRAMES = 255
+
+_BATCH_HEADER = struct.Struct(">BB")
+_FRAME_LENGTH = struct.Struct(">H")
+_MQTT_HEADER = struct.Struct(">BBHIII")
+
+# (Opus帧, 时间戳(毫秒, u32), 序列号)
+Packet = Tuple[bytes, int, int]
+
+
+class FramePacker:
+    """连接级的打包缓冲区，发送完成后复用"""
+
+    def __init__(self, initial_size: int = 4096):
+        self._buffer = bytearray(initial_size)
+        # 上一条消息还在发送时（等待写缓冲）不能覆盖缓冲区，临时改用新缓冲区
+        self._busy = False
+
+    def _acquire(self, size: int) -> bytearray:
+        if self._busy:
+            return bytearray(size)
+        if len(self._buffer) < size:
+            self._buffer = bytearray(max(size, len(self._buffer) * 2))
+        return self._buffer
+
+    async def _send(self, websocket, buffer: bytearray, size: int):
+        owned = buffer is self._buffer
+        if owned:
+            self._busy = True
+        try:
+            await websocket.send(memoryview(buffer)[:size])
+        finally:
+            if owned:
+                self._busy = False
+
+    async def send_batch(self, websocket, frames: List[bytes]):
+        """按批量容器格式发送"""
+        for start in range(0, len(frames), MAX_BATCH_FRAMES):
+            chunk = frames[start : start + MAX_BATCH_FRAMES]
+            size = _BATCH_HEADER.size + sum(_FRAME_LENGTH.size + len(f) for f in chunk)
+            buffer = self._acquire(size)
+            _BATCH_HEADER.pack_into(buffer, 0, BATCH_VERSION, len(chunk))
+            offset = _BATCH_HEADER.size
+            for frame in chunk:
+                _FRAME_LENGTH.pack_into(buffer, offset, len(frame))
+                offset += _FRAME_LENGTH.size
+                buffer[offset : offset + len(frame)] = frame
+                offset += len(frame)
+            await self._send(websocket, buffer, size)
+
+    async def send_mqtt(self, websocket, packets: Iterable[Packet]):
+        """按MQTT网关格式发送，多帧首尾相接放入一条消息"""
+        packets = list(packets)
+        size = sum(_MQTT_HEADER.size + len(p[0]) for p in packets)
+        buffer = self._acquire(size)
+        offset = 0
+        for frame, timestamp, sequence in packets:
+            length = len(frame)
+            _MQTT_HEADER.pack_into(
+                buffer, offset, 1, 0, length, sequence & 0xFFFFFFFF, timestamp, length
+            )
+            offset += _MQTT_HEADER.size
+            buffer[offset : offset + length] = frame
+            offset += length
+        await self._send(websocket, buffer, size)
+
+
+def unpack_batch(data: bytes) -> List[bytes]:
+    """解析批量容器（测试与客户端对照用）"""
+    version, count = _BATCH_HEADER.unpack_from(data, 0)
+    if version != BATCH_VERSION:
+        raise ValueError(f"不支持的批量音频版本: {version}")
+    frames = []
+    offset = _BATCH_HEADER.size
+    for _ in range(count):
+        (length,) = _FRAME_LENGTH.unpack_from(data, offset)
+        offset += _FRAME_LENGTH.size
+        frames.append(bytes(data[offset : offset + length]))
+        offset += length
+    return frames
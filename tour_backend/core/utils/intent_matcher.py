@@ -0,0 +1,270 @@
+"""
+本地意图快速匹配
+
+用字符n-gram TF-IDF 为已注册函数的描述、唤醒词和少量示例句建立索引，
+对短指令做最近邻匹配。高置信度命中时直接返回与LLM意图识别相同格式的结果，
+不确定时返回None，由调用方继续走LLM意图识别。
+退出命令只按完整匹配；带否定或停止词的句子与示例字面相近、意思却相反，一律交给LLM。
+"""
+
+import re
+import json
+import math
+from collections import Counter
+from typing import Dict, List, Optional, Tuple
+from core.utils.util import remove_punctuation_and_length
+
+TAG = __name__
+
+# 默认示例句，配置中的 fast_path.examples 会追加到这里
+DEFAULT_EXAMPLES = {
+    "play_music": [
+        "播放音乐",
+        "放音乐",
+        "放首歌",
+        "来首歌",
+        "唱首歌",
+        "唱歌给我听",
+        "我想听歌",
+        "放点音乐",
+        "随便放首歌",
+    ],
+    "handle_exit_intent": [
+        "再见",
+        "拜拜",
+        "我要走了",
+        "不聊了",
+        "结束对话",
+        "退出系统",
+        "我不想和你说话了",
+    ],
+    "result_for_context": [
+        "现在几点",
+        "现在几点了",
+        "几点了",
+        "现在是什么时间",
+        "今天几号",
+        "今天星期几",
+        "今天是几月几号",
+        "今天是什么日期",
+        "今天农历几号",
+    ],
+    "get_weather": [
+        "今天天气怎么样",
+        "天气怎么样",
+        "明天会下雨吗",
+        "天气预报",
+    ],
+    "get_news_from_newsnow": ["播报新闻", "今天有什么新闻", "讲讲新闻"],
+    "get_news_from_chinanews": ["播报新闻", "今天有什么新闻", "讲讲新闻"],
+    # 与退出命令相近但实际是提问，作为竞争项避免误判
+    "continue_chat": [
+        "怎么退出了",
+        "为什么退出了",
+        "怎么退出",
+        "你好",
+        "你是谁",
+    ],
+}
+
+# 始终可用的伪函数，不需要出现在工具列表中
+BUILTIN_INTENTS = ("continue_chat", "result_for_context")
+
+# 函数描述中的示例，例如 ```用户:播放两只老虎
+EXAMPLE_PATTERN = re.compile(r"用户[:：]\s*([^\n`]+)")
+CLAUSE_PATTERN = re.compile(r"[、，,。；;！!？?\n]")
+# 否定和停止词，例如"不要放音乐""停止播放音乐""关闭音乐""不要退出"，
+# 与示例句只差一两个字，相似度很高但意图相反
+NEGATION_PATTERN = re.compile(r"不|别|没|勿|莫|停|关|取消|算了")
+
+
+def _normalize(text: str) -> str:
+    _, filtered = remove_punctuation_and_length(text)
+    return filtered.lower().replace(" ", "")
+
+
+def _ngrams(text: str) -> Counter:
+    grams = Counter()
+    for n in (1, 2, 3):
+        for i in range(len(text) - n + 1):
+            grams[text[i : i + n]] += 1
+    return grams
+
+
+class LocalIntentMatcher:
+    """
+    Args:
+        functions: 当前连接可用的函数描述列表（与传给LLM的格式相同）
+        exit_commands: 退出命令
+        wakeup_words: 唤醒词，视为普通聊天
+        music_names: 本地音乐名称，用于填充play_music的歌名
+        config: fast_path配置，支持threshold/margin/max_length/examples
+    """
+
+    def __init__(
+        self,
+        functions: List[Dict],
+        exit_commands: List[str],
+        wakeup_words: List[str],
+        music_names: Optional[List[str]] = None,
+        config: Optional[Dict] = None,
+    ):
+        config = config or {}
+        self.threshold = float(config.get("threshold", 0.6))
+        self.margin = float(config.get("margin", 0.1))
+        self.max_length = int(config.get("max_length", 12))
+        self.music_names = sorted(
+            {name for name in (music_names or []) if name}, key=len, reverse=True
+        )
+
+        self.available = set(BUILTIN_INTENTS)
+        examples: Dict[str, List[str]] = {}
+        for func in functions or []:
+            func_info = func.get("function", {})
+            name = func_info.get("name", "")
+            if not name:
+                continue
+            self.available.add(name)
+            examples.setdefault(name, []).extend(self._mine_examples(func_info))
+
+        extra_examples = config.get("examples") or {}
+        for source in (DEFAULT_EXAMPLES, extra_examples):
+            for name, phrases in source.items():
+                if name in self.available:
+                    examples.setdefault(name, []).extend(phrases or [])
+        # 退出命令多是"退出""关闭"这样的单个词，放进相似度索引会让"关闭音乐"之类的句子命中退出，
+        # 因此不参与索引，只按完整匹配
+        self.exit_commands = set()
+        if "handle_exit_intent" in self.available:
+            self.exit_commands = {
+                normalized
+                for normalized in (_normalize(cmd) for cmd in exit_commands or [])
+                if normalized
+            }
+        examples.setdefault("continue_chat", []).extend(wakeup_words or [])
+
+        self._build_index(examples)
+
+    @staticmethod
+    def _mine_examples(func_info: Dict) -> List[str]:
+        """从函数描述中提取短句和示例作为索引文档"""
+        texts = [func_info.get("description", "")]
+        for param in func_info.get("parameters", {}).get("properties", {}).values():
+            texts.append(param.get("description", ""))
+        phrases = []
+        for text in texts:
+            phrases.extend(EXAMPLE_PATTERN.findall(text))
+        # 描述本身按标点切成短句，过长的说明性句子不适合与短指令匹配
+        for clause in CLAUSE_PATTERN.split(func_info.get("description", "")):
+            if 0 < len(clause) <= 10:
+                phrases.append(clause)
+        return phrases
+
+    def _build_index(self, examples: Dict[str, List[str]]):
+        entries: List[Tuple[str, str]] = []
+        seen = set()
+        for name, phrases in examples.items():
+            for phrase in phrases:
+                normalized = _normalize(phrase)
+                if normalized and (name, normalized) not in seen:
+                    seen.add((name, normalized))
+                    entries.append((name, normalized))
+
+        doc_freq = Counter()
+        grams_list = []
+        for _, text in entries:
+            grams = _ngrams(text)
+            grams_list.append(grams)
+            doc_freq.update(grams.keys())
+
+        total = len(entries)
+        self.idf = {
+            gram: math.log((1 + total) / (1 + df)) + 1 for gram, df in doc_freq.items()
+        }
+        # 倒排索引：n-gram -> [(条目序号, 权重)]
+        self.postings: Dict[str, List[Tuple[int, float]]] = {}
+        self.labels = []
+        self.texts = {}
+        for index, ((name, text), grams) in enumerate(zip(entries, grams_list)):
+            vector = {gram: count * self.idf[gram] for gram, count in grams.items()}
+            norm = math.sqrt(sum(w * w for w in vector.values())) or 1.0
+            for gram, weight in vector.items():
+                self.postings.setdefault(gram, []).append((index, weight / norm))
+            self.labels.append(name)
+            self.texts.setdefault(text, name)
+
+    def score(self, text: str) -> List[Tuple[str, float]]:
+        """返回各意图的最高相似度，按分数降序"""
+        normalized = _normalize(text)
+        if not normalized:
+            return []
+        # 与示例句完全一致时直接给满分
+        if normalized in self.texts:
+            return [(self.texts[normalized], 1.0)]
+        grams = _ngrams(normalized)
+        vector = {
+            gram: count * self.idf[gram] for gram, count in grams.items() if gram in self.idf
+        }
+        # 未登录的n-gram也计入查询向量长度，避免只含少量已知字的长句得到高分
+        unknown = sum(count for gram, count in grams.items() if gram not in self.idf)
+        norm = math.sqrt(sum(w * w for w in vector.values()) + unknown) or 1.0
+
+        scores = {}
+        for gram, weight in vector.items():
+            for index, doc_weight in self.postings[gram]:
+                scores[index] = scores.get(index, 0.0) + weight * doc_weight
+        best = {}
+        for index, value in scores.items():
+            label = self.labels[index]
+            value /= norm
+            if value > best.get(label, 0.0):
+                best[label] = value
+        return sorted(best.items(), key=lambda item: item[1], reverse=True)
+
+    def match(self, text: str) -> Optional[str]:
+        """高置信度时返回意图JSON字符串，否则返回None"""
+        normalized = _normalize(text)
+        if not normalized or len(normalized) > self.max_length:
+            return None
+        if normalized in self.exit_commands:
+            return self._function_call("handle_exit_intent", normalized)
+        # 与示例句完全一致时可信（如"不聊了"），否则带否定或停止词的句子交给LLM判断
+        if normalized not in self.texts and NEGATION_PATTERN.search(normalized):
+            return None
+        ranked = self.score(normalized)
+        if not ranked:
+            return None
+        name, best = ranked[0]
+        second = ranked[1][1] if len(ranked) > 1 else 0.0
+        if best < self.threshold or best - second < self.margin:
+            return None
+        return self._function_call(name, normalized)
+
+    def _function_call(self, name: str, normalized: str) -> Optional[str]:
+        """构造与LLM意图识别相同格式的结果，必需参数无法填充时返回None"""
+        function_call = {"name": name}
+        if name not in BUILTIN_INTENTS:
+            arguments = self._fill_arguments(name, normalized)
+            if arguments is None:
+                return None
+            if arguments:
+                function_call["arguments"] = arguments
+        return json.dumps({"function_call": function_call}, ensure_ascii=False)
+
+    def _fill_arguments(self, name: str, text: str) -> Optional[Dict]:
+        """填充必需参数，无法可靠填充时返回None交给LLM"""
+        if name == "play_music":
+            for music_name in self.music_names:
+                if music_name.lower() in text:
+                    return {"song_name": music_name}
+            return {"song_name": "random"}
+        if name == "handle_exit_intent":
+            return {"say_goodbye": "再见，下次再一起玩吧！"}
+        if name in ("get_news_from_newsnow", "get_news_from_chinanews"):
+            return {"lang": "zh_CN"}
+        if name == "get_weather":
+            # 句子里可能带有地点，只有与示例句完全一致时才使用默认地点
+            return {"lang": "zh_CN"} if text in self.texts else None
+        if name == "get_lunar":
+            return {}
+        return None
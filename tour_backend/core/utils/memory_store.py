@@ -0,0 +1,116 @@
+"""
+本地短期记忆存储
+
+mem_local_short 原先把所有角色的记忆放在一个 data/.memory.yaml 中：每个连接加载记忆都要解析整个文件，
+每次会话结束保存记忆都要重新解析、修改一个键再整体写回，耗时随角色总数线性增长，并发保存时还会互相覆盖。
+这里改为 SQLite（WAL模式）按 role_id 建主键索引：
+- 单个角色的读取和写入只访问对应的一行
+- 进程内写入加锁串行，多进程通过 WAL 和 busy_timeout 协调，不会丢失并发写入
+- 首次打开时把旧的 YAML 文件导入数据库，导入后重命名为 .migrated，已存在的新记录不会被旧数据覆盖
+"""
+
+import os
+import time
+import sqlite3
+import threading
+from typing import Dict, Optional
+import yaml
+from config.logger import setup_logging
+
+TAG = __name__
+logger = setup_logging()
+
+
+class LocalMemoryStore:
+    def __init__(self, db_path: str, legacy_yaml_path: Optional[str] = None):
+        self.db_path = db_path
+        db_dir = os.path.dirname(db_path)
+        if db_dir:
+            os.makedirs(db_dir, exist_ok=True)
+        self._lock = threading.Lock()
+        self._db = sqlite3.connect(
+            db_path, timeout=30, isolation_level=None, check_same_thread=False
+        )
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute("PRAGMA synchronous=NORMAL")
+        self._db.execute(
+            "CREATE TABLE IF NOT EXISTS memory ("
+            "role_id TEXT PRIMARY KEY, content TEXT NOT NULL, updated_at REAL NOT NULL)"
+        )
+        if legacy_yaml_path:
+            self._migrate_yaml(legacy_yaml_path)
+
+    def get(self, role_id: str) -> Optional[str]:
+        with self._lock:
+            row = self._db.execute(
+                "SELECT content FROM memory WHERE role_id = ?", (role_id,)
+            ).fetchone()
+        return row[0] if row else None
+
+    def put(self, role_id: str, content: str):
+        with self._lock:
+            self._db.execute(
+                "INSERT INTO memory (role_id, content, updated_at) VALUES (?, ?, ?) "
+                "ON CONFLICT(role_id) DO UPDATE SET "
+                "content = excluded.content, updated_at = excluded.updated_at",
+                (role_id, content, time.time()),
+            )
+
+    def count(self) -> int:
+        with self._lock:
+            return self._db.execute("SELECT COUNT(*) FROM memory").fetchone()[0]
+
+    def close(self):
+        with self._lock:
+            self._db.close()
+
+    def _migrate_yaml(self, yaml_path: str):
+        """导入旧版 YAML 记忆文件，多个进程同时启动时只有一个进程执行导入"""
+        if not os.path.exists(yaml_path):
+            return
+        with self._lock:
+            self._db.execute("BEGIN IMMEDIATE")
+            try:
+                if not os.path.exists(yaml_path):
+                    self._db.execute("COMMIT")
+                    return
+                with open(yaml_path, "r", encoding="utf-8") as f:
+                    loader = getattr(yaml, "CSafeLoader", yaml.SafeLoader)
+                    all_memory: Dict = yaml.load(f, Loader=loader) or {}
+                now = time.time()
+                self._db.executemany(
+                    "INSERT OR IGNORE INTO memory (role_id, content, updated_at) "
+                    "VALUES (?, ?, ?)",
+                    (
+                        (str(role_id), content, now)
+                        for role_id, content in all_memory.items()
+                        if content is not None
+                    ),
+                )
+                # 在事务内改名，其他进程拿到写锁后不会重复导入
+                os.replace(yaml_path, yaml_path + ".migrated")
+                self._db.execute("COMMIT")
+            except Exception:
+                self._db.execute("ROLLBACK")
+                raise
+        logger.bind(tag=TAG).info(
+            f"已将 {len(all_memory)} 个角色的记忆从 {yaml_path} 导入 {self.db_path}"
+        )
+
+
+_stores: Dict[str, LocalMemoryStore] = {}
+_stores_lock = threading.Lock()
+
+
+def get_memory_store(
+    db_path: str, legacy_yaml_path: Optional[str] = None
+) -> LocalMemoryStore:
+    """获取进程级共享的记忆存储（同一路径只打开一次）"""
+    store = _stores.get(db_path)
+    if store is None:
+        with _stores_lock:
+            store = _stores.get(db_path)
+            if store is None:
+                store = LocalMemoryStore(db_path, legacy_yaml_path)
+                _stores[db_path] = store
+    return store
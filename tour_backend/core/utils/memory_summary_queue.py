@@ -0,0 +1,336 @@
+"""
+记忆总结后台队列
+
+原先每个连接断开时都新建一个线程和事件循环来执行 memory.save_memory，一个旅行团同时离开时
+会瞬间产生几十个线程和几十个并发的LLM总结请求。这里改为服务级的总结队列：
+- 固定数量的工作线程，同时进行的总结不超过 max_workers 个，每个线程复用自己的事件循环
+- 同一角色在 coalesce_seconds 内的多次保存合并为一次总结（对话按顺序拼接），同一角色的总结不会并发执行
+- 到期的任务按优先级执行：本次对话轮数多的游客先总结
+- 待处理任务写入 spool_dir，服务重启后在第一次提交任务时恢复（使用该连接的记忆模块作为模板）
+- 统计提交、合并、完成、失败、队列深度、排队和总结耗时，按 metrics_interval 输出日志
+"""
+
+import os
+import copy
+import json
+import time
+import hashlib
+import asyncio
+import threading
+from typing import Any, Dict, List, Optional
+from config.logger import setup_logging
+from config.config_loader import get_project_dir
+from core.utils.dialogue import Message
+
+TAG = __name__
+logger = setup_logging()
+
+
+class _SummaryJob:
+    def __init__(self, role_id, memory, messages, priority, ready_at, seq):
+        self.role_id = role_id
+        self.memory = memory
+        self.messages: List[Dict[str, str]] = messages
+        self.priority = priority
+        self.ready_at = ready_at
+        self.seq = seq
+        self.enqueued_at = time.monotonic()
+
+
+def _dialogue_messages(dialogue) -> List[Dict[str, str]]:
+    """只保留用于总结的用户和助手消息"""
+    return [
+        {"role": m.role, "content": m.content}
+        for m in dialogue
+        if m.role in ("user", "assistant") and m.content
+    ]
+
+
+def _memory_state(memory) -> Dict[str, Any]:
+    """记忆模块中与总结相关、需要随任务落盘的状态"""
+    state = {}
+    for name in ("save_to_file", "short_memory"):
+        if hasattr(memory, name):
+            state[name] = getattr(memory, name)
+    return state
+
+
+class MemorySummaryQueue:
+    def __init__(
+        self,
+        max_workers: int = 4,
+        coalesce_seconds: float = 10,
+        spool_dir: Optional[str] = None,
+        metrics_interval: int = 60,
+    ):
+        self.max_workers = max(1, int(max_workers))
+        self.coalesce_seconds = max(0.0, float(coalesce_seconds))
+        self.spool_dir = spool_dir
+        if spool_dir:
+            os.makedirs(spool_dir, exist_ok=True)
+        self.metrics_interval = metrics_interval
+
+        self._cond = threading.Condition()
+        # 尚未开始的任务，每个角色最多一个
+        self._pending: Dict[str, _SummaryJob] = {}
+        self._running_roles = set()
+        self._seq = 0
+        self._restored = spool_dir is None
+        self._workers: List[threading.Thread] = []
+
+        self._metrics_lock = threading.Lock()
+        self._reset_metrics()
+        self._last_metrics_time = time.monotonic()
+
+    def submit(self, memory, dialogue, priority: Optional[int] = None) -> bool:
+        """提交一次记忆保存，返回是否入队（没有可总结的对话时不入队）"""
+        role_id = getattr(memory, "role_id", None)
+        if role_id is None or not getattr(memory, "saves_memory", True):
+            return False
+        messages = _dialogue_messages(dialogue)
+        if len(messages) < 2:
+            return False
+        if priority is None:
+            priority = -sum(1 for m in messages if m["role"] == "user")
+        if not self._restored:
+            self._restore_spool(memory)
+
+        # 复制记忆模块，共享实例的 role_id 等状态被后续连接修改时不影响排队中的任务
+        job_memory = copy.copy(memory)
+        with self._cond:
+            merged = self._enqueue(
+                str(role_id), job_memory, messages, priority, time.monotonic()
+            )
+            job = self._pending[str(role_id)]
+            self._spool_write(job)
+            self._ensure_workers()
+            self._cond.notify()
+        with self._metrics_lock:
+            self._submitted += 1
+            if merged:
+                self._coalesced += 1
+        return True
+
+    def _enqueue(self, role_id, memory, messages, priority, now) -> bool:
+        """加入待处理任务，同一角色已有未开始的任务时合并，返回是否发生合并"""
+        job = self._pending.get(role_id)
+        if job is not None:
+            job.memory = memory
+            job.messages.extend(messages)
+            job.priority = min(job.priority, priority)
+            return True
+        self._seq += 1
+        self._pending[role_id] = _SummaryJob(
+            role_id, memory, messages, priority, now + self.coalesce_seconds, self._seq
+        )
+        return False
+
+    def _ensure_workers(self):
+        while len(self._workers) < min(self.max_workers, len(self._pending)):
+            worker = threading.Thread(
+                target=self._worker,
+                name=f"memory-summary-{len(self._workers)}",
+                daemon=True,
+            )
+            self._workers.append(worker)
+            worker.start()
+
+    def _next_job(self) -> _SummaryJob:
+        """取出已过合并窗口、且同角色没有正在执行的任务中优先级最高的一个"""
+        with self._cond:
+            while True:
+                now = time.monotonic()
+                ready = [
+                    job
+                    for job in self._pending.values()
+                    if job.ready_at <= now and job.role_id not in self._running_roles
+                ]
+                if ready:
+                    job = min(ready, key=lambda j: (j.priority, j.seq))
+                    del self._pending[job.role_id]
+                    self._running_roles.add(job.role_id)
+                    return job
+                waiting = [
+                    job.ready_at
+                    for job in self._pending.values()
+                    if job.role_id not in self._running_roles
+                ]
+                self._cond.wait(max(0.0, min(waiting) - now) if waiting else None)
+
+    def _worker(self):
+        loop = asyncio.new_event_loop()
+        asyncio.set_event_loop(loop)
+        while True:
+            job = self._next_job()
+            start_time = time.monotonic()
+            success = True
+            try:
+                # 同一角色上一次总结的结果可能已写入存储，总结前重新读取
+                job.memory.refresh_memory()
+                msgs = [Message(role=m["role"], content=m["content"]) for m in job.messages]
+                loop.run_until_complete(job.memory.save_memory(msgs))
+                job.memory.invalidate_query_cache()
+            except Exception as e:
+                success = False
+                logger.bind(tag=TAG).error(f"保存记忆失败 - Role: {job.role_id}: {e}")
+            finally:
+                self._spool_remove(job)
+                with self._cond:
+                    self._running_roles.discard(job.role_id)
+                    self._cond.notify_all()
+            self._record(
+                success,
+                wait_time=start_time - job.enqueued_at,
+                run_time=time.monotonic() - start_time,
+            )
+
+    def _spool_path(self, job: _SummaryJob) -> str:
+        # 同一角色执行中的任务和新排队的任务各自一个文件
+        name = hashlib.sha1(job.role_id.encode("utf-8")).hexdigest()
+        return os.path.join(self.spool_dir, f"{name}-{job.seq}.json")
+
+    def _spool_write(self, job: _SummaryJob):
+        if not self.spool_dir:
+            return
+        path = self._spool_path(job)
+        data = {
+            "role_id": job.role_id,
+            "priority": job.priority,
+            "messages": job.messages,
+            "state": _memory_state(job.memory),
+        }
+        try:
+            tmp_path = f"{path}.tmp"
+            with open(tmp_path, "w", encoding="utf-8") as f:
+                json.dump(data, f, ensure_ascii=False)
+            os.replace(tmp_path, path)
+        except Exception as e:
+            logger.bind(tag=TAG).warning(f"记忆总结任务落盘失败: {e}")
+
+    def _spool_remove(self, job: _SummaryJob):
+        if self.spool_dir:
+            self._remove_file(self._spool_path(job))
+
+    def _remove_file(self, path: str):
+        try:
+            os.remove(path)
+        except FileNotFoundError:
+            pass
+        except Exception as e:
+            logger.bind(tag=TAG).warning(f"删除记忆总结落盘文件失败: {e}")
+
+    def _restore_spool(self, template):
+        """恢复上次运行未完成的任务，记忆模块以当前连接的为模板"""
+        with self._cond:
+            if self._restored:
+                return
+            self._restored = True
+            restored = 0
+            now = time.monotonic()
+            for name in sorted(os.listdir(self.spool_dir)):
+                if not name.endswith(".json"):
+                    continue
+                path = os.path.join(self.spool_dir, name)
+                try:
+                    with open(path, encoding="utf-8") as f:
+                        data = json.load(f)
+                    memory = copy.copy(template)
+                    memory.role_id = data["role_id"]
+                    for key, value in data.get("state", {}).items():
+                        setattr(memory, key, value)
+                    self._enqueue(
+                        data["role_id"], memory, data["messages"], data["priority"], now
+                    )
+                    # 恢复的任务不再等待合并窗口
+                    self._pending[data["role_id"]].ready_at = now
+                    restored += 1
+                except Exception as e:
+                    logger.bind(tag=TAG).warning(f"恢复记忆总结任务失败 {name}: {e}")
+                # 合并后按新的任务重新落盘
+                self._remove_file(path)
+            for job in self._pending.values():
+                self._spool_write(job)
+            if restored:
+                logger.bind(tag=TAG).info(f"已恢复 {restored} 个未完成的记忆总结任务")
+                self._ensure_workers()
+                self._cond.notify_all()
+        with self._metrics_lock:
+            self._restored_jobs += restored
+
+    def _reset_metrics(self):
+        self._submitted = 0
+        self._coalesced = 0
+        self._restored_jobs = 0
+        self._completed = 0
+        self._failed = 0
+        self._max_queue_depth = 0
+        self._wait_time = 0.0
+        self._run_time = 0.0
+
+    def _record(self, success, wait_time, run_time):
+        queue_depth = len(self._pending)
+        with self._metrics_lock:
+            if success:
+                self._completed += 1
+            else:
+                self._failed += 1
+            self._max_queue_depth = max(self._max_queue_depth, queue_depth + 1)
+            self._wait_time += wait_time
+            self._run_time += run_time
+
+        if not self.metrics_interval:
+            return
+        now = time.monotonic()
+        if now - self._last_metrics_time >= self.metrics_interval:
+            self._last_metrics_time = now
+            metrics = self.get_metrics(reset=True)
+            logger.bind(tag=TAG).info(
+                f"记忆总结队列统计: 提交 {metrics['submitted']}, 合并 {metrics['coalesced']}, "
+                f"恢复 {metrics['restored']}, 完成 {metrics['completed']}, 失败 {metrics['failed']}, "
+                f"当前队列深度 {metrics['queue_depth']}, 执行中 {metrics['running']}, "
+                f"最大队列深度 {metrics['max_queue_depth']}, "
+                f"平均排队 {metrics['avg_wait_ms']:.0f}ms, 平均总结 {metrics['avg_run_ms']:.0f}ms"
+            )
+
+    def get_metrics(self, reset: bool = False) -> Dict[str, Any]:
+        """获取自上次重置以来的队列指标"""
+        with self._metrics_lock:
+            finished = self._completed + self._failed
+            metrics = {
+                "submitted": self._submitted,
+                "coalesced": self._coalesced,
+                "restored": self._restored_jobs,
+                "completed": self._completed,
+                "failed": self._failed,
+                "queue_depth": len(self._pending),
+                "running": len(self._running_roles),
+                "max_queue_depth": self._max_queue_depth,
+                "avg_wait_ms": self._wait_time * 1000 / finished if finished else 0.0,
+                "avg_run_ms": self._run_time * 1000 / finished if finished else 0.0,
+            }
+            if reset:
+                self._reset_metrics()
+        return metrics
+
+
+_queue: Optional[MemorySummaryQueue] = None
+_queue_lock = threading.Lock()
+
+
+def get_memory_summary_queue(config: Dict[str, Any]) -> MemorySummaryQueue:
+    """获取服务级记忆总结队列（首次调用时按配置创建）"""
+    global _queue
+    if _queue is None:
+        with _queue_lock:
+            if _queue is None:
+                queue_config = config.get("memory_summary") or {}
+                spool_dir = queue_config.get("spool_dir", "data/memory_spool")
+                if spool_dir and not os.path.isabs(spool_dir):
+                    spool_dir = os.path.join(get_project_dir(), spool_dir)
+                _queue = MemorySummaryQueue(
+                    max_workers=int(queue_config.get("max_workers", 4)),
+                    coalesce_seconds=float(queue_config.get("coalesce_seconds", 10)),
+                    spool_dir=spool_dir or None,
+                    metrics_interval=int(queue_config.get("metrics_interval", 60)),
+                )
+    return _queue
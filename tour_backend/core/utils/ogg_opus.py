@@ -0,0 +1,119 @@
+"""
+Opus包封装为Ogg-Opus（RFC 7845）
+
+聊天记录上报时直接封装设备上行/TTS下行的原始Opus包，不解码为PCM WAV，体积约为WAV的十分之一，
+标准播放器和浏览器可直接播放。
+"""
+
+import struct
+from typing import Iterable, List
+
+# Ogg页校验：多项式0x04C11DB7，不反射，初值0
+_CRC_TABLE = []
+for _i in range(256):
+    _r = _i << 24
+    for _ in range(8):
+        _r = ((_r << 1) ^ 0x04C11DB7) if _r & 0x80000000 else (_r << 1)
+    _CRC_TABLE.append(_r & 0xFFFFFFFF)
+
+# Opus解码器输出采样率固定按48kHz计算granule position
+_GRANULE_RATE = 48000
+# libopus编码器的默认延迟（48kHz采样数）
+_PRE_SKIP = 312
+_MAX_SEGMENTS = 255
+# TOC配置号对应的单帧时长（48kHz采样数）
+_SILK_FRAME = (480, 960, 1920, 2880)
+_HYBRID_FRAME = (480, 960)
+_CELT_FRAME = (120, 240, 480, 960)
+
+
+def _crc32(data: bytes) -> int:
+    crc = 0
+    table = _CRC_TABLE
+    for byte in data:
+        crc = ((crc << 8) & 0xFFFFFFFF) ^ table[((crc >> 24) & 0xFF) ^ byte]
+    return crc
+
+
+def packet_samples(packet: bytes) -> int:
+    """根据TOC字节计算一个Opus包的时长（48kHz采样数）"""
+    if not packet:
+        return 0
+    toc = packet[0]
+    config = toc >> 3
+    if config < 12:
+        frame = _SILK_FRAME[config % 4]
+    elif config < 16:
+        frame = _HYBRID_FRAME[config % 2]
+    else:
+        frame = _CELT_FRAME[config % 4]
+    code = toc & 0x03
+    if code == 0:
+        count = 1
+    elif code in (1, 2):
+        count = 2
+    else:
+        count = packet[1] & 0x3F if len(packet) > 1 else 0
+    return frame * count
+
+
+def _page(header_type, granule, serial, sequence, packets: List[bytes]) -> bytes:
+    lacing = bytearray()
+    for packet in packets:
+        length = len(packet)
+        lacing.extend(b"\xff" * (length // 255))
+        lacing.append(length % 255)
+    header = struct.pack(
+        "<4sBBqIIIB",
+        b"OggS",
+        0,
+        header_type,
+        granule,
+        serial,
+        sequence,
+        0,
+        len(lacing),
+    )
+    page = bytearray(header + lacing + b"".join(packets))
+    struct.pack_into("<I", page, 22, _crc32(page))
+    return bytes(page)
+
+
+def opus_to_ogg(
+    packets: Iterable[bytes],
+    sample_rate: int = 16000,
+    channels: int = 1,
+    serial: int = 1,
+) -> bytes:
+    """把原始Opus包序列封装为Ogg-Opus文件
+
+    Args:
+        packets: Opus包（不含容器头）
+        sample_rate: 编码前的原始采样率，写入OpusHead供播放器参考
+        channels: 声道数
+        serial: Ogg逻辑流序列号
+    """
+    head = struct.pack(
+        "<8sBBHIhB", b"OpusHead", 1, channels, _PRE_SKIP, sample_rate, 0, 0
+    )
+    vendor = b"xiaozhi-server"
+    tags = struct.pack("<8sI", b"OpusTags", len(vendor)) + vendor + struct.pack("<I", 0)
+
+    pages = [_page(0x02, 0, serial, 0, [head]), _page(0x00, 0, serial, 1, [tags])]
+    sequence = 2
+    granule = 0
+    current: List[bytes] = []
+    segments = 0
+    packets = [p for p in packets if p]
+    for index, packet in enumerate(packets):
+        packet_segments = len(packet) // 255 + 1
+        if current and segments + packet_segments > _MAX_SEGMENTS:
+            pages.append(_page(0x00, granule, serial, sequence, current))
+            sequence += 1
+            current, segments = [], 0
+        current.append(bytes(packet))
+        segments += packet_segments
+        granule += packet_samples(packet)
+    # 最后一页带EOS标记；没有音频包时单独写一个空的EOS页
+    pages.append(_page(0x04, granule, serial, sequence, current))
+    return b"".join(pages)
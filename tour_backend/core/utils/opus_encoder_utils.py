@@ -4,12 +4,81 @@ Opus编码工具类
 """
 
 import logging
+import threading
 import traceback
 import numpy as np
+from contextlib import contextmanager
 from opuslib_next import Encoder
 from opuslib_next import constants
 from typing import Optional, Callable, Any
 
+
+def pcm_frames(pcm_data, frame_size: int, channels: int = 1) -> np.ndarray:
+    """
+    把16位PCM切成形状为 (帧数, frame_size*channels) 的帧矩阵
+    长度正好是整帧时直接返回原数据上的零拷贝视图；否则只分配一次补零后的缓冲区，
+    每一帧都是该缓冲区上的视图
+    """
+    samples = np.frombuffer(pcm_data, dtype=np.int16)
+    total_frame_size = frame_size * channels
+    frame_count = -(-len(samples) // total_frame_size)
+    if len(samples) == frame_count * total_frame_size:
+        return samples.reshape(frame_count, total_frame_size)
+    padded = np.zeros(frame_count * total_frame_size, dtype=np.int16)
+    padded[: len(samples)] = samples
+    return padded.reshape(frame_count, total_frame_size)
+
+
+class OpusEncoderPool:
+    """
+    可复用的Opus编码器池
+    创建编码器需要分配libopus状态，逐句新建开销不小；池中的编码器归还时重置状态，
+    保证不同音频流之间互不影响。同一连接可能有多个线程同时编码，因此是池而不是单个编码器
+    """
+
+    def __init__(
+        self,
+        sample_rate: int = 16000,
+        channels: int = 1,
+        application=constants.APPLICATION_AUDIO,
+        max_idle: int = 4,
+    ):
+        self.sample_rate = sample_rate
+        self.channels = channels
+        self.application = application
+        self.max_idle = max_idle
+        self._idle = []
+        self._lock = threading.Lock()
+
+    @contextmanager
+    def encoder(self):
+        """借出一个编码器，退出时重置并归还"""
+        with self._lock:
+            encoder = self._idle.pop() if self._idle else None
+        if encoder is None:
+            encoder = Encoder(self.sample_rate, self.channels, self.application)
+        try:
+            yield encoder
+        finally:
+            encoder.reset_state()
+            with self._lock:
+                if len(self._idle) < self.max_idle:
+                    self._idle.append(encoder)
+
+
+_default_pool = None
+_default_pool_lock = threading.Lock()
+
+
+def get_default_encoder_pool() -> OpusEncoderPool:
+    """进程级默认编码器池，供不属于某个连接的编码（如提示音资源包构建）使用"""
+    global _default_pool
+    if _default_pool is None:
+        with _default_pool_lock:
+            if _default_pool is None:
+                _default_pool = OpusEncoderPool()
+    return _default_pool
+
 class OpusEncoderUtils:
     """PCM到Opus的编码器"""
 
@@ -34,8 +103,9 @@ class OpusEncoderUtils:
         self.bitrate = 24000  # bps
         self.complexity = 10  # 最高质量
 
-        # 缓冲区初始化为空
-        self.buffer = np.array([], dtype=np.int16)
+        # 不足一帧的剩余样本，预分配一帧大小，避免每次追加都重新分配整个缓冲区
+        self.buffer = np.zeros(self.total_frame_size, dtype=np.int16)
+        self.buffered = 0
 
         try:
             # 创建Opus编码器
@@ -52,7 +122,7 @@ class OpusEncoderUtils:
     def reset_state(self):
         """重置编码器状态"""
         self.encoder.reset_state()
-        self.buffer = np.array([], dtype=np.int16)
+        self.buffered = 0
 
     def encode_pcm_to_opus_stream(self, pcm_data: bytes, end_of_stream: bool, callback: Callable[[Any], Any]):
         """
@@ -66,38 +136,44 @@ class OpusEncoderUtils:
         Returns:
             Opus数据包列表
         """
-        # 将字节数据转换为short数组
+        # 将字节数据转换为short数组（零拷贝视图）
         new_samples = self._convert_bytes_to_shorts(pcm_data)
-
-        # 校验PCM数据
-        self._validate_pcm_data(new_samples)
-
-        # 将新数据追加到缓冲区
-        self.buffer = np.append(self.buffer, new_samples)
-
         offset = 0
 
-        # 处理所有完整帧
-        while offset <= len(self.buffer) - self.total_frame_size:
-            frame = self.buffer[offset : offset + self.total_frame_size]
+        # 先用新数据补齐上次剩余的不完整帧
+        if self.buffered:
+            take = min(self.total_frame_size - self.buffered, len(new_samples))
+            self.buffer[self.buffered : self.buffered + take] = new_samples[:take]
+            self.buffered += take
+            offset = take
+            if self.buffered == self.total_frame_size:
+                output = self._encode(self.buffer)
+                if output:
+                    callback(output)
+                self.buffered = 0
+
+        # 处理所有完整帧，直接在新数据上取视图
+        while offset <= len(new_samples) - self.total_frame_size:
+            frame = new_samples[offset : offset + self.total_frame_size]
             output = self._encode(frame)
             if output:
                 callback(output)
             offset += self.total_frame_size
 
         # 保留未处理的样本
-        self.buffer = self.buffer[offset:]
+        remaining = len(new_samples) - offset
+        if remaining > 0:
+            self.buffer[self.buffered : self.buffered + remaining] = new_samples[offset:]
+            self.buffered += remaining
 
         # 流结束时处理剩余数据
-        if end_of_stream and len(self.buffer) > 0:
-            # 创建最后一帧并用0填充
-            last_frame = np.zeros(self.total_frame_size, dtype=np.int16)
-            last_frame[: len(self.buffer)] = self.buffer
-
-            output = self._encode(last_frame)
+        if end_of_stream and self.buffered > 0:
+            # 最后一帧用0填充
+            self.buffer[self.buffered :] = 0
+            output = self._encode(self.buffer)
             if output:
                 callback(output)
-            self.buffer = np.array([], dtype=np.int16)
+            self.buffered = 0
 
     def _encode(self, frame: np.ndarray) -> Optional[bytes]:
         """编码一帧音频数据"""
@@ -117,15 +193,6 @@ class OpusEncoderUtils:
         # 假设输入是小端字节序的16位PCM
         return np.frombuffer(bytes_data, dtype=np.int16)
 
-    def _validate_pcm_data(self, pcm_shorts: np.ndarray) -> None:
-        """验证PCM数据是否有效"""
-        # 16位PCM数据范围是 -32768 到 32767
-        if np.any((pcm_shorts < -32768) | (pcm_shorts > 32767)):
-            invalid_samples = pcm_shorts[(pcm_shorts < -32768) | (pcm_shorts > 32767)]
-            logging.warning(f"发现无效PCM样本: {invalid_samples[:5]}...")
-            # 在实际应用中可以选择裁剪而不是抛出异常
-            # np.clip(pcm_shorts, -32768, 32767, out=pcm_shorts)
-
     def close(self):
         """关闭编码器并释放资源"""
         # opuslib没有明确的关闭方法，Python的垃圾回收会处理
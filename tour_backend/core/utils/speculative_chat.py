@@ -0,0 +1,53 @@
+"""
+推测执行的聊天回复
+
+intent_llm 模式下意图识别和聊天回复原本是两次串行的LLM调用。开启推测执行后，
+聊天LLM与意图识别同时启动，意图结果出来之前输出只缓存、不送入TTS：
+- 意图为普通聊天时提交，缓存的输出立即送入TTS，后续输出照常流式处理
+- 意图被其他功能处理时取消，聊天输出全部丢弃，不写入对话历史
+"""
+
+import threading
+
+TAG = __name__
+
+
+class SpeculativeChat:
+    PENDING = 0
+    COMMITTED = 1
+    CANCELLED = 2
+
+    def __init__(self, timeout: float = 30):
+        self.timeout = timeout
+        self._state = self.PENDING
+        self._decided = threading.Event()
+
+    def commit(self):
+        self._decide(self.COMMITTED)
+
+    def cancel(self):
+        self._decide(self.CANCELLED)
+
+    def _decide(self, state):
+        # 只接受第一次裁决
+        if not self._decided.is_set():
+            self._state = state
+            self._decided.set()
+
+    @property
+    def decided(self) -> bool:
+        return self._decided.is_set()
+
+    @property
+    def committed(self) -> bool:
+        return self._state == self.COMMITTED
+
+    @property
+    def cancelled(self) -> bool:
+        return self._state == self.CANCELLED
+
+    def wait(self) -> bool:
+        """聊天输出已全部缓存但意图还未出结果时阻塞等待，超时视为取消"""
+        if not self._decided.wait(self.timeout):
+            self.cancel()
+        return self.committed
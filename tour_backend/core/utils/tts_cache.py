@@ -0,0 +1,266 @@
+"""
+短语级TTS音频缓存
+
+以 (TTS提供方, 音色及语速/音调等参数, 输出格式, 归一化文本) 为键，缓存已经切好、可直接发送的
+60ms音频帧（Opus或PCM），重复的短语不再调用TTS接口，也不再经过ffmpeg/pydub转码。
+- 内存层：按字节数上限做LRU淘汰
+- 磁盘层：每个短语一个p3格式文件（每帧4字节头 + 数据），读取时使用mmap，服务重启后仍可命中
+进程内所有连接共享同一个缓存实例。
+"""
+
+import os
+import mmap
+import time
+import struct
+import hashlib
+import threading
+import unicodedata
+from collections import OrderedDict
+from typing import Any, Dict, List, Optional
+from config.logger import setup_logging
+
+TAG = __name__
+logger = setup_logging()
+
+_tts_cache = None
+_tts_cache_lock = threading.Lock()
+
+# 计算缓存参数时忽略的配置项：凭据和与音频内容无关的路径
+_IGNORED_PARAM_MARKERS = ("key", "token", "secret", "password", "output_dir")
+
+
+def get_tts_cache(config: Dict[str, Any]) -> Optional["TTSAudioCache"]:
+    """获取进程级TTS缓存（首次调用时按配置创建），未开启时返回None"""
+    global _tts_cache
+    cache_config = config.get("tts_cache") or {}
+    if not cache_config.get("enable", False):
+        return None
+    if _tts_cache is None:
+        with _tts_cache_lock:
+            if _tts_cache is None:
+                _tts_cache = TTSAudioCache(
+                    memory_max_mb=cache_config.get("memory_max_mb", 64),
+                    disk_dir=cache_config.get("disk_dir", "data/tts_cache"),
+                    disk_max_mb=cache_config.get("disk_max_mb", 512),
+                    max_text_length=cache_config.get("max_text_length", 50),
+                    metrics_interval=cache_config.get("metrics_interval", 300),
+                )
+    return _tts_cache
+
+
+def tts_cache_params(provider_name: str, config: Dict[str, Any]) -> str:
+    """由TTS提供方和配置生成参数指纹，音色、语速、音调等任一变化都会得到不同的键"""
+    params = []
+    for name in sorted(config):
+        lowered = name.lower()
+        if any(marker in lowered for marker in _IGNORED_PARAM_MARKERS):
+            continue
+        params.append(f"{name}={config[name]!r}")
+    return f"{provider_name}|{'|'.join(params)}"
+
+
+def normalize_text(text: str) -> str:
+    """全角转半角、合并空白，大小写和空白差异不影响命中"""
+    text = unicodedata.normalize("NFKC", text or "")
+    return " ".join(text.split()).lower()
+
+
+class TTSAudioCache:
+    def __init__(
+        self,
+        memory_max_mb: float = 64,
+        disk_dir: Optional[str] = "data/tts_cache",
+        disk_max_mb: float = 512,
+        max_text_length: int = 50,
+        metrics_interval: int = 300,
+    ):
+        self.memory_max_bytes = int(memory_max_mb * 1024 * 1024)
+        self.disk_max_bytes = int(disk_max_mb * 1024 * 1024)
+        self.max_text_length = max_text_length
+        self.metrics_interval = metrics_interval
+        self.disk_dir = disk_dir
+
+        self._lock = threading.Lock()
+        # 键 -> 帧元组
+        self._memory: "OrderedDict[str, tuple]" = OrderedDict()
+        self._memory_bytes = 0
+        # 磁盘文件 键 -> 大小，按写入/访问顺序排列，超出上限时淘汰最早的
+        self._disk: "OrderedDict[str, int]" = OrderedDict()
+        self._disk_bytes = 0
+        if self.disk_dir:
+            self._load_disk_index()
+
+        self._reset_metrics()
+        self._last_metrics_time = time.monotonic()
+
+    def make_key(self, params: str, text: str) -> Optional[str]:
+        """生成缓存键，文本过长（很少重复）时返回None，不缓存"""
+        normalized = normalize_text(text)
+        if not normalized or len(normalized) > self.max_text_length:
+            return None
+        return hashlib.sha1(f"{params}\n{normalized}".encode("utf-8")).hexdigest()
+
+    def get(self, key: str) -> Optional[tuple]:
+        with self._lock:
+            frames = self._memory.get(key)
+            if frames is not None:
+                self._memory.move_to_end(key)
+                self._memory_hits += 1
+                self._bytes_saved += sum(len(f) for f in frames)
+            on_disk = frames is None and key in self._disk
+        if frames is not None:
+            self._maybe_log_metrics()
+            return frames
+
+        if on_disk:
+            frames = self._read_disk(key)
+        with self._lock:
+            if frames is None:
+                self._misses += 1
+            else:
+                self._disk_hits += 1
+                self._bytes_saved += sum(len(f) for f in frames)
+                self._disk.move_to_end(key)
+                self._put_memory(key, frames)
+        self._maybe_log_metrics()
+        return frames
+
+    def put(self, key: str, frames: List[bytes]):
+        if not frames:
+            return
+        frames = tuple(bytes(f) for f in frames)
+        with self._lock:
+            self._put_memory(key, frames)
+            need_write = self.disk_dir and key not in self._disk
+        if need_write:
+            self._write_disk(key, frames)
+
+    def _put_memory(self, key: str, frames: tuple):
+        size = sum(len(f) for f in frames)
+        if size > self.memory_max_bytes:
+            return
+        old = self._memory.pop(key, None)
+        if old is not None:
+            self._memory_bytes -= sum(len(f) for f in old)
+        self._memory[key] = frames
+        self._memory_bytes += size
+        while self._memory_bytes > self.memory_max_bytes:
+            _, evicted = self._memory.popitem(last=False)
+            self._memory_bytes -= sum(len(f) for f in evicted)
+            self._evictions += 1
+
+    def _path(self, key: str) -> str:
+        return os.path.join(self.disk_dir, f"{key}.p3")
+
+    def _load_disk_index(self):
+        try:
+            os.makedirs(self.disk_dir, exist_ok=True)
+            entries = []
+            for file_name in os.listdir(self.disk_dir):
+                if not file_name.endswith(".p3"):
+                    continue
+                stat = os.stat(os.path.join(self.disk_dir, file_name))
+                entries.append((stat.st_mtime, file_name[:-3], stat.st_size))
+            for _, key, size in sorted(entries):
+                self._disk[key] = size
+                self._disk_bytes += size
+        except OSError as e:
+            logger.bind(tag=TAG).warning(f"TTS磁盘缓存目录不可用，仅使用内存缓存: {e}")
+            self.disk_dir = None
+
+    def _read_disk(self, key: str) -> Optional[tuple]:
+        try:
+            with open(self._path(key), "rb") as f:
+                with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+                    frames = []
+                    offset, total = 0, len(mm)
+                    while offset + 4 <= total:
+                        _, _, length = struct.unpack_from(">BBH", mm, offset)
+                        offset += 4
+                        if offset + length > total:
+                            raise ValueError("帧长度超出文件范围")
+                        frames.append(mm[offset : offset + length])
+                        offset += length
+            return tuple(frames)
+        except (OSError, ValueError) as e:
+            logger.bind(tag=TAG).warning(f"读取TTS磁盘缓存失败，已丢弃: {key}, {e}")
+            with self._lock:
+                size = self._disk.pop(key, None)
+                if size is not None:
+                    self._disk_bytes -= size
+            self._remove_file(key)
+            return None
+
+    def _write_disk(self, key: str, frames: tuple):
+        data = b"".join(struct.pack(">BBH", 0, 0, len(f)) + f for f in frames)
+        path = self._path(key)
+        tmp_path = f"{path}.{threading.get_ident()}.tmp"
+        try:
+            with open(tmp_path, "wb") as f:
+                f.write(data)
+            os.replace(tmp_path, path)
+        except OSError as e:
+            logger.bind(tag=TAG).warning(f"写入TTS磁盘缓存失败: {e}")
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+            return
+
+        evicted = []
+        with self._lock:
+            if key not in self._disk:
+                self._disk[key] = len(data)
+                self._disk_bytes += len(data)
+            while self._disk_bytes > self.disk_max_bytes and len(self._disk) > 1:
+                old_key, size = self._disk.popitem(last=False)
+                self._disk_bytes -= size
+                evicted.append(old_key)
+        for old_key in evicted:
+            self._remove_file(old_key)
+
+    def _remove_file(self, key: str):
+        try:
+            os.remove(self._path(key))
+        except OSError:
+            pass
+
+    def _reset_metrics(self):
+        self._memory_hits = 0
+        self._disk_hits = 0
+        self._misses = 0
+        self._evictions = 0
+        self._bytes_saved = 0
+
+    def _maybe_log_metrics(self):
+        if not self.metrics_interval:
+            return
+        now = time.monotonic()
+        if now - self._last_metrics_time >= self.metrics_interval:
+            self._last_metrics_time = now
+            metrics = self.get_metrics(reset=True)
+            logger.bind(tag=TAG).info(
+                f"TTS缓存统计: 命中率 {metrics['hit_ratio']:.1%} (内存 {metrics['memory_hits']}, "
+                f"磁盘 {metrics['disk_hits']}, 未命中 {metrics['misses']}), "
+                f"节省音频 {metrics['bytes_saved'] / 1024:.1f}KB, 内存占用 {metrics['memory_bytes'] / 1024:.1f}KB "
+                f"({metrics['memory_entries']}条), 磁盘占用 {metrics['disk_bytes'] / 1024:.1f}KB ({metrics['disk_entries']}条)"
+            )
+
+    def get_metrics(self, reset: bool = False) -> Dict[str, Any]:
+        """获取自上次重置以来的命中率、节省的音频字节数等指标"""
+        with self._lock:
+            hits = self._memory_hits + self._disk_hits
+            lookups = hits + self._misses
+            metrics = {
+                "memory_hits": self._memory_hits,
+                "disk_hits": self._disk_hits,
+                "misses": self._misses,
+                "hit_ratio": hits / lookups if lookups else 0.0,
+                "bytes_saved": self._bytes_saved,
+                "evictions": self._evictions,
+                "memory_entries": len(self._memory),
+                "memory_bytes": self._memory_bytes,
+                "disk_entries": len(self._disk),
+                "disk_bytes": self._disk_bytes,
+            }
+            if reset:
+                self._reset_metrics()
+        return metrics
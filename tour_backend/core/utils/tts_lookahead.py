@@ -0,0 +1,134 @@
+"""
+非流式TTS前瞻并行合成
+
+原先文本处理线程逐句调用TTS：第N+1句要等第N句合成、转码完成后才开始，TTS比实时慢时
+句与句之间会出现明显停顿。这里把切好的句子提交到连接级的小线程池，最多同时合成K句，
+再由 OrderedAudioRelay 按提交顺序把音频写入 tts_audio_queue：
+- 队首的句子边合成边转发，首句延迟与逐句合成一致
+- 后面的句子先缓存在各自的槽位里，轮到它成为队首时一次性转发
+- 打断时丢弃所有未播放的槽位，尚未开始的合成任务直接取消
+"""
+
+import threading
+from collections import deque
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Callable, Optional
+
+
+class SynthesisSlot:
+    """一句话的音频输出槽位，提供与队列相同的 put 接口"""
+
+    def __init__(self, relay: "OrderedAudioRelay"):
+        self.relay = relay
+        self.buffer = []
+        self.done = False
+        self.cancelled = False
+        self.future: Optional[Future] = None
+
+    def put(self, item, block=True, timeout=None):
+        self.relay._put(self, item)
+
+    put_nowait = put
+
+    def finish(self):
+        self.relay._finish(self)
+
+
+class OrderedAudioRelay:
+    """按提交顺序把各槽位的音频转发到输出队列"""
+
+    def __init__(self, get_output_queue: Callable[[], object], max_parallel: int):
+        # 输出队列在异步流水线模式下会被替换，每次转发时重新获取
+        self.get_output_queue = get_output_queue
+        self.max_parallel = max_parallel
+        self._slots = deque()
+        self._lock = threading.Lock()
+        self._executor: Optional[ThreadPoolExecutor] = None
+        # 限制同时在合成的句子数，超出时文本处理线程等待，避免一次性堆积大量请求
+        self._semaphore = threading.BoundedSemaphore(max_parallel)
+
+    def new_slot(self) -> SynthesisSlot:
+        slot = SynthesisSlot(self)
+        with self._lock:
+            self._slots.append(slot)
+        return slot
+
+    def put(self, item):
+        """不需要合成的条目（如LAST标记）也按顺序排在已提交的句子之后"""
+        slot = self.new_slot()
+        slot.put(item)
+        slot.finish()
+
+    def submit(self, fn: Callable[[SynthesisSlot], None]) -> SynthesisSlot:
+        """提交一句话的合成任务，fn 把音频写入传入的槽位"""
+        slot = self.new_slot()
+        self._semaphore.acquire()
+        if self._executor is None:
+            self._executor = ThreadPoolExecutor(
+                max_workers=self.max_parallel, thread_name_prefix="tts-lookahead"
+            )
+
+        def run():
+            try:
+                if not slot.cancelled:
+                    fn(slot)
+            finally:
+                self._semaphore.release()
+                slot.finish()
+
+        try:
+            slot.future = self._executor.submit(run)
+        except RuntimeError:
+            # 线程池已关闭（连接正在断开）
+            self._semaphore.release()
+            slot.cancelled = True
+            slot.finish()
+        return slot
+
+    def _put(self, slot: SynthesisSlot, item):
+        with self._lock:
+            if slot.cancelled:
+                return
+            if self._slots and self._slots[0] is slot:
+                self.get_output_queue().put(item)
+            else:
+                slot.buffer.append(item)
+
+    def _finish(self, slot: SynthesisSlot):
+        with self._lock:
+            slot.done = True
+            # 队首完成后依次把后续槽位提升为队首，并转发它们已缓存的音频
+            while self._slots and self._slots[0].done:
+                self._slots.popleft()
+                if not self._slots:
+                    break
+                head = self._slots[0]
+                if head.buffer:
+                    output_queue = self.get_output_queue()
+                    for item in head.buffer:
+                        output_queue.put(item)
+                    head.buffer = []
+
+    def pending(self) -> int:
+        with self._lock:
+            return len(self._slots)
+
+    def cancel(self):
+        """打断：丢弃所有未转发的音频，取消还没开始的合成"""
+        with self._lock:
+            slots = list(self._slots)
+            self._slots.clear()
+            for slot in slots:
+                slot.cancelled = True
+                slot.buffer = []
+        for slot in slots:
+            if slot.future is not None:
+                # 未开始的任务取消后不会执行 run，需要补上信号量
+                if slot.future.cancel():
+                    self._semaphore.release()
+
+    def shutdown(self):
+        self.cancel()
+        if self._executor is not None:
+            self._executor.shutdown(wait=False)
+            self._executor = None
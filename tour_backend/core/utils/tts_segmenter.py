@@ -0,0 +1,193 @@
+"""
+TTS文本增量切句
+
+原先每收到一个LLM分片都要把整段回复重新拼接、截取，再对每个标点做一次rfind，
+回复越长越慢（整体为平方复杂度）。TextSegmenter 只扫描新到的字符，已切出的文本不再参与拼接和查找。
+
+首句切分按实测延迟自适应：
+- 首句遇到逗号等首句标点即切出，与原先一致
+- 迟迟等不到标点时，多等n个字要多花 n/LLM出字速度 秒；这段等待最多控制在一次TTS首包耗时左右，
+  即首句字数上限约为 LLM出字速度 × TTS首包耗时，超过后在空白、右引号等自然停顿处提前切出
+- LLM出字速度与TTS首包耗时按提供方滚动统计（指数滑动平均），服务内所有连接共享
+"""
+
+import re
+import time
+import threading
+from typing import Dict, Iterable, Optional
+
+
+class RollingEstimate:
+    """指数滑动平均，用于估计TTS首包耗时、LLM出字速度"""
+
+    def __init__(self, alpha: float = 0.2):
+        self.alpha = alpha
+        self.value: Optional[float] = None
+
+    def update(self, sample: float):
+        if sample <= 0:
+            return
+        if self.value is None:
+            self.value = sample
+        else:
+            self.value += self.alpha * (sample - self.value)
+
+    def get(self, default: float) -> float:
+        return default if self.value is None else self.value
+
+
+_estimates: Dict[str, RollingEstimate] = {}
+_estimates_lock = threading.Lock()
+
+
+def get_rolling_estimate(name: str) -> RollingEstimate:
+    """按名称获取服务级共享的滚动估计"""
+    estimate = _estimates.get(name)
+    if estimate is None:
+        with _estimates_lock:
+            estimate = _estimates.setdefault(name, RollingEstimate())
+    return estimate
+
+
+def _compile(chars: Iterable[str]):
+    return re.compile("[" + "".join(re.escape(c) for c in chars) + "]")
+
+
+# 没有标点时可以提前切分的自然停顿：空白、右引号和右括号
+_SOFT_BREAKS = re.compile(r"[\s”’」』）)】》]")
+
+
+class TextSegmenter:
+    def __init__(
+        self,
+        first_punctuations: Iterable[str],
+        punctuations: Iterable[str],
+        ttfb_estimate: Optional[RollingEstimate] = None,
+        llm_rate_estimate: Optional[RollingEstimate] = None,
+    ):
+        self._first_pattern = _compile(first_punctuations)
+        self._pattern = _compile(punctuations)
+        self.ttfb_estimate = ttfb_estimate or RollingEstimate()
+        self.llm_rate_estimate = llm_rate_estimate or RollingEstimate()
+
+        # 自适应首句参数，可由 configure 按配置覆盖
+        self.adaptive_first_chunk = True
+        self.min_first_chars = 6
+        self.max_first_chars = 30
+        self.default_ttfb = 0.5
+        self.default_llm_rate = 20.0
+
+        self.reset()
+
+    def configure(self, config: Optional[dict]):
+        config = config or {}
+        self.adaptive_first_chunk = bool(config.get("adaptive_first_chunk", True))
+        self.min_first_chars = int(config.get("min_first_chars", self.min_first_chars))
+        self.max_first_chars = int(config.get("max_first_chars", self.max_first_chars))
+        self.default_ttfb = float(config.get("default_ttfb", self.default_ttfb))
+        self.default_llm_rate = float(
+            config.get("default_llm_rate", self.default_llm_rate)
+        )
+
+    def reset(self):
+        """新一轮回复开始，上一轮的出字速度计入滚动统计"""
+        if getattr(self, "_fed_chars", 0) >= self.min_first_chars:
+            elapsed = self._last_feed_time - self._first_feed_time
+            if elapsed > 0:
+                self.llm_rate_estimate.update(self._fed_chars / elapsed)
+
+        # 尚未切出的文本片段，只保存最后一次切分之后的部分
+        self._chunks = []
+        self._pending_len = 0
+        self.is_first_sentence = True
+        # 待切分文本中的切分位置（切到该位置之前），0表示尚未找到
+        self._cut = 0
+        self._soft_cut = 0
+
+        self._fed_chars = 0
+        self._first_feed_time = 0.0
+        self._last_feed_time = 0.0
+
+    def feed(self, text: str) -> Optional[str]:
+        """追加LLM新输出的文本，能切出一句时返回该句（含结尾标点），否则返回None"""
+        if not text:
+            return None
+        now = time.monotonic()
+        if not self._fed_chars:
+            self._first_feed_time = now
+        self._last_feed_time = now
+        self._fed_chars += len(text)
+
+        offset = self._pending_len
+        self._chunks.append(text)
+        self._pending_len += len(text)
+        self._scan(text, offset)
+
+        if self._cut:
+            return self._take(self._cut)
+        if self.is_first_sentence and self.adaptive_first_chunk:
+            return self._force_first_cut()
+        return None
+
+    def take_remaining(self) -> str:
+        """取出全部未切分的文本（回复结束时调用）"""
+        text = "".join(self._chunks)
+        self._chunks = []
+        self._pending_len = 0
+        self._cut = 0
+        self._soft_cut = 0
+        return text
+
+    def first_chunk_limit(self) -> int:
+        """等不到标点时首句最多积累的字数"""
+        ttfb = self.ttfb_estimate.get(self.default_ttfb)
+        llm_rate = self._current_llm_rate()
+        limit = int(llm_rate * ttfb)
+        return max(self.min_first_chars, min(limit, self.max_first_chars))
+
+    def _current_llm_rate(self) -> float:
+        # 本轮已有足够样本时用本轮的实时速度，否则用历史统计
+        elapsed = self._last_feed_time - self._first_feed_time
+        if self._fed_chars >= self.min_first_chars and elapsed >= 0.1:
+            return self._fed_chars / elapsed
+        return self.llm_rate_estimate.get(self.default_llm_rate)
+
+    def _scan(self, text: str, offset: int):
+        """只扫描新文本：首句取第一个首句标点，之后取最后一个句末标点"""
+        if self.is_first_sentence:
+            if not self._cut:
+                match = self._first_pattern.search(text)
+                if match:
+                    self._cut = offset + match.end()
+            if not self._cut and self.adaptive_first_chunk:
+                for match in _SOFT_BREAKS.finditer(text):
+                    self._soft_cut = offset + match.end()
+        else:
+            end = 0
+            for match in self._pattern.finditer(text):
+                end = match.end()
+            if end:
+                self._cut = offset + end
+
+    def _force_first_cut(self) -> Optional[str]:
+        if self._pending_len < self.first_chunk_limit():
+            return None
+        if self._soft_cut >= self.min_first_chars:
+            return self._take(self._soft_cut)
+        if self._pending_len >= self.max_first_chars:
+            return self._take(self._pending_len)
+        return None
+
+    def _take(self, cut: int) -> str:
+        pending = "".join(self._chunks)
+        segment, rest = pending[:cut], pending[cut:]
+        was_first = self.is_first_sentence
+        self.is_first_sentence = False
+        self._chunks = [rest] if rest else []
+        self._pending_len = len(rest)
+        self._cut = 0
+        self._soft_cut = 0
+        if was_first and rest:
+            # 首句之后剩余的文本改用句末标点重新扫描，每个字符最多多扫描一次
+            self._scan(rest, 0)
+        return segment
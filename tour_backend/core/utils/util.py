@@ -6,10 +6,15 @@ import wave
 import socket
 import requests
 import subprocess
-import numpy as np
 import opuslib_next
 from io import BytesIO
 from core.utils import p3
+from core.utils.audio_decode import decode_file_to_pcm16, decode_to_pcm16
+from core.utils.opus_encoder_utils import (
+    OpusEncoderPool,
+    get_default_encoder_pool,
+    pcm_frames,
+)
 from pydub import AudioSegment
 from typing import Callable, Any
 
@@ -245,7 +250,14 @@ def extract_json_from_string(input_string):
     return None
 
 
-def audio_to_data_stream(audio_file_path, is_opus=True, callback: Callable[[Any], Any]=None) -> None:
+def audio_file_to_pcm(audio_file_path: str) -> bytes:
+    """
+    把音频文件转换为单声道/16kHz/16位小端PCM
+    WAV（以及安装了miniaudio时的MP3等）在进程内解码，其余格式退回ffmpeg
+    """
+    raw_data = decode_file_to_pcm16(audio_file_path)
+    if raw_data is not None:
+        return raw_data
     # 获取文件后缀名
     file_type = os.path.splitext(audio_file_path)[1]
     if file_type:
@@ -254,66 +266,56 @@ def audio_to_data_stream(audio_file_path, is_opus=True, callback: Callable[[Any]
     audio = AudioSegment.from_file(
         audio_file_path, format=file_type, parameters=["-nostdin"]
     )
-
     # 转换为单声道/16kHz采样率/16位小端编码（确保与编码器匹配）
     audio = audio.set_channels(1).set_frame_rate(16000).set_sample_width(2)
+    return audio.raw_data
+
+
+def audio_bytes_to_pcm(audio_bytes, file_type: str) -> bytes:
+    """音频二进制数据转换为单声道/16kHz/16位小端PCM，优先进程内解码"""
+    raw_data = decode_to_pcm16(audio_bytes, file_type)
+    if raw_data is not None:
+        return raw_data
+    audio = AudioSegment.from_file(
+        BytesIO(audio_bytes), format=file_type, parameters=["-nostdin"]
+    )
+    audio = audio.set_channels(1).set_frame_rate(16000).set_sample_width(2)
+    return audio.raw_data
+
 
+def audio_to_data_stream(
+    audio_file_path,
+    is_opus=True,
+    callback: Callable[[Any], Any] = None,
+    encoder_pool: OpusEncoderPool = None,
+) -> None:
     # 获取原始PCM数据（16位小端）
-    raw_data = audio.raw_data
-    pcm_to_data_stream(raw_data, is_opus, callback)
+    raw_data = audio_file_to_pcm(audio_file_path)
+    pcm_to_data_stream(raw_data, is_opus, callback, encoder_pool)
 
-def audio_to_data(audio_file_path: str, is_opus: bool = True) -> list[bytes]:
+def audio_to_data(
+    audio_file_path: str, is_opus: bool = True, encoder_pool: OpusEncoderPool = None
+) -> list[bytes]:
     """
     将音频文件转换为Opus/PCM编码的帧列表
     Args:
         audio_file_path: 音频文件路径
         is_opus: 是否进行Opus编码
+        encoder_pool: Opus编码器池，默认使用进程级编码器池
     """
-    # 获取文件后缀名
-    file_type = os.path.splitext(audio_file_path)[1]
-    if file_type:
-        file_type = file_type.lstrip(".")
-    # 读取音频文件，-nostdin 参数：不要从标准输入读取数据，否则FFmpeg会阻塞
-    audio = AudioSegment.from_file(
-        audio_file_path, format=file_type, parameters=["-nostdin"]
-    )
-
-    # 转换为单声道/16kHz采样率/16位小端编码（确保与编码器匹配）
-    audio = audio.set_channels(1).set_frame_rate(16000).set_sample_width(2)
-
     # 获取原始PCM数据（16位小端）
-    raw_data = audio.raw_data
-
-    # 初始化Opus编码器
-    encoder = opuslib_next.Encoder(16000, 1, opuslib_next.APPLICATION_AUDIO)
-
-    # 编码参数
-    frame_duration = 60  # 60ms per frame
-    frame_size = int(16000 * frame_duration / 1000)  # 960 samples/frame
-
+    raw_data = audio_file_to_pcm(audio_file_path)
     datas = []
-    # 按帧处理所有音频数据（包括最后一帧可能补零）
-    for i in range(0, len(raw_data), frame_size * 2):  # 16bit=2bytes/sample
-        # 获取当前帧的二进制数据
-        chunk = raw_data[i : i + frame_size * 2]
-
-        # 如果最后一帧不足，补零
-        if len(chunk) < frame_size * 2:
-            chunk += b"\x00" * (frame_size * 2 - len(chunk))
-
-        if is_opus:
-            # 转换为numpy数组处理
-            np_frame = np.frombuffer(chunk, dtype=np.int16)
-            # 编码Opus数据
-            frame_data = encoder.encode(np_frame.tobytes(), frame_size)
-        else:
-            frame_data = chunk if isinstance(chunk, bytes) else bytes(chunk)
-
-        datas.append(frame_data)
-
+    pcm_to_data_stream(raw_data, is_opus, datas.append, encoder_pool)
     return datas
 
-def audio_bytes_to_data_stream(audio_bytes, file_type, is_opus, callback: Callable[[Any], Any]) -> None:
+def audio_bytes_to_data_stream(
+    audio_bytes,
+    file_type,
+    is_opus,
+    callback: Callable[[Any], Any],
+    encoder_pool: OpusEncoderPool = None,
+) -> None:
     """
     直接用音频二进制数据转为opus/pcm数据，支持wav、mp3、p3
     """
@@ -321,41 +323,38 @@ def audio_bytes_to_data_stream(audio_bytes, file_type, is_opus, callback: Callab
         # 直接用p3解码
         return p3.decode_opus_from_bytes_stream(audio_bytes, callback)
     else:
-        # 其他格式用pydub
-        audio = AudioSegment.from_file(
-            BytesIO(audio_bytes), format=file_type, parameters=["-nostdin"]
-        )
-        audio = audio.set_channels(1).set_frame_rate(16000).set_sample_width(2)
-        raw_data = audio.raw_data
-        pcm_to_data_stream(raw_data, is_opus, callback)
-
+        # 其他格式解码为PCM（WAV等进程内解码，其余用ffmpeg）
+        raw_data = audio_bytes_to_pcm(audio_bytes, file_type)
+        pcm_to_data_stream(raw_data, is_opus, callback, encoder_pool)
 
-def pcm_to_data_stream(raw_data, is_opus=True, callback: Callable[[Any], Any] = None):
-    # 初始化Opus编码器
-    encoder = opuslib_next.Encoder(16000, 1, opuslib_next.APPLICATION_AUDIO)
 
+def pcm_to_data_stream(
+    raw_data,
+    is_opus=True,
+    callback: Callable[[Any], Any] = None,
+    encoder_pool: OpusEncoderPool = None,
+):
+    """
+    把16kHz单声道16位PCM按60ms切帧，编码为Opus（或直接输出PCM帧）后逐帧回调
+    Args:
+        encoder_pool: Opus编码器池，默认使用进程级编码器池
+    """
     # 编码参数
     frame_duration = 60  # 60ms per frame
     frame_size = int(16000 * frame_duration / 1000)  # 960 samples/frame
 
-    # 按帧处理所有音频数据（包括最后一帧可能补零）
-    for i in range(0, len(raw_data), frame_size * 2):  # 16bit=2bytes/sample
-        # 获取当前帧的二进制数据
-        chunk = raw_data[i : i + frame_size * 2]
-
-        # 如果最后一帧不足，补零
-        if len(chunk) < frame_size * 2:
-            chunk += b"\x00" * (frame_size * 2 - len(chunk))
-
-        if is_opus:
-            # 转换为numpy数组处理
-            np_frame = np.frombuffer(chunk, dtype=np.int16)
-            # 编码Opus数据
-            frame_data = encoder.encode(np_frame.tobytes(), frame_size)
-            callback(frame_data)
-        else:
-            frame_data = chunk if isinstance(chunk, bytes) else bytes(chunk)
-            callback(frame_data)
+    # 整帧部分是原数据的零拷贝视图，只有最后不足一帧时才补零
+    frames = pcm_frames(raw_data, frame_size)
+    if not is_opus:
+        for frame in frames:
+            callback(frame.tobytes())
+        return
+
+    if encoder_pool is None:
+        encoder_pool = get_default_encoder_pool()
+    with encoder_pool.encoder() as encoder:
+        for frame in frames:
+            callback(encoder.encode(frame.tobytes(), frame_size))
 
 def opus_datas_to_wav_bytes(opus_datas, sample_rate=16000, channels=1):
     """
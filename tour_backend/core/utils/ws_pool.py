@@ -0,0 +1,247 @@
+"""
+流式TTS上游WebSocket连接池
+
+火山双流式、阿里云流式、阿里百炼、讯飞流式TTS原先由每个访客连接各自建立上游WebSocket，
+TCP/TLS握手和鉴权都落在首句音频的延迟上。这里提供服务级的连接池：
+- 按(提供方, 地址, 凭据)区分连接池，任何访客连接都可以借出一条连接，会话结束后归还
+- 最近有使用时保持 min_idle 条预热连接，借出时通常无需再握手
+- 定期对空闲连接发送ping做健康检查，空闲超过 idle_timeout 的连接关闭回收
+- 这几家的协议在一条连接上同一时间只允许一个会话，因此一条连接同一时间只借给一个会话；
+  不支持连接复用的协议（如讯飞，一条连接只能完成一次合成）归还时直接关闭，只享受预热
+"""
+
+import time
+import asyncio
+import hashlib
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Tuple
+from config.logger import setup_logging
+
+TAG = __name__
+logger = setup_logging()
+
+Connector = Callable[[], Awaitable[Any]]
+
+_pools: Dict[str, "UpstreamWSPool"] = {}
+
+
+def _is_open(ws) -> bool:
+    state = getattr(ws, "state", None)
+    return state is not None and state.name == "OPEN"
+
+
+async def _close_quietly(ws):
+    try:
+        await ws.close()
+    except Exception:
+        pass
+
+
+class UpstreamWSPool:
+    def __init__(
+        self,
+        name: str,
+        connector: Connector,
+        min_idle: int = 1,
+        max_idle: int = 8,
+        idle_timeout: float = 50,
+        health_check_interval: float = 15,
+        ping_timeout: float = 5,
+        warm_window: float = 600,
+    ):
+        self.name = name
+        # 建立一条新连接的协程工厂，凭据刷新后由提供方更新。连接池是服务级的，
+        # 工厂只能绑定凭据值，不能引用提供方实例，否则访客断开后提供方和连接对象无法回收
+        self.connector = connector
+        self.min_idle = min_idle
+        self.max_idle = max_idle
+        self.idle_timeout = idle_timeout
+        self.health_check_interval = health_check_interval
+        self.ping_timeout = ping_timeout
+        # 最近 warm_window 秒内有借出时才保持预热连接，长时间无人使用时不占用上游连接
+        self.warm_window = warm_window
+
+        # 空闲连接 (ws, 归还/建立时间)，后进先出，优先借出最近用过的连接
+        self._idle: List[Tuple[Any, float]] = []
+        self._leased = 0
+        self._warming = 0
+        self._last_lease_time = 0.0
+        self._maintain_task: Optional[asyncio.Task] = None
+        self._closed = False
+
+        self.leases = 0
+        self.warm_hits = 0
+        self.connect_count = 0
+        self.connect_seconds = 0.0
+
+    async def lease(self):
+        """借出一条可用连接，没有空闲连接时现场建立"""
+        self._ensure_maintenance()
+        self._last_lease_time = time.monotonic()
+        self.leases += 1
+        while self._idle:
+            ws, _ = self._idle.pop()
+            if _is_open(ws):
+                self._leased += 1
+                self.warm_hits += 1
+                self._schedule_warm_up()
+                return ws
+            await _close_quietly(ws)
+
+        ws = await self._connect()
+        self._leased += 1
+        self._schedule_warm_up()
+        return ws
+
+    async def release(self, ws, reusable: bool = True):
+        """
+        归还连接
+        Args:
+            reusable: 会话是否正常结束、连接可以交给下一个会话；否则直接关闭
+        """
+        self._leased = max(self._leased - 1, 0)
+        if (
+            reusable
+            and not self._closed
+            and _is_open(ws)
+            and len(self._idle) < self.max_idle
+        ):
+            self._idle.append((ws, time.monotonic()))
+            return
+        await _close_quietly(ws)
+        self._schedule_warm_up()
+
+    async def _connect(self):
+        start = time.monotonic()
+        ws = await self.connector()
+        self.connect_count += 1
+        self.connect_seconds += time.monotonic() - start
+        return ws
+
+    def _ensure_maintenance(self):
+        if self._maintain_task is None or self._maintain_task.done():
+            self._maintain_task = asyncio.get_running_loop().create_task(
+                self._maintain()
+            )
+
+    def _schedule_warm_up(self):
+        """空闲连接不足 min_idle 时在后台补充，不阻塞借出"""
+        if self._closed or time.monotonic() - self._last_lease_time > self.warm_window:
+            return
+        missing = self.min_idle - len(self._idle) - self._warming
+        for _ in range(max(missing, 0)):
+            self._warming += 1
+            asyncio.get_running_loop().create_task(self._warm_one())
+
+    async def _warm_one(self):
+        try:
+            ws = await self._connect()
+        except Exception as e:
+            logger.bind(tag=TAG).warning(f"{self.name} 预热连接失败: {e}")
+            return
+        finally:
+            self._warming -= 1
+        if self._closed or len(self._idle) >= self.max_idle:
+            await _close_quietly(ws)
+            return
+        self._idle.append((ws, time.monotonic()))
+
+    async def _maintain(self):
+        """定期健康检查并回收空闲连接"""
+        while not self._closed:
+            await asyncio.sleep(self.health_check_interval)
+            now = time.monotonic()
+            # 先同步移出超时或已断开的连接，避免关闭期间被借出
+            expired = [
+                ws
+                for ws, since in self._idle
+                if now - since > self.idle_timeout or not _is_open(ws)
+            ]
+            if expired:
+                expired_ids = {id(ws) for ws in expired}
+                self._idle = [
+                    item for item in self._idle if id(item[0]) not in expired_ids
+                ]
+            for ws in expired:
+                # 很多厂商会主动断开长时间空闲的连接，超时前主动回收
+                await _close_quietly(ws)
+
+            for ws, _ in list(self._idle):
+                if await self._ping(ws):
+                    continue
+                # ping期间连接可能已被借出，只回收仍在空闲列表中的
+                remaining = [item for item in self._idle if item[0] is not ws]
+                if len(remaining) != len(self._idle):
+                    self._idle = remaining
+                    await _close_quietly(ws)
+
+            self._schedule_warm_up()
+            if not self._idle and not self._leased and not self._warming:
+                if now - self._last_lease_time > self.warm_window:
+                    # 长时间无人使用，停止维护任务，下次借出时重新启动
+                    self._maintain_task = None
+                    return
+
+    async def _ping(self, ws) -> bool:
+        try:
+            pong = await ws.ping()
+            await asyncio.wait_for(pong, timeout=self.ping_timeout)
+            return True
+        except Exception:
+            return False
+
+    def get_metrics(self) -> Dict[str, Any]:
+        return {
+            "leases": self.leases,
+            "warm_hits": self.warm_hits,
+            "connects": self.connect_count,
+            "avg_connect_ms": (
+                self.connect_seconds / self.connect_count * 1000
+                if self.connect_count
+                else 0.0
+            ),
+            "idle": len(self._idle),
+            "leased": self._leased,
+        }
+
+    async def close(self):
+        self._closed = True
+        if self._maintain_task is not None:
+            self._maintain_task.cancel()
+            self._maintain_task = None
+        idle, self._idle = self._idle, []
+        for ws, _ in idle:
+            await _close_quietly(ws)
+
+
+def pool_key(provider: str, url: str, *secrets) -> str:
+    """连接池键：凭据只参与摘要，不出现在日志中"""
+    digest = hashlib.sha1("|".join(str(s) for s in secrets).encode("utf-8")).hexdigest()
+    return f"{provider}|{url}|{digest[:12]}"
+
+
+def get_ws_pool(
+    config: Dict[str, Any], key: str, connector: Connector
+) -> Optional[UpstreamWSPool]:
+    """
+    获取（必要时创建）连接池，未开启连接池时返回None
+    每次调用都会更新建连工厂，使刷新后的凭据用于之后新建的连接；
+    connector应由模块级函数和凭据值构造（如functools.partial），不要捕获提供方的self
+    """
+    pool_config = config.get("tts_ws_pool") or {}
+    if not pool_config.get("enable", False):
+        return None
+    pool = _pools.get(key)
+    if pool is None:
+        pool = UpstreamWSPool(
+            name=key.split("|", 1)[0],
+            connector=connector,
+            min_idle=int(pool_config.get("min_idle", 1)),
+            max_idle=int(pool_config.get("max_idle", 8)),
+            idle_timeout=float(pool_config.get("idle_timeout", 50)),
+            health_check_interval=float(pool_config.get("health_check_interval", 15)),
+            warm_window=float(pool_config.get("warm_window", 600)),
+        )
+        _pools[key] = pool
+    else:
+        pool.connector = connector
+    return pool
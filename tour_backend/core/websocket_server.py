@@ -4,7 +4,7 @@ import json
 import websockets
 from config.logger import setup_logging
 from core.connection import ConnectionHandler
-from config.config_loader import get_config_from_api
+from config.config_loader import get_config_from_api_async, invalidate_private_config
 from core.auth import AuthManager, AuthenticationError
 from core.utils.modules_initialize import initialize_modules
 from core.utils.util import check_vad_update, check_asr_update
@@ -139,7 +139,7 @@ class WebSocketServer:
         try:
             async with self.config_lock:
                 # 重新获取配置
-                new_config = get_config_from_api(self.config)
+                new_config = await get_config_from_api_async(self.config)
                 if new_config is None:
                     self.logger.bind(tag=TAG).error("获取新配置失败")
                     return False
@@ -150,8 +150,9 @@ class WebSocketServer:
                 self.logger.bind(tag=TAG).info(
                     f"检查VAD和ASR类型是否需要更新: {update_vad} {update_asr}"
                 )
-                # 更新配置
+                # 更新配置，设备的差异化配置随之失效
                 self.config = new_config
+                invalidate_private_config()
                 # 重新初始化组件
                 modules = initialize_modules(
                     self.logger,
@@ -0,0 +1,242 @@
+import time
+import queue
+import asyncio
+import threading
+import statistics
+from concurrent.futures import ThreadPoolExecutor
+from tabulate import tabulate
+from core.utils.async_pipeline import PipelineQueue
+
+description = "异步流水线模式与线程模式的并发连接数、首包音频延迟对比测试"
+
+# 模拟各阶段耗时（秒），阻塞调用使用 time.sleep 模拟模型推理/接口调用
+ASR_COST = 0.05
+LLM_FIRST_TOKEN_COST = 0.2
+TTS_COST = 0.08
+SENTENCES_PER_TURN = 3
+FRAMES_PER_SENTENCE = 10
+
+
+class SimulatedConnection:
+    """只保留线程/队列结构的模拟连接，阶段耗时用固定延迟代替"""
+
+    def __init__(self, loop, async_mode, shared_executor=None):
+        self.loop = loop
+        self.async_mode = async_mode
+        self.stop_event = threading.Event()
+        self.first_audio_latency = None
+        self.voice_stop_time = None
+        self.tasks = []
+        self.threads = []
+        if async_mode:
+            self.executor = shared_executor
+            self.asr_queue = PipelineQueue(loop)
+            self.text_queue = PipelineQueue(loop)
+            self.audio_queue = PipelineQueue(loop)
+            self.report_queue = PipelineQueue(loop)
+        else:
+            self.executor = ThreadPoolExecutor(max_workers=5)
+            self.asr_queue = queue.Queue()
+            self.text_queue = queue.Queue()
+            self.audio_queue = queue.Queue()
+            self.report_queue = queue.Queue()
+        self.done = asyncio.Event()
+
+    # ---------------- 各阶段的业务逻辑 ----------------
+    async def handle_audio(self, message):
+        self.voice_stop_time = time.perf_counter()
+        text = await self.loop.run_in_executor(self.executor, self.asr, message)
+        self.executor.submit(self.chat, text)
+
+    def asr(self, message):
+        time.sleep(ASR_COST)
+        return "你好"
+
+    def chat(self, text):
+        time.sleep(LLM_FIRST_TOKEN_COST)
+        for i in range(SENTENCES_PER_TURN):
+            self.text_queue.put(f"{text}-{i}")
+        self.text_queue.put(None)
+
+    def synthesize(self, sentence):
+        if sentence is None:
+            self.audio_queue.put(None)
+            return
+        time.sleep(TTS_COST)
+        for _ in range(FRAMES_PER_SENTENCE):
+            self.audio_queue.put(b"\x00" * 60)
+
+    async def send_audio(self, frame):
+        if frame is None:
+            self.done.set()
+            return
+        if self.first_audio_latency is None:
+            self.first_audio_latency = time.perf_counter() - self.voice_stop_time
+        await asyncio.sleep(0)
+
+    # ---------------- 线程模式 ----------------
+    def _asr_thread(self):
+        while not self.stop_event.is_set():
+            try:
+                message = self.asr_queue.get(timeout=1)
+            except queue.Empty:
+                continue
+            asyncio.run_coroutine_threadsafe(
+                self.handle_audio(message), self.loop
+            ).result()
+
+    def _tts_thread(self):
+        while not self.stop_event.is_set():
+            try:
+                sentence = self.text_queue.get(timeout=1)
+            except queue.Empty:
+                continue
+            self.synthesize(sentence)
+
+    def _audio_thread(self):
+        while not self.stop_event.is_set():
+            try:
+                frame = self.audio_queue.get(timeout=0.1)
+            except queue.Empty:
+                continue
+            asyncio.run_coroutine_threadsafe(
+                self.send_audio(frame), self.loop
+            ).result()
+
+    def _report_thread(self):
+        while not self.stop_event.is_set():
+            try:
+                self.report_queue.get(timeout=1)
+            except queue.Empty:
+                continue
+
+    # ---------------- 异步流水线模式 ----------------
+    async def _asr_task(self):
+        while True:
+            await self.handle_audio(await self.asr_queue.get())
+
+    async def _tts_task(self):
+        while True:
+            sentence = await self.text_queue.get()
+            await self.loop.run_in_executor(self.executor, self.synthesize, sentence)
+
+    async def _audio_task(self):
+        while True:
+            await self.send_audio(await self.audio_queue.get())
+
+    async def _report_task(self):
+        while True:
+            await self.report_queue.get()
+
+    def open(self):
+        if self.async_mode:
+            for coro in (
+                self._asr_task(),
+                self._tts_task(),
+                self._audio_task(),
+                self._report_task(),
+            ):
+                self.tasks.append(self.loop.create_task(coro))
+        else:
+            for target in (
+                self._asr_thread,
+                self._tts_thread,
+                self._audio_thread,
+                self._report_thread,
+            ):
+                thread = threading.Thread(target=target, daemon=True)
+                thread.start()
+                self.threads.append(thread)
+
+    def close(self):
+        self.stop_event.set()
+        for task in self.tasks:
+            task.cancel()
+        if not self.async_mode:
+            self.executor.shutdown(wait=False)
+
+
+async def run_scenario(connections, async_mode, max_workers):
+    """同时建立connections个连接，每个连接说一句话，统计线程数和首包音频延迟"""
+    loop = asyncio.get_running_loop()
+    shared_executor = (
+        ThreadPoolExecutor(max_workers=max_workers) if async_mode else None
+    )
+    conns = []
+    peak_threads = threading.active_count()
+    error = None
+    try:
+        for _ in range(connections):
+            conn = SimulatedConnection(loop, async_mode, shared_executor)
+            conn.open()
+            conns.append(conn)
+        for conn in conns:
+            conn.asr_queue.put(b"voice")
+        # 线程池按需创建线程，运行过程中采样峰值线程数
+        pending = [asyncio.create_task(conn.done.wait()) for conn in conns]
+        while pending:
+            done, pending = await asyncio.wait(pending, timeout=0.05)
+            peak_threads = max(peak_threads, threading.active_count())
+    except RuntimeError as e:
+        # 线程数达到进程上限
+        error = str(e)
+    finally:
+        for conn in conns:
+            conn.close()
+        if shared_executor:
+            shared_executor.shutdown(wait=False)
+
+    latencies = sorted(
+        conn.first_audio_latency * 1000
+        for conn in conns
+        if conn.first_audio_latency is not None
+    )
+    if error or not latencies:
+        return {"connections": connections, "error": error or "无结果"}
+    p99_index = max(0, int(len(latencies) * 0.99) - 1)
+    return {
+        "connections": connections,
+        "threads": peak_threads,
+        "p50": statistics.median(latencies),
+        "p99": latencies[p99_index],
+    }
+
+
+async def main(levels=(50, 200, 400), max_workers=64):
+    rows = []
+    for connections in levels:
+        for async_mode in (False, True):
+            result = await run_scenario(connections, async_mode, max_workers)
+            # 等待上一轮线程退出
+            await asyncio.sleep(1.5)
+            mode = "异步流水线" if async_mode else "线程模式"
+            if "error" in result:
+                rows.append([mode, connections, "-", "-", f"失败: {result['error']}"])
+            else:
+                rows.append(
+                    [
+                        mode,
+                        connections,
+                        result["threads"],
+                        f"{result['p50']:.1f}",
+                        f"{result['p99']:.1f}",
+                    ]
+                )
+
+    print("\n异步流水线性能对比:")
+    print(
+        tabulate(
+            rows,
+            headers=["模式", "并发连接数", "峰值线程数", "首包音频P50(ms)", "首包音频P99(ms)"],
+            tablefmt="grid",
+        )
+    )
+    print("\n测试说明:")
+    print(
+        f"- 模拟阶段耗时: ASR {ASR_COST * 1000:.0f}ms, LLM首字 {LLM_FIRST_TOKEN_COST * 1000:.0f}ms, TTS每句 {TTS_COST * 1000:.0f}ms"
+    )
+    print(f"- 异步流水线模式共享线程池大小: {max_workers}")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,122 @@
+import io
+import time
+import wave
+import shutil
+import resource
+import numpy as np
+from tabulate import tabulate
+from pydub import AudioSegment
+from core.utils.audio_decode import decode_to_pcm16, miniaudio
+
+description = "TTS音频解码测试（进程内解码 vs ffmpeg子进程），各提供方输出格式的每秒句数与每句CPU耗时"
+
+SENTENCE_SECONDS = 3
+ROUNDS = 30
+
+# (提供方, 格式, 采样率, 声道, 位深)
+PROVIDER_FORMATS = [
+    ("阿里云/腾讯", "wav", 16000, 1, 16),
+    ("豆包/OpenAI/自定义", "wav", 24000, 1, 16),
+    ("GPT-SoVITS", "wav", 32000, 1, 16),
+    ("FishSpeech", "wav", 44100, 1, 16),
+    ("CozeCN", "wav", 24000, 1, 32),
+    ("立体声/48k(通用)", "wav", 48000, 2, 16),
+]
+# MP3 提供方(Edge/硅基流动/ttson)使用仓库自带的提示音作为样本
+MP3_SAMPLE = ("Edge/硅基流动/ttson", "mp3", "config/assets/tts_notify.mp3")
+
+
+def make_wav(sample_rate, channels, bits):
+    t = np.arange(sample_rate * SENTENCE_SECONDS) / sample_rate
+    # 模拟语音的多谐波信号
+    signal = sum(np.sin(2 * np.pi * f * t) / (i + 1) for i, f in enumerate((180, 360, 720, 1400)))
+    signal = (signal / np.abs(signal).max() * 0.6).astype(np.float64)
+    if bits == 16:
+        data = (signal * 32767).astype("<i2")
+    else:
+        data = (signal * 2147483647).astype("<i4")
+    if channels > 1:
+        data = np.repeat(data[:, None], channels, axis=1)
+    buffer = io.BytesIO()
+    with wave.open(buffer, "wb") as w:
+        w.setnchannels(channels)
+        w.setsampwidth(bits // 8)
+        w.setframerate(sample_rate)
+        w.writeframes(data.tobytes())
+    return buffer.getvalue()
+
+
+def ffmpeg_decode(audio_bytes, file_type):
+    audio = AudioSegment.from_file(
+        io.BytesIO(audio_bytes), format=file_type, parameters=["-nostdin"]
+    )
+    return audio.set_channels(1).set_frame_rate(16000).set_sample_width(2).raw_data
+
+
+def cpu_seconds():
+    """本进程与子进程(ffmpeg)的CPU时间之和"""
+    children = resource.getrusage(resource.RUSAGE_CHILDREN)
+    return time.process_time() + children.ru_utime + children.ru_stime
+
+
+def measure(decode, audio_bytes, file_type):
+    decode(audio_bytes, file_type)  # 预热（滤波器设计等）
+    wall_start = time.perf_counter()
+    cpu_start = cpu_seconds()
+    for _ in range(ROUNDS):
+        decode(audio_bytes, file_type)
+    wall = time.perf_counter() - wall_start
+    cpu = cpu_seconds() - cpu_start
+    return ROUNDS / wall, cpu / ROUNDS * 1000
+
+
+def main():
+    has_ffmpeg = shutil.which("ffmpeg") is not None
+    samples = [
+        (name, fmt, make_wav(rate, channels, bits), f"{rate}Hz/{channels}ch/{bits}bit")
+        for name, fmt, rate, channels, bits in PROVIDER_FORMATS
+    ]
+    with open(MP3_SAMPLE[2], "rb") as f:
+        samples.append((MP3_SAMPLE[0], MP3_SAMPLE[1], f.read(), "mp3"))
+
+    rows = []
+    for name, file_type, audio_bytes, detail in samples:
+        if decode_to_pcm16(audio_bytes, file_type) is not None:
+            inproc_rate, inproc_cpu = measure(decode_to_pcm16, audio_bytes, file_type)
+            inproc = (f"{inproc_rate:.1f}", f"{inproc_cpu:.2f}")
+        else:
+            inproc_rate = None
+            inproc = ("不支持(需miniaudio)", "-")
+        if has_ffmpeg:
+            ffmpeg_rate, ffmpeg_cpu = measure(ffmpeg_decode, audio_bytes, file_type)
+            legacy = (f"{ffmpeg_rate:.1f}", f"{ffmpeg_cpu:.2f}")
+            speedup = f"{inproc_rate / ffmpeg_rate:.1f}x" if inproc_rate else "-"
+        else:
+            legacy = ("未安装ffmpeg", "-")
+            speedup = "-"
+        rows.append([name, detail, *inproc, *legacy, speedup])
+
+    print(f"\n单句({SENTENCE_SECONDS}秒音频)解码为16kHz单声道PCM，每项{ROUNDS}轮:")
+    print(
+        tabulate(
+            rows,
+            headers=[
+                "提供方",
+                "格式",
+                "进程内 句/秒",
+                "进程内 CPU ms/句",
+                "ffmpeg 句/秒",
+                "ffmpeg CPU ms/句",
+                "加速比",
+            ],
+            tablefmt="grid",
+        )
+    )
+    print("\n测试说明:")
+    print("- 进程内解码：直接解析WAV + NumPy多相重采样，MP3在安装miniaudio时进程内解码")
+    print("- ffmpeg：pydub为每句话启动一个ffmpeg子进程，CPU时间包含子进程")
+    print(f"- miniaudio: {'已安装' if miniaudio is not None else '未安装，MP3仍走ffmpeg'}")
+
+
+if __name__ == "__main__":
+    main()
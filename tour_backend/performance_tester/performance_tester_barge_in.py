@@ -0,0 +1,271 @@
+import io
+import json
+import time
+import wave
+import random
+import asyncio
+import threading
+from loguru import logger
+from tabulate import tabulate
+from websockets.asyncio.client import connect
+from websockets.asyncio.server import serve
+from config.logger import setup_logging
+from core.connection import ConnectionHandler
+from core.handle.abortHandle import handleAbortMessage
+from core.providers.tts.base import TTSProviderBase
+from core.providers.tts.dto.dto import TTSMessageDTO, SentenceType, ContentType
+from core.utils import downlink_scheduler
+from core.utils.cancellation import CancelToken
+
+description = "打断（barge-in）延迟测试：脚本客户端在播放中途打断并立即开始下一轮，统计残留音频停止时间和下一轮首帧时间"
+
+HOST = "127.0.0.1"
+PORT = 18767
+SESSIONS = 40
+# 每句合成耗时（模拟上游非流式TTS的HTTP请求）与每句音频时长
+SYNTH_SECONDS = 0.6
+SENTENCE_SECONDS = 1.2
+FIRST_TURN_SENTENCES = 8
+# 收到第一帧音频后，在该区间内随机打断
+ABORT_AFTER = (0.3, 1.5)
+# 打断后残留音频停止时间的P99目标
+TARGET_P99_MS = 200
+CONFIG = {"downlink_scheduler": {"enable": True, "tick_ms": 20}}
+
+
+def make_wav(seconds):
+    buffer = io.BytesIO()
+    with wave.open(buffer, "wb") as f:
+        f.setnchannels(1)
+        f.setsampwidth(2)
+        f.setframerate(16000)
+        f.writeframes(b"\x00\x00" * int(16000 * seconds))
+    return buffer.getvalue()
+
+
+WAV_BYTES = make_wav(SENTENCE_SECONDS)
+
+
+class UpstreamTTS(TTSProviderBase):
+    """非流式TTS：每句等待一次上游请求，统计被取消的请求数"""
+
+    def __init__(self, stats):
+        super().__init__({}, delete_audio_file=True)
+        self.stats = stats
+
+    async def text_to_speak(self, text, output_file):
+        try:
+            await asyncio.sleep(SYNTH_SECONDS)
+        except asyncio.CancelledError:
+            self.stats["cancelled_requests"] += 1
+            raise
+        self.stats["completed_requests"] += 1
+        return WAV_BYTES
+
+
+class BenchConn:
+    """只包含打断路径所需状态的连接对象，复用ConnectionHandler的打断与清理实现"""
+
+    cancel_turn = ConnectionHandler.cancel_turn
+    clear_queues = ConnectionHandler.clear_queues
+
+    def __init__(self, websocket, stats):
+        self.websocket = websocket
+        self.loop = asyncio.get_running_loop()
+        self.config = CONFIG
+        self.logger = setup_logging()
+        self.stop_event = threading.Event()
+        self.client_abort = False
+        self.turn_token = CancelToken()
+        self.session_id = "barge-in"
+        self.sentence_id = None
+        self.headers = {}
+        self.max_output_size = 0
+        self.audio_format = "opus"
+        self.conn_from_mqtt_gateway = False
+        self.audio_batch_frames = 1
+        self.downlink_stream = None
+        self.read_config_from_api = False
+        self.async_pipeline = False
+        self.llm_finish_task = True
+        self.client_is_speaking = False
+        self.close_after_chat = False
+        self.last_activity_time = 0
+        self.tts_MessageText = None
+        self.tts = UpstreamTTS(stats)
+
+    def clearSpeakStatus(self):
+        self.client_is_speaking = False
+
+
+async def legacy_abort(conn):
+    """优化前的打断：只设置client_abort并逐个清空队列，进行中的合成请求照常跑完"""
+    conn.client_abort = True
+    conn.clear_queues()
+    await conn.websocket.send(
+        json.dumps({"type": "tts", "state": "stop", "session_id": conn.session_id})
+    )
+    conn.clearSpeakStatus()
+
+
+def start_turn(conn, sentences):
+    conn.sentence_id = str(random.getrandbits(64))
+    queue = conn.tts.tts_text_queue
+    queue.put(
+        TTSMessageDTO(
+            sentence_id=conn.sentence_id,
+            sentence_type=SentenceType.FIRST,
+            content_type=ContentType.ACTION,
+        )
+    )
+    for sentence in sentences:
+        queue.put(
+            TTSMessageDTO(
+                sentence_id=conn.sentence_id,
+                sentence_type=SentenceType.MIDDLE,
+                content_type=ContentType.TEXT,
+                content_detail=sentence,
+            )
+        )
+    queue.put(
+        TTSMessageDTO(
+            sentence_id=conn.sentence_id,
+            sentence_type=SentenceType.LAST,
+            content_type=ContentType.ACTION,
+        )
+    )
+
+
+def make_handler(abort, stats):
+    async def handler(ws):
+        conn = BenchConn(ws, stats)
+        await conn.tts.open_audio_channels(conn)
+        try:
+            async for message in ws:
+                data = json.loads(message)
+                if data["type"] == "start":
+                    start_turn(conn, data["sentences"])
+                elif data["type"] == "abort":
+                    await abort(conn)
+        finally:
+            conn.stop_event.set()
+            conn.turn_token.cancel()
+            conn.clear_queues()
+            if conn.downlink_stream is not None:
+                conn.downlink_stream.close()
+
+    return handler
+
+
+async def scripted_client(seed):
+    """播放中途打断并立即开始下一轮，返回(残留音频停止时间, 下一轮首帧时间, 残留帧数)"""
+    rng = random.Random(seed)
+    async with connect(f"ws://{HOST}:{PORT}") as ws:
+        # 持续接收并记录到达时间，打断前已到达的帧不计为残留
+        received = []
+        first_audio = asyncio.Event()
+        second_turn_done = asyncio.Event()
+
+        async def reader():
+            in_second_turn = False
+            async for message in ws:
+                now = time.perf_counter()
+                if isinstance(message, bytes):
+                    received.append((now, in_second_turn))
+                    first_audio.set()
+                    continue
+                data = json.loads(message)
+                if data.get("state") == "sentence_start" and "第二轮" in data.get(
+                    "text", ""
+                ):
+                    in_second_turn = True
+                elif data.get("state") == "stop" and in_second_turn:
+                    second_turn_done.set()
+                    return
+
+        reader_task = asyncio.create_task(reader())
+        first_turn = [f"第一轮的第{i}句话。" for i in range(FIRST_TURN_SENTENCES)]
+        await ws.send(json.dumps({"type": "start", "sentences": first_turn}))
+        await first_audio.wait()
+        await asyncio.sleep(rng.uniform(*ABORT_AFTER))
+
+        abort_time = time.perf_counter()
+        await ws.send(json.dumps({"type": "abort"}))
+        await ws.send(json.dumps({"type": "start", "sentences": ["第二轮回答。"]}))
+        await second_turn_done.wait()
+        await reader_task
+
+        stale = [t for t, second in received if not second and t > abort_time]
+        new = [t for t, second in received if second]
+        return (
+            (max(stale, default=abort_time) - abort_time) * 1000,
+            (new[0] - abort_time) * 1000,
+            len(stale),
+        )
+
+
+async def run_scenario(abort):
+    downlink_scheduler._scheduler = None
+    stats = {"cancelled_requests": 0, "completed_requests": 0}
+    async with serve(make_handler(abort, stats), HOST, PORT):
+        results = await asyncio.gather(*(scripted_client(i) for i in range(SESSIONS)))
+    return results, stats
+
+
+def percentile(values, p):
+    ordered = sorted(values)
+    return ordered[min(int(len(ordered) * p), len(ordered) - 1)]
+
+
+def main():
+    # 关闭服务端逐句日志，避免干扰输出
+    logger.disable("core")
+    rows = []
+    for name, abort in [
+        ("仅设置client_abort(优化前)", legacy_abort),
+        ("取消令牌+关闭上游请求", handleAbortMessage),
+    ]:
+        results, stats = asyncio.run(run_scenario(abort))
+        stop_ms = [r[0] for r in results]
+        next_ms = [r[1] for r in results]
+        stale = [r[2] for r in results]
+        p99 = percentile(stop_ms, 0.99)
+        rows.append(
+            [
+                name,
+                f"{percentile(stop_ms, 0.5):.0f}",
+                f"{p99:.0f}",
+                "达标" if p99 <= TARGET_P99_MS else "未达标",
+                f"{sum(stale) / len(stale):.1f}",
+                f"{percentile(next_ms, 0.5):.0f}",
+                f"{percentile(next_ms, 0.99):.0f}",
+                stats["cancelled_requests"],
+            ]
+        )
+    print(
+        f"\n{SESSIONS}个脚本客户端，每句合成{SYNTH_SECONDS * 1000:.0f}ms/音频{SENTENCE_SECONDS * 1000:.0f}ms（单位：毫秒）:"
+    )
+    print(
+        tabulate(
+            rows,
+            headers=[
+                "打断方式",
+                "残留音频停止P50",
+                "残留音频停止P99",
+                f"P99目标{TARGET_P99_MS}ms",
+                "打断后残留帧数",
+                "下一轮首帧P50",
+                "下一轮首帧P99",
+                "取消的上游请求",
+            ],
+            tablefmt="grid",
+        )
+    )
+    print("\n测试说明:")
+    print("- 残留音频停止：从客户端发出abort到收到上一轮最后一帧音频的时间")
+    print("- 下一轮首帧：打断后立即开始新一轮，从abort到收到新一轮第一帧音频的时间")
+    print("- 优化前进行中的合成请求要跑完，新一轮的合成排在其后，跑完的旧句子还可能在新一轮开始后被播放")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,209 @@
+import os
+import time
+import shutil
+import random
+import asyncio
+import tempfile
+import threading
+from functools import partial
+from concurrent.futures import ThreadPoolExecutor
+from aiohttp import web
+from loguru import logger
+from tabulate import tabulate
+from config.manage_api_client import ManageApiClient, report as manage_report
+from core.utils.chat_history_reporter import ChatHistoryReporter
+from core.utils.ogg_opus import opus_to_ogg
+
+description = "聊天记录上报测试（本地模拟管理端）：逐条WAV同步上报 vs 批量Ogg-Opus异步上报，正常情况与管理端短暂不可用时的请求数、上传量和线程占用"
+
+HOST = "127.0.0.1"
+PORT = 18768
+SESSIONS = 40
+TURNS = 10
+# 每句音频时长（60ms一帧）与Opus包大小
+SENTENCE_FRAMES = 50
+PACKET_BYTES = (80, 160)
+# 管理端不可用的时长，以及旧实现的重试间隔（按比例缩短，默认配置为10秒）
+OUTAGE_SECONDS = 3
+LEGACY_RETRY_DELAY = 1
+# 管理端客户端的熔断恢复时间同样按比例缩短（默认30秒）
+API_CONFIG = {
+    "url": f"http://{HOST}:{PORT}/",
+    "secret": "benchmark",
+    "breaker_recovery": 2,
+}
+
+
+class MockManager:
+    """记录收到的请求，fail_until之前返回503"""
+
+    def __init__(self):
+        self.requests = 0
+        self.records = 0
+        self.bytes = 0
+        self.fail_until = 0.0
+
+    async def handle(self, request):
+        body = await request.read()
+        self.requests += 1
+        if time.monotonic() < self.fail_until:
+            return web.json_response({"code": 500, "msg": "unavailable"}, status=503)
+        self.bytes += len(body)
+        data = await request.json()
+        self.records += len(data["records"]) if "records" in data else 1
+        return web.json_response({"code": 0, "data": None})
+
+    def reset(self, fail_seconds=0):
+        self.requests = self.records = self.bytes = 0
+        self.fail_until = time.monotonic() + fail_seconds
+
+
+def start_server(mock):
+    loop = asyncio.new_event_loop()
+    app = web.Application(client_max_size=64 * 1024 * 1024)
+    app.router.add_post("/agent/chat-history/report", mock.handle)
+    app.router.add_post("/agent/chat-history/report/batch", mock.handle)
+    runner = web.AppRunner(app, access_log=None)
+    loop.run_until_complete(runner.setup())
+    loop.run_until_complete(web.TCPSite(runner, HOST, PORT).start())
+    threading.Thread(target=loop.run_forever, daemon=True).start()
+
+
+def make_records():
+    rng = random.Random(0)
+    records = []
+    for session in range(SESSIONS):
+        for turn in range(TURNS):
+            for chat_type in (1, 2):
+                packets = [
+                    bytes([11 << 3]) + os.urandom(rng.randint(*PACKET_BYTES))
+                    for _ in range(SENTENCE_FRAMES)
+                ]
+                records.append(
+                    (f"device-{session}", chat_type, f"第{turn}轮对话内容", packets)
+                )
+    return records
+
+
+def legacy_wav(packets):
+    """优化前上报的WAV：44字节头 + 每帧960个16bit采样"""
+    return b"\x00" * (44 + len(packets) * 1920)
+
+
+def run_legacy(records, mock, expected):
+    """每个连接的线程池里逐条同步上报，返回(耗时, 线程占用秒数)"""
+    ManageApiClient._instance = None
+    ManageApiClient(
+        {
+            "manager-api": dict(
+                API_CONFIG, max_retries=6, retry_delay=LEGACY_RETRY_DELAY
+            )
+        }
+    )
+    executors = {}
+    busy = []
+
+    def task(device, chat_type, text, packets):
+        start = time.perf_counter()
+        manage_report(
+            mac_address=device,
+            session_id=device,
+            chat_type=chat_type,
+            content=text,
+            audio=legacy_wav(packets),
+            report_time=int(time.time()),
+        )
+        busy.append(time.perf_counter() - start)
+
+    start = time.perf_counter()
+    for device, chat_type, text, packets in records:
+        executor = executors.setdefault(device, ThreadPoolExecutor(max_workers=5))
+        executor.submit(task, device, chat_type, text, packets)
+    for executor in executors.values():
+        executor.shutdown(wait=True)
+    elapsed = time.perf_counter() - start
+    ManageApiClient.safe_close()
+    return elapsed, sum(busy), mock.records == expected
+
+
+def run_pipeline(records, mock, expected, spool_dir):
+    """服务级上报管道，返回(全部送达耗时, 调用方占用秒数)"""
+    reporter = ChatHistoryReporter(
+        API_CONFIG,
+        flush_interval=0.2,
+        spool_dir=spool_dir,
+        backoff_max=2,
+        metrics_interval=0,
+    )
+    start = time.perf_counter()
+    for device, chat_type, text, packets in records:
+        reporter.submit(
+            mac_address=device,
+            session_id=device,
+            chat_type=chat_type,
+            content=text,
+            report_time=int(time.time()),
+            audio=partial(opus_to_ogg, packets),
+        )
+    caller = time.perf_counter() - start
+    deadline = time.monotonic() + 60
+    while mock.records < expected and time.monotonic() < deadline:
+        time.sleep(0.05)
+    return time.perf_counter() - start, caller, mock.records == expected
+
+
+def main():
+    logger.disable("core")
+    mock = MockManager()
+    start_server(mock)
+    records = make_records()
+    expected = len(records)
+    spool_dir = tempfile.mkdtemp(prefix="report_spool_")
+    rows = []
+    try:
+        for scenario, fail_seconds in [("正常", 0), (f"管理端{OUTAGE_SECONDS}秒不可用", OUTAGE_SECONDS)]:
+            for name, run in [
+                ("逐条WAV同步上报(优化前)", run_legacy),
+                ("批量Ogg-Opus异步上报", partial(run_pipeline, spool_dir=spool_dir)),
+            ]:
+                mock.reset(fail_seconds)
+                elapsed, thread_seconds, complete = run(records, mock, expected)
+                rows.append(
+                    [
+                        scenario,
+                        name,
+                        mock.requests,
+                        f"{mock.bytes / 1024 / 1024:.1f}",
+                        f"{thread_seconds:.2f}",
+                        f"{elapsed:.1f}",
+                        "是" if complete else f"否({mock.records}/{expected})",
+                    ]
+                )
+        print(
+            f"\n{SESSIONS}个连接各{TURNS}轮对话，共{expected}条ASR/TTS记录，每句{SENTENCE_FRAMES * 60 / 1000:.0f}秒音频:"
+        )
+        print(
+            tabulate(
+                rows,
+                headers=[
+                    "场景",
+                    "上报方式",
+                    "HTTP请求数",
+                    "成功上传(MB)",
+                    "占用对话线程(秒)",
+                    "全部送达(秒)",
+                    "全部送达",
+                ],
+                tablefmt="grid",
+            )
+        )
+        print("\n测试说明:")
+        print("- 占用对话线程：优化前为连接线程池执行上报（含重试等待）的总时长，优化后为调用方提交记录的总时长")
+        print(f"- 优化前重试间隔按比例缩短为{LEGACY_RETRY_DELAY}秒（默认10秒，最多6次）")
+        print("- 管理端不可用期间，优化后的记录写入落盘目录，退避结束后补传")
+    finally:
+        shutil.rmtree(spool_dir, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,205 @@
+import time
+import asyncio
+import threading
+from aiohttp import web
+from loguru import logger
+from tabulate import tabulate
+from config.logger import setup_logging
+from config.config_loader import (
+    get_private_config_from_api,
+    invalidate_private_config,
+    warm_private_configs,
+)
+from config.manage_api_client import (
+    ManageApiClient,
+    init_service,
+    manage_api_async_close,
+)
+from core.connection import ConnectionHandler
+
+description = "连接建立测试（本地模拟管理端）：一批手环同时连接时获取差异化配置的耗时，事件循环内同步请求 vs 异步请求+缓存 vs 启动预热"
+
+HOST = "127.0.0.1"
+PORT = 18770
+DEVICES = 50
+# 模拟管理端查询数据库并组装模型配置的耗时
+API_LATENCY = 0.08
+SELECTED_MODULE = {"LLM": "LLM_default", "TTS": "TTS_default", "ASR": "ASR_default"}
+CONFIG = {
+    "read_config_from_api": True,
+    "selected_module": SELECTED_MODULE,
+    "delete_audio": True,
+    "private_config_cache": {"enable": True, "ttl": 300},
+    "manager-api": {"url": f"http://{HOST}:{PORT}/", "secret": "benchmark"},
+}
+
+
+def device_id(i):
+    return f"aa:bb:cc:00:00:{i:02x}"
+
+
+def make_private_config(device):
+    return {
+        "selected_module": dict(SELECTED_MODULE),
+        "LLM": {"LLM_default": {"type": "openai", "model_name": "qwen", "api_key": "k"}},
+        "TTS": {"TTS_default": {"type": "edge", "voice": "zh-CN-XiaoxiaoNeural"}},
+        "prompt": f"你是{device}对应的景区NPC，" + "介绍景点历史与游览路线。" * 20,
+        "summaryMemory": "游客喜欢历史故事。" * 10,
+        "chat_history_conf": 1,
+    }
+
+
+class MockManager:
+    def __init__(self):
+        self.requests = 0
+
+    async def agent_models(self, request):
+        self.requests += 1
+        data = await request.json()
+        await asyncio.sleep(API_LATENCY)
+        return web.json_response(
+            {"code": 0, "data": make_private_config(data["macAddress"])}
+        )
+
+    async def agent_models_batch(self, request):
+        self.requests += 1
+        await asyncio.sleep(API_LATENCY)
+        items = [
+            {
+                "macAddress": device_id(i),
+                "clientId": device_id(i),
+                "config": make_private_config(device_id(i)),
+            }
+            for i in range(DEVICES)
+        ]
+        return web.json_response({"code": 0, "data": items})
+
+
+def start_server(mock):
+    loop = asyncio.new_event_loop()
+    app = web.Application()
+    app.router.add_post("/config/agent-models", mock.agent_models)
+    app.router.add_post("/config/agent-models/batch", mock.agent_models_batch)
+    runner = web.AppRunner(app, access_log=None)
+    loop.run_until_complete(runner.setup())
+    loop.run_until_complete(web.TCPSite(runner, HOST, PORT).start())
+    threading.Thread(target=loop.run_forever, daemon=True).start()
+
+
+class BenchConn:
+    """只包含获取差异化配置所需状态的连接对象，复用ConnectionHandler的实现"""
+
+    _fetch_private_config = ConnectionHandler._fetch_private_config
+
+    def __init__(self, device):
+        self.config = CONFIG
+        self.read_config_from_api = True
+        self.headers = {"device-id": device, "client-id": device}
+        self.logger = setup_logging()
+        self.need_bind = False
+
+
+async def legacy_fetch(device):
+    """优化前：在事件循环中同步请求管理端"""
+    return get_private_config_from_api(CONFIG, device, device)
+
+
+async def cached_fetch(device):
+    return await BenchConn(device)._fetch_private_config()
+
+
+async def loop_lag_probe(stop, lags):
+    while not stop.is_set():
+        start = time.perf_counter()
+        await asyncio.sleep(0.005)
+        lags.append((time.perf_counter() - start - 0.005) * 1000)
+
+
+async def connect_all(fetch):
+    """所有设备同时连接，返回每个连接获取到配置的耗时和事件循环最长阻塞"""
+    stop = asyncio.Event()
+    lags = []
+    probe = asyncio.create_task(loop_lag_probe(stop, lags))
+    await asyncio.sleep(0.01)
+
+    # 从所有设备同时发起连接的时刻开始计时，包含排队等待事件循环的时间
+    start = time.perf_counter()
+
+    async def one(i):
+        private_config = await fetch(device_id(i))
+        assert private_config and "LLM" in private_config
+        return (time.perf_counter() - start) * 1000
+
+    latencies = await asyncio.gather(*(one(i) for i in range(DEVICES)))
+    stop.set()
+    await probe
+    return latencies, max(lags)
+
+
+def percentile(values, p):
+    ordered = sorted(values)
+    return ordered[min(int(len(ordered) * p), len(ordered) - 1)]
+
+
+async def run_scenarios(mock):
+    rows = []
+    scenarios = [
+        ("事件循环内同步请求(优化前)", legacy_fetch, None),
+        ("异步请求，缓存未命中", cached_fetch, None),
+        ("缓存命中（手环再次连接）", cached_fetch, "reuse"),
+        ("启动时批量预热", cached_fetch, "warm"),
+    ]
+    for name, fetch, prepare in scenarios:
+        if prepare != "reuse":
+            invalidate_private_config()
+        if prepare == "warm":
+            await warm_private_configs(CONFIG)
+        mock.requests = 0
+        latencies, max_lag = await connect_all(fetch)
+        rows.append(
+            [
+                name,
+                f"{percentile(latencies, 0.5):.1f}",
+                f"{percentile(latencies, 0.99):.1f}",
+                mock.requests,
+                f"{max_lag:.0f}",
+            ]
+        )
+    await manage_api_async_close()
+    return rows
+
+
+def main():
+    logger.disable("core")
+    logger.disable("config")
+    mock = MockManager()
+    start_server(mock)
+    ManageApiClient._instance = None
+    init_service(CONFIG)
+    rows = asyncio.run(run_scenarios(mock))
+    ManageApiClient.safe_close()
+
+    print(
+        f"\n{DEVICES}个手环同时连接，管理端每次查询耗时{API_LATENCY * 1000:.0f}ms（单位：毫秒）:"
+    )
+    print(
+        tabulate(
+            rows,
+            headers=[
+                "获取方式",
+                "获取配置P50",
+                "获取配置P99",
+                "连接期间的管理端请求",
+                "事件循环最长阻塞",
+            ],
+            tablefmt="grid",
+        )
+    )
+    print("\n测试说明:")
+    print("- 获取配置：从连接开始到拿到差异化配置、可以开始初始化模型的时间")
+    print("- 优化前每个连接在事件循环中同步请求管理端，同时连接的设备只能逐个等待，其间所有连接的音频都无法处理")
+    print("- 预热的请求发生在服务启动时，不计入连接期间的请求数")
+
+
+if __name__ == "__main__":
+    main()
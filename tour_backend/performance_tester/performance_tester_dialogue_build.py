@@ -0,0 +1,171 @@
+import re
+import copy
+import time
+import uuid
+import statistics
+from datetime import datetime
+from types import SimpleNamespace
+from tabulate import tabulate
+from core.utils.dialogue import Dialogue, Message
+from core.providers.llm.dify.dify import LLMProvider as DifyLLMProvider
+from core.providers.llm.ollama.ollama import LLMProvider as OllamaLLMProvider
+
+description = "对话上下文构建耗时测试（增量渲染 vs 每轮全量重建），观察历史增长时每轮构建成本"
+
+TURNS = 200
+SAMPLE_TURNS = (1, 10, 25, 50, 100, 200)
+REPEAT = 50
+
+# 模拟多KB的景区NPC角色提示词
+PROMPT = (
+    "你是景区导游小智，当前时间：{{current_time}}。\n"
+    + "\n".join(f"[景点{i}] 这里是景点{i}的详细介绍，包括历史、典故、开放时间和游览建议。" * 3 for i in range(30))
+    + "\n<memory>\n</memory>\n"
+)
+MEMORY = "用户喜欢历史故事，上次参观到了景点12。"
+VOICEPRINT = {
+    "speakers": [
+        "test1,张三,张三是一个程序员",
+        "test2,李四,李四是一个产品经理",
+        "test3,王五,王五是一个设计师",
+    ]
+}
+
+
+def legacy_build(messages, memory_str, voiceprint_config):
+    """优化前的实现：每轮查找系统消息、替换时间、解析说话人、正则替换记忆并重建全部消息"""
+    dialogue = []
+    system_message = next((m for m in messages if m.role == "system"), None)
+    if system_message:
+        prompt = system_message.content.replace(
+            "{{current_time}}", datetime.now().strftime("%H:%M")
+        )
+        speakers = voiceprint_config.get("speakers", [])
+        if speakers:
+            prompt += "\n\n<speakers_info>"
+            for speaker_str in speakers:
+                parts = speaker_str.split(",", 2)
+                if len(parts) >= 2:
+                    description = parts[2].strip() if len(parts) >= 3 else ""
+                    prompt += f"\n- {parts[1].strip()}：{description}"
+            prompt += "\n\n</speakers_info>"
+        if memory_str is not None:
+            prompt = re.sub(
+                r"<memory>.*?</memory>",
+                f"<memory>\n{memory_str}\n</memory>",
+                prompt,
+                flags=re.DOTALL,
+            )
+        dialogue.append({"role": "system", "content": prompt})
+    for m in messages:
+        if m.role == "system":
+            continue
+        if m.tool_calls is not None:
+            dialogue.append({"role": m.role, "tool_calls": m.tool_calls})
+        elif m.role == "tool":
+            dialogue.append(
+                {
+                    "role": m.role,
+                    "tool_call_id": m.tool_call_id or str(uuid.uuid4()),
+                    "content": m.content,
+                }
+            )
+        else:
+            dialogue.append({"role": m.role, "content": m.content})
+    return dialogue
+
+
+class _SilentLLM:
+    """只执行适配器改写对话的逻辑（dify/coze拼接工具结果、ollama的qwen3加/no_think），不发起请求"""
+
+    is_qwen3 = True
+    model_name = "qwen3"
+
+    def __init__(self):
+        self.client = SimpleNamespace(
+            chat=SimpleNamespace(
+                completions=SimpleNamespace(create=lambda **kwargs: iter(()))
+            )
+        )
+
+    def response(self, session_id, dialogue):
+        return iter(())
+
+
+def check_adapter_isolation():
+    """
+    对话历史返回的是缓存的消息对象，适配器改写时必须自行拷贝：
+    工具调用后dify/coze会弹出末尾的tool消息并改写前面的user消息，ollama会改写最后一条user消息
+    """
+    for provider in (DifyLLMProvider, OllamaLLMProvider):
+        dialogue = Dialogue()
+        dialogue.update_system_message(PROMPT)
+        dialogue.put(Message(role="user", content="hi"))
+        dialogue.put(Message(role="assistant", tool_calls=[{"id": "call_1"}]))
+        dialogue.put(Message(role="tool", tool_call_id="call_1", content="RES"))
+        before = copy.deepcopy(dialogue.get_llm_dialogue_with_memory(MEMORY, VOICEPRINT))
+        for _ in range(2):
+            llm_dialogue = dialogue.get_llm_dialogue_with_memory(MEMORY, VOICEPRINT)
+            list(
+                provider.response_with_functions(
+                    _SilentLLM(), "session", llm_dialogue, functions=[]
+                )
+            )
+        after = dialogue.get_llm_dialogue_with_memory(MEMORY, VOICEPRINT)
+        assert after == before, f"{provider.__module__}修改了缓存的对话历史: {after[1]}"
+
+
+def measure(fn):
+    costs = []
+    for _ in range(REPEAT):
+        start = time.perf_counter()
+        fn()
+        costs.append((time.perf_counter() - start) * 1e6)
+    return statistics.median(costs)
+
+
+def main():
+    check_adapter_isolation()
+    dialogue = Dialogue()
+    dialogue.update_system_message(PROMPT)
+    rows = []
+    for turn in range(1, TURNS + 1):
+        dialogue.put(Message(role="user", content=f"第{turn}个问题：这个景点有什么故事？"))
+        dialogue.put(Message(role="assistant", content=f"第{turn}个回答：" + "相传很久以前……" * 10))
+        if turn not in SAMPLE_TURNS:
+            continue
+
+        expected = legacy_build(dialogue.dialogue, MEMORY, VOICEPRINT)
+        actual = dialogue.get_llm_dialogue_with_memory(MEMORY, VOICEPRINT)
+        assert expected == actual, "增量渲染结果与全量重建不一致"
+
+        legacy_us = measure(lambda: legacy_build(dialogue.dialogue, MEMORY, VOICEPRINT))
+        incremental_us = measure(
+            lambda: dialogue.get_llm_dialogue_with_memory(MEMORY, VOICEPRINT)
+        )
+        rows.append(
+            [
+                turn,
+                len(dialogue.dialogue),
+                f"{legacy_us:.1f}",
+                f"{incremental_us:.1f}",
+                f"{legacy_us / incremental_us:.1f}x",
+            ]
+        )
+
+    print(f"\n对话上下文构建耗时（系统提示词 {len(PROMPT)} 字，单位us，中位数）:")
+    print(
+        tabulate(
+            rows,
+            headers=["轮次", "消息数", "全量重建", "增量渲染", "加速比"],
+            tablefmt="grid",
+        )
+    )
+    print("\n测试说明:")
+    print("- 每轮写入一问一答后构建一次上下文，时间、记忆、说话人不变时复用系统提示词渲染结果")
+    print("- 增量渲染每轮只剩列表拼接（直接引用缓存的消息），不再重新解析系统提示词和历史消息")
+    print("- 已校验：工具调用后经dify、ollama(qwen3)适配器改写两次，缓存的对话历史保持不变")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,137 @@
+import time
+import asyncio
+from tabulate import tabulate
+from websockets.asyncio.client import connect
+from websockets.asyncio.server import serve
+from core.utils.frame_packer import FramePacker, unpack_batch
+
+description = "下行音频批量发送测试：逐帧发送 vs 多帧合并为一条消息（含MQTT网关头部预分配），服务端每帧CPU耗时"
+
+HOST = "127.0.0.1"
+PORT = 18766
+LISTENERS = 100
+FRAMES_PER_LISTENER = 600
+# 60ms Opus帧的典型大小
+OPUS_FRAME = b"\x58" * 160
+BATCH_FRAMES = 3
+
+
+async def legacy_mqtt_send(ws, frames):
+    """优化前：每帧新建16字节头部并拼接负载"""
+    for sequence, frame in enumerate(frames):
+        header = bytearray(16)
+        header[0] = 1
+        header[2:4] = len(frame).to_bytes(2, "big")
+        header[4:8] = sequence.to_bytes(4, "big")
+        header[8:12] = (sequence * 60).to_bytes(4, "big")
+        header[12:16] = len(frame).to_bytes(4, "big")
+        await ws.send(bytes(header) + frame)
+
+
+async def raw_send(ws, frames):
+    for frame in frames:
+        await ws.send(frame)
+
+
+def packer_mqtt_send(batch):
+    async def send(ws, frames):
+        packer = FramePacker()
+        packets = [(frame, sequence * 60, sequence) for sequence, frame in enumerate(frames)]
+        for i in range(0, len(packets), batch):
+            await packer.send_mqtt(ws, packets[i : i + batch])
+
+    return send
+
+
+def packer_batch_send(batch):
+    async def send(ws, frames):
+        packer = FramePacker()
+        for i in range(0, len(frames), batch):
+            await packer.send_batch(ws, frames[i : i + batch])
+
+    return send
+
+
+SCENARIOS = [
+    ("WebSocket客户端", "逐帧发送(优化前)", raw_send),
+    ("WebSocket客户端", f"批量容器({BATCH_FRAMES}帧/消息)", packer_batch_send(BATCH_FRAMES)),
+    ("MQTT网关", "逐帧新建头部(优化前)", legacy_mqtt_send),
+    ("MQTT网关", "预分配头部(逐帧)", packer_mqtt_send(1)),
+    ("MQTT网关", f"预分配头部({BATCH_FRAMES}帧/消息)", packer_mqtt_send(BATCH_FRAMES)),
+]
+
+
+async def run_scenario(send):
+    frames = [OPUS_FRAME] * FRAMES_PER_LISTENER
+
+    async def handler(ws):
+        await ws.recv()
+        await send(ws, frames)
+        await ws.close()
+
+    async def listener():
+        messages = 0
+        async with connect(f"ws://{HOST}:{PORT}", max_size=None) as ws:
+            await ws.send("start")
+            async for _ in ws:
+                messages += 1
+        return messages
+
+    async with serve(handler, HOST, PORT):
+        messages = await asyncio.gather(*(listener() for _ in range(LISTENERS)))
+    return sum(messages)
+
+
+class _CaptureWS:
+    def __init__(self):
+        self.messages = []
+
+    async def send(self, data):
+        self.messages.append(bytes(data))
+
+
+async def _capture(send, frames):
+    ws = _CaptureWS()
+    await send(ws, frames)
+    return ws.messages
+
+
+def main():
+    # 格式自检
+    assert unpack_batch(
+        asyncio.run(_capture(packer_batch_send(BATCH_FRAMES), [b"a", b"bc", b"def"]))[0]
+    ) == [b"a", b"bc", b"def"]
+
+    rows = []
+    baseline = {}
+    for client, name, send in SCENARIOS:
+        cpu_start = time.process_time()
+        messages = asyncio.run(run_scenario(send))
+        cpu = time.process_time() - cpu_start
+        frames = LISTENERS * FRAMES_PER_LISTENER
+        per_frame_us = cpu / frames * 1e6
+        baseline.setdefault(client, per_frame_us)
+        rows.append(
+            [
+                client,
+                name,
+                f"{messages:,}",
+                f"{per_frame_us:.1f}",
+                f"{baseline[client] / per_frame_us:.2f}x",
+            ]
+        )
+    print(f"\n{LISTENERS}个收听连接各下发{FRAMES_PER_LISTENER}帧（收发双方在同一进程）:")
+    print(
+        tabulate(
+            rows,
+            headers=["客户端", "发送方式", "WebSocket消息数", "每帧CPU(us)", "相对优化前"],
+            tablefmt="grid",
+        )
+    )
+    print("\n测试说明:")
+    print("- 每帧CPU为整个进程（服务端发送 + 本地客户端接收）的CPU时间除以总帧数")
+    print("- 批量容器需客户端在hello中声明 features.audio_batch；MQTT网关合并发送需网关按头部长度拆包")
+
+
+if __name__ == "__main__":
+    main()
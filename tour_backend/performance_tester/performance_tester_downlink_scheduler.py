@@ -0,0 +1,194 @@
+import time
+import random
+import asyncio
+import statistics
+from types import SimpleNamespace
+from tabulate import tabulate
+from core.handle.sendAudioHandle import sendAudio
+from core.utils import downlink_scheduler
+
+description = "下行音频发送调度测试：500路同时播放时的事件循环延迟与帧间隔抖动（集中定时器 vs 每帧sleep，含慢连接场景）"
+
+SPEAKERS = 500
+UTTERANCE_SECONDS = 8
+FRAME_MS = 60
+# 各连接开始播放的时间随机错开
+START_SPREAD = 1.0
+# 探针每隔该时间测一次事件循环延迟
+PROBE_INTERVAL = 0.01
+OPUS_FRAME = b"\x00" * 120
+# 慢连接场景：部分客户端每发送若干帧，send 就像写缓冲超限时那样等待 drain
+SLOW_CLIENTS = 5
+SLOW_EVERY_FRAMES = 10
+SLOW_STALL = 0.3
+
+
+class FakeWebSocket:
+    def __init__(self, slow=False):
+        self.send_times = []
+        self.transport = None
+        self.slow = slow
+
+    async def send(self, data):
+        if isinstance(data, (bytes, bytearray)):
+            self.send_times.append(time.perf_counter())
+            if self.slow and len(self.send_times) % SLOW_EVERY_FRAMES == 0:
+                await asyncio.sleep(SLOW_STALL)
+
+
+def make_conn(config, slow=False):
+    return SimpleNamespace(
+        config=config,
+        websocket=FakeWebSocket(slow),
+        client_abort=False,
+        conn_from_mqtt_gateway=False,
+        last_activity_time=0,
+    )
+
+
+async def probe_loop_lag(stop, lags):
+    while not stop.is_set():
+        start = time.perf_counter()
+        await asyncio.sleep(PROBE_INTERVAL)
+        lags.append(time.perf_counter() - start - PROBE_INTERVAL)
+
+
+async def speaker(conn, delay, frames):
+    await asyncio.sleep(delay)
+    await sendAudio(conn, frames)
+    stream = getattr(conn, "downlink_stream", None)
+    if stream is not None:
+        await stream.drain()
+
+
+def count_loop_iterations(loop, counter, busy):
+    """统计事件循环迭代（唤醒）次数，以及每次迭代除去select等待之外的执行耗时"""
+    run_once = loop._run_once
+    selector = loop._selector
+    select = selector.select
+    waited = [0.0]
+
+    def timed_select(timeout=None):
+        start = time.perf_counter()
+        try:
+            return select(timeout)
+        finally:
+            waited[0] += time.perf_counter() - start
+
+    def counted():
+        counter[0] += 1
+        waited[0] = 0.0
+        start = time.perf_counter()
+        run_once()
+        busy.append((time.perf_counter() - start - waited[0]) * 1000)
+
+    selector.select = timed_select
+    loop._run_once = counted
+
+
+async def run_scenario(use_scheduler, slow_clients=0):
+    downlink_scheduler._scheduler = None
+    iterations = [0]
+    busy = []
+    count_loop_iterations(asyncio.get_running_loop(), iterations, busy)
+    config = {
+        "tts_audio_send_delay": 0,
+        "downlink_scheduler": {"enable": use_scheduler, "tick_ms": 20},
+    }
+    frames = [OPUS_FRAME] * (UTTERANCE_SECONDS * 1000 // FRAME_MS)
+    rng = random.Random(0)
+    conns = [make_conn(config, slow=i < slow_clients) for i in range(SPEAKERS)]
+
+    stop = asyncio.Event()
+    lags = []
+    probe = asyncio.create_task(probe_loop_lag(stop, lags))
+    cpu_start = time.process_time()
+    wall_start = time.perf_counter()
+    await asyncio.gather(
+        *(speaker(conn, rng.uniform(0, START_SPREAD), frames) for conn in conns)
+    )
+    wall = time.perf_counter() - wall_start
+    cpu = time.process_time() - cpu_start
+    stop.set()
+    await probe
+
+    # 预缓冲之后的帧间隔与60ms的偏差，只统计正常连接
+    deviations = []
+    for conn in conns[slow_clients:]:
+        times = conn.websocket.send_times[3:]
+        deviations.extend(
+            abs((b - a) * 1000 - FRAME_MS) for a, b in zip(times, times[1:])
+        )
+    return {
+        "lags": [lag * 1000 for lag in lags],
+        "deviations": deviations,
+        "busy": busy,
+        "cpu": cpu,
+        "wall": wall,
+        "wakeups": iterations[0] / wall,
+    }
+
+
+def percentile(values, p):
+    ordered = sorted(values)
+    return ordered[min(int(len(ordered) * p), len(ordered) - 1)]
+
+
+def main():
+    results = [
+        ("每帧各自sleep(优化前)", asyncio.run(run_scenario(False))),
+        ("集中定时器(20ms节拍)", asyncio.run(run_scenario(True))),
+        (
+            f"集中定时器+{SLOW_CLIENTS}个慢连接",
+            asyncio.run(run_scenario(True, SLOW_CLIENTS)),
+        ),
+    ]
+    rows = []
+    for name, r in results:
+        rows.append(
+            [
+                name,
+                f"{statistics.mean(r['lags']):.2f}",
+                f"{percentile(r['lags'], 0.99):.2f}",
+                f"{max(r['lags']):.2f}",
+                f"{percentile(r['busy'], 0.99):.2f}",
+                f"{percentile(r['deviations'], 0.5):.2f}",
+                f"{percentile(r['deviations'], 0.99):.2f}",
+                f"{r['wakeups']:,.0f}",
+                f"{r['cpu'] / r['wall'] * 100:.1f}%",
+            ]
+        )
+    print(f"\n{SPEAKERS}路连接各播放{UTTERANCE_SECONDS}秒音频（单位：毫秒）:")
+    print(
+        tabulate(
+            rows,
+            headers=[
+                "调度方式",
+                "循环延迟均值",
+                "循环延迟P99",
+                "循环延迟最大",
+                "单次迭代耗时P99",
+                "帧间隔偏差P50",
+                "帧间隔偏差P99",
+                "循环迭代/秒",
+                "CPU占用",
+            ],
+            tablefmt="grid",
+        )
+    )
+    print("\n测试说明:")
+    print(f"- 循环延迟：探针每{PROBE_INTERVAL * 1000:.0f}ms sleep一次，实际唤醒比预期晚的时间")
+    print("- 单次迭代耗时：事件循环每次迭代执行回调的时间（不含select等待），即一次连续占用事件循环的时长")
+    print(f"- 帧间隔偏差：同一连接相邻两帧发送间隔与{FRAME_MS}ms之差（不含开头的预缓冲帧，不含慢连接）")
+    print(
+        f"- 慢连接：{SLOW_CLIENTS}个连接每发送{SLOW_EVERY_FRAMES}帧send就等待{SLOW_STALL * 1000:.0f}ms，"
+        "模拟写缓冲超限后等待drain；节拍循环不等待它们，其他连接的帧间隔不受影响"
+    )
+    print(
+        "- 集中定时器一个节拍处理几百个连接时分批进行，每批约0.5ms后让出事件循环；"
+        "事件循环空闲时间更长，循环延迟主要是select超时唤醒的系统延迟，不是发送占用"
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,168 @@
+import os
+import time
+import importlib
+import statistics
+from tabulate import tabulate
+from config.settings import load_config
+from plugins_func.register import all_function_registry
+from core.utils.intent_matcher import LocalIntentMatcher
+
+description = "本地快速意图匹配的命中率、准确率与匹配耗时测试"
+
+LLM = "交给LLM"
+
+# 回放语料：(用户说的话, 期望意图)，可通过 data/intent_corpus.txt 追加，每行 "文本<TAB>意图"
+# 期望意图为LLM时表示快速路径不应作出判断，必须交给LLM
+REPLAY_CORPUS = [
+    ("播放音乐", "play_music"),
+    ("放首歌吧", "play_music"),
+    ("来首歌听听", "play_music"),
+    ("给我唱首歌", "play_music"),
+    ("我想听歌", "play_music"),
+    ("随便放点音乐", "play_music"),
+    ("播放两只老虎", "play_music"),
+    ("再见", "handle_exit_intent"),
+    ("拜拜", "handle_exit_intent"),
+    ("好了拜拜", "handle_exit_intent"),
+    ("我要走了", "handle_exit_intent"),
+    ("退出", "handle_exit_intent"),
+    ("关闭", "handle_exit_intent"),
+    ("结束对话吧", "handle_exit_intent"),
+    ("怎么退出了", "continue_chat"),
+    ("不要放音乐", LLM),
+    ("停止播放音乐", LLM),
+    ("我不想听歌", LLM),
+    ("别唱了", LLM),
+    ("不要退出", LLM),
+    ("关闭音乐", LLM),
+    ("现在几点了", "result_for_context"),
+    ("现在几点", "result_for_context"),
+    ("几点啦", "result_for_context"),
+    ("今天几号", "result_for_context"),
+    ("今天星期几啊", "result_for_context"),
+    ("今天是几月几号", "result_for_context"),
+    ("今天天气怎么样", "get_weather"),
+    ("天气怎么样", "get_weather"),
+    ("明天会下雨吗", "get_weather"),
+    ("北京明天天气怎么样", "get_weather"),
+    ("播报一下新闻", "get_news_from_newsnow"),
+    ("今天有什么新闻", "get_news_from_newsnow"),
+    ("你好", "continue_chat"),
+    ("你是谁呀", "continue_chat"),
+    ("给我讲个故事", "continue_chat"),
+    ("我今天心情不太好", "continue_chat"),
+    ("你觉得人工智能会取代人类吗", "continue_chat"),
+    ("帮我算一下三加五等于几", "continue_chat"),
+    ("你最喜欢什么颜色", "continue_chat"),
+    ("我们聊聊宇宙吧", "continue_chat"),
+]
+
+ROUNDS = 200
+
+
+def load_corpus():
+    corpus = list(REPLAY_CORPUS)
+    path = os.path.join("data", "intent_corpus.txt")
+    if os.path.exists(path):
+        with open(path, "r", encoding="utf-8") as f:
+            for line in f:
+                parts = line.rstrip("\n").split("\t")
+                if len(parts) == 2 and parts[0]:
+                    corpus.append((parts[0], parts[1]))
+    return corpus
+
+
+def load_functions(config):
+    """按意图识别配置加载插件，返回与传给LLM相同格式的函数描述"""
+    intent_config = config["Intent"]["intent_llm"]
+    names = ["handle_exit_intent", "play_music"]
+    names += [n for n in intent_config.get("functions", []) if n not in names]
+    functions = []
+    for name in names:
+        try:
+            importlib.import_module(f"plugins_func.functions.{name}")
+        except Exception as e:
+            print(f"加载插件 {name} 失败: {e}")
+            continue
+        if name in all_function_registry:
+            functions.append(all_function_registry[name].description)
+    return functions, intent_config.get("fast_path") or {}
+
+
+def main():
+    config = load_config()
+    functions, fast_path_config = load_functions(config)
+
+    build_start = time.perf_counter()
+    matcher = LocalIntentMatcher(
+        functions,
+        config.get("exit_commands", []),
+        config.get("wakeup_words", []),
+        ["两只老虎", "小星星"],
+        fast_path_config,
+    )
+    build_ms = (time.perf_counter() - build_start) * 1000
+
+    corpus = load_corpus()
+    rows = []
+    hits = correct = 0
+    hit_latency, miss_latency = [], []
+    for text, expected in corpus:
+        result = None
+        for _ in range(ROUNDS):
+            start = time.perf_counter()
+            result = matcher.match(text)
+            elapsed = (time.perf_counter() - start) * 1e6
+            (hit_latency if result is not None else miss_latency).append(elapsed)
+
+        if result is None:
+            verdict = LLM
+            predicted = "-"
+        elif expected == LLM:
+            hits += 1
+            predicted = result
+            verdict = "误判"
+        else:
+            hits += 1
+            predicted = result
+            name = result.split('"name": "')[1].split('"')[0]
+            if name == expected:
+                correct += 1
+                verdict = "命中"
+            else:
+                verdict = "误判"
+        rows.append([text, expected, predicted, verdict])
+
+    print("\n本地快速意图匹配结果:")
+    print(tabulate(rows, headers=["用户输入", "期望意图", "快速匹配结果", "结论"], tablefmt="grid"))
+
+    def quantiles(values):
+        if not values:
+            return "-", "-"
+        values = sorted(values)
+        return (
+            f"{statistics.median(values):.1f}",
+            f"{values[int(len(values) * 0.99) - 1]:.1f}",
+        )
+
+    hit_p50, hit_p99 = quantiles(hit_latency)
+    miss_p50, miss_p99 = quantiles(miss_latency)
+    summary = [
+        ["语料条数", len(corpus)],
+        ["快速路径命中率", f"{hits / len(corpus) * 100:.1f}%"],
+        ["命中准确率", f"{correct / hits * 100:.1f}%" if hits else "-"],
+        ["命中耗时 P50/P99 (us)", f"{hit_p50} / {hit_p99}"],
+        ["未命中耗时 P50/P99 (us)", f"{miss_p50} / {miss_p99}"],
+        ["索引构建耗时 (ms)", f"{build_ms:.2f}"],
+    ]
+    print("\n汇总:")
+    print(tabulate(summary, tablefmt="grid"))
+    print("\n测试说明:")
+    print("- 命中的请求跳过意图识别LLM调用，未命中的请求在匹配后继续走LLM，额外开销为未命中耗时")
+    print("- 否定和停止类指令（不要放音乐、关闭音乐等）期望交给LLM，快速路径返回任何意图都算误判")
+    print("- 退出命令只按完整匹配，不参与相似度索引")
+    print(f"- 每条语料重复匹配 {ROUNDS} 次统计耗时")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,195 @@
+import time
+import asyncio
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from aiohttp import web
+from tabulate import tabulate
+from loguru import logger
+from config.manage_api_client import ManageApiClient, AsyncManageApiClient
+
+description = "管理端客户端测试（本地模拟管理端）：同步客户端+固定间隔重试 vs 异步客户端（指数退避、熔断、请求合并），管理端故障与设备重连风暴时的请求数和等待时间"
+
+HOST = "127.0.0.1"
+PORT = 18772
+DEVICES = 50
+API_LATENCY = 0.05
+# 管理端不可用的时长，以及旧实现的固定重试间隔（按比例缩短，默认配置为10秒×6次）
+OUTAGE_SECONDS = 4
+LEGACY_RETRY_DELAY = 1
+MAX_RETRIES = 6
+API_CONFIG = {
+    "url": f"http://{HOST}:{PORT}/",
+    "secret": "benchmark",
+    "max_retries": MAX_RETRIES,
+    "retry_delay": 0.2,
+    "retry_max_delay": 3,
+    "breaker_threshold": 5,
+    "breaker_recovery": 1,
+}
+
+
+class MockManager:
+    """fail_until之前返回503，同时记录请求数和建立的TCP连接数"""
+
+    def __init__(self):
+        self.requests = 0
+        self.peers = set()
+        self.fail_until = 0.0
+
+    async def agent_models(self, request):
+        self.requests += 1
+        self.peers.add(request.transport.get_extra_info("peername"))
+        data = await request.json()
+        await asyncio.sleep(API_LATENCY)
+        if time.monotonic() < self.fail_until:
+            return web.json_response({"code": 500, "msg": "unavailable"}, status=503)
+        return web.json_response(
+            {"code": 0, "data": {"device": data["macAddress"], "prompt": "景区NPC"}}
+        )
+
+    def reset(self, fail_seconds=0):
+        self.requests = 0
+        self.peers = set()
+        self.fail_until = time.monotonic() + fail_seconds
+
+
+def start_server(mock):
+    loop = asyncio.new_event_loop()
+    app = web.Application()
+    app.router.add_post("/config/agent-models", mock.agent_models)
+    runner = web.AppRunner(app, access_log=None)
+    loop.run_until_complete(runner.setup())
+    loop.run_until_complete(web.TCPSite(runner, HOST, PORT).start())
+    threading.Thread(target=loop.run_forever, daemon=True).start()
+
+
+def payload(device):
+    return {"macAddress": device, "clientId": device, "selectedModule": {}}
+
+
+def legacy_fetch(device):
+    """优化前的_execute_request：失败后固定间隔time.sleep重试"""
+    for attempt in range(MAX_RETRIES + 1):
+        try:
+            return ManageApiClient._request(
+                "POST", "/config/agent-models", json=payload(device)
+            )
+        except Exception as e:
+            if attempt == MAX_RETRIES or not ManageApiClient._should_retry(e):
+                raise
+            time.sleep(LEGACY_RETRY_DELAY)
+
+
+def run_legacy(devices):
+    """每个连接在自己的线程池中同步请求，返回(每个连接等待秒数, 成功数, 阻塞线程秒数)"""
+    ManageApiClient._instance = None
+    ManageApiClient({"manager-api": API_CONFIG})
+    start = time.perf_counter()
+
+    def one(device):
+        try:
+            legacy_fetch(device)
+            ok = True
+        except Exception:
+            ok = False
+        return time.perf_counter() - start, ok
+
+    executors = [ThreadPoolExecutor(max_workers=1) for _ in devices]
+    futures = [ex.submit(one, d) for ex, d in zip(executors, devices)]
+    results = [f.result() for f in futures]
+    for ex in executors:
+        ex.shutdown()
+    ManageApiClient.safe_close()
+    waits = [r[0] for r in results]
+    return waits, sum(r[1] for r in results), sum(waits)
+
+
+async def run_async(devices):
+    """所有连接在同一事件循环中异步请求，返回(每个连接等待秒数, 成功数, 阻塞线程秒数)"""
+    client = AsyncManageApiClient(API_CONFIG)
+    start = time.perf_counter()
+
+    async def one(device):
+        try:
+            await client.request(
+                "POST", "/config/agent-models", coalesce=True, json=payload(device)
+            )
+            ok = True
+        except Exception:
+            ok = False
+        return time.perf_counter() - start, ok
+
+    results = await asyncio.gather(*(one(d) for d in devices))
+    await client.aclose()
+    waits = [r[0] for r in results]
+    return waits, sum(r[1] for r in results), 0.0
+
+
+def percentile(values, p):
+    ordered = sorted(values)
+    return ordered[min(int(len(ordered) * p), len(ordered) - 1)]
+
+
+def main():
+    logger.disable("core")
+    mock = MockManager()
+    start_server(mock)
+
+    distinct = [f"aa:bb:cc:00:01:{i:02x}" for i in range(DEVICES)]
+    # 同一设备反复重连、视觉接口与连接同时请求时的重复请求
+    same = ["aa:bb:cc:00:02:01"] * DEVICES
+    scenarios = [
+        ("正常，各设备不同", distinct, 0),
+        ("正常，同一设备重复请求", same, 0),
+        (f"管理端{OUTAGE_SECONDS}秒不可用", distinct, OUTAGE_SECONDS),
+    ]
+    rows = []
+    for scenario, devices, fail_seconds in scenarios:
+        for name, run in [
+            ("同步客户端+固定间隔重试(优化前)", run_legacy),
+            ("异步客户端", lambda d: asyncio.run(run_async(d))),
+        ]:
+            mock.reset(fail_seconds)
+            waits, succeeded, thread_seconds = run(devices)
+            rows.append(
+                [
+                    scenario,
+                    name,
+                    mock.requests,
+                    len(mock.peers),
+                    f"{percentile(waits, 0.5):.2f}",
+                    f"{max(waits):.2f}",
+                    f"{succeeded}/{len(devices)}",
+                    f"{thread_seconds:.1f}",
+                ]
+            )
+
+    print(f"\n{DEVICES}个连接同时请求差异化配置，管理端每次处理{API_LATENCY * 1000:.0f}ms:")
+    print(
+        tabulate(
+            rows,
+            headers=[
+                "场景",
+                "客户端",
+                "管理端请求数",
+                "TCP连接数",
+                "等待P50(秒)",
+                "最长等待(秒)",
+                "成功",
+                "阻塞线程(秒)",
+            ],
+            tablefmt="grid",
+        )
+    )
+    print("\n测试说明:")
+    print(f"- 优化前重试间隔按比例缩短为{LEGACY_RETRY_DELAY}秒（默认10秒，最多{MAX_RETRIES}次）")
+    print(
+        f"- 异步客户端：退避{API_CONFIG['retry_delay']}秒起翻倍（上限{API_CONFIG['retry_max_delay']}秒，随机抖动），"
+        f"连续失败{API_CONFIG['breaker_threshold']}次熔断{API_CONFIG['breaker_recovery']}秒"
+    )
+    print("- 管理端故障时，异步客户端熔断后只放行探测请求，其余请求在重试预算内等待恢复，不再持续请求管理端")
+    print("- 阻塞线程：优化前每个连接占用一个线程等待请求和重试的总时长，异步客户端不占用线程")
+
+
+if __name__ == "__main__":
+    main()
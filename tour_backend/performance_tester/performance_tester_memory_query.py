@@ -0,0 +1,169 @@
+import time
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
+from loguru import logger
+from tabulate import tabulate
+from config.logger import setup_logging
+from core.connection import ConnectionHandler
+from core.providers.memory.base import MemoryProviderBase
+from core.utils.cache.manager import cache_manager
+from core.utils.cache.config import CacheType
+
+description = "记忆查询测试：ASR出结果到LLM开始请求前等待记忆的时间（同步查询 vs 异步预取+按角色缓存），以及查询对事件循环的阻塞"
+
+SESSIONS = 20
+TURNS = 3
+# 模拟mem0检索耗时与意图识别耗时
+QUERY_SECONDS = 0.3
+INTENT_SECONDS = 0.4
+# 同一游客多轮中重复的问题（如再次询问同一景点）
+QUERIES = ["这个景点有什么历史", "附近有什么好吃的", "这个景点有什么历史"]
+
+
+class BlockingMemory(MemoryProviderBase):
+    """优化前的mem0：async方法里调用同步的MemoryClient.search"""
+
+    def __init__(self, role_id):
+        super().__init__({})
+        self.role_id = role_id
+        self.calls = 0
+
+    async def save_memory(self, msgs):
+        return None
+
+    async def query_memory(self, query):
+        self.calls += 1
+        time.sleep(QUERY_SECONDS)
+        return f"{self.role_id}的记忆"
+
+
+class AsyncMemory(BlockingMemory):
+    """优化后的mem0：异步客户端查询，结果按角色缓存"""
+
+    cache_query = True
+
+    async def query_memory(self, query):
+        self.calls += 1
+        await asyncio.sleep(QUERY_SECONDS)
+        return f"{self.role_id}的记忆"
+
+
+class BenchConn:
+    """只包含记忆查询路径的连接对象，复用ConnectionHandler的实现"""
+
+    prefetch_memory = ConnectionHandler.prefetch_memory
+    _query_memory = ConnectionHandler._query_memory
+
+    def __init__(self, memory, executor):
+        self.memory = memory
+        self.loop = asyncio.get_running_loop()
+        self.config = {"memory_query_timeout": 10}
+        self.logger = setup_logging()
+        self.executor = executor
+
+
+async def legacy_turn(conn, text):
+    """优化前：意图识别完成后，chat中再同步等待记忆查询"""
+    await asyncio.sleep(INTENT_SECONDS)
+    future = conn.executor.submit(
+        lambda: asyncio.run_coroutine_threadsafe(
+            conn.memory.query_memory(text), conn.loop
+        ).result()
+    )
+    await asyncio.wrap_future(future)
+
+
+async def prefetch_turn(conn, text):
+    """优化后：ASR出结果即预取，与意图识别并行"""
+    conn.prefetch_memory(text)
+    await asyncio.sleep(INTENT_SECONDS)
+    await asyncio.wrap_future(conn.executor.submit(conn._query_memory, text))
+
+
+async def session(turn, memory_cls, index, executor):
+    conn = BenchConn(memory_cls(f"visitor-{index}"), executor)
+    waits = []
+    for text in QUERIES[:TURNS]:
+        start = time.perf_counter()
+        await turn(conn, text)
+        # 扣除意图识别本身的耗时，只统计额外等待记忆的时间
+        waits.append((time.perf_counter() - start - INTENT_SECONDS) * 1000)
+    return waits, conn.memory.calls
+
+
+async def loop_lag_probe(stop, lags):
+    """每10ms唤醒一次，记录事件循环被阻塞的最长时间"""
+    while not stop.is_set():
+        start = time.perf_counter()
+        await asyncio.sleep(0.01)
+        lags.append((time.perf_counter() - start - 0.01) * 1000)
+
+
+async def run_scenario(turn, memory_cls):
+    cache_manager.clear(CacheType.MEMORY_QUERY)
+    executor = ThreadPoolExecutor(max_workers=SESSIONS)
+    stop = asyncio.Event()
+    lags = []
+    probe = asyncio.create_task(loop_lag_probe(stop, lags))
+    start = time.perf_counter()
+    results = await asyncio.gather(
+        *(session(turn, memory_cls, i, executor) for i in range(SESSIONS))
+    )
+    elapsed = time.perf_counter() - start
+    stop.set()
+    await probe
+    executor.shutdown()
+    waits = [w for r in results for w in r[0]]
+    calls = sum(r[1] for r in results)
+    return waits, calls, max(lags), elapsed
+
+
+def percentile(values, p):
+    ordered = sorted(values)
+    return ordered[min(int(len(ordered) * p), len(ordered) - 1)]
+
+
+def main():
+    logger.disable("core")
+    rows = []
+    for name, turn, memory_cls in [
+        ("同步查询(优化前)", legacy_turn, BlockingMemory),
+        ("异步预取+按角色缓存", prefetch_turn, AsyncMemory),
+    ]:
+        waits, calls, max_lag, elapsed = asyncio.run(run_scenario(turn, memory_cls))
+        rows.append(
+            [
+                name,
+                f"{percentile(waits, 0.5):.0f}",
+                f"{percentile(waits, 0.99):.0f}",
+                calls,
+                f"{max_lag:.0f}",
+                f"{elapsed:.1f}",
+            ]
+        )
+    print(
+        f"\n{SESSIONS}个会话各{TURNS}轮，记忆检索{QUERY_SECONDS * 1000:.0f}ms，"
+        f"意图识别{INTENT_SECONDS * 1000:.0f}ms:"
+    )
+    print(
+        tabulate(
+            rows,
+            headers=[
+                "查询方式",
+                "额外等待记忆P50(ms)",
+                "额外等待记忆P99(ms)",
+                "记忆检索次数",
+                "事件循环最长阻塞(ms)",
+                "总耗时(秒)",
+            ],
+            tablefmt="grid",
+        )
+    )
+    print("\n测试说明:")
+    print("- 额外等待记忆：意图识别结束后到记忆就绪、可以请求LLM的时间，即记忆查询在首字链路上的耗时")
+    print("- 优化前同步检索阻塞事件循环，多个会话的检索只能排队执行")
+    print("- 第三轮重复了第一轮的问题，缓存命中时不再检索")
+
+
+if __name__ == "__main__":
+    main()
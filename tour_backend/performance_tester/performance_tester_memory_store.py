@@ -0,0 +1,186 @@
+import os
+import json
+import time
+import shutil
+import random
+import tempfile
+import threading
+import yaml
+from tabulate import tabulate
+from core.utils.memory_store import LocalMemoryStore
+
+description = "本地记忆存储测试：每次会话加载+保存记忆的耗时（整文件YAML重写 vs SQLite按角色索引），以及并发保存是否丢失写入"
+
+ROLE_COUNTS = [1_000, 10_000, 100_000]
+# 整文件YAML在该角色数以上只测一次（单次已需数十秒）
+LEGACY_SINGLE_RUN_ABOVE = 10_000
+ROUNDS = 20
+CONCURRENT_WRITERS = 8
+WRITES_PER_WRITER = 25
+
+
+def make_memory(rng):
+    return json.dumps(
+        {
+            "时空档案": {
+                "身份图谱": {"现用名": f"游客{rng.randint(0, 99999)}", "特征标记": ["亲子游"]},
+                "记忆立方": [{"事件": "参观古城", "时间戳": "2025-05-01", "情感值": 0.8}],
+            },
+            "高光语录": ["这里的风景太美了"],
+        },
+        ensure_ascii=False,
+    )
+
+
+def role_id(i):
+    return f"device-{i:08d}"
+
+
+class LegacyYamlStore:
+    """优化前的实现：每次加载/保存都解析并整体重写 data/.memory.yaml"""
+
+    def __init__(self, path):
+        self.path = path
+
+    def get(self, role):
+        all_memory = {}
+        if os.path.exists(self.path):
+            with open(self.path, "r", encoding="utf-8") as f:
+                all_memory = yaml.safe_load(f) or {}
+        return all_memory.get(role)
+
+    def put(self, role, content):
+        all_memory = {}
+        if os.path.exists(self.path):
+            with open(self.path, "r", encoding="utf-8") as f:
+                all_memory = yaml.safe_load(f) or {}
+        all_memory[role] = content
+        with open(self.path, "w", encoding="utf-8") as f:
+            yaml.dump(all_memory, f, allow_unicode=True)
+
+
+def build_yaml(path, count, rng):
+    data = {role_id(i): make_memory(rng) for i in range(count)}
+    dumper = getattr(yaml, "CSafeDumper", yaml.SafeDumper)
+    with open(path, "w", encoding="utf-8") as f:
+        yaml.dump(data, f, Dumper=dumper, allow_unicode=True)
+
+
+def session_cost(store, rounds, count, rng):
+    """一次会话：连接时加载记忆，断开时保存记忆，返回平均毫秒"""
+    start = time.perf_counter()
+    for _ in range(rounds):
+        role = role_id(rng.randrange(count))
+        store.get(role)
+        store.put(role, make_memory(rng))
+    return (time.perf_counter() - start) / rounds * 1000
+
+
+def concurrent_lost_writes(store):
+    """多个线程同时保存不同角色的记忆，返回丢失的写入数和出错次数"""
+    errors = [0]
+
+    def writer(w):
+        rng = random.Random(w)
+        for i in range(WRITES_PER_WRITER):
+            try:
+                store.put(f"writer-{w}-{i}", make_memory(rng))
+            except Exception:
+                errors[0] += 1
+
+    threads = [
+        threading.Thread(target=writer, args=(w,)) for w in range(CONCURRENT_WRITERS)
+    ]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    lost = 0
+    for w in range(CONCURRENT_WRITERS):
+        for i in range(WRITES_PER_WRITER):
+            try:
+                if store.get(f"writer-{w}-{i}") is None:
+                    lost += 1
+            except Exception:
+                lost += 1
+    return lost, errors[0]
+
+
+def main():
+    rng = random.Random(0)
+    workdir = tempfile.mkdtemp(prefix="memory_store_")
+    try:
+        rows = []
+        for count in ROLE_COUNTS:
+            yaml_path = os.path.join(workdir, f"memory_{count}.yaml")
+            build_yaml(yaml_path, count, rng)
+            size_mb = os.path.getsize(yaml_path) / 1024 / 1024
+
+            # 旧实现直接在该YAML文件上加载/保存
+            legacy_rounds = 1 if count > LEGACY_SINGLE_RUN_ABOVE else 3
+            legacy_ms = session_cost(
+                LegacyYamlStore(yaml_path), legacy_rounds, count, rng
+            )
+
+            db_path = os.path.join(workdir, f"memory_{count}.db")
+            start = time.perf_counter()
+            store = LocalMemoryStore(db_path, legacy_yaml_path=yaml_path)
+            migrate_s = time.perf_counter() - start
+            assert store.count() == count
+            new_ms = session_cost(store, ROUNDS * 50, count, rng)
+            store.close()
+
+            rows.append(
+                [
+                    f"{count:,}",
+                    f"{size_mb:.1f}",
+                    f"{legacy_ms:,.1f}",
+                    f"{new_ms:.3f}",
+                    f"{legacy_ms / new_ms:,.0f}x",
+                    f"{migrate_s:.1f}",
+                ]
+            )
+        print("\n每次会话加载+保存一个角色的记忆（单位：毫秒）:")
+        print(
+            tabulate(
+                rows,
+                headers=[
+                    "角色数",
+                    "YAML大小(MB)",
+                    "整文件YAML",
+                    "SQLite(WAL)",
+                    "加速比",
+                    "一次性迁移(秒)",
+                ],
+                tablefmt="grid",
+            )
+        )
+
+        legacy_path = os.path.join(workdir, "concurrent.yaml")
+        build_yaml(legacy_path, 1_000, rng)
+        legacy_lost, legacy_errors = concurrent_lost_writes(LegacyYamlStore(legacy_path))
+        store = LocalMemoryStore(os.path.join(workdir, "concurrent.db"))
+        new_lost, new_errors = concurrent_lost_writes(store)
+        store.close()
+        total = CONCURRENT_WRITERS * WRITES_PER_WRITER
+        print(f"\n{CONCURRENT_WRITERS}个线程同时保存共{total}条记忆（已有1,000个角色）:")
+        print(
+            tabulate(
+                [
+                    ["整文件YAML", legacy_lost, legacy_errors],
+                    ["SQLite(WAL)", new_lost, new_errors],
+                ],
+                headers=["存储方式", "丢失的写入", "读写出错"],
+                tablefmt="grid",
+            )
+        )
+        print("\n测试说明:")
+        print("- 整文件YAML每次加载和保存都要解析全部角色并整体写回，耗时随角色数线性增长")
+        print(f"- 角色数超过{LEGACY_SINGLE_RUN_ABOVE:,}时整文件YAML只测一次")
+        print("- 迁移时间为首次打开时把旧YAML导入SQLite的一次性耗时")
+    finally:
+        shutil.rmtree(workdir, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    main()
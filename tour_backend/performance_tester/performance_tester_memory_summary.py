@@ -0,0 +1,207 @@
+import time
+import shutil
+import asyncio
+import tempfile
+import threading
+from loguru import logger
+from tabulate import tabulate
+from core.providers.memory.base import MemoryProviderBase
+from core.utils.dialogue import Message
+from core.utils.memory_summary_queue import MemorySummaryQueue
+
+description = "记忆总结队列测试：旅行团同时断开连接时的线程数、并发LLM总结请求数、完成时间，以及合并与重启恢复"
+
+VISITORS = 40
+# 模拟记忆总结LLM的单次耗时
+LLM_SECONDS = 0.5
+MAX_WORKERS = 4
+# 合并测试：同一游客短时间内反复断线重连的次数
+RECONNECTS = 4
+RECONNECT_VISITORS = 10
+
+
+class SlowLLMStats:
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.active = 0
+        self.peak = 0
+        self.calls = 0
+        self.finished = 0
+
+    def call(self):
+        with self.lock:
+            self.active += 1
+            self.calls += 1
+            self.peak = max(self.peak, self.active)
+        time.sleep(LLM_SECONDS)
+        with self.lock:
+            self.active -= 1
+            self.finished += 1
+
+
+class BenchMemory(MemoryProviderBase):
+    """和 mem_local_short 一样在 save_memory 中同步调用一次LLM"""
+
+    def __init__(self, role_id, stats):
+        super().__init__({})
+        self.role_id = role_id
+        self.stats = stats
+
+    async def save_memory(self, msgs):
+        if len(msgs) < 2:
+            return None
+        self.stats.call()
+        return f"{self.role_id}:{len(msgs)}"
+
+    async def query_memory(self, query):
+        return ""
+
+
+def make_dialogue(turns):
+    dialogue = [Message(role="system", content="你是导游")]
+    for i in range(turns):
+        dialogue.append(Message(role="user", content=f"第{i}个问题"))
+        dialogue.append(Message(role="assistant", content=f"第{i}个回答"))
+    return dialogue
+
+
+def legacy_submit(memory, dialogue):
+    """优化前：每次断开连接新建一个线程和事件循环"""
+
+    def save_memory_task():
+        loop = asyncio.new_event_loop()
+        try:
+            loop.run_until_complete(memory.save_memory(dialogue))
+        finally:
+            loop.close()
+
+    threading.Thread(target=save_memory_task, daemon=True).start()
+
+
+def wait_finished(stats, expected, baseline_threads):
+    """等待全部总结完成，返回(耗时, 峰值线程增量)"""
+    start = time.perf_counter()
+    peak_threads = 0
+    while stats.finished < expected:
+        peak_threads = max(peak_threads, threading.active_count() - baseline_threads)
+        time.sleep(0.005)
+    return time.perf_counter() - start, peak_threads
+
+
+def group_leaves(submit):
+    stats = SlowLLMStats()
+    baseline_threads = threading.active_count()
+    start = time.perf_counter()
+    for i in range(VISITORS):
+        submit(BenchMemory(f"visitor-{i}", stats), make_dialogue(1 + i % 5))
+    submit_ms = (time.perf_counter() - start) * 1000
+    elapsed, peak_threads = wait_finished(stats, VISITORS, baseline_threads)
+    return stats, submit_ms, elapsed, peak_threads
+
+
+def reconnects(submit):
+    """同一批游客在合并窗口内反复断线重连，返回LLM调用次数"""
+    stats = SlowLLMStats()
+    for _ in range(RECONNECTS):
+        for i in range(RECONNECT_VISITORS):
+            submit(BenchMemory(f"visitor-{i}", stats), make_dialogue(2))
+    # 等待合并窗口结束和全部任务执行完毕
+    time.sleep(1.5 + LLM_SECONDS * RECONNECTS * RECONNECT_VISITORS / MAX_WORKERS)
+    return stats.calls
+
+
+def restart_recovery(spool_dir):
+    """提交后在总结开始前“重启”，新队列从落盘目录恢复任务"""
+    stats = SlowLLMStats()
+    before = MemorySummaryQueue(
+        max_workers=MAX_WORKERS,
+        coalesce_seconds=3600,
+        spool_dir=spool_dir,
+        metrics_interval=0,
+    )
+    for i in range(RECONNECT_VISITORS):
+        before.submit(BenchMemory(f"visitor-{i}", stats), make_dialogue(2))
+    after = MemorySummaryQueue(
+        max_workers=MAX_WORKERS,
+        coalesce_seconds=0,
+        spool_dir=spool_dir,
+        metrics_interval=0,
+    )
+    # 重启后第一个连接断开时恢复上次未完成的任务
+    after.submit(BenchMemory("visitor-new", stats), make_dialogue(2))
+    wait_finished(stats, RECONNECT_VISITORS + 1, threading.active_count())
+    return stats.calls, after.get_metrics()["restored"]
+
+
+def main():
+    # 关闭队列的逐条日志，避免干扰输出
+    logger.disable("core")
+    spool_dir = tempfile.mkdtemp(prefix="memory_spool_")
+    try:
+        queue = MemorySummaryQueue(
+            max_workers=MAX_WORKERS, coalesce_seconds=0, metrics_interval=0
+        )
+        rows = []
+        for name, submit in [
+            ("每次断开新建线程(优化前)", legacy_submit),
+            (f"共享队列({MAX_WORKERS}个工作线程)", queue.submit),
+        ]:
+            stats, submit_ms, elapsed, peak_threads = group_leaves(submit)
+            rows.append(
+                [
+                    name,
+                    f"{submit_ms:.1f}",
+                    peak_threads,
+                    stats.peak,
+                    f"{elapsed:.1f}",
+                ]
+            )
+        print(f"\n{VISITORS}名游客同时断开连接，单次总结LLM耗时{LLM_SECONDS * 1000:.0f}ms:")
+        print(
+            tabulate(
+                rows,
+                headers=[
+                    "保存方式",
+                    "提交耗时(ms)",
+                    "峰值新增线程",
+                    "峰值并发LLM请求",
+                    "全部完成(秒)",
+                ],
+                tablefmt="grid",
+            )
+        )
+
+        legacy_calls = reconnects(legacy_submit)
+        coalescing = MemorySummaryQueue(
+            max_workers=MAX_WORKERS, coalesce_seconds=1, metrics_interval=0
+        )
+        queue_calls = reconnects(coalescing.submit)
+        recovered_calls, restored = restart_recovery(spool_dir)
+        total = RECONNECTS * RECONNECT_VISITORS
+        print(
+            f"\n{RECONNECT_VISITORS}名游客各断线重连{RECONNECTS}次（共{total}次断开），合并窗口1秒:"
+        )
+        print(
+            tabulate(
+                [
+                    ["每次断开新建线程(优化前)", legacy_calls],
+                    ["共享队列", queue_calls],
+                ],
+                headers=["保存方式", "LLM总结次数"],
+                tablefmt="grid",
+            )
+        )
+        print(
+            f"\n重启恢复：{RECONNECT_VISITORS}个任务在总结前重启，恢复 {restored} 个，"
+            f"重启后共执行 {recovered_calls} 次总结（含1个新任务）"
+        )
+        print("\n测试说明:")
+        print("- 优化前每次断开都新建线程并立即请求LLM，并发请求数等于同时离开的游客数")
+        print("- 共享队列的并发请求数不超过工作线程数，对话轮数多的游客优先总结")
+        print("- 优化前进程重启时尚未完成的总结全部丢失")
+    finally:
+        shutil.rmtree(spool_dir, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    main()
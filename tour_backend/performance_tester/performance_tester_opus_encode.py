@@ -0,0 +1,153 @@
+import time
+import numpy as np
+import opuslib_next
+from tabulate import tabulate
+from core.utils.util import pcm_to_data_stream
+from core.utils.opus_encoder_utils import OpusEncoderPool, OpusEncoderUtils
+
+description = "下行音频切帧与Opus编码微基准（编码器复用 + 零拷贝切帧 vs 每句新建编码器 + 逐帧拷贝）"
+
+FRAME_SIZE = 960  # 60ms @ 16kHz
+SENTENCE_SECONDS = 3
+SENTENCES = 100
+# 流式TTS每次回调的PCM字节数（约100ms）
+STREAM_CHUNK_BYTES = 3200
+
+# 目标（单核，帧/秒）：60ms一帧，1000帧/秒约可支撑60路实时下行
+TARGETS = {
+    "切帧(PCM输出)": 200000,
+    "切帧+Opus编码": 1000,
+    "流式编码(OpusEncoderUtils)": 1000,
+}
+
+
+def legacy_pcm_to_data_stream(raw_data, is_opus, callback):
+    """优化前的实现：每次调用新建编码器，逐帧切片、补零并经numpy往返一次"""
+    encoder = opuslib_next.Encoder(16000, 1, opuslib_next.APPLICATION_AUDIO)
+    for i in range(0, len(raw_data), FRAME_SIZE * 2):
+        chunk = raw_data[i : i + FRAME_SIZE * 2]
+        if len(chunk) < FRAME_SIZE * 2:
+            chunk += b"\x00" * (FRAME_SIZE * 2 - len(chunk))
+        if is_opus:
+            np_frame = np.frombuffer(chunk, dtype=np.int16)
+            callback(encoder.encode(np_frame.tobytes(), FRAME_SIZE))
+        else:
+            callback(chunk if isinstance(chunk, bytes) else bytes(chunk))
+
+
+class LegacyStreamEncoder(OpusEncoderUtils):
+    """优化前的流式编码：每个分片都用 np.append 重新分配整个缓冲区"""
+
+    def __init__(self, *args):
+        super().__init__(*args)
+        self.legacy_buffer = np.array([], dtype=np.int16)
+
+    def encode_pcm_to_opus_stream(self, pcm_data, end_of_stream, callback):
+        self.legacy_buffer = np.append(self.legacy_buffer, np.frombuffer(pcm_data, dtype=np.int16))
+        offset = 0
+        while offset <= len(self.legacy_buffer) - self.total_frame_size:
+            callback(self._encode(self.legacy_buffer[offset : offset + self.total_frame_size]))
+            offset += self.total_frame_size
+        self.legacy_buffer = self.legacy_buffer[offset:]
+        if end_of_stream and len(self.legacy_buffer) > 0:
+            last_frame = np.zeros(self.total_frame_size, dtype=np.int16)
+            last_frame[: len(self.legacy_buffer)] = self.legacy_buffer
+            callback(self._encode(last_frame))
+            self.legacy_buffer = np.array([], dtype=np.int16)
+
+
+def make_sentences():
+    rng = np.random.default_rng(0)
+    sentences = []
+    for _ in range(SENTENCES):
+        # 长度不是整帧，覆盖末帧补零路径
+        samples = 16000 * SENTENCE_SECONDS + int(rng.integers(1, FRAME_SIZE))
+        t = np.arange(samples) / 16000
+        signal = np.sin(2 * np.pi * 220 * t) * 8000 + rng.normal(0, 500, samples)
+        sentences.append(signal.astype(np.int16).tobytes())
+    return sentences
+
+
+def run_batch(fn, sentences, is_opus):
+    frames = 0
+
+    def callback(_):
+        nonlocal frames
+        frames += 1
+
+    start = time.perf_counter()
+    for raw in sentences:
+        fn(raw, is_opus, callback)
+    return frames / (time.perf_counter() - start)
+
+
+def run_stream(encoder, sentences):
+    frames = 0
+
+    def callback(_):
+        nonlocal frames
+        frames += 1
+
+    start = time.perf_counter()
+    for raw in sentences:
+        for i in range(0, len(raw), STREAM_CHUNK_BYTES):
+            chunk = raw[i : i + STREAM_CHUNK_BYTES]
+            encoder.encode_pcm_to_opus_stream(chunk, i + STREAM_CHUNK_BYTES >= len(raw), callback)
+    return frames / (time.perf_counter() - start)
+
+
+def main():
+    sentences = make_sentences()
+    pool = OpusEncoderPool()
+
+    def pooled(raw, is_opus, callback):
+        pcm_to_data_stream(raw, is_opus, callback, encoder_pool=pool)
+
+    results = [
+        (
+            "切帧(PCM输出)",
+            run_batch(legacy_pcm_to_data_stream, sentences, False),
+            run_batch(pooled, sentences, False),
+        ),
+        (
+            "切帧+Opus编码",
+            run_batch(legacy_pcm_to_data_stream, sentences, True),
+            run_batch(pooled, sentences, True),
+        ),
+        (
+            "流式编码(OpusEncoderUtils)",
+            run_stream(LegacyStreamEncoder(16000, 1, 60), sentences),
+            run_stream(OpusEncoderUtils(16000, 1, 60), sentences),
+        ),
+    ]
+
+    rows = []
+    for name, legacy, optimized in results:
+        target = TARGETS[name]
+        rows.append(
+            [
+                name,
+                f"{legacy:,.0f}",
+                f"{optimized:,.0f}",
+                f"{optimized / legacy:.2f}x",
+                f"{target:,}",
+                "达标" if optimized >= target else "未达标",
+            ]
+        )
+
+    print(f"\n{SENTENCES}句 x {SENTENCE_SECONDS}秒音频，单线程（单位：帧/秒）:")
+    print(
+        tabulate(
+            rows,
+            headers=["场景", "优化前", "优化后", "加速比", "目标", "结果"],
+            tablefmt="grid",
+        )
+    )
+    print("\n测试说明:")
+    print("- 优化后：连接级编码器池复用编码器，整帧直接取PCM上的零拷贝视图，只有末帧补零时分配一次缓冲区")
+    print(f"- 流式编码按每次{STREAM_CHUNK_BYTES}字节分片输入，优化前每个分片都用np.append重建缓冲区")
+    print("- 编码器耗时占Opus编码场景的绝大部分，切帧场景反映的是纯框架开销")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,158 @@
+import os
+import time
+import wave
+import statistics
+import numpy as np
+from tabulate import tabulate
+from config.settings import load_config
+from core.utils.asr import create_instance as create_asr_instance
+
+description = "本地流式ASR(句尾端点提前启动意图识别)与整句识别的说完话到首包音频延迟对比"
+
+SAMPLE_RATE = 16000
+CHUNK_SAMPLES = 960  # 与设备上行一致，每包60ms
+
+# 说完话之后、首包音频之前其余阶段的模拟耗时（毫秒），两种模式相同
+INTENT_COST_MS = 300  # 意图识别LLM调用
+FIRST_AUDIO_COST_MS = 600  # 聊天LLM首句 + TTS首包
+
+
+def load_utterances(wav_dir):
+    """读取目录下的16kHz单声道16bit录音"""
+    utterances = []
+    for file_name in sorted(os.listdir(wav_dir)):
+        if not file_name.endswith(".wav"):
+            continue
+        with wave.open(os.path.join(wav_dir, file_name)) as f:
+            if f.getnchannels() != 1 or f.getsampwidth() != 2 or f.getframerate() != SAMPLE_RATE:
+                print(f"跳过 {file_name}: 需要16kHz单声道16bit")
+                continue
+            pcm = f.readframes(f.getnframes())
+        samples = np.frombuffer(pcm, dtype=np.int16).astype(np.float32) / 32768
+        utterances.append((file_name, samples))
+    return utterances
+
+
+def bench_offline(provider, samples):
+    """整句识别：VAD静默判定后才把整句送入模型，返回识别耗时(ms)"""
+    start = time.perf_counter()
+    stream = provider.model.create_stream()
+    stream.accept_waveform(SAMPLE_RATE, samples)
+    provider.model.decode_stream(stream)
+    text = stream.result.text
+    return (time.perf_counter() - start) * 1000, text
+
+
+def bench_stream(provider, samples, silence_ms):
+    """流式识别：按60ms逐包送入并增量解码，说完后继续送入静音直到检测到端点
+
+    返回 (端点相对说完话的时间ms, VAD判定后的收尾耗时ms, 识别文本)
+    """
+    model = provider.model
+    stream = model.create_stream()
+
+    def feed(chunk):
+        stream.accept_waveform(SAMPLE_RATE, chunk)
+        while model.is_ready(stream):
+            model.decode_stream(stream)
+
+    for i in range(0, len(samples), CHUNK_SAMPLES):
+        feed(samples[i : i + CHUNK_SAMPLES])
+
+    # 说话结束后逐包送入静音，端点时间 = 已送入的静音时长 + 本包解码耗时
+    endpoint_ms = None
+    silence = np.zeros(CHUNK_SAMPLES, dtype=np.float32)
+    silence_fed = 0
+    while silence_fed < silence_ms:
+        start = time.perf_counter()
+        feed(silence)
+        silence_fed += CHUNK_SAMPLES * 1000 / SAMPLE_RATE
+        if model.is_endpoint(stream):
+            endpoint_ms = silence_fed + (time.perf_counter() - start) * 1000
+            break
+
+    start = time.perf_counter()
+    stream.accept_waveform(SAMPLE_RATE, np.zeros(int(0.66 * SAMPLE_RATE), dtype=np.float32))
+    stream.input_finished()
+    while model.is_ready(stream):
+        model.decode_stream(stream)
+    text = model.get_result(stream)
+    finish_ms = (time.perf_counter() - start) * 1000
+    return endpoint_ms, finish_ms, text
+
+
+def main(wav_dir=os.path.join("config", "assets")):
+    config = load_config()
+    delete_audio = True
+    offline = create_asr_instance("sherpa_onnx_local", config["ASR"]["SherpaASR"], delete_audio)
+    streaming = create_asr_instance(
+        "sherpa_onnx_stream", config["ASR"]["SherpaStreamASR"], delete_audio
+    )
+    vad_name = config["selected_module"]["VAD"]
+    silence_ms = int(config["VAD"][vad_name].get("min_silence_duration_ms") or 1000)
+
+    rows = []
+    offline_latency, stream_latency = [], []
+    for file_name, samples in load_utterances(wav_dir):
+        decode_ms, offline_text = bench_offline(offline, samples)
+        endpoint_ms, finish_ms, stream_text = bench_stream(streaming, samples, silence_ms)
+
+        # 整句：静默判定 -> 整句识别 -> 意图识别 -> 首包音频
+        offline_total = silence_ms + decode_ms + INTENT_COST_MS + FIRST_AUDIO_COST_MS
+        # 流式：意图识别在端点处提前启动，与剩余静默等待并行
+        asr_done = silence_ms + finish_ms
+        if endpoint_ms is not None:
+            intent_done = max(asr_done, endpoint_ms + INTENT_COST_MS)
+        else:
+            intent_done = asr_done + INTENT_COST_MS
+        stream_total = intent_done + FIRST_AUDIO_COST_MS
+
+        offline_latency.append(offline_total)
+        stream_latency.append(stream_total)
+        rows.append(
+            [
+                file_name,
+                f"{len(samples) / SAMPLE_RATE:.1f}s",
+                f"{decode_ms:.0f}",
+                f"{finish_ms:.0f}",
+                f"{endpoint_ms:.0f}" if endpoint_ms is not None else "-",
+                f"{offline_total:.0f}",
+                f"{stream_total:.0f}",
+                stream_text[:20],
+            ]
+        )
+
+    if not rows:
+        print(f"{wav_dir} 下没有可用的录音")
+        return
+
+    print("\n本地流式ASR延迟对比（单位ms）:")
+    print(
+        tabulate(
+            rows,
+            headers=[
+                "录音",
+                "时长",
+                "整句识别耗时",
+                "流式收尾耗时",
+                "端点检测时间",
+                "整句:说完到首包",
+                "流式:说完到首包",
+                "流式识别结果",
+            ],
+            tablefmt="grid",
+        )
+    )
+    print(
+        f"\n平均说完话到首包音频: 整句 {statistics.mean(offline_latency):.0f}ms, 流式 {statistics.mean(stream_latency):.0f}ms"
+    )
+    print("\n测试说明:")
+    print(f"- VAD静默判定时长: {silence_ms}ms")
+    print(
+        f"- 模拟耗时: 意图识别 {INTENT_COST_MS}ms, 聊天LLM首句+TTS首包 {FIRST_AUDIO_COST_MS}ms"
+    )
+    print("- 流式模式下意图识别在模型端点处以预取方式启动，与剩余静默等待重叠")
+
+
+if __name__ == "__main__":
+    main()
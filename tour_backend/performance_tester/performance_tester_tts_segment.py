@@ -0,0 +1,144 @@
+import time
+import random
+from tabulate import tabulate
+from core.utils.tts_segmenter import RollingEstimate, TextSegmenter
+
+description = "TTS增量切句测试：逐分片切句耗时（增量扫描 vs 整段重拼rfind），以及首句在无标点长句下的切出时机"
+
+PUNCTUATIONS = ("。", "？", "?", "！", "!", "；", ";", "：")
+FIRST_SENTENCE_PUNCTUATIONS = ("，", "~", "、", ",") + PUNCTUATIONS
+# 每个LLM分片的字数
+TOKEN_CHARS = 2
+RESPONSE_LENGTHS = [200, 1000, 5000]
+ROUNDS = 20
+
+
+class LegacySegmenter:
+    """优化前的实现：每个分片都重新拼接整段回复，并对每个标点做rfind"""
+
+    def __init__(self):
+        self.tts_text_buff = []
+        self.processed_chars = 0
+        self.is_first_sentence = True
+
+    def feed(self, text):
+        self.tts_text_buff.append(text)
+        full_text = "".join(self.tts_text_buff)
+        current_text = full_text[self.processed_chars :]
+        last_punct_pos = -1
+        punctuations = (
+            FIRST_SENTENCE_PUNCTUATIONS if self.is_first_sentence else PUNCTUATIONS
+        )
+        for punct in punctuations:
+            pos = current_text.rfind(punct)
+            if (pos != -1 and last_punct_pos == -1) or (
+                pos != -1 and pos < last_punct_pos
+            ):
+                last_punct_pos = pos
+        if last_punct_pos != -1:
+            segment = current_text[: last_punct_pos + 1]
+            self.processed_chars += len(segment)
+            self.is_first_sentence = False
+            return segment
+        return None
+
+
+def make_response(length, seed=0):
+    rng = random.Random(seed)
+    words = "今天天气很好我们一起去景区看看这里的历史文化和自然风光非常值得一游"
+    text = []
+    while len(text) < length:
+        sentence = [rng.choice(words) for _ in range(rng.randint(8, 30))]
+        if rng.random() < 0.5:
+            sentence.insert(rng.randint(3, len(sentence) - 2), "，")
+        text.extend(sentence)
+        text.append(rng.choice("。！？"))
+    return "".join(text[:length])
+
+
+def tokens_of(text):
+    return [text[i : i + TOKEN_CHARS] for i in range(0, len(text), TOKEN_CHARS)]
+
+
+def run(make_segmenter, tokens):
+    start = time.perf_counter()
+    segments = 0
+    for _ in range(ROUNDS):
+        segmenter = make_segmenter()
+        for token in tokens:
+            if segmenter.feed(token):
+                segments += 1
+    return (time.perf_counter() - start) / ROUNDS * 1000, segments // ROUNDS
+
+
+def first_chunk_chars(llm_rate, ttfb, text):
+    """模拟LLM以 llm_rate 字/秒输出一句没有标点的长句，返回首句切出时已积累的字数"""
+    ttfb_estimate = RollingEstimate()
+    ttfb_estimate.update(ttfb)
+    rate_estimate = RollingEstimate()
+    rate_estimate.update(llm_rate)
+    segmenter = TextSegmenter(
+        FIRST_SENTENCE_PUNCTUATIONS, PUNCTUATIONS, ttfb_estimate, rate_estimate
+    )
+    for i, token in enumerate(tokens_of(text)):
+        segment = segmenter.feed(token)
+        if segment:
+            return len(segment), (i + 1) * TOKEN_CHARS / llm_rate
+    return None, None
+
+
+def main():
+    rows = []
+    for length in RESPONSE_LENGTHS:
+        tokens = tokens_of(make_response(length))
+        legacy_ms, legacy_segments = run(LegacySegmenter, tokens)
+        new_ms, new_segments = run(
+            lambda: TextSegmenter(FIRST_SENTENCE_PUNCTUATIONS, PUNCTUATIONS), tokens
+        )
+        rows.append(
+            [
+                length,
+                len(tokens),
+                f"{legacy_ms:.2f}",
+                f"{new_ms:.2f}",
+                f"{legacy_ms / new_ms:.1f}x",
+                f"{legacy_segments}/{new_segments}",
+            ]
+        )
+    print(f"\n整段回复逐分片切句（每分片{TOKEN_CHARS}字，{ROUNDS}轮平均，单位：毫秒/回复）:")
+    print(
+        tabulate(
+            rows,
+            headers=["回复字数", "分片数", "优化前", "优化后", "加速比", "切出句数(前/后)"],
+            tablefmt="grid",
+        )
+    )
+
+    # 英文长句：空白作为自然停顿
+    long_sentence = " ".join(["the old town was built along the river"] * 4)
+    rows = []
+    for llm_rate, ttfb in [(10, 0.3), (20, 0.5), (40, 0.5), (80, 0.8)]:
+        chars, wait = first_chunk_chars(llm_rate, ttfb, long_sentence)
+        rows.append(
+            [
+                llm_rate,
+                ttfb,
+                chars if chars is not None else "未切出",
+                f"{wait:.2f}" if wait is not None else "-",
+            ]
+        )
+    print("\n无标点长句的首句切出时机（优化前需等到第一个标点）:")
+    print(
+        tabulate(
+            rows,
+            headers=["LLM出字速度(字/秒)", "TTS首包耗时(秒)", "首句字数", "等待LLM时间(秒)"],
+            tablefmt="grid",
+        )
+    )
+    print("\n测试说明:")
+    print("- 优化前每个分片都重新拼接整段回复并对每个标点rfind，耗时随回复长度平方增长")
+    print("- 优化后只扫描新到的字符，首句上限 = LLM出字速度 × TTS首包耗时，在自然停顿处切出")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,105 @@
+import time
+import numpy as np
+from tabulate import tabulate
+from config.settings import load_config
+from core.providers.vad.silero_batch import (
+    VADProvider,
+    SAMPLE_RATE,
+    WINDOW_SIZE,
+    CONTEXT_SIZE,
+)
+
+description = "Silero VAD 跨连接批量推理吞吐测试（每核可支撑的实时流数）"
+
+# 每路实时音频每秒需要推理的窗口数
+WINDOWS_PER_STREAM_SECOND = SAMPLE_RATE / WINDOW_SIZE
+
+
+class BenchStream:
+    """只包含模型状态的测试流，跳过Opus解码"""
+
+    def __init__(self):
+        self.context = np.zeros(CONTEXT_SIZE, dtype=np.float32)
+        self.rnn_state = np.zeros((2, 128), dtype=np.float32)
+
+
+def make_audio(streams, seconds):
+    """为每路流生成带噪声的正弦波作为测试音频"""
+    rng = np.random.default_rng(0)
+    t = np.arange(int(SAMPLE_RATE * seconds)) / SAMPLE_RATE
+    audio = []
+    for i in range(streams):
+        wave = 0.3 * np.sin(2 * np.pi * (200 + i % 50 * 10) * t)
+        wave += 0.05 * rng.standard_normal(len(t))
+        windows = len(wave) // WINDOW_SIZE
+        audio.append(
+            wave[: windows * WINDOW_SIZE]
+            .reshape(windows, WINDOW_SIZE)
+            .astype(np.float32)
+        )
+    return audio
+
+
+def bench(vad, streams, seconds, batched):
+    """返回每CPU秒处理的窗口数"""
+    audio = make_audio(streams, seconds)
+    states = [BenchStream() for _ in range(streams)]
+    windows = audio[0].shape[0]
+
+    cpu_start = time.process_time()
+    wall_start = time.perf_counter()
+    for r in range(windows):
+        if batched:
+            vad.run_batch(states, np.stack([a[r] for a in audio]))
+        else:
+            for state, a in zip(states, audio):
+                vad.run_batch([state], a[r][np.newaxis, :])
+    cpu_cost = time.process_time() - cpu_start
+    wall_cost = time.perf_counter() - wall_start
+    total_windows = windows * streams
+    return total_windows / cpu_cost, total_windows / wall_cost
+
+
+def main(stream_counts=(1, 8, 32, 128), seconds=2):
+    config = load_config()
+    vad_config = dict(config["VAD"].get("SileroBatchVAD") or config["VAD"]["SileroVAD"])
+    vad_config["intra_op_num_threads"] = 1
+    vad = VADProvider(vad_config)
+
+    rows = []
+    for streams in stream_counts:
+        single_cpu, single_wall = bench(vad, streams, seconds, batched=False)
+        batch_cpu, batch_wall = bench(vad, streams, seconds, batched=True)
+        rows.append(
+            [
+                streams,
+                f"{single_cpu:.0f}",
+                f"{batch_cpu:.0f}",
+                f"{single_cpu / WINDOWS_PER_STREAM_SECOND:.0f}",
+                f"{batch_cpu / WINDOWS_PER_STREAM_SECOND:.0f}",
+                f"{batch_wall / single_wall:.2f}x",
+            ]
+        )
+
+    print("\nSilero VAD 批量推理吞吐:")
+    print(
+        tabulate(
+            rows,
+            headers=[
+                "并发流数",
+                "逐路推理(窗口/CPU秒)",
+                "批量推理(窗口/CPU秒)",
+                "逐路每核流数",
+                "批量每核流数",
+                "墙钟加速比",
+            ],
+            tablefmt="grid",
+        )
+    )
+    print("\n测试说明:")
+    print(f"- 每路实时流每秒需要 {WINDOWS_PER_STREAM_SECOND:.2f} 个{WINDOW_SIZE}采样点窗口")
+    print("- 推理线程数固定为1，每核流数 = 每CPU秒窗口数 / 每路每秒窗口数")
+
+
+if __name__ == "__main__":
+    main()
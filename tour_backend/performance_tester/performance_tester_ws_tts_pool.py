@@ -0,0 +1,144 @@
+import time
+import json
+import asyncio
+import threading
+import statistics
+from types import SimpleNamespace
+from tabulate import tabulate
+from websockets.asyncio.server import serve
+from core.utils import ws_pool
+from core.providers.tts.alibl_stream import TTSProvider
+
+description = "流式TTS上游连接池测试（本地模拟阿里百炼协议），访客首句音频延迟：连接池预热 vs 每个连接现场握手"
+
+HOST = "127.0.0.1"
+PORT = 18765
+# 模拟公网TCP+TLS握手与鉴权耗时
+HANDSHAKE_DELAY = 0.15
+# 模拟服务端首包合成耗时
+SYNTH_DELAY = 0.03
+VISITORS = 20
+# 相邻两个访客开始说话的间隔
+VISITOR_INTERVAL = 0.3
+# 16kHz 100ms PCM
+PCM_CHUNK = b"\x00\x01" * 1600
+
+
+async def mock_process_request(connection, request):
+    await asyncio.sleep(HANDSHAKE_DELAY)
+    return None
+
+
+async def mock_handler(ws):
+    """DashScope流式TTS协议的最小实现：run-task/continue-task/finish-task"""
+    async for msg in ws:
+        if not isinstance(msg, str):
+            continue
+        header = json.loads(msg)["header"]
+        action = header.get("action")
+        reply = {"header": {"task_id": header.get("task_id")}, "payload": {}}
+        if action == "run-task":
+            reply["header"]["event"] = "task-started"
+            await ws.send(json.dumps(reply))
+        elif action == "continue-task":
+            await asyncio.sleep(SYNTH_DELAY)
+            reply["header"]["event"] = "result-generated"
+            await ws.send(json.dumps(reply))
+            await ws.send(PCM_CHUNK)
+        elif action == "finish-task":
+            reply["header"]["event"] = "task-finished"
+            await ws.send(json.dumps(reply))
+
+
+async def run_visitor(config, session_id):
+    """模拟一个新访客连接的首轮对话，返回从开始会话到收到首个音频帧的耗时"""
+    provider = TTSProvider(
+        {"api_key": "benchmark", "ws_url": f"ws://{HOST}:{PORT}/", "sample_rate": 16000},
+        True,
+    )
+    provider.conn = SimpleNamespace(
+        config=config,
+        stop_event=threading.Event(),
+        client_abort=False,
+        tts_MessageText=None,
+        sentence_id=session_id,
+    )
+    first_audio = asyncio.Event()
+    provider.handle_opus = lambda opus_data: first_audio.set()
+
+    start = time.perf_counter()
+    await provider.start_session(session_id)
+    await provider.text_to_speak("你好，欢迎来到景区。", None)
+    await first_audio.wait()
+    latency = time.perf_counter() - start
+
+    await provider.finish_session(session_id)
+    monitor = provider._monitor_task
+    if monitor is not None:
+        await monitor
+    # 访客断开
+    await provider.close()
+    return latency
+
+
+async def run_scenario(pool_enabled):
+    config = {"tts_ws_pool": {"enable": pool_enabled, "min_idle": 1, "max_idle": 8}}
+    latencies = []
+    for i in range(VISITORS):
+        latencies.append(await run_visitor(config, f"session-{i}"))
+        await asyncio.sleep(VISITOR_INTERVAL)
+
+    metrics = None
+    for key, pool in list(ws_pool._pools.items()):
+        metrics = pool.get_metrics()
+        await pool.close()
+        del ws_pool._pools[key]
+    return latencies, metrics
+
+
+def percentile(values, p):
+    ordered = sorted(values)
+    return ordered[min(int(len(ordered) * p), len(ordered) - 1)]
+
+
+async def async_main():
+    async with serve(mock_handler, HOST, PORT, process_request=mock_process_request):
+        results = [
+            ("每个连接现场握手", *await run_scenario(False)),
+            ("连接池预热", *await run_scenario(True)),
+        ]
+
+    rows = []
+    for name, latencies, metrics in results:
+        ms = [v * 1000 for v in latencies]
+        rows.append(
+            [
+                name,
+                f"{ms[0]:.1f}",
+                f"{statistics.mean(ms[1:]):.1f}",
+                f"{percentile(ms, 0.5):.1f}",
+                f"{percentile(ms, 0.95):.1f}",
+                f"{metrics['warm_hits']}/{metrics['leases']}" if metrics else "-",
+            ]
+        )
+
+    print(f"\n{VISITORS}个访客依次发起首轮对话，间隔{VISITOR_INTERVAL}秒（单位：毫秒）:")
+    print(
+        tabulate(
+            rows,
+            headers=["场景", "第1个访客", "其余访客平均", "P50", "P95", "预热命中"],
+            tablefmt="grid",
+        )
+    )
+    print("\n测试说明:")
+    print(f"- 本地模拟服务端，每次握手额外延迟{HANDSHAKE_DELAY * 1000:.0f}ms模拟公网TCP/TLS与鉴权，首包合成{SYNTH_DELAY * 1000:.0f}ms")
+    print("- 首句音频延迟：从开始TTS会话到收到第一段音频")
+    print("- 连接池预热时只有第一个访客需要现场握手，之后的访客借出后台已建好的连接")
+
+
+def main():
+    asyncio.run(async_main())
+
+
+if __name__ == "__main__":
+    main()
@@ -1,11 +1,16 @@
 import { Protocol } from './protocol';
 import { AudioConfig } from '@/lib/constants';
 
+// 下行音频批量容器版本：u8 版本 + u8 帧数 + 帧数 × (u16 帧长度(大端) + Opus帧)
+const AUDIO_BATCH_VERSION = 1;
+
 export class WebsocketProtocol extends Protocol {
   private ws: WebSocket | null = null;
   private serverUrl: string = '';
   private reconnectAttempts: number = 0;
   private maxReconnectAttempts: number = 5;
+  // 服务端在hello回复中确认后，下行音频均为批量容器格式
+  private audioBatch: boolean = false;
 
   async connect(serverUrl: string): Promise<boolean> {
     this.serverUrl = serverUrl;
@@ -54,6 +59,7 @@ export class WebsocketProtocol extends Protocol {
       version: 3,
       features: {
         mcp: true,
+        audio_batch: true,
       },
       transport: 'websocket',
       audio_params: {
@@ -83,6 +89,7 @@ export class WebsocketProtocol extends Protocol {
       if (msgType === 'hello') {
         console.log('Received server hello:', message);
         this.sessionId = message.session_id || '';
+        this.audioBatch = message.audio_batch?.version === AUDIO_BATCH_VERSION;
         this.triggerAudioChannelOpened();
       } else if (msgType === 'goodbye') {
         const sessionId = message.session_id;
@@ -99,7 +106,20 @@ export class WebsocketProtocol extends Protocol {
 
   private handleBinaryMessage(data: ArrayBuffer): void {
     const audioData = new Uint8Array(data);
-    this.triggerIncomingAudio(audioData);
+    if (!this.audioBatch) {
+      this.triggerIncomingAudio(audioData);
+      return;
+    }
+
+    const view = new DataView(data);
+    const count = audioData[1];
+    let offset = 2;
+    for (let i = 0; i < count && offset + 2 <= audioData.length; i++) {
+      const length = view.getUint16(offset);
+      offset += 2;
+      this.triggerIncomingAudio(audioData.subarray(offset, offset + length));
+      offset += length;
+    }
   }
 
   async sendText(message: string): Promise<boolean> {